@@ -1,7 +1,7 @@
 """Configuration management for SensCoder MCP Server."""
 import os
 from pathlib import Path
-from typing import Optional, List
+from typing import Dict, Optional, List, Set
 
 from pydantic import validator
 from pydantic_settings import BaseSettings
@@ -32,10 +32,84 @@ class Settings(BaseSettings):
         """Parse CORS origins from comma-separated string."""
         return [origin.strip() for origin in self.cors_origins_str.split(",") if origin.strip()]
 
-    # Rate limiting settings
+    # Backend client settings
+    backend_timeout: float = 10.0  # seconds per request
+    backend_max_retries: int = 2  # retries of connection errors, timeouts and 5xx responses
+    provider_config_cache_ttl: float = 60.0  # seconds
+
+    # Rate limiting settings (token buckets shared by all workers on the host)
     rate_limit_requests: int = 100
     rate_limit_window: int = 60  # seconds
-    tool_invoke_rate_limit: str = "10/minute"
+    tool_invoke_rate_limit: str = "120/minute"  # per user, in cost units
+    tool_rate_costs_str: str = (
+        "exec=10,git=4,search=4,git_log=2,git_blame=2,git_diff_summary=2,git_diff_file=2,"
+        "read_files=2,echo=0.2,math=0.2"
+    )
+    rate_limit_db_path: Optional[str] = None  # defaults to ~/.senscoder/rate_limits.sqlite3
+
+    @property
+    def tool_rate_costs(self) -> Dict[str, float]:
+        """Parse per-tool costs (default 1) from a comma-separated list of tool=cost pairs."""
+        costs = {}
+        for item in self.tool_rate_costs_str.split(","):
+            tool, _, cost = item.partition("=")
+            if tool.strip() and cost.strip():
+                costs[tool.strip()] = float(cost)
+        return costs
+
+    @property
+    def rate_limit_db(self) -> Path:
+        """SQLite file holding the rate limit buckets."""
+        if self.rate_limit_db_path:
+            return Path(self.rate_limit_db_path).expanduser()
+        return Path.home() / ".senscoder" / "rate_limits.sqlite3"
+
+    # Subprocess settings
+    subprocess_max_concurrency: int = 4  # commands running at once, server-wide
+    subprocess_max_output_bytes: int = 5 * 1024 * 1024  # per stream
+
+    # Multi-project settings: analysis results, search indexes and git
+    # processes are kept for this many project roots, within this budget
+    max_projects: int = 8
+    project_state_memory_mb: int = 512
+
+    # Search settings
+    search_index_enabled: bool = True  # trigram index under ~/.senscoder/search_index
+
+    # Project analysis settings
+    analysis_prune_dirs_str: str = (
+        "node_modules,.git,.hg,.svn,venv,.venv,env,__pycache__,.tox,.mypy_cache,.pytest_cache,"
+        "dist,build,target,out,.next,.nuxt,.svelte-kit,.gradle,.terraform,coverage,vendor,bower_components"
+    )
+    analysis_respect_gitignore: bool = True
+    analysis_max_files_per_dir: int = 1000
+
+    @property
+    def analysis_prune_dirs(self) -> Set[str]:
+        """Parse the directory names skipped during analysis from a comma-separated string."""
+        return {name.strip() for name in self.analysis_prune_dirs_str.split(",") if name.strip()}
+
+    # Logging settings
+    log_format: str = "json"  # "json" (one object per line) or "text"
+    log_queue_size: int = 10000  # records buffered for the writer thread; more are dropped
+    log_slow_request_ms: float = 1000.0  # requests at least this slow are always logged
+    log_sample_rates_str: str = "/mcp/health=0.01,/wizard/status=0.1,/mcp/resources=0.1,/mcp/prompts=0.1"
+
+    @property
+    def log_sample_rates(self) -> Dict[str, float]:
+        """Parse the share of successful requests logged per path from path=rate pairs."""
+        rates = {}
+        for item in self.log_sample_rates_str.split(","):
+            path, _, rate = item.partition("=")
+            if path.strip() and rate.strip():
+                rates[path.strip()] = float(rate)
+        return rates
+
+    # Response compression: bodies of at least gzip_minimum_size bytes are
+    # gzip-compressed for clients that accept it (streaming routes never are)
+    gzip_enabled: bool = True
+    gzip_minimum_size: int = 4096
+    gzip_level: int = 3  # 1-9; low levels already shrink JSON several times at a fraction of the CPU
 
     # Security settings
     mcp_jwt_secret: str = "your-secret-key-change-in-production"
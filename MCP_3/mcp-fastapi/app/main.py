@@ -1,31 +1,173 @@
 """FastAPI application entry point for SensCoder MCP Server."""
+import asyncio
 import logging
+import math
+import time
+import uuid
+from contextlib import asynccontextmanager
+
 import uvicorn
-from fastapi import FastAPI, Request, HTTPException
+from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.responses import JSONResponse
-from slowapi import Limiter, _rate_limit_exceeded_handler
-from slowapi.util import get_remote_address
-from slowapi.errors import RateLimitExceeded
-from slowapi.middleware import SlowAPIMiddleware
 
 from app.config import settings
 from app.routes import router
+from app.services import fs_service, git_service, search_service, watcher_service
+from app.services.auto_setup_service import auto_setup_service
+from app.utils.http_client import backend_client
+from app.utils.json_response import FastJSONResponse
+from app.utils.logging_setup import configure_logging, request_id_var, should_log_request
+from app.utils.rate_limit import rate_limiter
 from app.wizard_routes import router as wizard_router
 
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO if not settings.debug else logging.DEBUG,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+# Configure logging (queued, written by a background thread)
+configure_logging()
 logger = logging.getLogger(__name__)
 
-# Configure rate limiting
-limiter = Limiter(
-    key_func=get_remote_address,
-    default_limits=[f"{settings.rate_limit_requests}/minute"]
-)
+
+class RequestLoggingMiddleware:
+    """
+    Give each HTTP request an ID and log one line when it completes.
+
+    The ID is taken from the X-Request-ID header or generated, returned in
+    the X-Request-ID response header and attached to every record logged
+    while handling the request. The completion line carries the method,
+    path, status and duration (until the last body chunk, so streamed
+    responses count in full); successful requests to high-volume paths are
+    sampled (see should_log_request).
+
+    Written as plain ASGI middleware rather than with @app.middleware("http"):
+    BaseHTTPMiddleware hides client disconnects from endpoints, which would
+    keep cancelled tool calls (and their subprocesses) running.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        request_id = headers.get(b"x-request-id", b"").decode("latin-1")[:64] or uuid.uuid4().hex[:16]
+        token = request_id_var.set(request_id)
+        started = time.perf_counter()
+        status = 500  # if the app fails before responding
+
+        async def send_with_request_id(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message["headers"] = [*message.get("headers", []), (b"x-request-id", request_id.encode("latin-1"))]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            duration = time.perf_counter() - started
+            path = scope["path"]
+            if should_log_request(path, status, duration):
+                client = scope.get("client")
+                logger.info(
+                    f"{scope['method']} {path} {status} {duration * 1000:.1f}ms",
+                    extra={
+                        "method": scope["method"],
+                        "path": path,
+                        "status": status,
+                        "duration_ms": round(duration * 1000, 2),
+                        "client": client[0] if client else None,
+                    }
+                )
+            request_id_var.reset(token)
+
+
+class CompressionMiddleware:
+    """
+    Gzip responses, except those of the streaming routes.
+
+    Starlette's GZipMiddleware only skips text/event-stream and flushes
+    after each chunk in recent versions; older ones would hold SSE and
+    NDJSON events back until the stream ends. Streams are therefore never
+    compressed, whatever the Starlette version.
+    """
+
+    STREAMING_PATH_SUFFIXES = ("/stream", "/events")
+
+    def __init__(self, app, minimum_size: int, compresslevel: int):
+        self.app = app
+        self.gzip = GZipMiddleware(app, minimum_size=minimum_size, compresslevel=compresslevel)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"].rstrip("/").endswith(self.STREAMING_PATH_SUFFIXES):
+            await self.app(scope, receive, send)
+        else:
+            await self.gzip(scope, receive, send)
+
+
+class RateLimitMiddleware:
+    """
+    Limit each client address to RATE_LIMIT_REQUESTS per RATE_LIMIT_WINDOW.
+
+    Uses the shared token buckets, so the limit holds across all workers
+    instead of applying to each one separately. Each check is a SQLite
+    write that all workers serialize on, so only the API routes are
+    limited; health and metrics probes, the wizard page and the docs are
+    not.
+    """
+
+    LIMITED_PREFIXES = ("/mcp/", "/wizard/")
+    EXEMPT_PATHS = {"/mcp/health", "/mcp/metrics"}
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        path = scope.get("path", "")
+        if (
+            scope["type"] != "http"
+            or not path.startswith(self.LIMITED_PREFIXES)
+            or path.rstrip("/") in self.EXEMPT_PATHS
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        client = scope.get("client")
+        key = f"ip:{client[0] if client else 'unknown'}"
+        allowed, retry_after = await asyncio.to_thread(
+            rate_limiter.acquire, key, 1, settings.rate_limit_requests, settings.rate_limit_window
+        )
+        if not allowed:
+            response = JSONResponse(
+                status_code=429,
+                content={"error": "Rate limit exceeded"},
+                headers={"Retry-After": str(math.ceil(retry_after))}
+            )
+            await response(scope, receive, send)
+            return
+
+        await self.app(scope, receive, send)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start and stop long-lived server resources."""
+    await backend_client.start()
+    watcher_service.subscribe(fs_service.invalidate)
+    watcher_service.subscribe(search_service.notify_changed)
+    watcher_service.subscribe(lambda root, paths: git_service.invalidate_status(str(root)))
+    await watcher_service.start()
+    search_service.warm_index()
+    yield
+    await auto_setup_service.close()
+    await watcher_service.stop()
+    await git_service.close()
+    search_service.close()
+    await backend_client.close()
+    rate_limiter.close()
 
 
 def create_app() -> FastAPI:
@@ -35,13 +177,13 @@ def create_app() -> FastAPI:
         description="Model Context Protocol server for SensCoder local-first coding assistant",
         version="0.1.0",
         docs_url="/docs",
-        redoc_url="/redoc"
+        redoc_url="/redoc",
+        default_response_class=FastJSONResponse,
+        lifespan=lifespan
     )
 
     # Add rate limiting
-    app.state.limiter = limiter
-    app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
-    app.add_middleware(SlowAPIMiddleware)
+    app.add_middleware(RateLimitMiddleware)
 
     # Add CORS middleware
     app.add_middleware(
@@ -59,6 +201,7 @@ def create_app() -> FastAPI:
         return JSONResponse(
             status_code=exc.status_code,
             content={"error": exc.detail},
+            headers=getattr(exc, "headers", None),
         )
 
     @app.exception_handler(Exception)
@@ -69,13 +212,16 @@ def create_app() -> FastAPI:
             content={"error": "Internal server error"},
         )
 
+    # Compress large responses for clients that accept gzip
+    if settings.gzip_enabled:
+        app.add_middleware(
+            CompressionMiddleware,
+            minimum_size=settings.gzip_minimum_size,
+            compresslevel=settings.gzip_level
+        )
+
     # Add request logging middleware
-    @app.middleware("http")
-    async def log_requests(request: Request, call_next):
-        logger.info(f"Request: {request.method} {request.url}")
-        response = await call_next(request)
-        logger.info(f"Response: {response.status_code}")
-        return response
+    app.add_middleware(RequestLoggingMiddleware)
 
     # Include MCP routes
     app.include_router(router)
@@ -120,7 +266,8 @@ def main():
         host=settings.host,
         port=settings.port,
         reload=settings.debug,
-        log_level="info"
+        log_level="info",
+        access_log=False  # RequestLoggingMiddleware logs each request
     )
 
 
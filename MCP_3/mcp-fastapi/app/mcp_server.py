@@ -1,14 +1,17 @@
 """Core MCP server logic with tool registry and MCP functionality."""
 import ast
 import operator
-from typing import Any, Dict, List, Callable, Optional
+from typing import Any, AsyncIterator, Dict, List, Callable, Optional
 
 from app.models import (
     ResourceData, PromptTemplate, ProviderConfig,
     ToolInvokeRequest, ToolInvokeResponse
 )
-from app.services import fs_service, exec_service, git_service, config_service
+from app.services import fs_service, exec_service, git_service, search_service, config_service
 from app.project_manager import project_manager
+from app.utils.metrics import tool_metrics
+from app.utils.project_state import project_states
+from app.utils.path_utils import resolve_safe_path
 
 
 class MCPServer:
@@ -16,6 +19,7 @@ class MCPServer:
 
     def __init__(self):
         self.tools: Dict[str, Callable] = {}
+        self.stream_tools: Dict[str, Callable] = {}
         self.resources: List[ResourceData] = []
         self.prompts: List[PromptTemplate] = []
         self._register_tools()
@@ -28,16 +32,40 @@ class MCPServer:
             'echo': self._tool_echo,
             'math': self._tool_math,
             'read_file': self._tool_read_file,
+            'read_files': self._tool_read_files,
             'write_file': self._tool_write_file,
             'list_files': self._tool_list_files,
+            'search': self._tool_search,
             'exec': self._tool_exec,
             'git': self._tool_git,
+            'git_read_file': self._tool_git_read_file,
+            'git_list_tree': self._tool_git_list_tree,
+            'git_resolve_ref': self._tool_git_resolve_ref,
+            'git_log': self._tool_git_log,
+            'git_blame': self._tool_git_blame,
+            'git_status': self._tool_git_status,
+            'git_diff_summary': self._tool_git_diff_summary,
+            'git_diff_file': self._tool_git_diff_file,
             'get_provider_config': self._tool_get_provider_config,
             'open_wizard': self._tool_open_wizard,
         }
 
+        # Tools with an incremental variant for /mcp/tool-invoke/stream.
+        # Tools missing here are streamed as a single data event.
+        self.stream_tools = {
+            'read_file': self._stream_read_file,
+            'search': self._stream_search,
+            'exec': self._stream_exec,
+            'git': self._stream_git,
+            'git_diff_file': self._stream_git_diff_file,
+        }
+
     def _register_resources(self):
         """Register available MCP resources."""
+        # Resources whose data is computed each time they are listed
+        self.dynamic_resources: Dict[str, Callable[[], Dict[str, Any]]] = {
+            "senscoder:metrics": self.get_metrics,
+        }
         self.resources = [
             ResourceData(
                 id="senscoder:about",
@@ -51,6 +79,12 @@ class MCPServer:
                     "features": ["fs", "exec", "git", "config"],
                     "capabilities": ["tools", "resources", "prompts"]
                 }
+            ),
+            ResourceData(
+                id="senscoder:metrics",
+                name="SensCoder MCP Metrics",
+                description="Per-tool call counts, errors, latency, payload bytes and subprocess CPU time of this worker.",
+                data={}
             )
         ]
 
@@ -144,7 +178,7 @@ Provide a step-by-step debugging process and the final solution.
         """
         try:
             # Check if project is configured before allowing tool usage
-            config = project_manager.get_project_config()
+            config = project_manager.get_project_config(request.user_id)
             if not config:
                 return ToolInvokeResponse(
                     ok=False,
@@ -160,7 +194,13 @@ Provide a step-by-step debugging process and the final solution.
                 )
 
             tool_func = self.tools[request.tool]
-            result = await tool_func(request.params, request.user_id)
+            call = tool_metrics.start(request.tool)
+            ok = False
+            try:
+                result = await tool_func(request.params, request.user_id)
+                ok = True
+            finally:
+                tool_metrics.finish(call, ok)
 
             return ToolInvokeResponse(
                 ok=True,
@@ -175,9 +215,59 @@ Provide a step-by-step debugging process and the final solution.
                 error=str(e)
             )
 
+    async def invoke_tool_stream(self, request: ToolInvokeRequest) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Invoke an MCP tool and yield its results incrementally.
+
+        Args:
+            request: Tool invocation request
+
+        Yields:
+            Event dicts: one {"event": "start"}, any number of
+            {"event": "data", "data": {...}}, then either {"event": "end"}
+            or {"event": "error", "error": ...}
+        """
+        yield {'event': 'start', 'tool': request.tool}
+
+        try:
+            config = project_manager.get_project_config(request.user_id)
+            if not config:
+                raise ValueError("Project not configured. Please visit http://localhost:8000/wizard to set up your project.")
+
+            if request.tool not in self.tools:
+                raise ValueError(f"Unknown tool: {request.tool}")
+
+            call = tool_metrics.start(request.tool)
+            ok = False
+            try:
+                stream_func = self.stream_tools.get(request.tool)
+                if stream_func:
+                    async for data in stream_func(request.params, request.user_id):
+                        yield {'event': 'data', 'tool': request.tool, 'data': data}
+                else:
+                    result = await self.tools[request.tool](request.params, request.user_id)
+                    yield {'event': 'data', 'tool': request.tool, 'data': result}
+                ok = True
+            finally:
+                tool_metrics.finish(call, ok)
+
+        except Exception as e:
+            yield {'event': 'error', 'tool': request.tool, 'ok': False, 'error': str(e)}
+            return
+
+        yield {'event': 'end', 'tool': request.tool, 'ok': True}
+
     def get_resources(self) -> List[ResourceData]:
-        """Get all available MCP resources."""
-        return self.resources
+        """Get all available MCP resources, with current data for dynamic ones."""
+        return [
+            resource.model_copy(update={"data": self.dynamic_resources[resource.id]()})
+            if resource.id in self.dynamic_resources else resource
+            for resource in self.resources
+        ]
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Tool metrics plus the state of the per-project caches."""
+        return {**tool_metrics.snapshot(), "projects": project_states.stats()}
 
     def get_prompts(self) -> List[PromptTemplate]:
         """Get all available MCP prompts."""
@@ -231,7 +321,22 @@ Provide a step-by-step debugging process and the final solution.
         if not path:
             raise ValueError("Path is required")
 
-        return await fs_service.read_file(path, user_id)
+        return await fs_service.read_file(
+            path,
+            user_id,
+            offset=params.get('offset'),
+            length=params.get('length'),
+            start_line=params.get('start_line'),
+            end_line=params.get('end_line')
+        )
+
+    async def _tool_read_files(self, params: Dict[str, Any], user_id: Optional[str]) -> Dict[str, Any]:
+        """Read several files in one call."""
+        paths = params.get('paths', [])
+        if not paths:
+            raise ValueError("Paths are required")
+
+        return await fs_service.read_files(paths, user_id)
 
     async def _tool_write_file(self, params: Dict[str, Any], user_id: Optional[str]) -> Dict[str, Any]:
         """Write file tool."""
@@ -241,18 +346,72 @@ Provide a step-by-step debugging process and the final solution.
         if not path:
             raise ValueError("Path is required")
 
-        return await fs_service.write_file(path, content, user_id)
+        try:
+            return await fs_service.write_file(path, content, user_id)
+        finally:
+            self._notify_changed(user_id, [path])
 
     async def _tool_list_files(self, params: Dict[str, Any], user_id: Optional[str]) -> Dict[str, Any]:
         """List files tool."""
         path = params.get('path', '.')
+
+        if params.get('recursive'):
+            return await fs_service.walk_files(
+                path,
+                user_id,
+                max_depth=params.get('max_depth'),
+                include=params.get('include'),
+                exclude=params.get('exclude'),
+                respect_gitignore=params.get('respect_gitignore', True),
+                limit=params.get('limit', fs_service.DEFAULT_WALK_LIMIT),
+                cursor=params.get('cursor'),
+                compact=params.get('format') == 'compact'
+            )
+
         entries = await fs_service.list_files(path, user_id)
 
+        if params.get('format') == 'compact':
+            # Same layout as the recursive listing: no repeated keys per entry
+            return {
+                'entries': [[entry.path, entry.is_dir, entry.size] for entry in entries],
+                'count': len(entries),
+                'columns': ['path', 'is_dir', 'size']
+            }
+
         return {
             'entries': [entry.dict() for entry in entries],
             'count': len(entries)
         }
 
+    def _notify_changed(self, user_id: Optional[str], paths: Optional[List[str]] = None) -> None:
+        """Tell the git status cache and search index that a user's project changed."""
+        try:
+            project_root = resolve_safe_path(".", user_id)
+        except ValueError:
+            return
+        git_service.invalidate_status(str(project_root))
+        search_service.notify_changed(project_root, paths)
+
+    def _search_options(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Options shared by the buffered and streaming search tool."""
+        return {
+            'regex': bool(params.get('regex', False)),
+            'case_sensitive': bool(params.get('case_sensitive', True)),
+            'include': params.get('include'),
+            'exclude': params.get('exclude'),
+            'respect_gitignore': params.get('respect_gitignore', True),
+            'context_lines': params.get('context_lines', 0),
+            'max_results': params.get('max_results', search_service.DEFAULT_MAX_RESULTS),
+        }
+
+    async def _tool_search(self, params: Dict[str, Any], user_id: Optional[str]) -> Dict[str, Any]:
+        """Search file contents across the project."""
+        query = params.get('query', '')
+        if not query:
+            raise ValueError("Query is required")
+
+        return await search_service.search(query, params.get('path', '.'), user_id, **self._search_options(params))
+
     async def _tool_exec(self, params: Dict[str, Any], user_id: Optional[str]) -> Dict[str, Any]:
         """Execute command tool."""
         command = params.get('command', '')
@@ -261,7 +420,10 @@ Provide a step-by-step debugging process and the final solution.
         if not command:
             raise ValueError("Command is required")
 
-        result = await exec_service.execute_command(command, args, user_id)
+        try:
+            result = await exec_service.execute_command(command, args, user_id)
+        finally:
+            self._notify_changed(user_id)
         return result.dict()
 
     async def _tool_git(self, params: Dict[str, Any], user_id: Optional[str]) -> Dict[str, Any]:
@@ -274,6 +436,94 @@ Provide a step-by-step debugging process and the final solution.
 
         return await git_service.execute_git_command(subcommand, args, user_id)
 
+    async def _tool_git_read_file(self, params: Dict[str, Any], user_id: Optional[str]) -> Dict[str, Any]:
+        """Read one or more files as of a git revision."""
+        paths = params.get('paths') or ([params['path']] if params.get('path') else [])
+        rev = params.get('rev', 'HEAD')
+
+        if not paths:
+            raise ValueError("Path or paths is required")
+
+        return await git_service.read_file_at_revision(paths, rev, user_id)
+
+    async def _tool_git_list_tree(self, params: Dict[str, Any], user_id: Optional[str]) -> Dict[str, Any]:
+        """List a directory as of a git revision."""
+        path = params.get('path', '')
+        rev = params.get('rev', 'HEAD')
+
+        return await git_service.list_tree(path, rev, user_id)
+
+    async def _tool_git_resolve_ref(self, params: Dict[str, Any], user_id: Optional[str]) -> Dict[str, Any]:
+        """Resolve a git revision to a full SHA."""
+        ref = params.get('ref', '')
+        if not ref:
+            raise ValueError("Ref is required")
+
+        return await git_service.resolve_ref(ref, user_id)
+
+    async def _tool_git_log(self, params: Dict[str, Any], user_id: Optional[str]) -> Dict[str, Any]:
+        """Structured, paginated commit history."""
+        return await git_service.log(
+            rev=params.get('rev', 'HEAD'),
+            path=params.get('path'),
+            limit=params.get('limit', git_service.DEFAULT_LOG_PAGE_SIZE),
+            cursor=params.get('cursor'),
+            numstat=bool(params.get('numstat', False)),
+            user_id=user_id
+        )
+
+    async def _tool_git_blame(self, params: Dict[str, Any], user_id: Optional[str]) -> Dict[str, Any]:
+        """Line-by-line commit attribution for a file."""
+        path = params.get('path', '')
+        if not path:
+            raise ValueError("Path is required")
+
+        return await git_service.blame(
+            path,
+            rev=params.get('rev', 'HEAD'),
+            start_line=params.get('start_line'),
+            end_line=params.get('end_line'),
+            include_lines=bool(params.get('include_lines', False)),
+            user_id=user_id
+        )
+
+    async def _tool_git_status(self, params: Dict[str, Any], user_id: Optional[str]) -> Dict[str, Any]:
+        """Structured, cached working tree status."""
+        untracked = params.get('untracked', 'normal')
+        return await git_service.status(untracked, user_id)
+
+    async def _tool_git_diff_summary(self, params: Dict[str, Any], user_id: Optional[str]) -> Dict[str, Any]:
+        """Per-file diff statistics without patch text."""
+        return await git_service.diff_summary(
+            base=params.get('base'),
+            target=params.get('target'),
+            staged=bool(params.get('staged', False)),
+            paths=params.get('paths'),
+            find_renames=params.get('find_renames', True),
+            user_id=user_id
+        )
+
+    def _diff_file_options(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Options shared by the buffered and streaming git_diff_file tool."""
+        return {
+            'old_path': params.get('old_path'),
+            'base': params.get('base'),
+            'target': params.get('target'),
+            'staged': bool(params.get('staged', False)),
+            'context_lines': params.get('context_lines', 3),
+            'find_renames': params.get('find_renames', True),
+            'max_bytes': params.get('max_bytes', git_service.DEFAULT_DIFF_MAX_BYTES),
+            'max_lines': params.get('max_lines', git_service.DEFAULT_DIFF_MAX_LINES),
+        }
+
+    async def _tool_git_diff_file(self, params: Dict[str, Any], user_id: Optional[str]) -> Dict[str, Any]:
+        """Bounded patch of a single file."""
+        path = params.get('path', '')
+        if not path:
+            raise ValueError("Path is required")
+
+        return await git_service.file_diff(path, user_id=user_id, **self._diff_file_options(params))
+
     async def _tool_get_provider_config(self, params: Dict[str, Any], user_id: Optional[str]) -> Dict[str, Any]:
         """Get provider config tool."""
         if not user_id:
@@ -303,6 +553,62 @@ Provide a step-by-step debugging process and the final solution.
             'instructions': 'The wizard should open in your default web browser. If it doesn\'t, manually navigate to the URL above.'
         }
 
+    # Streaming tool implementations
+
+    async def _stream_read_file(self, params: Dict[str, Any], user_id: Optional[str]) -> AsyncIterator[Dict[str, Any]]:
+        """Stream a file's content in chunks."""
+        path = params.get('path', '')
+        if not path:
+            raise ValueError("Path is required")
+
+        async for chunk in fs_service.stream_file(path, user_id):
+            yield chunk
+
+    async def _stream_search(self, params: Dict[str, Any], user_id: Optional[str]) -> AsyncIterator[Dict[str, Any]]:
+        """Stream search matches as they are found."""
+        query = params.get('query', '')
+        if not query:
+            raise ValueError("Query is required")
+
+        async for event in search_service.stream_search(
+            query, params.get('path', '.'), user_id, **self._search_options(params)
+        ):
+            yield event
+
+    async def _stream_exec(self, params: Dict[str, Any], user_id: Optional[str]) -> AsyncIterator[Dict[str, Any]]:
+        """Stream command stdout/stderr line by line."""
+        command = params.get('command', '')
+        args = params.get('args', [])
+
+        if not command:
+            raise ValueError("Command is required")
+
+        try:
+            async for event in exec_service.stream_command(command, args, user_id):
+                yield event
+        finally:
+            self._notify_changed(user_id)
+
+    async def _stream_git(self, params: Dict[str, Any], user_id: Optional[str]) -> AsyncIterator[Dict[str, Any]]:
+        """Stream git log per commit and git diff per file."""
+        subcommand = params.get('subcommand', '')
+        args = params.get('args', [])
+
+        if not subcommand:
+            raise ValueError("Git subcommand is required")
+
+        async for event in git_service.stream_git_command(subcommand, args, user_id):
+            yield event
+
+    async def _stream_git_diff_file(self, params: Dict[str, Any], user_id: Optional[str]) -> AsyncIterator[Dict[str, Any]]:
+        """Stream a single file's patch hunk by hunk."""
+        path = params.get('path', '')
+        if not path:
+            raise ValueError("Path is required")
+
+        async for event in git_service.stream_file_diff(path, user_id=user_id, **self._diff_file_options(params)):
+            yield event
+
 
 # Global MCP server instance
 mcp_server = MCPServer()
\ No newline at end of file
@@ -71,6 +71,18 @@ class MathParams(BaseModel):
 class ReadFileParams(BaseModel):
     """Parameters for read_file tool."""
     path: str = Field(..., min_length=1, max_length=500, description="Relative path to file within project root")
+    offset: Optional[int] = Field(None, ge=0, description="Byte offset to start reading at")
+    length: Optional[int] = Field(None, ge=1, description="Number of bytes to read")
+    start_line: Optional[int] = Field(None, ge=1, description="First line to read (1-based)")
+    end_line: Optional[int] = Field(None, ge=1, description="Last line to read (inclusive)")
+
+    class Config:
+        extra = "forbid"
+
+
+class ReadFilesParams(BaseModel):
+    """Parameters for read_files tool."""
+    paths: List[str] = Field(..., min_items=1, max_items=100, description="Relative paths to files within project root")
 
     class Config:
         extra = "forbid"
@@ -88,6 +100,30 @@ class WriteFileParams(BaseModel):
 class ListFilesParams(BaseModel):
     """Parameters for list_files tool."""
     path: Optional[str] = Field(".", min_length=0, max_length=500, description="Relative path to directory within project root")
+    recursive: bool = Field(False, description="List the whole tree below path, with pagination")
+    max_depth: Optional[int] = Field(None, ge=1, description="Maximum depth when recursive (1 = direct children)")
+    include: Optional[List[str]] = Field(None, max_items=50, description="Globs a file must match when recursive")
+    exclude: Optional[List[str]] = Field(None, max_items=50, description="Globs of files and directories to skip when recursive")
+    respect_gitignore: bool = Field(True, description="Skip .git and .gitignore'd paths when recursive")
+    limit: int = Field(1000, ge=1, le=10000, description="Entries per page when recursive")
+    cursor: Optional[str] = Field(None, max_length=1000, description="next_cursor from the previous page")
+    format: str = Field("full", pattern=r'^(full|compact)$', description="compact returns [path, is_dir, size] arrays")
+
+    class Config:
+        extra = "forbid"
+
+
+class SearchParams(BaseModel):
+    """Parameters for search tool."""
+    query: str = Field(..., min_length=1, max_length=1000, description="Text or regular expression to search for")
+    path: Optional[str] = Field(".", max_length=500, description="Relative path to directory to search")
+    regex: bool = Field(False, description="Treat query as a regular expression")
+    case_sensitive: bool = Field(True, description="Match case")
+    include: Optional[List[str]] = Field(None, max_items=50, description="Globs a file must match")
+    exclude: Optional[List[str]] = Field(None, max_items=50, description="Globs of files and directories to skip")
+    respect_gitignore: bool = Field(True, description="Skip .git and .gitignore'd paths")
+    context_lines: int = Field(0, ge=0, le=10, description="Lines of context before and after each match")
+    max_results: int = Field(200, ge=1, le=5000, description="Stop after this many matches")
 
     class Config:
         extra = "forbid"
@@ -111,6 +147,93 @@ class GitParams(BaseModel):
         extra = "forbid"
 
 
+class GitReadFileParams(BaseModel):
+    """Parameters for git_read_file tool."""
+    path: Optional[str] = Field(None, min_length=1, max_length=500, description="Relative path to file within project root")
+    paths: Optional[List[str]] = Field(None, max_items=500, description="Several relative paths to read at once")
+    rev: str = Field("HEAD", min_length=1, max_length=200, description="Revision to read the file at")
+
+    class Config:
+        extra = "forbid"
+
+
+class GitListTreeParams(BaseModel):
+    """Parameters for git_list_tree tool."""
+    path: str = Field("", max_length=500, description="Relative path to directory within project root")
+    rev: str = Field("HEAD", min_length=1, max_length=200, description="Revision to list the directory at")
+
+    class Config:
+        extra = "forbid"
+
+
+class GitResolveRefParams(BaseModel):
+    """Parameters for git_resolve_ref tool."""
+    ref: str = Field(..., min_length=1, max_length=200, description="Branch, tag, SHA or other revision to resolve")
+
+    class Config:
+        extra = "forbid"
+
+
+class GitLogParams(BaseModel):
+    """Parameters for git_log tool."""
+    rev: str = Field("HEAD", min_length=1, max_length=200, description="Revision to start the history from")
+    path: Optional[str] = Field(None, max_length=500, description="Only include commits touching this path")
+    limit: int = Field(50, ge=1, le=500, description="Commits per page")
+    cursor: Optional[str] = Field(None, max_length=200, description="next_cursor from the previous page")
+    numstat: bool = Field(False, description="Include per-file added/deleted line counts")
+
+    class Config:
+        extra = "forbid"
+
+
+class GitBlameParams(BaseModel):
+    """Parameters for git_blame tool."""
+    path: str = Field(..., min_length=1, max_length=500, description="Relative path to file within project root")
+    rev: str = Field("HEAD", min_length=1, max_length=200, description="Revision to blame at")
+    start_line: Optional[int] = Field(None, ge=1, description="First line to blame")
+    end_line: Optional[int] = Field(None, ge=1, description="Last line to blame")
+    include_lines: bool = Field(False, description="Include the text of each line")
+
+    class Config:
+        extra = "forbid"
+
+
+class GitStatusParams(BaseModel):
+    """Parameters for git_status tool."""
+    untracked: str = Field("normal", pattern=r'^(no|normal|all)$', description="Untracked file mode")
+
+    class Config:
+        extra = "forbid"
+
+
+class GitDiffSummaryParams(BaseModel):
+    """Parameters for git_diff_summary tool."""
+    base: Optional[str] = Field(None, max_length=200, description="Revision to diff from")
+    target: Optional[str] = Field(None, max_length=200, description="Revision to diff to (requires base)")
+    staged: bool = Field(False, description="Diff the index instead of the working tree")
+    paths: Optional[List[str]] = Field(None, max_items=100, description="Only include these paths")
+    find_renames: Union[bool, int] = Field(True, description="Detect renames, or a similarity percentage")
+
+    class Config:
+        extra = "forbid"
+
+
+class GitDiffFileParams(BaseModel):
+    """Parameters for git_diff_file tool."""
+    path: str = Field(..., min_length=1, max_length=500, description="Relative path to file within project root")
+    old_path: Optional[str] = Field(None, max_length=500, description="Original path if the file was renamed")
+    base: Optional[str] = Field(None, max_length=200, description="Revision to diff from")
+    target: Optional[str] = Field(None, max_length=200, description="Revision to diff to (requires base)")
+    staged: bool = Field(False, description="Diff the index instead of the working tree")
+    context_lines: int = Field(3, ge=0, le=1000, description="Lines of context around each change")
+    find_renames: Union[bool, int] = Field(True, description="Detect renames, or a similarity percentage")
+    max_bytes: int = Field(256 * 1024, ge=1, le=5 * 1024 * 1024, description="Maximum bytes of patch text")
+    max_lines: int = Field(5000, ge=1, description="Maximum lines of patch text")
+
+    class Config:
+        extra = "forbid"
+
+
 class GetProviderConfigParams(BaseModel):
     """Parameters for get_provider_config tool."""
     user_id: str = Field(..., min_length=1, max_length=100, description="User ID to get config for")
@@ -133,6 +256,7 @@ class ExecResult(BaseModel):
     stdout: str = Field(..., description="Standard output")
     stderr: str = Field(..., description="Standard error")
     exit_code: int = Field(..., description="Process exit code")
+    truncated: bool = Field(False, description="Whether output was cut at the size cap")
 
 
 class ProviderConfig(BaseModel):
@@ -1,10 +1,17 @@
 """Project configuration and wizard management."""
 import json
 import os
+import threading
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Tuple
 from pydantic import BaseModel, validator
-from app.config import settings
+from app.utils.http_client import backend_client
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
 
 
 class ProjectConfig(BaseModel):
@@ -34,59 +41,228 @@ class ProjectConfig(BaseModel):
 
 
 class ProjectManager:
-    """Manages project configuration and Vercel integration."""
+    """
+    Manages project configuration and Vercel integration.
+
+    There is one default project, and any user can be given a project root
+    of their own; users without one get the default project. A user whose
+    own root is unavailable (e.g. an unmounted volume) gets an error rather
+    than the default project, and their entry is kept in the file.
+
+    The configuration lives in `~/.senscoder/project_config.json`, shared
+    by every worker process on the host. Writes replace the file atomically
+    under an exclusive lock and bump a version counter; reads compare the
+    file's inode, mtime and size (one stat) with what was last loaded and
+    reload only when another process changed it.
+    """
 
     def __init__(self):
         self.config_file = Path.home() / ".senscoder" / "project_config.json"
         self.config_file.parent.mkdir(parents=True, exist_ok=True)
+        self.lock_file = self.config_file.with_suffix(".lock")
+        self.version = 0  # bumped by every write, from any process
         self._config: Optional[ProjectConfig] = None
+        self._user_configs: Dict[str, ProjectConfig] = {}  # valid entries
+        self._user_entries: Dict[str, Dict[str, Any]] = {}  # every entry as stored
+        self._signature: Optional[Tuple[int, int, int]] = None  # (inode, mtime_ns, size) last loaded
+        self._lock = threading.Lock()
         self._load_config()
 
+    def _file_signature(self) -> Optional[Tuple[int, int, int]]:
+        try:
+            stat = os.stat(self.config_file)
+        except OSError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    def _refresh(self):
+        """Reload the configuration if another process changed the file."""
+        if self._file_signature() != self._signature:
+            with self._lock:
+                self._load_config()
+
     def _load_config(self):
         """Load project configuration from disk."""
-        if self.config_file.exists():
+        # Stat before reading: if the file is replaced in between, the next
+        # call sees a changed signature and reloads again
+        signature = self._file_signature()
+        config, user_configs, user_entries, version = None, {}, {}, 0
+        if signature is not None:
             try:
                 with open(self.config_file, 'r') as f:
                     data = json.load(f)
-                    self._config = ProjectConfig(**data)
             except Exception:
-                self._config = None
+                data = None
+            if isinstance(data, dict) and "version" in data:
+                version = int(data.get("version") or 0)
+                for user_id, user_data in (data.get("users") or {}).items():
+                    if not isinstance(user_data, dict):
+                        continue
+                    # Entries that do not validate (e.g. a root that is
+                    # temporarily missing) are kept and written back as they are
+                    user_entries[user_id] = user_data
+                    try:
+                        user_configs[user_id] = ProjectConfig(**user_data)
+                    except Exception:
+                        pass
+                data = data.get("config")
+            if data:
+                try:
+                    config = ProjectConfig(**data)
+                except Exception:
+                    config = None
+        self._config, self._user_configs, self._user_entries = config, user_configs, user_entries
+        self.version, self._signature = version, signature
+
+    @contextmanager
+    def _file_lock(self):
+        """Hold an exclusive lock on the config across processes (where supported)."""
+        with open(self.lock_file, 'a') as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _save_config(
+        self,
+        config: Optional[ProjectConfig],
+        user_id: Optional[str] = None,
+        expected_version: Optional[int] = None
+    ):
+        """
+        Store a project configuration and save the whole file.
+
+        Args:
+            config: The configuration, or None to remove a user's own one
+            user_id: Whose configuration to store; None for the default project
+            expected_version: If given, only write when the stored
+                configuration is still at this version
+
+        Raises:
+            ValueError: If expected_version does not match
+        """
+        with self._lock, self._file_lock():
+            # Start from the latest version another process may have written
+            if self._file_signature() != self._signature:
+                self._load_config()
+            if expected_version is not None and expected_version != self.version:
+                raise ValueError(
+                    f"Project configuration changed (version {self.version}, expected {expected_version})"
+                )
+
+            default, user_configs, user_entries = self._config, dict(self._user_configs), dict(self._user_entries)
+            if user_id is None:
+                default = config
+            elif config is None:
+                user_configs.pop(user_id, None)
+                user_entries.pop(user_id, None)
+            else:
+                user_configs[user_id] = config
+                user_entries[user_id] = config.dict()
+
+            version = self.version + 1
+            data = {
+                "version": version,
+                "config": default.dict() if default else None,
+                "users": user_entries
+            }
+            tmp_file = self.config_file.with_suffix(f".{os.getpid()}.tmp")
+            with open(tmp_file, 'w') as f:
+                json.dump(data, f, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_file, self.config_file)
+
+            self._config, self._user_configs, self._user_entries = default, user_configs, user_entries
+            self.version = version
+            self._signature = self._file_signature()
+
+    def set_project_config(
+        self,
+        config: ProjectConfig,
+        expected_version: Optional[int] = None,
+        user_id: Optional[str] = None
+    ):
+        """
+        Set the project configuration.
+
+        Args:
+            config: The new configuration
+            expected_version: If given, only write when the stored
+                configuration is still at this version
+            user_id: Give this user their own project instead of setting
+                the default project
+
+        Raises:
+            ValueError: If expected_version does not match
+        """
+        self._save_config(config, user_id, expected_version)
+
+    def remove_user_project(self, user_id: str, expected_version: Optional[int] = None):
+        """
+        Return a user to the default project.
+
+        Raises:
+            ValueError: If expected_version does not match
+        """
+        self._save_config(None, user_id, expected_version)
+
+    def get_project_config(self, user_id: Optional[str] = None) -> Optional[ProjectConfig]:
+        """
+        Get the project configuration of a user (the default project if they have none).
+
+        Raises:
+            ValueError: If the user has a project of their own whose root
+                is unavailable
+        """
+        self._refresh()
+        if user_id is None or user_id not in self._user_entries:
+            return self._config
+        config = self._user_configs.get(user_id)
+        if config is not None and config.project_path.is_dir():
+            return config
+        # Missing at load time or gone since; the root may also have come back
+        with self._lock:
+            try:
+                config = ProjectConfig(**self._user_entries[user_id])
+            except Exception:
+                self._user_configs.pop(user_id, None)
+                root = self._user_entries[user_id].get("project_root")
+                raise ValueError(f"Project root of user {user_id} is unavailable: {root}")
+            self._user_configs[user_id] = config
+        return config
 
-    def _save_config(self):
-        """Save project configuration to disk."""
-        if self._config:
-            with open(self.config_file, 'w') as f:
-                json.dump(self._config.dict(), f, indent=2)
+    def has_user_project(self, user_id: str) -> bool:
+        """Check if a user has a project of their own, available or not."""
+        self._refresh()
+        return user_id in self._user_entries
 
-    def set_project_config(self, config: ProjectConfig):
-        """Set the project configuration."""
-        self._config = config
-        self._save_config()
+    def user_projects(self) -> Dict[str, ProjectConfig]:
+        """Users with an available project of their own, and their configurations."""
+        self._refresh()
+        return dict(self._user_configs)
 
-    def get_project_config(self) -> Optional[ProjectConfig]:
-        """Get the current project configuration."""
-        return self._config
+    def get_project_root(self, user_id: Optional[str] = None) -> Optional[str]:
+        """
+        Get the project root path of a user (the default project if they have none).
 
-    def get_project_root(self) -> Optional[str]:
-        """Get the current project root path."""
-        return self._config.project_root if self._config else None
+        Raises:
+            ValueError: If the user's own project root is unavailable
+        """
+        config = self.get_project_config(user_id)
+        return config.project_root if config else None
 
-    def is_configured(self) -> bool:
-        """Check if project is configured."""
-        return self._config is not None
+    def is_configured(self, user_id: Optional[str] = None) -> bool:
+        """Check if a project is configured for a user (or by default)."""
+        return self.get_project_config(user_id) is not None
 
     async def get_vercel_config(self) -> Dict[str, Any]:
         """Fetch configuration from Vercel backend."""
-        try:
-            import httpx
-            async with httpx.AsyncClient() as client:
-                response = await client.get(f"{settings.senscoder_backend_url}/api/internal/mcp/config")
-                if response.status_code == 200:
-                    return response.json()
-                else:
-                    return {}
-        except Exception:
-            return {}
+        config = await backend_client.get_json("/api/internal/mcp/config")
+        return config if isinstance(config, dict) else {}
 
 
 # Global project manager instance
@@ -1,8 +1,11 @@
 """FastAPI routes for MCP server endpoints."""
-from typing import List, Dict, Any, Optional
+import asyncio
+import logging
+import math
+from typing import AsyncIterator, List, Dict, Any, Optional
 from pathlib import Path
 
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Request
 from fastapi.responses import StreamingResponse
 
 from app.models import (
@@ -15,8 +18,73 @@ from app.config import settings
 from app.auth import get_current_user, get_optional_user, AuthService
 from app.services.project_analyzer import project_analyzer, ProjectMetadata
 from app.services.documentation_generator import documentation_generator
+from app.services.auto_setup_service import AutoSetupJob, auto_setup_service
+from app.utils.json_response import FastJSONResponse, dumps
+from app.utils.metrics import tool_metrics
+from app.utils.rate_limit import parse_rate, rate_limiter
 
 router = APIRouter(prefix="/mcp", tags=["mcp"])
+logger = logging.getLogger(__name__)
+
+DISCONNECT_POLL_INTERVAL = 0.5  # seconds
+
+
+def _tool_user_id(current_user: Optional[dict]) -> Optional[str]:
+    """
+    User whose project a tool call acts on.
+
+    Always the token subject, never the `user_id` of the request body;
+    anonymous calls act on the default project.
+    """
+    return current_user.get("sub") if current_user else None
+
+
+async def _check_tool_rate_limit(tool: str, http_request: Request, current_user: Optional[dict]) -> None:
+    """
+    Charge a tool call to the caller's token bucket.
+
+    The bucket is keyed by the authenticated user (or the client address
+    for anonymous calls) and shared by all workers. Each tool costs its
+    TOOL_RATE_COSTS weight, 1 by default.
+
+    Raises:
+        HTTPException: 429 with Retry-After if the bucket is empty
+    """
+    if current_user and current_user.get("sub"):
+        key = f"tool:user:{current_user['sub']}"
+    else:
+        key = f"tool:ip:{http_request.client.host if http_request.client else 'unknown'}"
+    capacity, period = parse_rate(settings.tool_invoke_rate_limit)
+    cost = settings.tool_rate_costs.get(tool, 1.0)
+
+    allowed, retry_after = await asyncio.to_thread(rate_limiter.acquire, key, cost, capacity, period)
+    if not allowed:
+        raise HTTPException(
+            status_code=429,
+            detail=f"Rate limit exceeded for tool '{tool}'",
+            headers={"Retry-After": str(math.ceil(retry_after))}
+        )
+
+
+async def _cancel_on_disconnect(http_request: Request, coro):
+    """
+    Await a coroutine, cancelling it if the HTTP client goes away.
+
+    Cancellation propagates into running tools, which kills any subprocess
+    they started instead of letting it run on for nobody.
+    """
+    task = asyncio.ensure_future(coro)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=DISCONNECT_POLL_INTERVAL)
+            if done:
+                return task.result()
+            if await http_request.is_disconnected():
+                task.cancel()
+                raise HTTPException(status_code=499, detail="Client disconnected")
+    finally:
+        if not task.done():
+            task.cancel()
 
 
 # Health check endpoint
@@ -29,9 +97,9 @@ async def health_check() -> Dict[str, Any]:
     """
     try:
         # Get server capabilities
-        tools_count = len(mcp_server.tools) if hasattr(mcp_server, 'tools') else 0
-        resources_count = len(mcp_server.get_resources().resources) if hasattr(mcp_server, 'get_resources') else 0
-        prompts_count = len(mcp_server.get_prompts().prompts) if hasattr(mcp_server, 'get_prompts') else 0
+        tools_count = len(mcp_server.tools)
+        resources_count = len(mcp_server.resources)
+        prompts_count = len(mcp_server.prompts)
 
         return {
             "status": "healthy",
@@ -48,6 +116,20 @@ async def health_check() -> Dict[str, Any]:
         }
 
 
+@router.get("/metrics")
+async def get_metrics() -> Dict[str, Any]:
+    """
+    Per-tool metrics of this worker process.
+
+    For each tool: call and error counts, calls in flight, a latency
+    histogram with estimated percentiles, request and response bytes, and
+    the CPU time of subprocesses that exited during its calls. Also the
+    process CPU time and the per-project cache state. Same data as the
+    `senscoder:metrics` resource.
+    """
+    return mcp_server.get_metrics()
+
+
 # Authentication endpoints
 @router.post("/auth/login")
 async def login(request: dict):
@@ -69,6 +151,7 @@ async def login(request: dict):
 @router.post("/tool-invoke", response_model=ToolInvokeResponse)
 async def invoke_tool(
     request: ToolInvokeRequest,
+    http_request: Request,
     current_user: dict = Depends(get_current_user)
 ) -> ToolInvokeResponse:
     """
@@ -84,13 +167,20 @@ async def invoke_tool(
     if len(request.tool) > 50:  # Reasonable limit
         raise HTTPException(status_code=400, detail="Tool name too long")
 
-    # Set user_id from authenticated user if not provided
-    if not request.user_id:
-        request.user_id = current_user.get("sub")
+    request.user_id = _tool_user_id(current_user)
+
+    await _check_tool_rate_limit(request.tool, http_request, current_user)
 
     try:
-        result = await mcp_server.invoke_tool(request)
-        return result
+        result = await _cancel_on_disconnect(http_request, mcp_server.invoke_tool(request))
+        # Serialized here rather than by FastAPI: skips the jsonable_encoder
+        # copy of large results and gives the response size for the metrics
+        response = FastJSONResponse(result)
+        if request.tool in mcp_server.tools:
+            tool_metrics.record_bytes(request.tool, len(await http_request.body()), len(response.body))
+        return response
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Tool invocation failed: {str(e)}")
 
@@ -125,24 +215,50 @@ async def get_prompts() -> PromptsResponse:
         raise HTTPException(status_code=500, detail=f"Failed to get prompts: {str(e)}")
 
 
-# Optional streaming endpoint for long-running operations
+# Streaming endpoint for long-running operations
 @router.post("/tool-invoke/stream")
-async def invoke_tool_streaming(request: ToolInvokeRequest):
+async def invoke_tool_streaming(
+    request: ToolInvokeRequest,
+    http_request: Request,
+    current_user: Optional[dict] = Depends(get_optional_user)
+) -> StreamingResponse:
     """
     Invoke an MCP tool with streaming response.
 
-    For long-running tools, this endpoint can stream results as they become available.
-    Currently returns the same response as the regular endpoint.
+    Results are delivered incrementally as the tool produces them: `exec`
+    streams stdout/stderr line by line, `read_file` streams content in chunks,
+    `git log` streams per commit and `git diff` per file. Other tools emit a
+    single data event.
+
+    Responds with Server-Sent Events when the client sends
+    `Accept: text/event-stream`, otherwise with newline-delimited JSON.
+    Each event has an `event` field of start, data, end or error.
     """
-    try:
-        result = await mcp_server.invoke_tool(request)
+    request.user_id = _tool_user_id(current_user)
 
-        # For now, return as regular JSON response
-        # In the future, this could return a StreamingResponse for real-time updates
-        return result
+    await _check_tool_rate_limit(request.tool, http_request, current_user)
 
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Tool invocation failed: {str(e)}")
+    use_sse = "text/event-stream" in http_request.headers.get("accept", "")
+
+    bytes_in = len(await http_request.body())
+
+    async def event_stream() -> AsyncIterator[bytes]:
+        bytes_out = 0
+        try:
+            async for event in mcp_server.invoke_tool_stream(request):
+                payload = dumps(event)
+                chunk = b"event: %s\ndata: %s\n\n" % (event['event'].encode(), payload) if use_sse else payload + b"\n"
+                bytes_out += len(chunk)
+                yield chunk
+        finally:
+            if request.tool in mcp_server.tools:
+                tool_metrics.record_bytes(request.tool, bytes_in, bytes_out)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream" if use_sse else "application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 
 # Auto-setup endpoints for automatic project analysis and documentation generation
@@ -172,51 +288,118 @@ async def auto_setup_project(
 
         user_id = current_user.get("sub") if current_user else settings.senscoder_default_user_id or "wizard-user"
 
-        # Step 1: Analyze project
-        print(f"Analyzing project at: {project_path}")
-        metadata = project_analyzer.analyze_project(project_path)
-
-        # Step 2: Generate all documentation
-        print("Generating documentation...")
-        prd = await documentation_generator.generate_prd(metadata, user_id)
-        features = await documentation_generator.generate_feature_list(metadata, user_id)
-        tech_summary = await documentation_generator.generate_tech_summary(metadata, user_id)
-        health_report = await documentation_generator.generate_health_report(metadata, user_id)
-        improvements = await documentation_generator.generate_improvements(metadata, user_id)
-        testing_plan = await documentation_generator.generate_testing_plan(metadata, user_id)
-        codebase_summary = await documentation_generator.generate_codebase_summary(metadata, user_id)
-
-        # Step 3: Return comprehensive results
-        result = {
-            "success": True,
-            "project_metadata": {
-                "project_type": metadata.project_type.value,
-                "languages": list(metadata.languages),
-                "frameworks": list(metadata.frameworks),
-                "has_tests": metadata.has_tests,
-                "health_score": metadata.health_score,
-                "entry_points": metadata.entry_points
-            },
-            "documentation": {
-                "prd": prd,
-                "features": features,
-                "tech_summary": tech_summary,
-                "health_report": health_report,
-                "improvements": improvements,
-                "testing_plan": testing_plan,
-                "codebase_summary": codebase_summary
-            },
-            "generated_at": prd["generated_at"]  # All docs have same timestamp
-        }
+        # Analyze the project, then generate all documentation concurrently
+        logger.info("Auto-setup started", extra={"project_path": project_path})
+        result = await auto_setup_service.run(project_path, user_id)
 
-        print(f"Auto-setup completed for project: {project_path}")
-        return result
+        logger.info("Auto-setup completed", extra={"project_path": project_path})
+        return FastJSONResponse(result)
 
     except Exception as e:
-        print(f"Auto-setup failed: {str(e)}")
+        logger.error(f"Auto-setup failed: {e}", extra={"project_path": request.get("projectPath")})
         raise HTTPException(status_code=500, detail=f"Auto-setup failed: {str(e)}")
 
 
+def _request_user_id(current_user: Optional[dict]) -> str:
+    return current_user.get("sub") if current_user else settings.senscoder_default_user_id or "wizard-user"
+
+
+def _get_setup_job(job_id: str, current_user: Optional[dict]) -> AutoSetupJob:
+    job = auto_setup_service.get(job_id, _request_user_id(current_user))
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Auto-setup job not found: {job_id}")
+    return job
+
+
+@router.post("/auto-setup/jobs", status_code=202)
+async def submit_auto_setup_job(
+    request: Dict[str, Any],
+    current_user: Optional[dict] = Depends(get_optional_user)
+) -> Dict[str, Any]:
+    """
+    Start auto-setup as a background job.
+
+    Returns immediately with the job status. Follow progress by polling
+    `GET /mcp/auto-setup/jobs/{job_id}` or subscribing to
+    `GET /mcp/auto-setup/jobs/{job_id}/events`, then fetch the documents
+    from `GET /mcp/auto-setup/jobs/{job_id}/result`. Submitting a project
+    that already has a queued or running job returns that job, with
+    `deduplicated` set.
+
+    Expects: {"projectPath": "/path/to/project"}
+    """
+    project_path = request.get("projectPath", "").strip()
+    if not project_path:
+        raise HTTPException(status_code=400, detail="projectPath is required")
+
+    try:
+        job, deduplicated = auto_setup_service.submit(project_path, _request_user_id(current_user))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return {**job.to_dict(), "deduplicated": deduplicated}
+
+
+@router.get("/auto-setup/jobs/{job_id}")
+async def get_auto_setup_job(
+    job_id: str,
+    current_user: Optional[dict] = Depends(get_optional_user)
+) -> Dict[str, Any]:
+    """Get the status and per-stage progress of an auto-setup job."""
+    return _get_setup_job(job_id, current_user).to_dict()
+
+
+@router.get("/auto-setup/jobs/{job_id}/events")
+async def stream_auto_setup_job(
+    job_id: str,
+    http_request: Request,
+    current_user: Optional[dict] = Depends(get_optional_user)
+) -> StreamingResponse:
+    """
+    Stream the progress events of an auto-setup job until it finishes.
+
+    Past events are replayed first. Each event has an `event` field of
+    start, stage (with `stage` and `status`) or end. Responds with
+    Server-Sent Events when the client sends `Accept: text/event-stream`,
+    otherwise with newline-delimited JSON.
+    """
+    job = _get_setup_job(job_id, current_user)
+    use_sse = "text/event-stream" in http_request.headers.get("accept", "")
+
+    async def event_stream() -> AsyncIterator[bytes]:
+        async for event in auto_setup_service.events(job):
+            payload = dumps(event)
+            if use_sse:
+                yield b"event: %s\ndata: %s\n\n" % (event['event'].encode(), payload)
+            else:
+                yield payload + b"\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream" if use_sse else "application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.get("/auto-setup/jobs/{job_id}/result")
+async def get_auto_setup_job_result(
+    job_id: str,
+    current_user: Optional[dict] = Depends(get_optional_user)
+) -> Dict[str, Any]:
+    """
+    Get the result of a finished auto-setup job.
+
+    Same body as `POST /mcp/auto-setup`. Responds with 409 while the job is
+    still running and 500 if it failed.
+    """
+    job = _get_setup_job(job_id, current_user)
+    if not job.finished:
+        raise HTTPException(status_code=409, detail=f"Auto-setup job is {job.status}")
+    if job.status == "failed":
+        raise HTTPException(status_code=500, detail=f"Auto-setup failed: {job.error}")
+    return FastJSONResponse(job.result)
+
+
 @router.post("/analyze-project")
 async def analyze_project(
     request: Dict[str, Any],
@@ -240,8 +423,8 @@ async def analyze_project(
         if not project_path:
             raise HTTPException(status_code=400, detail="projectPath is required")
 
-        print(f"Analyzing project at: {project_path}")
-        metadata = project_analyzer.analyze_project(project_path)
+        logger.info("Project analysis started", extra={"project_path": project_path})
+        metadata = await asyncio.to_thread(project_analyzer.analyze_project, project_path)
 
         # Convert metadata to dict for JSON response
         result = {
@@ -264,10 +447,10 @@ async def analyze_project(
             "folder_structure": metadata.folder_structure
         }
 
-        return result
+        return FastJSONResponse(result)
 
     except Exception as e:
-        print(f"Project analysis failed: {str(e)}")
+        logger.error(f"Project analysis failed: {e}", extra={"project_path": request.get("projectPath")})
         raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
 
 
@@ -289,7 +472,7 @@ async def generate_prd(
         user_id = current_user.get("sub") if current_user else settings.senscoder_default_user_id or "wizard-user"
 
         # Analyze project first
-        metadata = project_analyzer.analyze_project(project_path)
+        metadata = await asyncio.to_thread(project_analyzer.analyze_project, project_path)
 
         # Generate PRD
         prd = await documentation_generator.generate_prd(metadata, user_id)
@@ -297,7 +480,7 @@ async def generate_prd(
         return prd
 
     except Exception as e:
-        print(f"PRD generation failed: {str(e)}")
+        logger.error(f"PRD generation failed: {e}")
         raise HTTPException(status_code=500, detail=f"PRD generation failed: {str(e)}")
 
 
@@ -356,7 +539,7 @@ async def save_documentation(
         }
 
     except Exception as e:
-        print(f"Save documentation failed: {str(e)}")
+        logger.error(f"Save documentation failed: {e}")
         raise HTTPException(status_code=500, detail=f"Save documentation failed: {str(e)}")
 
 
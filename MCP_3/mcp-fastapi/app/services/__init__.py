@@ -3,6 +3,9 @@
 from .fs_service import fs_service
 from .exec_service import exec_service
 from .git_service import git_service
+from .search_service import search_service
+from .watcher_service import watcher_service
 from .config_service import config_service
 
-__all__ = ["fs_service", "exec_service", "git_service", "config_service"]
\ No newline at end of file
+__all__ = ["fs_service", "exec_service", "git_service", "search_service", "watcher_service",
+           "config_service"]
\ No newline at end of file
@@ -0,0 +1,226 @@
+"""Auto-setup pipeline (project analysis plus documentation) and its background jobs."""
+import asyncio
+import logging
+import time
+import uuid
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+from app.services.documentation_generator import documentation_generator
+from app.services.project_analyzer import ProjectMetadata, project_analyzer
+
+logger = logging.getLogger(__name__)
+
+# Called with (stage, status, error message)
+ProgressCallback = Callable[[str, str, Optional[str]], None]
+
+
+def build_result(metadata: ProjectMetadata, generated: Dict[str, Any]) -> Dict[str, Any]:
+    """The auto-setup response body for an analysis and its generated documents."""
+    result = {
+        "success": True,
+        "project_metadata": {
+            "project_type": metadata.project_type.value,
+            "languages": list(metadata.languages),
+            "frameworks": list(metadata.frameworks),
+            "has_tests": metadata.has_tests,
+            "health_score": metadata.health_score,
+            "entry_points": metadata.entry_points
+        },
+        "documentation": generated["documentation"],
+        "generated_at": generated["generated_at"]
+    }
+    if generated["errors"]:
+        # Partial results: the documents that failed are listed here instead
+        result["errors"] = generated["errors"]
+    return result
+
+
+@dataclass
+class AutoSetupJob:
+    """One background auto-setup run and the progress events it produced."""
+    id: str
+    project_path: str
+    user_id: str
+    status: str = "queued"  # queued, running, completed or failed
+    stages: Dict[str, str] = field(default_factory=dict)  # stage -> pending, running, completed or failed
+    created_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    events: List[Dict[str, Any]] = field(default_factory=list)
+    task: Optional[asyncio.Task] = None
+    _waiter: Optional[asyncio.Future] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("completed", "failed")
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Job status without the result."""
+        return {
+            "job_id": self.id,
+            "project_path": self.project_path,
+            "status": self.status,
+            "stages": dict(self.stages),
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+            "error": self.error
+        }
+
+
+class AutoSetupService:
+    """
+    Runs auto-setup inline or as background jobs.
+
+    Jobs are kept in memory: a job for a project that the same user already
+    has queued or running is reused instead of started again, and finished
+    jobs are kept for JOB_TTL seconds (at most MAX_FINISHED_JOBS of them)
+    so their results can be fetched.
+    """
+
+    JOB_TTL = 3600.0
+    MAX_FINISHED_JOBS = 100
+
+    def __init__(self):
+        self._jobs: Dict[str, AutoSetupJob] = {}
+        self._active: Dict[Tuple[str, str], AutoSetupJob] = {}  # (project path, user id) -> unfinished job
+
+    async def run(
+        self,
+        project_path: str,
+        user_id: str,
+        on_progress: Optional[ProgressCallback] = None
+    ) -> Dict[str, Any]:
+        """
+        Analyze a project and generate all of its documentation.
+
+        Args:
+            project_path: Path to the project root directory
+            user_id: User ID for context
+            on_progress: Called with (stage, status, error message) as the
+                "analysis" stage and each document stage starts and ends
+
+        Returns:
+            The auto-setup result (see build_result)
+
+        Raises:
+            ValueError: If the project path is not a directory
+        """
+        if on_progress:
+            on_progress("analysis", "running", None)
+        try:
+            # Analysis walks the filesystem; keep it off the event loop
+            metadata = await asyncio.to_thread(project_analyzer.analyze_project, project_path)
+        except Exception as e:
+            if on_progress:
+                on_progress("analysis", "failed", str(e))
+            raise
+        if on_progress:
+            on_progress("analysis", "completed", None)
+
+        generated = await documentation_generator.generate_all(metadata, user_id, on_progress)
+        return build_result(metadata, generated)
+
+    def submit(self, project_path: str, user_id: str) -> Tuple[AutoSetupJob, bool]:
+        """
+        Start an auto-setup job, or join the one already running for the project.
+
+        Returns:
+            (job, whether an existing job was reused)
+
+        Raises:
+            ValueError: If the project path is not a directory
+        """
+        path = Path(project_path).expanduser().resolve()
+        if not path.is_dir():
+            raise ValueError(f"Project path does not exist or is not a directory: {project_path}")
+
+        key = (str(path), user_id)
+        existing = self._active.get(key)
+        if existing is not None and not existing.finished:
+            return existing, True
+
+        self._prune()
+        job = AutoSetupJob(id=uuid.uuid4().hex, project_path=str(path), user_id=user_id)
+        job.stages = {"analysis": "pending", **{name: "pending" for name in documentation_generator.document_generators()}}
+        self._jobs[job.id] = job
+        self._active[key] = job
+        job.task = asyncio.create_task(self._run_job(job, key))
+        return job, False
+
+    def get(self, job_id: str, user_id: str) -> Optional[AutoSetupJob]:
+        """A job by ID, or None if unknown or owned by another user."""
+        job = self._jobs.get(job_id)
+        return job if job is not None and job.user_id == user_id else None
+
+    async def events(self, job: AutoSetupJob) -> AsyncIterator[Dict[str, Any]]:
+        """Every progress event of a job, replaying past ones, until it finishes."""
+        index = 0
+        while True:
+            while index < len(job.events):
+                index += 1
+                yield job.events[index - 1]
+            if job.finished:
+                return
+            if job._waiter is None:
+                job._waiter = asyncio.get_running_loop().create_future()
+            # Shielded: one subscriber going away must not cancel the others' wait
+            await asyncio.shield(job._waiter)
+
+    async def close(self) -> None:
+        """Cancel unfinished jobs."""
+        tasks = [job.task for job in self._jobs.values() if job.task and not job.task.done()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def _emit(self, job: AutoSetupJob, event: Dict[str, Any]) -> None:
+        job.events.append({"job_id": job.id, "time": time.time(), **event})
+        waiter, job._waiter = job._waiter, None
+        if waiter is not None and not waiter.done():
+            waiter.set_result(None)
+
+    async def _run_job(self, job: AutoSetupJob, key: Tuple[str, str]) -> None:
+        def on_progress(stage: str, status: str, error: Optional[str]) -> None:
+            job.stages[stage] = status
+            event = {"event": "stage", "stage": stage, "status": status}
+            if error:
+                event["error"] = error
+            self._emit(job, event)
+
+        job.status = "running"
+        self._emit(job, {"event": "start", "status": job.status})
+        try:
+            job.result = await self.run(job.project_path, job.user_id, on_progress)
+            job.status = "completed"
+        except asyncio.CancelledError:
+            job.status = "failed"
+            job.error = "Cancelled"
+            raise
+        except Exception as e:
+            logger.error(f"Auto-setup job {job.id} failed: {e}")
+            job.status = "failed"
+            job.error = str(e)
+        finally:
+            job.finished_at = time.time()
+            if self._active.get(key) is job:
+                del self._active[key]
+            end = {"event": "end", "status": job.status}
+            if job.error:
+                end["error"] = job.error
+            self._emit(job, end)
+
+    def _prune(self) -> None:
+        """Drop finished jobs that expired or exceed MAX_FINISHED_JOBS, oldest first."""
+        now = time.time()
+        finished = sorted((job for job in self._jobs.values() if job.finished), key=lambda job: job.finished_at)
+        excess = len(finished) - self.MAX_FINISHED_JOBS
+        for i, job in enumerate(finished):
+            if i < excess or now - job.finished_at > self.JOB_TTL:
+                del self._jobs[job.id]
+
+
+# Global service instance
+auto_setup_service = AutoSetupService()
@@ -1,14 +1,27 @@
 """Configuration service for fetching user and project config from Vercel backend."""
-import httpx
-from typing import Dict, Any, Optional
+import asyncio
+import time
+from typing import Dict, Any, Optional, Tuple
 
 from app.config import settings
 from app.models import ProviderConfig
 from app.project_manager import project_manager
+from app.utils.http_client import backend_client
 
 
 class ConfigService:
-    """Service for fetching configuration from the SensCoder Vercel backend."""
+    """
+    Service for fetching configuration from the SensCoder Vercel backend.
+
+    Provider configs are cached per user for `provider_config_cache_ttl`
+    seconds, and concurrent requests for the same user share one backend
+    call. Defaults returned while the backend is unavailable are not
+    cached.
+    """
+
+    def __init__(self):
+        self._provider_configs: Dict[str, Tuple[float, ProviderConfig]] = {}  # user -> (expiry, config)
+        self._provider_fetches: Dict[str, asyncio.Future] = {}
 
     async def get_provider_config(self, user_id: str) -> ProviderConfig:
         """
@@ -20,28 +33,39 @@ class ConfigService:
         Returns:
             ProviderConfig object
         """
-        try:
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.get(
-                    f"{settings.senscoder_backend_url}/api/internal/mcp/config",
-                    headers={"X-User-ID": user_id}
-                )
-
-                if response.status_code == 200:
-                    config_data = response.json()
-                    return ProviderConfig(
-                        provider=config_data.get('provider', 'none'),
-                        use_own_key=config_data.get('useOwnKey', False),
-                        has_api_key=config_data.get('hasApiKey', False)
-                    )
-                else:
-                    # Fallback to defaults
-                    return self.get_default_provider_config()
-
-        except Exception as e:
-            print(f"Failed to fetch provider config: {e}")
+        cached = self._provider_configs.get(user_id)
+        if cached is not None and cached[0] > time.monotonic():
+            return cached[1]
+
+        fetch = self._provider_fetches.get(user_id)
+        if fetch is None:
+            fetch = asyncio.ensure_future(self._fetch_provider_config(user_id))
+            self._provider_fetches[user_id] = fetch
+            fetch.add_done_callback(lambda _: self._provider_fetches.pop(user_id, None))
+        # Shielded: one caller going away must not cancel the fetch for the others
+        return await asyncio.shield(fetch)
+
+    async def _fetch_provider_config(self, user_id: str) -> ProviderConfig:
+        config_data = await backend_client.get_provider_config(user_id)
+        if not isinstance(config_data, dict):
+            # Fallback to defaults
             return self.get_default_provider_config()
 
+        config = ProviderConfig(
+            provider=config_data.get('provider', 'none'),
+            use_own_key=config_data.get('useOwnKey', False),
+            has_api_key=config_data.get('hasApiKey', False)
+        )
+        self._provider_configs[user_id] = (time.monotonic() + settings.provider_config_cache_ttl, config)
+        return config
+
+    def invalidate_provider_config(self, user_id: Optional[str] = None) -> None:
+        """Drop the cached provider config of a user, or of all users."""
+        if user_id is None:
+            self._provider_configs.clear()
+        else:
+            self._provider_configs.pop(user_id, None)
+
     async def get_project_config(self, user_id: str) -> Dict[str, Any]:
         """
         Get project configuration for a user from the Vercel backend.
@@ -52,21 +76,10 @@ class ConfigService:
         Returns:
             Project configuration dict
         """
-        try:
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.get(
-                    f"{settings.senscoder_backend_url}/api/internal/mcp/project-config",
-                    headers={"X-User-ID": user_id}
-                )
-
-                if response.status_code == 200:
-                    return response.json()
-                else:
-                    return self.get_default_project_config()
-
-        except Exception as e:
-            print(f"Failed to fetch project config: {e}")
-            return self.get_default_project_config()
+        config = await backend_client.get_project_config(user_id)
+        if config is None:
+            return self.get_default_project_config(user_id)
+        return config
 
     def get_default_provider_config(self) -> ProviderConfig:
         """Get default provider config when backend is unavailable."""
@@ -76,9 +89,9 @@ class ConfigService:
             has_api_key=False
         )
 
-    def get_default_project_config(self) -> Dict[str, Any]:
+    def get_default_project_config(self, user_id: Optional[str] = None) -> Dict[str, Any]:
         """Get default project config when backend is unavailable."""
-        config = project_manager.get_project_config()
+        config = project_manager.get_project_config(user_id)
         return {
             'projectRoot': config.project_root if config else str(settings.project_root_path)
         }
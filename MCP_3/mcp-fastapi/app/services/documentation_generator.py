@@ -1,11 +1,16 @@
 """AI-powered documentation and PRD generation service."""
+import asyncio
 import json
-from typing import Dict, List, Any, Optional
+import logging
+from typing import Awaitable, Callable, Dict, List, Any, Optional
 from datetime import datetime
 
+from app.models import ProviderConfig
 from app.services.project_analyzer import ProjectMetadata, ProjectType
 from app.services.config_service import config_service
 
+logger = logging.getLogger(__name__)
+
 
 class DocumentationGenerator:
     """Service for generating comprehensive project documentation using AI."""
@@ -20,19 +25,25 @@ class DocumentationGenerator:
             "testing_plan": self._get_testing_plan_template()
         }
 
-    async def generate_prd(self, metadata: ProjectMetadata, user_id: str) -> Dict[str, Any]:
+    async def generate_prd(
+        self,
+        metadata: ProjectMetadata,
+        user_id: str,
+        provider_config: Optional[ProviderConfig] = None
+    ) -> Dict[str, Any]:
         """
         Generate a comprehensive Product Requirements Document.
 
         Args:
             metadata: Project metadata
             user_id: User ID for context
+            provider_config: The user's provider config, fetched if not given
 
         Returns:
             PRD document
         """
         # Get AI analysis (placeholder - would call actual AI service)
-        ai_analysis = await self._get_ai_analysis(metadata, "prd", user_id)
+        ai_analysis = await self._get_ai_analysis(metadata, "prd", user_id, provider_config)
 
         prd = {
             "title": f"Product Requirements Document - {metadata.project_type.value.title()} Project",
@@ -60,18 +71,24 @@ class DocumentationGenerator:
 
         return prd
 
-    async def generate_feature_list(self, metadata: ProjectMetadata, user_id: str) -> Dict[str, Any]:
+    async def generate_feature_list(
+        self,
+        metadata: ProjectMetadata,
+        user_id: str,
+        provider_config: Optional[ProviderConfig] = None
+    ) -> Dict[str, Any]:
         """
         Generate a comprehensive feature list.
 
         Args:
             metadata: Project metadata
             user_id: User ID for context
+            provider_config: The user's provider config, fetched if not given
 
         Returns:
             Feature list document
         """
-        ai_analysis = await self._get_ai_analysis(metadata, "features", user_id)
+        ai_analysis = await self._get_ai_analysis(metadata, "features", user_id, provider_config)
 
         features = {
             "title": f"Feature Analysis - {metadata.project_type.value.title()} Project",
@@ -86,13 +103,19 @@ class DocumentationGenerator:
 
         return features
 
-    async def generate_tech_summary(self, metadata: ProjectMetadata, user_id: str) -> Dict[str, Any]:
+    async def generate_tech_summary(
+        self,
+        metadata: ProjectMetadata,
+        user_id: str,
+        provider_config: Optional[ProviderConfig] = None
+    ) -> Dict[str, Any]:
         """
         Generate a technical summary.
 
         Args:
             metadata: Project metadata
             user_id: User ID for context
+            provider_config: The user's provider config, fetched if not given
 
         Returns:
             Technical summary document
@@ -117,18 +140,24 @@ class DocumentationGenerator:
 
         return tech_summary
 
-    async def generate_health_report(self, metadata: ProjectMetadata, user_id: str) -> Dict[str, Any]:
+    async def generate_health_report(
+        self,
+        metadata: ProjectMetadata,
+        user_id: str,
+        provider_config: Optional[ProviderConfig] = None
+    ) -> Dict[str, Any]:
         """
         Generate a project health report.
 
         Args:
             metadata: Project metadata
             user_id: User ID for context
+            provider_config: The user's provider config, fetched if not given
 
         Returns:
             Health report document
         """
-        ai_analysis = await self._get_ai_analysis(metadata, "health", user_id)
+        ai_analysis = await self._get_ai_analysis(metadata, "health", user_id, provider_config)
 
         health_report = {
             "title": f"Project Health Report - {metadata.project_type.value.title()} Project",
@@ -149,18 +178,24 @@ class DocumentationGenerator:
 
         return health_report
 
-    async def generate_improvements(self, metadata: ProjectMetadata, user_id: str) -> Dict[str, Any]:
+    async def generate_improvements(
+        self,
+        metadata: ProjectMetadata,
+        user_id: str,
+        provider_config: Optional[ProviderConfig] = None
+    ) -> Dict[str, Any]:
         """
         Generate improvement recommendations.
 
         Args:
             metadata: Project metadata
             user_id: User ID for context
+            provider_config: The user's provider config, fetched if not given
 
         Returns:
             Improvements document
         """
-        ai_analysis = await self._get_ai_analysis(metadata, "improvements", user_id)
+        ai_analysis = await self._get_ai_analysis(metadata, "improvements", user_id, provider_config)
 
         improvements = {
             "title": f"Improvement Recommendations - {metadata.project_type.value.title()} Project",
@@ -176,18 +211,24 @@ class DocumentationGenerator:
 
         return improvements
 
-    async def generate_testing_plan(self, metadata: ProjectMetadata, user_id: str) -> Dict[str, Any]:
+    async def generate_testing_plan(
+        self,
+        metadata: ProjectMetadata,
+        user_id: str,
+        provider_config: Optional[ProviderConfig] = None
+    ) -> Dict[str, Any]:
         """
         Generate a comprehensive testing plan.
 
         Args:
             metadata: Project metadata
             user_id: User ID for context
+            provider_config: The user's provider config, fetched if not given
 
         Returns:
             Testing plan document
         """
-        ai_analysis = await self._get_ai_analysis(metadata, "testing", user_id)
+        ai_analysis = await self._get_ai_analysis(metadata, "testing", user_id, provider_config)
 
         testing_plan = {
             "title": f"Testing Plan - {metadata.project_type.value.title()} Project",
@@ -205,18 +246,24 @@ class DocumentationGenerator:
 
         return testing_plan
 
-    async def generate_codebase_summary(self, metadata: ProjectMetadata, user_id: str) -> Dict[str, Any]:
+    async def generate_codebase_summary(
+        self,
+        metadata: ProjectMetadata,
+        user_id: str,
+        provider_config: Optional[ProviderConfig] = None
+    ) -> Dict[str, Any]:
         """
         Generate a comprehensive codebase summary.
 
         Args:
             metadata: Project metadata
             user_id: User ID for context
+            provider_config: The user's provider config, fetched if not given
 
         Returns:
             Codebase summary document
         """
-        ai_analysis = await self._get_ai_analysis(metadata, "codebase", user_id)
+        ai_analysis = await self._get_ai_analysis(metadata, "codebase", user_id, provider_config)
 
         summary = {
             "title": f"Codebase Summary - {metadata.project_type.value.title()} Project",
@@ -234,13 +281,84 @@ class DocumentationGenerator:
 
         return summary
 
-    async def _get_ai_analysis(self, metadata: ProjectMetadata, analysis_type: str, user_id: str) -> Dict[str, Any]:
+    async def generate_all(
+        self,
+        metadata: ProjectMetadata,
+        user_id: str,
+        on_progress: Optional[Callable[[str, str, Optional[str]], None]] = None
+    ) -> Dict[str, Any]:
+        """
+        Generate every document concurrently.
+
+        The provider config is fetched once and shared by all generators. A
+        generator that fails does not affect the others.
+
+        Args:
+            metadata: Project metadata
+            user_id: User ID for context
+            on_progress: Called with (document name, "running" | "completed" |
+                "failed", error message) as each document starts and ends
+
+        Returns:
+            {"documentation": {name: document}, "errors": {name: message},
+            "generated_at": timestamp}
+        """
+        provider_config = await config_service.get_provider_config(user_id)
+        documentation = {}
+        errors = {}
+
+        async def run(name: str, generate: Callable[..., Awaitable[Dict[str, Any]]]) -> None:
+            if on_progress:
+                on_progress(name, "running", None)
+            try:
+                documentation[name] = await generate(metadata, user_id, provider_config)
+            except Exception as e:
+                logger.error(f"Generating {name} failed: {e}")
+                errors[name] = str(e) or type(e).__name__
+                if on_progress:
+                    on_progress(name, "failed", errors[name])
+            else:
+                if on_progress:
+                    on_progress(name, "completed", None)
+
+        generators = self.document_generators()
+        await asyncio.gather(*(run(name, generate) for name, generate in generators.items()))
+
+        # Keep the documents in generator order, not completion order
+        documentation = {name: documentation[name] for name in generators if name in documentation}
+
+        return {
+            "documentation": documentation,
+            "errors": errors,
+            "generated_at": datetime.now().isoformat()
+        }
+
+    def document_generators(self) -> Dict[str, Callable[..., Awaitable[Dict[str, Any]]]]:
+        """The generators run by generate_all, by document name."""
+        return {
+            "prd": self.generate_prd,
+            "features": self.generate_feature_list,
+            "tech_summary": self.generate_tech_summary,
+            "health_report": self.generate_health_report,
+            "improvements": self.generate_improvements,
+            "testing_plan": self.generate_testing_plan,
+            "codebase_summary": self.generate_codebase_summary
+        }
+
+    async def _get_ai_analysis(
+        self,
+        metadata: ProjectMetadata,
+        analysis_type: str,
+        user_id: str,
+        provider_config: Optional[ProviderConfig] = None
+    ) -> Dict[str, Any]:
         """
         Get AI-powered analysis for different aspects of the project.
         This is a placeholder that would call an actual AI service.
         """
         # Get provider config to determine if we can use AI
-        provider_config = await config_service.get_provider_config(user_id)
+        if provider_config is None:
+            provider_config = await config_service.get_provider_config(user_id)
 
         if not provider_config.has_api_key:
             # Return basic analysis without AI
@@ -1,15 +1,44 @@
 """Execution service for running shell commands safely."""
-from typing import List, Optional
+import asyncio
+from contextlib import aclosing
+from typing import Any, AsyncIterator, Dict, List, Optional
 
 from app.config import settings
 from app.models import ExecResult
 from app.project_manager import project_manager
-from app.utils.subprocess_utils import run_command_sync, DangerousCommandError
+from app.utils.subprocess_utils import (
+    run_command_async, stream_command_async, DangerousCommandError
+)
 
 
 class ExecutionService:
     """Service for safe command execution within project boundaries."""
 
+    COMMAND_TIMEOUT = 30  # seconds
+
+    def _get_exec_root(self, command: str, user_id: Optional[str] = None) -> str:
+        """
+        Validate that a command may run and return the directory to run it in.
+
+        Raises:
+            ValueError: If exec is not allowed, the command is empty or the
+                project is not configured
+        """
+        # Check if execution is allowed
+        if not settings.senscoder_allow_exec:
+            raise ValueError("Command execution is disabled in server configuration")
+
+        # Validate command
+        if not command or not command.strip():
+            raise ValueError("Command cannot be empty")
+
+        # Get project root from project manager
+        config = project_manager.get_project_config(user_id)
+        if not config:
+            raise ValueError("Project not configured. Please run the wizard at /wizard to set up your project.")
+
+        return str(config.project_root)
+
     async def execute_command(
         self,
         command: str,
@@ -31,45 +60,79 @@ class ExecutionService:
             ValueError: If exec is not allowed or command is invalid
             DangerousCommandError: If command is deemed dangerous
         """
-        # Check if execution is allowed
-        if not settings.senscoder_allow_exec:
-            raise ValueError("Command execution is disabled in server configuration")
-
-        # Validate command
-        if not command or not command.strip():
-            raise ValueError("Command cannot be empty")
-
-        # Get project root from project manager
-        config = project_manager.get_project_config()
-        if not config:
-            raise ValueError("Project not configured. Please run the wizard at /wizard to set up your project.")
-
-        project_root = config.project_root
+        project_root = self._get_exec_root(command, user_id)
 
         # Execute command in project root
         try:
-            stdout, stderr, exit_code = run_command_sync(
+            result = await run_command_async(
                 command,
                 args,
-                cwd=str(project_root),
-                timeout=30  # 30 second timeout
+                cwd=project_root,
+                timeout=self.COMMAND_TIMEOUT
             )
 
             return ExecResult(
-                stdout=stdout,
-                stderr=stderr,
-                exit_code=exit_code
+                stdout=result.stdout,
+                stderr=result.stderr,
+                exit_code=result.exit_code,
+                truncated=result.truncated
             )
 
         except DangerousCommandError as e:
             raise ValueError(f"Command blocked for safety: {e}")
-        except TimeoutError:
+        except asyncio.TimeoutError:
             raise ValueError("Command execution timed out")
         except FileNotFoundError:
             raise ValueError(f"Command not found: {command}")
         except Exception as e:
             raise ValueError(f"Command execution failed: {e}")
 
+    async def stream_command(
+        self,
+        command: str,
+        args: List[str],
+        user_id: Optional[str] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Execute a command and stream its output line by line.
+
+        Args:
+            command: Command to execute
+            args: Command arguments
+            user_id: User ID for context
+
+        Yields:
+            {"stream": "stdout"|"stderr", "line": ...} for each output line,
+            {"stream": ..., "truncated": true} if a stream hits the output
+            cap, then {"exit_code": ...} once the process has finished
+
+        Raises:
+            ValueError: If exec is not allowed, the command is invalid or fails
+        """
+        project_root = self._get_exec_root(command, user_id)
+
+        try:
+            async with aclosing(stream_command_async(
+                command,
+                args,
+                cwd=project_root,
+                timeout=self.COMMAND_TIMEOUT
+            )) as output:
+                async for stream, data in output:
+                    if stream == 'exit':
+                        yield {'exit_code': data}
+                    elif stream == 'truncated':
+                        yield {'stream': data, 'truncated': True}
+                    else:
+                        yield {'stream': stream, 'line': data}
+
+        except DangerousCommandError as e:
+            raise ValueError(f"Command blocked for safety: {e}")
+        except asyncio.TimeoutError:
+            raise ValueError("Command execution timed out")
+        except FileNotFoundError:
+            raise ValueError(f"Command not found: {command}")
+
 
 # Global service instance
-exec_service = ExecutionService()
\ No newline at end of file
+exec_service = ExecutionService()
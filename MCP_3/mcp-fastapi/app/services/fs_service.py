@@ -1,33 +1,88 @@
 """File system service for safe file operations."""
+import asyncio
+import codecs
+import mmap
 import os
 from pathlib import Path
-from typing import List, Optional
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Pattern, Sequence, Tuple
 
-from app.config import settings
 from app.models import FileEntry
-from app.utils.path_utils import resolve_safe_path, is_text_file, get_file_size_mb
+from app.utils.cache import LRUCache
+from app.utils.ignore import IgnoreFile, IgnoreStack, compile_glob
+from app.utils.line_index import LineIndex
+from app.utils.project_tree import ProjectTree
+from app.utils.path_utils import resolve_safe_path, is_text_file
 
 
 class FileSystemService:
     """Service for safe file system operations within project boundaries."""
 
-    MAX_FILE_SIZE_MB = 1.0  # 1MB limit for reading files
+    MAX_FILE_SIZE_MB = 1.0  # 1MB limit for reading files (and per ranged read)
+    STREAM_CHUNK_SIZE = 64 * 1024  # 64KB chunks for streamed reads
+    LINE_INDEX_BLOCK_SIZE = 64 * 1024  # bytes per line index entry
+    LINE_INDEX_CACHE_BYTES = 32 * 1024 * 1024
+    CONTENT_CACHE_BYTES = 64 * 1024 * 1024  # memory budget for cached file contents
+    MAX_READ_FILES = 100  # paths per read_files call
+    MAX_READ_FILES_CHARS = 8 * 1024 * 1024  # total content per read_files call
+    DEFAULT_WALK_LIMIT = 1000  # entries per recursive listing page
+    MAX_WALK_LIMIT = 10000
+    MAX_WALK_SCANNED = 100000  # directory entries examined per recursive listing call
 
-    async def read_file(self, relative_path: str, user_id: Optional[str] = None) -> dict:
+    def __init__(self):
+        # Contents of recently read files: path -> (mtime_ns, size, content)
+        self._contents = LRUCache(
+            max_entries=4096,
+            max_bytes=self.CONTENT_CACHE_BYTES,
+            sizeof=lambda entry: entry[1]
+        )
+        # Line indexes of recently paged files: path -> (mtime_ns, size, LineIndex)
+        self._line_indexes = LRUCache(
+            max_entries=256,
+            max_bytes=self.LINE_INDEX_CACHE_BYTES,
+            sizeof=lambda entry: entry[2].nbytes
+        )
+        # Live snapshots of watched project trees, maintained by the watcher service
+        self._trees: Dict[str, ProjectTree] = {}
+
+    def use_tree(self, project_root: Path, tree: Optional[ProjectTree]) -> None:
+        """Serve a project's gitignore-respecting listings from a live tree snapshot (None to stop)."""
+        if tree is None:
+            self._trees.pop(str(project_root), None)
+        else:
+            self._trees[str(project_root)] = tree
+
+    def project_tree(self, project_root: Path) -> Optional[ProjectTree]:
+        """The live tree snapshot of a project root, if one is being maintained."""
+        return self._trees.get(str(project_root))
+
+    def invalidate(self, project_root: Path, relative_paths: Optional[List[str]] = None) -> None:
         """
-        Read a file safely within project boundaries.
+        Drop cached data for changed files.
+
+        Cached entries are validated by mtime and size anyway; this frees
+        the memory of stale ones early.
 
         Args:
-            relative_path: Relative path to file
-            user_id: User ID for context
+            project_root: Resolved project root
+            relative_paths: Paths relative to the project root, or None to
+                drop everything
+        """
+        if relative_paths is None:
+            self._contents.clear()
+            self._line_indexes.clear()
+            return
+        for relative_path in relative_paths:
+            key = str(project_root / relative_path)
+            self._contents.pop(key)
+            self._line_indexes.pop(key)
 
-        Returns:
-            Dict with file content and metadata
+    def _resolve_text_file(self, relative_path: str, user_id: Optional[str] = None) -> Path:
+        """
+        Resolve a path to an existing text file within project boundaries.
 
         Raises:
-            ValueError: If path is invalid or file is too large
+            ValueError: If path is invalid or not a text file
             FileNotFoundError: If file doesn't exist
-            PermissionError: If file cannot be read
         """
         # Resolve safe path
         file_path = resolve_safe_path(relative_path, user_id)
@@ -40,28 +95,295 @@ class FileSystemService:
         if not file_path.is_file():
             raise ValueError(f"Path is not a file: {relative_path}")
 
-        # Check file size
-        file_size_mb = get_file_size_mb(file_path)
-        if file_size_mb > self.MAX_FILE_SIZE_MB:
-            raise ValueError(f"File too large ({file_size_mb:.1f}MB > {self.MAX_FILE_SIZE_MB}MB): {relative_path}")
-
         # Check if it's a text file
         if not is_text_file(file_path):
             raise ValueError(f"File is not a text file: {relative_path}")
 
+        return file_path
+
+    async def read_file(
+        self,
+        relative_path: str,
+        user_id: Optional[str] = None,
+        offset: Optional[int] = None,
+        length: Optional[int] = None,
+        start_line: Optional[int] = None,
+        end_line: Optional[int] = None
+    ) -> dict:
+        """
+        Read a file safely within project boundaries.
+
+        Without a range the whole file is read, subject to MAX_FILE_SIZE_MB.
+        With a byte range (offset/length) or line range (start_line/end_line)
+        the file is memory-mapped and only the requested part is read, so
+        files of any size can be paged through. Each ranged read returns at
+        most MAX_FILE_SIZE_MB plus the position to continue from.
+
+        Args:
+            relative_path: Relative path to file
+            user_id: User ID for context
+            offset: Byte offset to start reading at
+            length: Number of bytes to read
+            start_line: First line to read (1-based)
+            end_line: Last line to read (inclusive)
+
+        Returns:
+            Dict with file content and metadata
+
+        Raises:
+            ValueError: If path or range is invalid or file is too large
+            FileNotFoundError: If file doesn't exist
+            PermissionError: If file cannot be read
+        """
+        file_path = self._resolve_text_file(relative_path, user_id)
+
+        byte_range = offset is not None or length is not None
+        line_range = start_line is not None or end_line is not None
+        if byte_range and line_range:
+            raise ValueError("Use either offset/length or start_line/end_line, not both")
+        if byte_range or line_range:
+            try:
+                return await asyncio.to_thread(
+                    self._read_range, file_path, relative_path, offset, length, start_line, end_line
+                )
+            except PermissionError:
+                raise PermissionError(f"Permission denied reading file: {relative_path}")
+
+        content = self._read_text(file_path, relative_path)
+        return {
+            "content": content,
+            "path": relative_path,
+            "size": len(content),
+            "encoding": "utf-8"
+        }
+
+    def _read_text(self, file_path: Path, relative_path: str) -> str:
+        """
+        Read a whole text file, serving it from the content cache when unchanged.
+
+        Cache entries are validated against the file's mtime and size on
+        every lookup.
+
+        Raises:
+            ValueError: If file is too large or not valid UTF-8
+            PermissionError: If file cannot be read
+        """
+        stat = os.stat(file_path)
+        key = str(file_path)
+        cached = self._contents.get(key)
+        if cached and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+            return cached[2]
+
+        # Check file size
+        file_size_mb = stat.st_size / (1024 * 1024)
+        if file_size_mb > self.MAX_FILE_SIZE_MB:
+            raise ValueError(
+                f"File too large ({file_size_mb:.1f}MB > {self.MAX_FILE_SIZE_MB}MB): {relative_path}. "
+                f"Use offset/length or start_line/end_line to read it in parts"
+            )
+
         # Read file content
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
+            with open(file_path, 'rb') as f:
+                raw = f.read()
+            content = raw.decode('utf-8')
         except UnicodeDecodeError:
             raise ValueError(f"File is not valid UTF-8 text: {relative_path}")
         except PermissionError:
             raise PermissionError(f"Permission denied reading file: {relative_path}")
 
+        # Keyed on the stat taken before reading, so a concurrent write
+        # invalidates the entry on the next lookup
+        self._contents.put(key, (stat.st_mtime_ns, len(raw), content))
+        return content
+
+    async def read_files(self, relative_paths: List[str], user_id: Optional[str] = None) -> dict:
+        """
+        Read several files safely within project boundaries.
+
+        Failures are reported per file instead of failing the whole call.
+        Files are served from the content cache when unchanged.
+
+        Args:
+            relative_paths: Relative paths to files (at most MAX_READ_FILES)
+            user_id: User ID for context
+
+        Returns:
+            Dict with one entry per path: content on success, error otherwise
+
+        Raises:
+            ValueError: If too many paths are given
+        """
+        if len(relative_paths) > self.MAX_READ_FILES:
+            raise ValueError(f"Too many paths ({len(relative_paths)} > {self.MAX_READ_FILES})")
+
+        return await asyncio.to_thread(self._read_files, list(dict.fromkeys(relative_paths)), user_id)
+
+    def _read_files(self, relative_paths: List[str], user_id: Optional[str]) -> dict:
+        """Read several files (blocking)."""
+        files = []
+        total = 0
+
+        for relative_path in relative_paths:
+            try:
+                if total >= self.MAX_READ_FILES_CHARS:
+                    raise ValueError("Batch size limit reached; read this file separately")
+
+                file_path = self._resolve_text_file(relative_path, user_id)
+                content = self._read_text(file_path, relative_path)
+                total += len(content)
+                files.append({
+                    "path": relative_path,
+                    "content": content,
+                    "size": len(content),
+                    "encoding": "utf-8"
+                })
+            except (ValueError, FileNotFoundError, PermissionError) as e:
+                files.append({"path": relative_path, "error": str(e)})
+
         return {
+            "files": files,
+            "count": len(files),
+            "errors": sum(1 for entry in files if "error" in entry)
+        }
+
+    def _get_line_index(self, file_path: Path, mm: mmap.mmap) -> LineIndex:
+        """Get the cached line index of a mapped file, rebuilding it if the file changed."""
+        stat = os.stat(file_path)
+        key = str(file_path)
+        cached = self._line_indexes.get(key)
+        if cached and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size and cached[2].size == len(mm):
+            return cached[2]
+
+        index = LineIndex.build(mm, self.LINE_INDEX_BLOCK_SIZE)
+        self._line_indexes.put(key, (stat.st_mtime_ns, stat.st_size, index))
+        return index
+
+    @staticmethod
+    def _align_utf8(mm: mmap.mmap, start: int, end: int) -> Tuple[int, int]:
+        """Move a byte range off UTF-8 continuation bytes so no character is split."""
+        size = len(mm)
+        while start < size and start < end and mm[start] & 0xC0 == 0x80:
+            start += 1
+        while start < end < size and mm[end] & 0xC0 == 0x80:
+            end -= 1
+        return start, end
+
+    def _read_range(
+        self,
+        file_path: Path,
+        relative_path: str,
+        offset: Optional[int],
+        length: Optional[int],
+        start_line: Optional[int],
+        end_line: Optional[int]
+    ) -> dict:
+        """Read a byte or line range of a file through mmap (blocking)."""
+        max_bytes = int(self.MAX_FILE_SIZE_MB * 1024 * 1024)
+        line_mode = start_line is not None or end_line is not None
+
+        start_line = 1 if start_line is None else start_line
+        offset = offset or 0
+        if offset < 0 or (length is not None and length < 1):
+            raise ValueError("offset must be >= 0 and length >= 1")
+        if start_line < 1 or (end_line is not None and end_line < start_line):
+            raise ValueError("start_line must be >= 1 and end_line >= start_line")
+
+        with open(file_path, 'rb') as f:
+            # Empty files cannot be mapped
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if os.fstat(f.fileno()).st_size else None
+            try:
+                size = len(mm) if mm else 0
+                result: Dict[str, Any] = {"path": relative_path, "encoding": "utf-8", "file_size": size}
+
+                if mm is None:
+                    start = end = 0
+                    content = ""
+                    if line_mode:
+                        result.update({"start_line": start_line, "end_line": None, "total_lines": 0, "next_line": None})
+                elif line_mode:
+                    index = self._get_line_index(file_path, mm)
+                    start, end = index.line_range(mm, start_line, end_line or index.line_count)
+                    if end - start > max_bytes:
+                        # Stop at the last whole line that fits, or mid-line if none does
+                        cut = mm.rfind(b'\n', start, start + max_bytes)
+                        end = cut + 1 if cut != -1 else self._align_utf8(mm, start, start + max_bytes)[1]
+                    content = mm[start:end].decode('utf-8', errors='replace')
+                    lines = content.count('\n') + (1 if content and not content.endswith('\n') else 0)
+                    result.update({
+                        "start_line": start_line,
+                        "end_line": start_line + lines - 1 if lines else None,
+                        "total_lines": index.line_count,
+                        "next_line": start_line + lines if end < size and content.endswith('\n') else None
+                    })
+                else:
+                    start = min(offset, size)
+                    end = min(start + min(length or max_bytes, max_bytes), size)
+                    start, end = self._align_utf8(mm, start, end)
+                    content = mm[start:end].decode('utf-8', errors='replace')
+            finally:
+                if mm is not None:
+                    mm.close()
+
+        result.update({
             "content": content,
-            "path": relative_path,
             "size": len(content),
+            "offset": start,
+            "length": end - start,
+            "next_offset": end if end < size else None
+        })
+        return result
+
+    async def stream_file(
+        self,
+        relative_path: str,
+        user_id: Optional[str] = None,
+        chunk_size: Optional[int] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream a text file in chunks within project boundaries.
+
+        Unlike read_file, the whole file is never held in memory, so the
+        size limit does not apply.
+
+        Args:
+            relative_path: Relative path to file
+            user_id: User ID for context
+            chunk_size: Bytes to read per chunk (defaults to STREAM_CHUNK_SIZE)
+
+        Yields:
+            {"content": ..., "offset": ...} for each chunk, where offset is the
+            byte offset of the chunk in the file, then a final
+            {"path": ..., "size": ..., "encoding": "utf-8"} summary
+
+        Raises:
+            ValueError: If path is invalid or file is not UTF-8 text
+            FileNotFoundError: If file doesn't exist
+            PermissionError: If file cannot be read
+        """
+        file_path = self._resolve_text_file(relative_path, user_id)
+        chunk_size = chunk_size or self.STREAM_CHUNK_SIZE
+        decoder = codecs.getincrementaldecoder('utf-8')()
+
+        offset = 0
+        try:
+            with open(file_path, 'rb') as f:
+                while True:
+                    raw = f.read(chunk_size)
+                    text = decoder.decode(raw, final=not raw)
+                    if text:
+                        yield {"content": text, "offset": offset}
+                    if not raw:
+                        break
+                    offset += len(raw)
+        except UnicodeDecodeError:
+            raise ValueError(f"File is not valid UTF-8 text: {relative_path}")
+        except PermissionError:
+            raise PermissionError(f"Permission denied reading file: {relative_path}")
+
+        yield {
+            "path": relative_path,
+            "size": offset,
             "encoding": "utf-8"
         }
 
@@ -98,6 +420,8 @@ class FileSystemService:
                 f.write(content)
         except PermissionError:
             raise PermissionError(f"Permission denied writing file: {relative_path}")
+        finally:
+            self._contents.pop(str(file_path))
 
         return {
             "success": True,
@@ -126,6 +450,7 @@ class FileSystemService:
         """
         # Resolve safe path
         dir_path = resolve_safe_path(relative_path, user_id)
+        project_root = resolve_safe_path(".", user_id)
 
         # Check if directory exists
         if not dir_path.exists():
@@ -136,14 +461,17 @@ class FileSystemService:
 
         entries = []
         try:
-            for item in sorted(dir_path.iterdir()):
+            # scandir reports the entry type without a stat call; only files need one for their size
+            with os.scandir(dir_path) as it:
+                items = sorted(it, key=lambda item: item.name)
+            for item in items:
                 try:
-                    stat = item.stat()
+                    is_dir = item.is_dir()
                     entry = FileEntry(
                         name=item.name,
-                        path=str(item.relative_to(settings.project_root_path)),
-                        is_dir=item.is_dir(),
-                        size=stat.st_size if item.is_file() else None
+                        path=str(Path(item.path).relative_to(project_root)),
+                        is_dir=is_dir,
+                        size=item.stat().st_size if not is_dir and item.is_file() else None
                     )
                     entries.append(entry)
                 except (OSError, PermissionError):
@@ -154,6 +482,215 @@ class FileSystemService:
 
         return entries
 
+    async def walk_files(
+        self,
+        relative_path: str = ".",
+        user_id: Optional[str] = None,
+        max_depth: Optional[int] = None,
+        include: Optional[List[str]] = None,
+        exclude: Optional[List[str]] = None,
+        respect_gitignore: bool = True,
+        limit: int = DEFAULT_WALK_LIMIT,
+        cursor: Optional[str] = None,
+        compact: bool = False
+    ) -> dict:
+        """
+        List a directory tree recursively within project boundaries.
+
+        Entries are returned depth-first with names sorted at each level,
+        which is the lexicographic order of their path components. The
+        cursor is the last path examined, so a follow-up call skips every
+        subtree that sorts before it without reading it. Symlinked
+        directories are listed but not followed.
+
+        Args:
+            relative_path: Relative path to directory (defaults to project root)
+            user_id: User ID for context
+            max_depth: Maximum depth to descend (1 lists direct children only)
+            include: Globs a file must match to be listed (directories are
+                still traversed); patterns without "/" match the file name
+            exclude: Globs of files and directories to skip entirely
+            respect_gitignore: Skip .git and paths ignored by .gitignore files
+            limit: Maximum number of entries to return
+            cursor: next_cursor from the previous page
+            compact: Return entries as [path, is_dir, size] arrays
+
+        Returns:
+            Dict with entries, count and next_cursor (None when done)
+
+        Raises:
+            ValueError: If path or arguments are invalid
+            FileNotFoundError: If directory doesn't exist
+        """
+        dir_path = resolve_safe_path(relative_path, user_id)
+        if not dir_path.exists():
+            raise FileNotFoundError(f"Directory not found: {relative_path}")
+        if not dir_path.is_dir():
+            raise ValueError(f"Path is not a directory: {relative_path}")
+        if max_depth is not None and max_depth < 1:
+            raise ValueError("max_depth must be >= 1")
+
+        limit = max(1, min(int(limit), self.MAX_WALK_LIMIT))
+        project_root = resolve_safe_path(".", user_id)
+
+        return await asyncio.to_thread(
+            self._walk,
+            project_root,
+            dir_path,
+            max_depth,
+            [compile_glob(pattern) for pattern in include or []],
+            [compile_glob(pattern) for pattern in exclude or []],
+            respect_gitignore,
+            limit,
+            tuple(cursor.split('/')) if cursor else None,
+            compact
+        )
+
+    def iter_tree(
+        self,
+        project_root: Path,
+        dir_path: Path,
+        max_depth: Optional[int] = None,
+        exclude: Sequence[Pattern] = (),
+        respect_gitignore: bool = True,
+        cursor: Optional[Tuple[str, ...]] = None
+    ) -> Iterator[Tuple[os.DirEntry, Tuple[str, ...], str, bool]]:
+        """
+        Walk a directory tree depth-first in sorted order (blocking).
+
+        Ignored and excluded directories are pruned without being read, and
+        symlinked directories are not followed. With a cursor (a path below
+        dir_path as a tuple of components), everything up to and including
+        it is skipped; only directories on the way to it are read.
+
+        Args:
+            project_root: Resolved project root
+            dir_path: Resolved directory to walk
+            max_depth: Maximum depth to descend (1 = direct children only)
+            exclude: Compiled globs matched against paths below dir_path
+            respect_gitignore: Skip .git and paths ignored by .gitignore files
+            cursor: Resume after this path
+
+        Yields:
+            (entry, path components below dir_path, path relative to the
+            project root, is_dir) tuples
+        """
+        root_rel = dir_path.relative_to(project_root).as_posix()
+        root_rel = '' if root_rel == '.' else root_rel
+
+        # .gitignore files between the project root and the listing root apply too
+        ignores = IgnoreStack.for_directory(project_root, root_rel) if respect_gitignore else IgnoreStack()
+
+        def children(path: str) -> List[os.DirEntry]:
+            try:
+                with os.scandir(path) as it:
+                    return sorted(it, key=lambda item: item.name, reverse=True)
+            except OSError:
+                return []
+
+        # Stack of (path components, remaining children popped in sorted order, ignore rules in effect)
+        stack = [((), children(str(dir_path)), ignores)]
+
+        while stack:
+            parts, pending, ignores = stack[-1]
+            if not pending:
+                stack.pop()
+                continue
+
+            item = pending.pop()
+            item_parts = parts + (item.name,)
+            before_cursor = cursor is not None and item_parts <= cursor
+            if before_cursor and cursor[:len(item_parts)] != item_parts:
+                # Already returned, along with everything below it
+                continue
+
+            rel_in_root = '/'.join(item_parts)
+            rel_path = f"{root_rel}/{rel_in_root}" if root_rel else rel_in_root
+            try:
+                is_dir = item.is_dir()
+                is_real_dir = is_dir and not item.is_symlink()
+            except OSError:
+                continue
+
+            if respect_gitignore and ((is_dir and item.name == '.git') or ignores.is_ignored(rel_path, is_dir)):
+                continue
+            if any(pattern.match(rel_in_root) for pattern in exclude):
+                continue
+
+            if not before_cursor:
+                yield item, item_parts, rel_path, is_dir
+
+            if is_real_dir and (max_depth is None or len(item_parts) < max_depth):
+                sub_ignores = ignores.push(IgnoreFile.load(Path(item.path), rel_path)) if respect_gitignore else ignores
+                stack.append((item_parts, children(item.path), sub_ignores))
+
+    def _walk(
+        self,
+        project_root: Path,
+        dir_path: Path,
+        max_depth: Optional[int],
+        include: List[Pattern],
+        exclude: List[Pattern],
+        respect_gitignore: bool,
+        limit: int,
+        cursor: Optional[Tuple[str, ...]],
+        compact: bool
+    ) -> dict:
+        """Recursive listing (blocking). See walk_files."""
+        entries: List[Any] = []
+        scanned = 0
+        last_scanned: Optional[str] = None
+        done = True
+
+        tree = self.project_tree(project_root) if respect_gitignore else None
+        if tree is not None:
+            root_rel = dir_path.relative_to(project_root).as_posix()
+            items = (
+                (name, item_parts, rel_path, entry.is_dir, entry)
+                for name, item_parts, rel_path, entry in tree.iter_tree(
+                    '' if root_rel == '.' else root_rel, max_depth, exclude, cursor
+                )
+            )
+        else:
+            items = (
+                (item.name, item_parts, rel_path, is_dir, item)
+                for item, item_parts, rel_path, is_dir in self.iter_tree(
+                    project_root, dir_path, max_depth, exclude, respect_gitignore, cursor
+                )
+            )
+
+        for name, item_parts, rel_path, is_dir, item in items:
+            if scanned >= self.MAX_WALK_SCANNED or len(entries) >= limit:
+                done = False
+                break
+            scanned += 1
+            last_scanned = '/'.join(item_parts)
+
+            if include and (is_dir or not any(pattern.match(last_scanned) for pattern in include)):
+                continue
+            if is_dir:
+                size = None
+            elif tree is not None:
+                size = item.size
+            else:
+                try:
+                    size = item.stat().st_size
+                except OSError:
+                    size = None
+            if compact:
+                entries.append([rel_path, is_dir, size])
+            else:
+                entries.append({"name": name, "path": rel_path, "is_dir": is_dir, "size": size})
+
+        result: Dict[str, Any] = {
+            "entries": entries,
+            "count": len(entries),
+            "next_cursor": None if done else last_scanned
+        }
+        if compact:
+            result["columns"] = ["path", "is_dir", "size"]
+        return result
+
 
 # Global service instance
 fs_service = FileSystemService()
\ No newline at end of file
@@ -1,16 +1,142 @@
 """Git service for safe git operations within project boundaries."""
+import asyncio
+import os
 import re
-from typing import Dict, List, Optional, Any
+import time
+from contextlib import aclosing
+from dataclasses import dataclass
+from pathlib import PurePosixPath
+from typing import Any, AsyncIterator, Dict, List, Optional, Union
 
 from app.config import settings
 from app.project_manager import project_manager
-from app.utils.subprocess_utils import run_command_sync, DangerousCommandError
+from app.utils.cache import LRUCache
+from app.services.watcher_service import watcher_service
+from app.utils.git_batch import GitCatFile
+from app.utils.project_state import project_states
+from app.utils.subprocess_utils import (
+    run_command_async, stream_command_async, DangerousCommandError
+)
+
+
+@dataclass
+class _RepoState:
+    """What the git service keeps for one repository root."""
+    cat_file: Optional[GitCatFile] = None
+    git_dir: Optional[str] = None
+    status: Optional[Dict[str, Any]] = None  # last git_status result with its fingerprint
+    worktree_generation: int = 0
+
+    @property
+    def nbytes(self) -> int:
+        return 200 * len(self.status['result']['entries']) if self.status else 0
+
+    async def close(self) -> None:
+        if self.cat_file is not None:
+            await self.cat_file.close()
 
 
 class GitService:
-    """Service for safe git operations within project boundaries."""
+    """
+    Service for safe git operations within project boundaries.
+
+    Per-repository state (persistent cat-file processes, cached status) is
+    held in the shared per-project state cache, so it is released when a
+    project has not been used for a while.
+    """
 
     ALLOWED_SUBCOMMANDS = {'status', 'log', 'diff', 'branch', 'remote'}
+    COMMAND_TIMEOUT = 30  # seconds
+    MAX_BLOB_SIZE = 1024 * 1024  # same 1MB limit as fs_service.read_file
+    DEFAULT_LOG_PAGE_SIZE = 50
+    MAX_LOG_PAGE_SIZE = 500
+    DEFAULT_DIFF_MAX_BYTES = 256 * 1024
+    DEFAULT_DIFF_MAX_LINES = 5000
+    MAX_DIFF_BYTES = 5 * 1024 * 1024
+
+    # NUL-separated fields, one \x1e-prefixed record per commit
+    LOG_FIELDS = [
+        ('hash', '%H'), ('parents', '%P'),
+        ('author_name', '%an'), ('author_email', '%ae'), ('author_time', '%at'),
+        ('committer_name', '%cn'), ('committer_email', '%ce'), ('committer_time', '%ct'),
+        ('subject', '%s'), ('body', '%b'),
+    ]
+    LOG_FORMAT = '%x1e' + ''.join(f'{code}%x00' for _, code in LOG_FIELDS)
+
+    def __init__(self):
+        # History below a commit never changes, so these never need invalidating
+        self._log_cache = LRUCache(max_entries=256)
+        self._blame_cache = LRUCache(max_entries=64)
+        # Edits made outside the server don't touch the index or HEAD, so
+        # cached status is only trusted this long without an explicit signal
+        self.status_cache_ttl = 2.0
+        # ... or this long when the watcher reports worktree changes as they happen
+        self.watched_status_cache_ttl = 30.0
+
+    def _repo(self, repo_root: str) -> _RepoState:
+        return project_states.get(repo_root, 'git', _RepoState)
+
+    def _get_repo_root(self, user_id: Optional[str] = None) -> str:
+        """
+        Validate that git operations are allowed and return the project root.
+
+        Raises:
+            ValueError: If git is not allowed or the project is not configured
+        """
+        # Check if git operations are allowed
+        if not settings.senscoder_allow_git:
+            raise ValueError("Git operations are disabled in server configuration")
+
+        # Get project root from project manager
+        config = project_manager.get_project_config(user_id)
+        if not config:
+            raise ValueError("Project not configured. Please run the wizard at /wizard to set up your project.")
+
+        return str(config.project_root)
+
+    def _get_git_root(self, subcommand: str, user_id: Optional[str] = None) -> str:
+        """
+        Validate that a git subcommand may run and return the repository root.
+
+        Raises:
+            ValueError: If git is not allowed, the subcommand is unsupported or
+                the project is not configured
+        """
+        # Validate subcommand
+        if subcommand not in self.ALLOWED_SUBCOMMANDS:
+            raise ValueError(f"Unsupported git subcommand: {subcommand}")
+
+        return self._get_repo_root(user_id)
+
+    def _get_cat_file(self, repo_root: str) -> GitCatFile:
+        """Get the persistent object reader for a repository, creating it on first use."""
+        repo = self._repo(repo_root)
+        if repo.cat_file is None:
+            repo.cat_file = GitCatFile(repo_root)
+        return repo.cat_file
+
+    @staticmethod
+    def _validate_rev(rev: str) -> str:
+        """Validate a revision name used to build `<rev>:<path>` object names."""
+        rev = (rev or 'HEAD').strip()
+        if rev.startswith('-') or ':' in rev or any(c.isspace() for c in rev):
+            raise ValueError(f"Invalid revision: {rev}")
+        return rev
+
+    @staticmethod
+    def _normalize_tree_path(path: str) -> str:
+        """Normalize a project-relative path, refusing to leave the project root."""
+        parts = [part for part in PurePosixPath(path or '.').parts if part not in ('', '.')]
+        if PurePosixPath(path or '.').is_absolute() or '..' in parts:
+            raise ValueError(f"Path attempts to escape project root: {path}")
+        return '/'.join(parts)
+
+    async def close(self) -> None:
+        """Shut down all persistent git processes."""
+        for _, repo in project_states.items('git'):
+            cat_file, repo.cat_file = repo.cat_file, None
+            if cat_file is not None:
+                await cat_file.close()
 
     async def execute_git_command(
         self,
@@ -32,31 +158,18 @@ class GitService:
         Raises:
             ValueError: If git is not allowed or subcommand is invalid
         """
-        # Check if git operations are allowed
-        if not settings.senscoder_allow_git:
-            raise ValueError("Git operations are disabled in server configuration")
-
-        # Validate subcommand
-        if subcommand not in self.ALLOWED_SUBCOMMANDS:
-            raise ValueError(f"Unsupported git subcommand: {subcommand}")
-
-        # Get project root from project manager
-        config = project_manager.get_project_config()
-        if not config:
-            raise ValueError("Project not configured. Please run the wizard at /wizard to set up your project.")
-
-        project_root = config.project_root
+        project_root = self._get_git_root(subcommand, user_id)
 
         # Build git command
         git_args = [subcommand] + args
 
         # Execute git command
         try:
-            stdout, stderr, exit_code = run_command_sync(
+            stdout, stderr, exit_code, _ = await run_command_async(
                 'git',
                 git_args,
-                cwd=str(project_root),
-                timeout=30
+                cwd=project_root,
+                timeout=self.COMMAND_TIMEOUT
             )
 
             # Format response based on subcommand
@@ -86,13 +199,938 @@ class GitService:
 
         except DangerousCommandError as e:
             raise ValueError(f"Git command blocked for safety: {e}")
-        except TimeoutError:
+        except asyncio.TimeoutError:
             raise ValueError("Git command execution timed out")
         except FileNotFoundError:
             raise ValueError("Git command not found - ensure git is installed")
         except Exception as e:
             raise ValueError(f"Git command execution failed: {e}")
 
+    async def stream_git_command(
+        self,
+        subcommand: str,
+        args: List[str],
+        user_id: Optional[str] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Execute a git command and stream its results incrementally.
+
+        `log` output is streamed one commit at a time and `diff` output one
+        file at a time. Other subcommands yield a single complete result.
+
+        Args:
+            subcommand: Git subcommand (status, log, diff, etc.)
+            args: Additional git arguments
+            user_id: User ID for context
+
+        Yields:
+            {"commit": {...}} per commit for log, {"file": ..., "diff": ...}
+            per file for diff, then a final summary dict
+
+        Raises:
+            ValueError: If git is not allowed or subcommand is invalid
+        """
+        if subcommand not in ('log', 'diff'):
+            yield await self.execute_git_command(subcommand, args, user_id)
+            return
+
+        project_root = self._get_git_root(subcommand, user_id)
+        git_args = [subcommand] + args
+
+        count = 0
+        current: Optional[Dict[str, Any]] = None
+        stderr_lines: List[str] = []
+        exit_code = 0
+        truncated = False
+
+        try:
+            async with aclosing(stream_command_async(
+                'git',
+                git_args,
+                cwd=project_root,
+                timeout=self.COMMAND_TIMEOUT
+            )) as output:
+                async for stream, data in output:
+                    if stream == 'exit':
+                        exit_code = data
+                        continue
+                    if stream == 'truncated':
+                        truncated = True
+                        continue
+                    if stream == 'stderr':
+                        stderr_lines.append(data)
+                        continue
+
+                    if subcommand == 'log':
+                        line = data.strip()
+                        if not line:
+                            continue
+                        # Commit headers are unindented; message lines are not
+                        if data.startswith('commit '):
+                            if current:
+                                yield {'commit': current}
+                                count += 1
+                            current = {'hash': line.split()[1], 'full': line}
+                        elif current:
+                            current['full'] += '\n' + line
+                    else:
+                        if data.startswith('diff --git '):
+                            if current:
+                                yield current
+                                count += 1
+                            current = {
+                                'file': data.rstrip('\n').rsplit(' b/', 1)[-1],
+                                'diff': data
+                            }
+                        elif current:
+                            current['diff'] += data
+
+        except DangerousCommandError as e:
+            raise ValueError(f"Git command blocked for safety: {e}")
+        except asyncio.TimeoutError:
+            raise ValueError("Git command execution timed out")
+        except FileNotFoundError:
+            raise ValueError("Git command not found - ensure git is installed")
+
+        if current:
+            yield {'commit': current} if subcommand == 'log' else current
+            count += 1
+
+        summary: Dict[str, Any] = {'count': count, 'exit_code': exit_code}
+        if subcommand == 'diff':
+            summary['has_changes'] = count > 0
+        if truncated:
+            summary['truncated'] = True
+        if stderr_lines:
+            summary['error'] = ''.join(stderr_lines)
+        yield summary
+
+    async def read_file_at_revision(
+        self,
+        paths: List[str],
+        rev: str = 'HEAD',
+        user_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Read file contents as of a revision from the object database.
+
+        Args:
+            paths: Paths relative to the project root
+            rev: Commit, branch, tag or any other revision (defaults to HEAD)
+            user_id: User ID for context
+
+        Returns:
+            Dict with one entry per path: content on success, error otherwise
+
+        Raises:
+            ValueError: If git is not allowed or the revision name is invalid
+        """
+        repo_root = self._get_repo_root(user_id)
+        rev = self._validate_rev(rev)
+        cat_file = self._get_cat_file(repo_root)
+
+        files = []
+        for path in paths:
+            try:
+                rel_path = self._normalize_tree_path(path)
+                spec = f"{rev}:./{rel_path}"
+
+                info = await cat_file.info(spec)
+                if info is None:
+                    raise FileNotFoundError(f"File not found at {rev}: {path}")
+                if info.type != 'blob':
+                    raise ValueError(f"Path is not a file at {rev}: {path}")
+                if info.size > self.MAX_BLOB_SIZE:
+                    raise ValueError(f"File too large ({info.size} bytes > {self.MAX_BLOB_SIZE}): {path}")
+
+                _, content = await cat_file.read(info.sha)
+                try:
+                    text = content.decode('utf-8')
+                except UnicodeDecodeError:
+                    raise ValueError(f"File is not valid UTF-8 text: {path}")
+
+                files.append({
+                    'path': path,
+                    'sha': info.sha,
+                    'size': info.size,
+                    'content': text,
+                    'encoding': 'utf-8'
+                })
+            except (ValueError, FileNotFoundError) as e:
+                files.append({'path': path, 'error': str(e)})
+
+        return {
+            'rev': rev,
+            'files': files,
+            'count': len(files)
+        }
+
+    async def list_tree(
+        self,
+        path: str = '',
+        rev: str = 'HEAD',
+        user_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        List a directory as of a revision from the object database.
+
+        Args:
+            path: Directory relative to the project root (defaults to the root)
+            rev: Commit, branch, tag or any other revision (defaults to HEAD)
+            user_id: User ID for context
+
+        Returns:
+            Dict with the tree SHA and its entries
+
+        Raises:
+            ValueError: If git is not allowed, the revision is invalid or the
+                path is not a directory at that revision
+            FileNotFoundError: If the path does not exist at that revision
+        """
+        repo_root = self._get_repo_root(user_id)
+        rev = self._validate_rev(rev)
+        rel_path = self._normalize_tree_path(path)
+        cat_file = self._get_cat_file(repo_root)
+
+        spec = f"{rev}:./{rel_path}"
+        info = await cat_file.info(spec)
+        if info is None:
+            raise FileNotFoundError(f"Path not found at {rev}: {path or '.'}")
+
+        entries = await cat_file.read_tree(info.sha)
+        prefix = f"{rel_path}/" if rel_path else ''
+
+        return {
+            'rev': rev,
+            'path': rel_path or '.',
+            'sha': info.sha,
+            'entries': [
+                {
+                    'name': entry.name,
+                    'path': prefix + entry.name,
+                    'type': entry.type,
+                    'mode': entry.mode,
+                    'sha': entry.sha
+                }
+                for entry in entries
+            ],
+            'count': len(entries)
+        }
+
+    async def resolve_ref(self, ref: str, user_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Resolve a revision (branch, tag, `HEAD~3`, abbreviated SHA...) to an object.
+
+        Args:
+            ref: Revision to resolve
+            user_id: User ID for context
+
+        Returns:
+            Dict with the full SHA and object type
+
+        Raises:
+            ValueError: If git is not allowed or the revision cannot be resolved
+        """
+        repo_root = self._get_repo_root(user_id)
+        info = await self._get_cat_file(repo_root).info(ref.strip())
+        if info is None:
+            raise ValueError(f"Unknown revision: {ref}")
+
+        return {
+            'ref': ref,
+            'sha': info.sha,
+            'type': info.type
+        }
+
+    async def _resolve_commit(self, repo_root: str, rev: str) -> str:
+        """Resolve a revision to the full SHA of a commit."""
+        rev = self._validate_rev(rev)
+        info = await self._get_cat_file(repo_root).info(f"{rev}^{{commit}}")
+        if info is None:
+            raise ValueError(f"Unknown revision: {rev}")
+        return info.sha
+
+    async def log(
+        self,
+        rev: str = 'HEAD',
+        path: Optional[str] = None,
+        limit: int = DEFAULT_LOG_PAGE_SIZE,
+        cursor: Optional[str] = None,
+        numstat: bool = False,
+        user_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Get one page of structured commit history.
+
+        The first page resolves `rev` to a commit; later pages are requested
+        with the returned `next_cursor`, which pins that commit so paging is
+        stable even if the branch moves meanwhile. Pages are cached by commit
+        SHA and never go stale.
+
+        Args:
+            rev: Revision to start from (defaults to HEAD)
+            path: Only include commits touching this project-relative path
+            limit: Commits per page (at most MAX_LOG_PAGE_SIZE)
+            cursor: `next_cursor` from the previous page
+            numstat: Include per-file added/deleted line counts
+            user_id: User ID for context
+
+        Returns:
+            Dict with commits and next_cursor (None on the last page)
+
+        Raises:
+            ValueError: If git is not allowed or an argument is invalid
+        """
+        repo_root = self._get_repo_root(user_id)
+        limit = max(1, min(int(limit), self.MAX_LOG_PAGE_SIZE))
+        rel_path = self._normalize_tree_path(path) if path else None
+
+        if cursor:
+            match = re.fullmatch(r'([0-9a-f]{40}|[0-9a-f]{64}):(\d+)', cursor)
+            if not match:
+                raise ValueError(f"Invalid cursor: {cursor}")
+            head, offset = match.group(1), int(match.group(2))
+        else:
+            head, offset = await self._resolve_commit(repo_root, rev), 0
+
+        cache_key = (repo_root, head, rel_path, offset, limit, numstat)
+        page = self._log_cache.get(cache_key)
+        if page is None:
+            git_args = [
+                'log', head, f'--skip={offset}', f'--max-count={limit + 1}',
+                f'--format={self.LOG_FORMAT}', '-z'
+            ]
+            if numstat:
+                git_args.append('--numstat')
+            if rel_path:
+                git_args += ['--', rel_path]
+
+            try:
+                result = await run_command_async('git', git_args, cwd=repo_root, timeout=self.COMMAND_TIMEOUT)
+            except asyncio.TimeoutError:
+                raise ValueError("Git command execution timed out")
+            if result.exit_code != 0:
+                raise ValueError(f"Git log failed: {result.stderr.strip()}")
+            if result.truncated:
+                raise ValueError("Git log output too large; request a smaller page or disable numstat")
+
+            commits = self._parse_log_records(result.stdout)
+            has_more = len(commits) > limit
+            page = {
+                'commits': commits[:limit],
+                'next_cursor': f"{head}:{offset + limit}" if has_more else None
+            }
+            self._log_cache.put(cache_key, page)
+
+        return {
+            'head': head,
+            'path': rel_path,
+            'commits': page['commits'],
+            'count': len(page['commits']),
+            'next_cursor': page['next_cursor']
+        }
+
+    def _parse_log_records(self, output: str) -> List[Dict[str, Any]]:
+        """Parse `git log -z` output produced with LOG_FORMAT (and optionally --numstat)."""
+        commits = []
+        field_count = len(self.LOG_FIELDS)
+
+        for record in output.split('\x1e')[1:]:
+            parts = record.split('\0', field_count)
+            commit: Dict[str, Any] = {
+                name: parts[i] for i, (name, _) in enumerate(self.LOG_FIELDS)
+            }
+            commit['parents'] = commit['parents'].split()
+            commit['author_time'] = int(commit['author_time'])
+            commit['committer_time'] = int(commit['committer_time'])
+            commit['body'] = commit['body'].rstrip('\n')
+
+            # Anything after the fields is --numstat output
+            remainder = parts[field_count] if len(parts) > field_count else ''
+            tokens = remainder.lstrip('\0\n').split('\0')
+            files = []
+            i = 0
+            while i < len(tokens):
+                token = tokens[i].lstrip('\n')
+                i += 1
+                if not token:
+                    continue
+                added, deleted, file_path = token.split('\t', 2)
+                entry: Dict[str, Any] = {
+                    'added': None if added == '-' else int(added),
+                    'deleted': None if deleted == '-' else int(deleted),
+                }
+                if not file_path and i + 1 < len(tokens):
+                    # Rename: "<added>\t<deleted>\t\0<old>\0<new>\0"
+                    entry['old_path'], file_path = tokens[i], tokens[i + 1]
+                    i += 2
+                entry['path'] = file_path
+                files.append(entry)
+            if files:
+                commit['files'] = files
+
+            commits.append(commit)
+
+        return commits
+
+    async def blame(
+        self,
+        path: str,
+        rev: str = 'HEAD',
+        start_line: Optional[int] = None,
+        end_line: Optional[int] = None,
+        include_lines: bool = False,
+        user_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Attribute each line of a file at a revision to the commit that last changed it.
+
+        Results are cached by commit SHA, so repeated blames are free.
+
+        Args:
+            path: File path relative to the project root
+            rev: Revision to blame at (defaults to HEAD)
+            start_line: First line to blame (1-based, inclusive)
+            end_line: Last line to blame (inclusive)
+            include_lines: Include the text of each line
+            user_id: User ID for context
+
+        Returns:
+            Dict with line-range hunks and the commits they refer to
+
+        Raises:
+            ValueError: If git is not allowed, an argument is invalid or blame fails
+        """
+        try:
+            start_line = int(start_line) if start_line is not None else None
+            end_line = int(end_line) if end_line is not None else None
+        except (TypeError, ValueError):
+            raise ValueError("start_line and end_line must be integers")
+        if start_line is not None or end_line is not None:
+            start_line = 1 if start_line is None else start_line
+            if start_line < 1 or (end_line is not None and end_line < start_line):
+                raise ValueError("start_line must be >= 1 and end_line >= start_line")
+
+        repo_root = self._get_repo_root(user_id)
+        rel_path = self._normalize_tree_path(path)
+        if not rel_path:
+            raise ValueError("Path is required")
+        commit = await self._resolve_commit(repo_root, rev)
+
+        cache_key = (repo_root, commit, rel_path, start_line, end_line)
+        result = self._blame_cache.get(cache_key)
+        if result is None:
+            git_args = ['blame', '--porcelain']
+            if start_line is not None:
+                git_args.append(f"-L{start_line},{'' if end_line is None else end_line}")
+            git_args += [commit, '--', rel_path]
+
+            try:
+                output = await run_command_async('git', git_args, cwd=repo_root, timeout=self.COMMAND_TIMEOUT)
+            except asyncio.TimeoutError:
+                raise ValueError("Git command execution timed out")
+            if output.exit_code != 0:
+                raise ValueError(f"Git blame failed: {output.stderr.strip()}")
+            if output.truncated:
+                raise ValueError("Git blame output too large; request a line range")
+
+            result = self._parse_blame_porcelain(output.stdout)
+            self._blame_cache.put(cache_key, result)
+
+        response = {
+            'path': rel_path,
+            'rev': rev,
+            'commit': commit,
+            'hunks': result['hunks'],
+            'commits': result['commits'],
+        }
+        if include_lines:
+            response['lines'] = result['lines']
+        return response
+
+    def _parse_blame_porcelain(self, output: str) -> Dict[str, Any]:
+        """Parse `git blame --porcelain` output into hunks and commit metadata."""
+        hunks: List[Dict[str, Any]] = []
+        commits: Dict[str, Dict[str, Any]] = {}
+        lines: List[str] = []
+        current_sha: Optional[str] = None
+        current_orig = current_final = 0
+        header_re = re.compile(r'^([0-9a-f]{40}|[0-9a-f]{64}) (\d+) (\d+)(?: \d+)?$')
+
+        for line in output.split('\n'):
+            if line.startswith('\t'):
+                lines.append(line[1:])
+                last = hunks[-1] if hunks else None
+                if (
+                    last and last['commit'] == current_sha
+                    and last['start_line'] + last['line_count'] == current_final
+                    and last['orig_start_line'] + last['line_count'] == current_orig
+                ):
+                    last['line_count'] += 1
+                else:
+                    hunks.append({
+                        'commit': current_sha,
+                        'start_line': current_final,
+                        'orig_start_line': current_orig,
+                        'line_count': 1
+                    })
+                continue
+
+            match = header_re.match(line)
+            if match:
+                current_sha = match.group(1)
+                current_orig, current_final = int(match.group(2)), int(match.group(3))
+                commits.setdefault(current_sha, {})
+                continue
+
+            if current_sha and line:
+                key, _, value = line.partition(' ')
+                info = commits[current_sha]
+                if key in ('author-time', 'committer-time'):
+                    info[key.replace('-', '_')] = int(value)
+                elif key in ('author', 'author-mail', 'committer', 'committer-mail', 'summary', 'filename'):
+                    info[key.replace('-mail', '_email')] = value.strip('<>')
+                elif key == 'previous':
+                    info['previous'] = value.split(' ', 1)[0]
+                elif key == 'boundary':
+                    info['boundary'] = True
+
+        return {'hunks': hunks, 'commits': commits, 'lines': lines}
+
+    def _diff_args(
+        self,
+        base: Optional[str],
+        target: Optional[str],
+        staged: bool,
+        find_renames: Union[bool, int]
+    ) -> List[str]:
+        """Build the revision and rename options shared by the diff tools."""
+        args = ['--relative']
+
+        if find_renames is True:
+            args.append('-M')
+        elif find_renames is False:
+            args.append('--no-renames')
+        else:
+            args.append(f'-M{max(0, min(int(find_renames), 100))}%')
+
+        if staged:
+            args.append('--cached')
+        if base:
+            args.append(self._validate_rev(base))
+        if target:
+            if not base:
+                raise ValueError("target requires base")
+            args.append(self._validate_rev(target))
+        return args
+
+    async def diff_summary(
+        self,
+        base: Optional[str] = None,
+        target: Optional[str] = None,
+        staged: bool = False,
+        paths: Optional[List[str]] = None,
+        find_renames: Union[bool, int] = True,
+        user_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Summarize a diff per file without producing any patch text.
+
+        Uses `--raw --numstat -z`, so the cost is independent of how large the
+        individual changes are. Fetch the patch of the files you need with
+        file_diff / stream_file_diff.
+
+        Args:
+            base: Revision to diff from (defaults to the index, or HEAD if staged)
+            target: Revision to diff to (defaults to the working tree)
+            staged: Diff the index instead of the working tree
+            paths: Only include these project-relative paths
+            find_renames: Detect renames (True, False or a similarity percentage)
+            user_id: User ID for context
+
+        Returns:
+            Dict with per-file status and added/deleted line counts, and
+            `truncated` set if git's output was cut at the size cap (the
+            files or counts at the end are then missing)
+
+        Raises:
+            ValueError: If git is not allowed, an argument is invalid or diff fails
+        """
+        repo_root = self._get_repo_root(user_id)
+        git_args = ['diff', '--raw', '--numstat', '-z'] + self._diff_args(base, target, staged, find_renames)
+        if paths:
+            git_args += ['--'] + [self._normalize_tree_path(path) or '.' for path in paths]
+
+        try:
+            output = await run_command_async('git', git_args, cwd=repo_root, timeout=self.COMMAND_TIMEOUT)
+        except asyncio.TimeoutError:
+            raise ValueError("Git command execution timed out")
+        if output.exit_code != 0:
+            raise ValueError(f"Git diff failed: {output.stderr.strip()}")
+
+        files: List[Dict[str, Any]] = []
+        numstat_index = 0
+        tokens = output.stdout.split('\0')
+        if output.truncated:
+            # The last record was cut off mid-way; drop its partial token
+            tokens.pop()
+        i = 0
+        while i < len(tokens):
+            token = tokens[i]
+            i += 1
+            if not token:
+                continue
+
+            if token.startswith(':'):
+                # ":<old mode> <new mode> <old sha> <new sha> <status>\0<path>[\0<new path>]"
+                status = token.split(' ')[4]
+                entry: Dict[str, Any] = {'status': status[0]}
+                if status[0] in ('R', 'C'):
+                    if i + 2 > len(tokens):
+                        break
+                    entry['similarity'] = int(status[1:] or 0)
+                    entry['old_path'], entry['path'] = tokens[i], tokens[i + 1]
+                    i += 2
+                else:
+                    if i + 1 > len(tokens):
+                        break
+                    entry['path'] = tokens[i]
+                    i += 1
+                files.append(entry)
+            else:
+                # "<added>\t<deleted>\t<path>" in the same order as the raw entries;
+                # renames leave the path empty and repeat both paths after it
+                fields = token.split('\t', 2)
+                if len(fields) != 3:
+                    break
+                added, deleted, path = fields
+                if not path:
+                    i += 2
+                if numstat_index < len(files):
+                    entry = files[numstat_index]
+                    entry['binary'] = added == '-'
+                    entry['additions'] = 0 if added == '-' else int(added)
+                    entry['deletions'] = 0 if deleted == '-' else int(deleted)
+                numstat_index += 1
+
+        result = {
+            'files': files,
+            'count': len(files),
+            'additions': sum(entry.get('additions', 0) for entry in files),
+            'deletions': sum(entry.get('deletions', 0) for entry in files)
+        }
+        if output.truncated:
+            result['truncated'] = True
+        return result
+
+    async def stream_file_diff(
+        self,
+        path: str,
+        old_path: Optional[str] = None,
+        base: Optional[str] = None,
+        target: Optional[str] = None,
+        staged: bool = False,
+        context_lines: int = 3,
+        find_renames: Union[bool, int] = True,
+        max_bytes: int = DEFAULT_DIFF_MAX_BYTES,
+        max_lines: int = DEFAULT_DIFF_MAX_LINES,
+        user_id: Optional[str] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream the patch of a single file hunk by hunk, within byte/line caps.
+
+        Once a cap is reached the git process is stopped, so a huge diff costs
+        only what is actually read.
+
+        Args:
+            path: File path relative to the project root
+            old_path: Original path if the file was renamed (from diff_summary)
+            base, target, staged, find_renames: As for diff_summary
+            context_lines: Lines of context around each change (-U)
+            max_bytes: Stop after this many bytes of patch text
+            max_lines: Stop after this many lines of patch text
+            user_id: User ID for context
+
+        Yields:
+            {"header": ...} with the file header, {"hunk": ...} per hunk, then
+            a final summary with counts and a truncated flag
+
+        Raises:
+            ValueError: If git is not allowed, an argument is invalid or diff fails
+        """
+        repo_root = self._get_repo_root(user_id)
+        max_bytes = max(1, min(int(max_bytes), self.MAX_DIFF_BYTES))
+        max_lines = max(1, int(max_lines))
+        context_lines = max(0, min(int(context_lines), 1000))
+
+        git_args = ['diff', f'-U{context_lines}'] + self._diff_args(base, target, staged, find_renames)
+        git_args += ['--', self._normalize_tree_path(path)]
+        if old_path:
+            git_args.append(self._normalize_tree_path(old_path))
+
+        current: List[str] = []
+        in_header = True
+        hunks = total_lines = total_bytes = 0
+        truncated = False
+        stderr_lines: List[str] = []
+        exit_code = 0
+
+        try:
+            async with aclosing(stream_command_async(
+                'git', git_args, cwd=repo_root, timeout=self.COMMAND_TIMEOUT
+            )) as output:
+                async for stream, data in output:
+                    if stream == 'exit':
+                        exit_code = data
+                        continue
+                    if stream == 'stderr':
+                        stderr_lines.append(data)
+                        continue
+                    if stream == 'truncated':
+                        truncated = True
+                        continue
+
+                    if total_bytes + len(data) > max_bytes or total_lines >= max_lines:
+                        truncated = True
+                        break
+                    total_bytes += len(data)
+                    total_lines += 1
+
+                    if data.startswith('@@'):
+                        if current:
+                            yield {'header': ''.join(current)} if in_header else {'hunk': ''.join(current)}
+                            hunks += 0 if in_header else 1
+                        current = [data]
+                        in_header = False
+                    else:
+                        current.append(data)
+
+        except DangerousCommandError as e:
+            raise ValueError(f"Git command blocked for safety: {e}")
+        except asyncio.TimeoutError:
+            raise ValueError("Git command execution timed out")
+
+        if exit_code != 0:
+            raise ValueError(f"Git diff failed: {''.join(stderr_lines).strip()}")
+
+        if current:
+            yield {'header': ''.join(current)} if in_header else {'hunk': ''.join(current)}
+            hunks += 0 if in_header else 1
+
+        yield {
+            'path': path,
+            'hunks': hunks,
+            'lines': total_lines,
+            'bytes': total_bytes,
+            'truncated': truncated
+        }
+
+    async def file_diff(self, path: str, **options: Any) -> Dict[str, Any]:
+        """
+        Get the patch of a single file within byte/line caps.
+
+        Takes the same options as stream_file_diff.
+
+        Returns:
+            Dict with the patch text, hunk/line/byte counts and a truncated flag
+        """
+        parts: List[str] = []
+        summary: Dict[str, Any] = {}
+
+        async with aclosing(self.stream_file_diff(path, **options)) as events:
+            async for event in events:
+                if 'header' in event:
+                    parts.append(event['header'])
+                elif 'hunk' in event:
+                    parts.append(event['hunk'])
+                else:
+                    summary = event
+
+        return {**summary, 'diff': ''.join(parts)}
+
+    def invalidate_status(self, repo_root: Optional[str] = None) -> None:
+        """
+        Signal that the working tree may have changed (e.g. after a write or exec).
+
+        Args:
+            repo_root: The repository that changed, or None for all of them
+        """
+        if repo_root is None:
+            repos = [repo for _, repo in project_states.items('git')]
+        else:
+            repos = [project_states.peek(repo_root, 'git')]
+        for repo in repos:
+            if repo is not None:
+                repo.worktree_generation += 1
+
+    async def _get_git_dir(self, repo_root: str) -> str:
+        """Get the absolute git directory for a project root (handles worktrees)."""
+        repo = self._repo(repo_root)
+        git_dir = repo.git_dir
+        if git_dir is None:
+            result = await run_command_async(
+                'git', ['rev-parse', '--absolute-git-dir'], cwd=repo_root, timeout=self.COMMAND_TIMEOUT
+            )
+            if result.exit_code != 0:
+                raise ValueError(f"Not a git repository: {result.stderr.strip()}")
+            git_dir = result.stdout.strip()
+            repo.git_dir = git_dir
+        return git_dir
+
+    async def _status_fingerprint(self, repo_root: str) -> tuple:
+        """Cheap signature of everything that can change `git status` output."""
+        git_dir = await self._get_git_dir(repo_root)
+
+        try:
+            st = os.stat(os.path.join(git_dir, 'index'))
+            index_sig = (st.st_mtime_ns, st.st_size, st.st_ino)
+        except FileNotFoundError:
+            index_sig = None
+
+        try:
+            with open(os.path.join(git_dir, 'HEAD'), 'r', encoding='utf-8') as f:
+                head_ref = f.read().strip()
+        except OSError:
+            head_ref = None
+        head = await self._get_cat_file(repo_root).info('HEAD')
+
+        return (index_sig, head_ref, head.sha if head else None, self._repo(repo_root).worktree_generation)
+
+    async def status(
+        self,
+        untracked: str = 'normal',
+        user_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Get structured working tree status from `git status --porcelain=v2 -z`.
+
+        Results are cached and reused while the index, HEAD and the worktree
+        change signal are unchanged (and for at most status_cache_ttl seconds,
+        or watched_status_cache_ttl while the watcher reports changes to the
+        repository live), so polling is cheap.
+
+        Args:
+            untracked: Untracked file mode: 'no', 'normal' or 'all'
+            user_id: User ID for context
+
+        Returns:
+            Dict with branch info, per-path entries and change counts
+
+        Raises:
+            ValueError: If git is not allowed or status fails
+        """
+        if untracked not in ('no', 'normal', 'all'):
+            raise ValueError(f"Invalid untracked mode: {untracked}")
+
+        repo_root = self._get_repo_root(user_id)
+        fingerprint = await self._status_fingerprint(repo_root)
+
+        ttl = self.watched_status_cache_ttl if watcher_service.is_live(repo_root) else self.status_cache_ttl
+        repo = self._repo(repo_root)
+        cached = repo.status
+        if (
+            cached
+            and cached['fingerprint'] == fingerprint
+            and cached['untracked'] == untracked
+            and time.monotonic() - cached['time'] < ttl
+        ):
+            return {**cached['result'], 'cached': True}
+
+        # --no-optional-locks keeps status from rewriting the index, which
+        # would change the fingerprint we just took
+        git_args = [
+            '--no-optional-locks', 'status', '--porcelain=v2', '-z',
+            '--branch', f'--untracked-files={untracked}'
+        ]
+        try:
+            output = await run_command_async('git', git_args, cwd=repo_root, timeout=self.COMMAND_TIMEOUT)
+        except asyncio.TimeoutError:
+            raise ValueError("Git command execution timed out")
+        if output.exit_code != 0:
+            raise ValueError(f"Git status failed: {output.stderr.strip()}")
+
+        result = self._parse_status_v2(output.stdout)
+        repo.status = {
+            'fingerprint': fingerprint,
+            'untracked': untracked,
+            'time': time.monotonic(),
+            'result': result
+        }
+        return {**result, 'cached': False}
+
+    def _parse_status_v2(self, output: str) -> Dict[str, Any]:
+        """Parse `git status --porcelain=v2 -z --branch` output."""
+        branch: Dict[str, Any] = {}
+        entries: List[Dict[str, Any]] = []
+        counts = {'staged': 0, 'unstaged': 0, 'untracked': 0, 'conflicted': 0, 'ignored': 0}
+
+        records = output.split('\0')
+        i = 0
+        while i < len(records):
+            record = records[i]
+            i += 1
+            if not record:
+                continue
+
+            kind = record[0]
+            if kind == '#':
+                key, _, value = record[2:].partition(' ')
+                if key == 'branch.oid':
+                    branch['oid'] = None if value == '(initial)' else value
+                elif key == 'branch.head':
+                    branch['head'] = None if value == '(detached)' else value
+                elif key == 'branch.upstream':
+                    branch['upstream'] = value
+                elif key == 'branch.ab':
+                    ahead, behind = value.split()
+                    branch['ahead'], branch['behind'] = int(ahead), -int(behind)
+
+            elif kind in ('1', '2'):
+                fields = record.split(' ', 9 if kind == '2' else 8)
+                xy = fields[1]
+                entry: Dict[str, Any] = {
+                    'path': fields[-1],
+                    'kind': 'changed' if kind == '1' else 'renamed',
+                    'index_status': xy[0],
+                    'worktree_status': xy[1],
+                }
+                if fields[2] != 'N...':
+                    entry['submodule'] = fields[2]
+                if kind == '2':
+                    # "<X><score> <path>" followed by the original path record
+                    entry['score'] = fields[8]
+                    entry['orig_path'] = records[i]
+                    i += 1
+                if xy[0] != '.':
+                    counts['staged'] += 1
+                if xy[1] != '.':
+                    counts['unstaged'] += 1
+                entries.append(entry)
+
+            elif kind == 'u':
+                fields = record.split(' ', 10)
+                entries.append({
+                    'path': fields[-1],
+                    'kind': 'unmerged',
+                    'index_status': fields[1][0],
+                    'worktree_status': fields[1][1],
+                })
+                counts['conflicted'] += 1
+
+            elif kind in ('?', '!'):
+                entries.append({
+                    'path': record[2:],
+                    'kind': 'untracked' if kind == '?' else 'ignored',
+                })
+                counts['untracked' if kind == '?' else 'ignored'] += 1
+
+        return {
+            'branch': branch,
+            'entries': entries,
+            'counts': counts,
+            'has_changes': any(entry['kind'] != 'ignored' for entry in entries)
+        }
+
     def _parse_git_log(self, log_output: str) -> Dict[str, Any]:
         """Parse git log output into structured format."""
         commits = []
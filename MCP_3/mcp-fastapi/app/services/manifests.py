@@ -0,0 +1,243 @@
+"""Parse-once model of a project's package manifests."""
+import hashlib
+import json
+import os
+import re
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set
+
+try:  # Python 3.11+
+    import tomllib
+except ImportError:  # pragma: no cover
+    try:
+        import tomli as tomllib
+    except ImportError:
+        tomllib = None
+
+# Manifest files read from the project root
+MANIFEST_FILES = [
+    "package.json", "requirements.txt", "pyproject.toml", "setup.py",
+    "go.mod", "Cargo.toml", "pom.xml", "build.gradle"
+]
+
+
+@dataclass
+class GoModule:
+    """The parts of a go.mod file the analyzer uses."""
+    module: Optional[str] = None
+    go_version: Optional[str] = None
+    require: Dict[str, str] = field(default_factory=dict)  # module path -> version
+    indirect: Set[str] = field(default_factory=set)
+
+
+@dataclass
+class MavenProject:
+    """The parts of a pom.xml file the analyzer uses."""
+    group_id: Optional[str] = None
+    artifact_id: Optional[str] = None
+    parent: Optional[str] = None  # "groupId:artifactId"
+    dependencies: List[Dict[str, Optional[str]]] = field(default_factory=list)  # group_id, artifact_id, version, scope
+    plugins: List[str] = field(default_factory=list)  # "groupId:artifactId"
+
+    @property
+    def artifacts(self) -> List[str]:
+        """Every referenced "groupId:artifactId": parent, dependencies and plugins."""
+        refs = [f"{dep['group_id']}:{dep['artifact_id']}" for dep in self.dependencies] + self.plugins
+        return ([self.parent] if self.parent else []) + refs
+
+
+@dataclass
+class ProjectManifests:
+    """
+    Manifests of one project, read and parsed once per analysis.
+
+    A parsed field is None when its file is missing or cannot be parsed;
+    `present` lists the files that exist either way.
+    """
+    present: Set[str] = field(default_factory=set)
+    hashes: Dict[str, Optional[str]] = field(default_factory=dict)  # file -> sha1 of its content, None if missing
+    package_json: Optional[Dict[str, Any]] = None
+    pyproject: Optional[Dict[str, Any]] = None
+    requirements: Optional[Dict[str, str]] = None  # name -> version ("latest" if unpinned)
+    go_mod: Optional[GoModule] = None
+    cargo: Optional[Dict[str, Any]] = None
+    pom: Optional[MavenProject] = None
+    root_python: Dict[str, str] = field(default_factory=dict)  # root *.py file -> content
+
+    @property
+    def npm_dependencies(self) -> Dict[str, str]:
+        return dict((self.package_json or {}).get("dependencies") or {})
+
+    @property
+    def npm_dev_dependencies(self) -> Dict[str, str]:
+        return dict((self.package_json or {}).get("devDependencies") or {})
+
+    @property
+    def npm_all_dependencies(self) -> Dict[str, str]:
+        return {**self.npm_dependencies, **self.npm_dev_dependencies}
+
+    @property
+    def npm_scripts(self) -> Dict[str, str]:
+        return dict((self.package_json or {}).get("scripts") or {})
+
+    def python_sources_contain(self, *needles: str) -> bool:
+        """Whether any root Python file contains one of the given strings."""
+        return any(needle in content for content in self.root_python.values() for needle in needles)
+
+    @classmethod
+    def load(cls, root: Path) -> "ProjectManifests":
+        """Read and parse the manifests and root Python files of a project."""
+        manifests = cls()
+        names = list(MANIFEST_FILES)
+        try:
+            with os.scandir(root) as it:
+                names.extend(sorted(item.name for item in it if item.name.endswith(".py") and item.is_file()))
+        except OSError:
+            pass
+
+        for name in names:
+            try:
+                with open(root / name, "rb") as f:
+                    data = f.read()
+            except OSError:
+                manifests.hashes[name] = None
+                continue
+            manifests.present.add(name)
+            manifests.hashes[name] = hashlib.sha1(data).hexdigest()
+            text = data.decode("utf-8", errors="replace")
+
+            if name.endswith(".py"):
+                manifests.root_python[name] = text
+            if name == "package.json":
+                manifests.package_json = _parse_json(text)
+            elif name == "pyproject.toml":
+                manifests.pyproject = _parse_toml(text)
+            elif name == "Cargo.toml":
+                manifests.cargo = _parse_toml(text)
+            elif name == "requirements.txt":
+                manifests.requirements = parse_requirements(text)
+            elif name == "go.mod":
+                manifests.go_mod = parse_go_mod(text)
+            elif name == "pom.xml":
+                manifests.pom = parse_pom(text)
+        return manifests
+
+
+def _parse_json(text: str) -> Optional[Dict[str, Any]]:
+    try:
+        data = json.loads(text)
+    except ValueError:
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def _parse_toml(text: str) -> Optional[Dict[str, Any]]:
+    if tomllib is None:
+        return None
+    try:
+        return tomllib.loads(text)
+    except tomllib.TOMLDecodeError:
+        return None
+
+
+_REQUIREMENT = re.compile(r"([A-Za-z0-9][A-Za-z0-9._-]*)(\[[^\]]*\])?\s*(.*)")
+
+
+def parse_requirements(text: str) -> Dict[str, str]:
+    """
+    Parse a requirements.txt file.
+
+    Returns:
+        Package name -> pinned version for `==` requirements, the version
+        specifier for other constraints, or "latest" when unconstrained.
+        Options (`-r`, `-e`, `--index-url`, ...) and URLs are skipped.
+    """
+    requirements = {}
+    for line in text.splitlines():
+        line = line.split(" #", 1)[0].strip()
+        if not line or line.startswith(("#", "-")) or "://" in line:
+            continue
+        match = _REQUIREMENT.match(line)
+        if not match:
+            continue
+        name, _, spec = match.groups()
+        spec = spec.split(";", 1)[0].strip()  # drop environment markers
+        if spec.startswith("==") and "," not in spec:
+            requirements[name] = spec[2:].strip()
+        else:
+            requirements[name] = spec or "latest"
+    return requirements
+
+
+def parse_go_mod(text: str) -> GoModule:
+    """Parse the module, go and require directives of a go.mod file, including require blocks."""
+    go_mod = GoModule()
+    in_require = False
+    for raw_line in text.splitlines():
+        line, _, comment = raw_line.partition("//")
+        line = line.strip()
+        if not line:
+            continue
+
+        if in_require:
+            if line == ")":
+                in_require = False
+                continue
+            parts = line.split()
+        else:
+            directive, _, rest = line.partition(" ")
+            rest = rest.strip()
+            if directive == "module":
+                go_mod.module = rest.strip('"')
+                continue
+            if directive == "go":
+                go_mod.go_version = rest
+                continue
+            if directive != "require":
+                continue
+            if rest == "(":
+                in_require = True
+                continue
+            parts = rest.split()
+
+        if len(parts) >= 2:
+            go_mod.require[parts[0].strip('"')] = parts[1]
+            if "indirect" in comment:
+                go_mod.indirect.add(parts[0].strip('"'))
+    return go_mod
+
+
+def parse_pom(text: str) -> Optional[MavenProject]:
+    """Parse the coordinates, parent, dependencies and build plugins of a pom.xml file."""
+    try:
+        root = ET.fromstring(text)
+    except ET.ParseError:
+        return None
+
+    # Drop the POM namespace so paths can use bare tag names
+    for element in root.iter():
+        if isinstance(element.tag, str) and element.tag.startswith("{"):
+            element.tag = element.tag.split("}", 1)[1]
+
+    def coordinates(element: ET.Element) -> str:
+        return f"{element.findtext('groupId', '').strip()}:{element.findtext('artifactId', '').strip()}"
+
+    pom = MavenProject(
+        group_id=root.findtext("groupId"),
+        artifact_id=root.findtext("artifactId")
+    )
+    parent = root.find("parent")
+    if parent is not None:
+        pom.parent = coordinates(parent)
+    for dependency in root.findall("dependencies/dependency"):
+        pom.dependencies.append({
+            "group_id": (dependency.findtext("groupId") or "").strip(),
+            "artifact_id": (dependency.findtext("artifactId") or "").strip(),
+            "version": dependency.findtext("version"),
+            "scope": dependency.findtext("scope"),
+        })
+    for plugin in root.findall("build/plugins/plugin"):
+        pom.plugins.append(coordinates(plugin))
+    return pom
@@ -1,12 +1,48 @@
 """Project analysis service for automatic project type detection and metadata extraction."""
 import os
+import hashlib
 import json
+import logging
+import pickle
 import re
+import threading
+from fnmatch import translate
 from pathlib import Path
-from typing import Dict, List, Any, Optional, Set
-from dataclasses import dataclass
+from typing import Dict, List, Any, Optional, Set, Tuple
+from dataclasses import dataclass, field
 from enum import Enum
 
+from app.config import settings
+from app.services.manifests import ProjectManifests, parse_requirements
+from app.utils.ignore import IgnoreFile, IgnoreStack
+from app.utils.project_state import project_states
+
+logger = logging.getLogger(__name__)
+
+CACHE_VERSION = 3
+
+# What each detector reads: "root" is the project root listing, "tree" the
+# listings of every walked directory, "manifests" the content of
+# manifests.MANIFEST_FILES and of the Python files in the root. When only
+# the manifests changed the scan lists the root alone, so no detector may
+# read both the tree listings and the manifests
+DETECTOR_INPUTS = {
+    "project_type": {"root", "manifests"},
+    "languages": {"tree"},
+    "frameworks": {"root", "manifests"},
+    "dependencies": {"manifests"},
+    "build_commands": {"manifests"},
+    "start_commands": {"root", "manifests"},
+    "test_info": {"root", "manifests"},
+    "folder_structure": {"tree"},
+    "config_files": {"tree"},
+    "entry_points": {"tree", "manifests"},
+    "package_managers": {"root", "manifests"},
+    "deployment_indicators": {"tree"},
+    "vulnerable_packages": {"manifests"},
+    "secret_files": {"tree"},
+}
+
 
 class ProjectType(Enum):
     NEXTJS = "nextjs"
@@ -45,69 +81,335 @@ class ProjectMetadata:
     health_score: int  # 0-100
 
 
+@dataclass
+class ProjectScan:
+    """
+    One walk of a project directory, shared by all detectors.
+
+    Paths are relative to the project root and `/`-separated; the root
+    directory itself is ''.
+    """
+    root: Path
+    entries: Dict[str, List[Tuple[str, bool]]] = field(default_factory=dict)  # dir -> sorted (name, is_dir)
+    files: List[str] = field(default_factory=list)
+    dirs: List[str] = field(default_factory=list)
+    unreadable: Set[str] = field(default_factory=set)  # directories that could not be listed
+    capped: Set[str] = field(default_factory=set)  # directories with more files than were recorded
+    dir_mtimes: Dict[str, int] = field(default_factory=dict)  # walked directory -> mtime_ns
+    ignore_mtimes: Dict[str, int] = field(default_factory=dict)  # .gitignore file -> mtime_ns
+
+    @classmethod
+    def walk(
+        cls,
+        root: Path,
+        prune: Set[str] = frozenset(),
+        respect_gitignore: bool = True,
+        max_files_per_dir: Optional[int] = None,
+        max_depth: Optional[int] = None
+    ) -> "ProjectScan":
+        """
+        Walk a project depth-first in sorted order with os.scandir.
+
+        Symlinked directories are listed but not descended into. The mtime
+        of each walked directory (and of the .gitignore files read) is
+        recorded before listing it, so `changed` can later tell whether a
+        new walk would see anything different.
+
+        Args:
+            root: Project root directory
+            prune: Directory names to skip entirely, at any depth
+            respect_gitignore: Skip paths ignored by .gitignore files
+            max_files_per_dir: Record at most this many files per directory
+                (subdirectories are still walked)
+            max_depth: Walk at most this many levels below the root (0 lists
+                the root only)
+        """
+        scan = cls(root)
+        stack = [('', IgnoreStack())]
+        while stack:
+            rel_dir, ignores = stack.pop()
+            dir_path = root / rel_dir if rel_dir else root
+            try:
+                scan.dir_mtimes[rel_dir] = os.stat(dir_path).st_mtime_ns
+                with os.scandir(dir_path) as it:
+                    items = sorted(it, key=lambda item: item.name)
+            except OSError:
+                scan.unreadable.add(rel_dir)
+                scan.entries[rel_dir] = []
+                continue
+            if respect_gitignore and any(item.name == '.gitignore' for item in items):
+                ignore_path = f"{rel_dir}/.gitignore" if rel_dir else '.gitignore'
+                try:
+                    scan.ignore_mtimes[ignore_path] = os.stat(root / ignore_path).st_mtime_ns
+                except OSError:
+                    pass
+                ignores = ignores.push(IgnoreFile.load(dir_path, rel_dir))
+
+            listing = []
+            subdirs = []
+            file_count = 0
+            for item in items:
+                rel_path = f"{rel_dir}/{item.name}" if rel_dir else item.name
+                try:
+                    is_dir = item.is_dir()
+                    is_file = not is_dir and item.is_file()
+                except OSError:
+                    continue
+                if is_dir and item.name in prune:
+                    continue
+                if (is_dir or is_file) and ignores.is_ignored(rel_path, is_dir):
+                    continue
+
+                if is_dir:
+                    listing.append((item.name, True))
+                    scan.dirs.append(rel_path)
+                    if not item.is_symlink():
+                        subdirs.append(rel_path)
+                elif is_file:
+                    if max_files_per_dir is not None and file_count >= max_files_per_dir:
+                        scan.capped.add(rel_dir)
+                        continue
+                    file_count += 1
+                    listing.append((item.name, False))
+                    scan.files.append(rel_path)
+            scan.entries[rel_dir] = listing
+            if max_depth is None or rel_dir.count('/') + (1 if rel_dir else 0) < max_depth:
+                stack.extend((subdir, ignores) for subdir in reversed(subdirs))
+        return scan
+
+    def changed(self) -> Set[str]:
+        """
+        Which listings changed since the walk: a subset of {"root", "tree"}.
+
+        Adding, removing or renaming an entry updates its directory's mtime,
+        so this costs one stat per walked directory instead of a new walk.
+        """
+        def mtime(rel_path: str) -> Optional[int]:
+            try:
+                return os.stat(self.root / rel_path if rel_path else self.root).st_mtime_ns
+            except OSError:
+                return None
+
+        changed = set()
+        if mtime('') != self.dir_mtimes.get('') or (
+            '.gitignore' in self.ignore_mtimes and mtime('.gitignore') != self.ignore_mtimes['.gitignore']
+        ):
+            changed.update(("root", "tree"))
+        elif any(mtime(path) != value for path, value in self.dir_mtimes.items()) or any(
+            mtime(path) != value for path, value in self.ignore_mtimes.items()
+        ):
+            changed.add("tree")
+        return changed
+
+    @property
+    def root_names(self) -> Set[str]:
+        """Names of the entries directly in the project root."""
+        return {name for name, _ in self.entries.get('', [])}
+
+    def root_files(self, pattern: str) -> List[str]:
+        """Names of the files directly in the project root matching a glob pattern."""
+        regex = re.compile(translate(pattern))
+        return [name for name, is_dir in self.entries.get('', []) if not is_dir and regex.match(name)]
+
+
+@dataclass
+class _CachedAnalysis:
+    """Detector results for one project, with the fingerprint they were computed at."""
+    root: str
+    options: Tuple
+    scan: ProjectScan  # directory and .gitignore mtimes only; listings are dropped
+    manifests: Dict[str, Optional[str]]  # file -> content hash, None if missing
+    results: Dict[str, Any]
+    version: int = CACHE_VERSION
+    nbytes: int = 0  # pickled size, as an estimate of its memory footprint
+
+
 class ProjectAnalyzer:
-    """Service for analyzing project structure and generating metadata."""
+    """
+    Service for analyzing project structure and generating metadata.
+
+    The last analysis of each project is kept in the shared per-project
+    state cache and on disk under CACHE_DIR.
+    """
+
+    CACHE_DIR = Path.home() / ".senscoder" / "analysis_cache"
 
     def __init__(self):
         self.project_root: Optional[Path] = None
+        self.scan: Optional[ProjectScan] = None
+        self.manifests: Optional[ProjectManifests] = None
+        self._lock = threading.Lock()
 
     def analyze_project(self, project_path: str) -> ProjectMetadata:
         """
         Analyze a project directory and extract comprehensive metadata.
 
+        Results are cached in memory and under CACHE_DIR, keyed on a
+        fingerprint of the project: the mtimes of the walked directories
+        and .gitignore files, and the hashes of the manifest files. Only
+        the detectors whose inputs (see DETECTOR_INPUTS) changed since the
+        cached analysis are run again; an unchanged project costs one stat
+        per directory plus hashing the manifests.
+
         Args:
             project_path: Path to the project root directory
 
         Returns:
             ProjectMetadata object with all detected information
         """
-        self.project_root = Path(project_path).resolve()
+        project_root = Path(project_path).resolve()
 
-        if not self.project_root.exists() or not self.project_root.is_dir():
+        if not project_root.exists() or not project_root.is_dir():
             raise ValueError(f"Project path does not exist or is not a directory: {project_path}")
 
-        # Detect project type
-        project_type = self._detect_project_type()
-
-        # Extract metadata
-        languages = self._detect_languages()
-        frameworks = self._detect_frameworks()
-        dependencies, dev_dependencies = self._extract_dependencies()
-        build_commands = self._detect_build_commands()
-        start_commands = self._detect_start_commands()
-        test_commands, has_tests, test_frameworks = self._detect_test_info()
-        folder_structure = self._analyze_folder_structure()
-        config_files = self._find_config_files()
-        entry_points = self._find_entry_points()
-        package_managers = self._detect_package_managers()
-        deployment_indicators = self._detect_deployment_indicators()
-        vulnerabilities = self._scan_vulnerabilities()
-        health_score = self._calculate_health_score()
+        # Detectors keep their state on the instance, so analyses run one at a time
+        with self._lock:
+            self.project_root = project_root
+            results = self._analyze()
+            self.scan = None
+            self.manifests = None
+
+        test_commands, has_tests, test_frameworks = results["test_info"]
+        dependencies, dev_dependencies = results["dependencies"]
+        config_files = results["config_files"]
+        entry_points = results["entry_points"]
+        deployment_indicators = results["deployment_indicators"]
+        vulnerabilities = results["vulnerable_packages"] + results["secret_files"]
+        health_score = self._calculate_health_score(
+            has_tests, config_files, entry_points, deployment_indicators, vulnerabilities
+        )
 
+        # Copies, so callers cannot modify the cached results
         return ProjectMetadata(
-            project_type=project_type,
-            languages=languages,
-            frameworks=frameworks,
-            dependencies=dependencies,
-            dev_dependencies=dev_dependencies,
-            build_commands=build_commands,
-            start_commands=start_commands,
-            test_commands=test_commands,
+            project_type=results["project_type"],
+            languages=set(results["languages"]),
+            frameworks=set(results["frameworks"]),
+            dependencies=dict(dependencies),
+            dev_dependencies=dict(dev_dependencies),
+            build_commands=list(results["build_commands"]),
+            start_commands=list(results["start_commands"]),
+            test_commands=list(test_commands),
             has_tests=has_tests,
-            test_frameworks=test_frameworks,
-            folder_structure=folder_structure,
-            config_files=config_files,
-            entry_points=entry_points,
-            package_managers=package_managers,
-            deployment_indicators=deployment_indicators,
-            vulnerabilities=vulnerabilities,
+            test_frameworks=set(test_frameworks),
+            folder_structure=json.loads(json.dumps(results["folder_structure"])),
+            config_files=list(config_files),
+            entry_points=list(entry_points),
+            package_managers=set(results["package_managers"]),
+            deployment_indicators=list(deployment_indicators),
+            vulnerabilities=list(vulnerabilities),
             health_score=health_score
         )
 
+    def _analyze(self) -> Dict[str, Any]:
+        """Run the detectors whose inputs changed since the cached analysis."""
+        root = str(self.project_root)
+        options = (
+            tuple(sorted(settings.analysis_prune_dirs)),
+            settings.analysis_respect_gitignore,
+            settings.analysis_max_files_per_dir
+        )
+        # Read before walking, so a change made meanwhile invalidates the cache
+        self.manifests = ProjectManifests.load(self.project_root)
+        manifests = self.manifests.hashes
+
+        cached = project_states.get(root, "analysis") or self._load_cache(root)
+        if cached is None or cached.options != options:
+            changed = {"root", "tree", "manifests"}
+            results: Dict[str, Any] = {}
+        else:
+            changed = cached.scan.changed()
+            if manifests != cached.manifests:
+                changed.add("manifests")
+            results = dict(cached.results)
+
+        if not changed:
+            return results
+
+        walk_options = dict(
+            prune=set(options[0]), respect_gitignore=options[1], max_files_per_dir=options[2]
+        )
+        if "tree" in changed:
+            # Walk the tree once; every detector below reads from this scan
+            self.scan = ProjectScan.walk(self.project_root, **walk_options)
+            fingerprint = self.scan
+        else:
+            # Only the manifests changed: the root listing is all the detectors need
+            self.scan = ProjectScan.walk(self.project_root, max_depth=0, **walk_options)
+            fingerprint = cached.scan
+
+        detectors = {
+            "project_type": self._detect_project_type,
+            "languages": self._detect_languages,
+            "frameworks": self._detect_frameworks,
+            "dependencies": self._extract_dependencies,
+            "build_commands": self._detect_build_commands,
+            "start_commands": self._detect_start_commands,
+            "test_info": self._detect_test_info,
+            "folder_structure": self._analyze_folder_structure,
+            "config_files": self._find_config_files,
+            "entry_points": self._find_entry_points,
+            "package_managers": self._detect_package_managers,
+            "deployment_indicators": self._detect_deployment_indicators,
+            "vulnerable_packages": self._find_vulnerable_packages,
+            "secret_files": self._find_secret_files,
+        }
+        for name, detector in detectors.items():
+            if name not in results or DETECTOR_INPUTS[name] & changed:
+                results[name] = detector()
+
+        cached = _CachedAnalysis(
+            root=root,
+            options=options,
+            scan=ProjectScan(
+                self.project_root,
+                dir_mtimes=fingerprint.dir_mtimes,
+                ignore_mtimes=fingerprint.ignore_mtimes
+            ),
+            manifests=manifests,
+            results=results
+        )
+        self._save_cache(cached)
+        project_states.set(root, "analysis", cached)
+        return results
+
+    def _cache_file(self, root: str) -> Path:
+        digest = hashlib.sha1(root.encode("utf-8")).hexdigest()[:16]
+        return self.CACHE_DIR / f"{digest}.pickle"
+
+    def _load_cache(self, root: str) -> Optional[_CachedAnalysis]:
+        """Read a cached analysis from disk, or return None if missing or unusable."""
+        try:
+            with open(self._cache_file(root), "rb") as f:
+                data = f.read()
+            cached = pickle.loads(data)
+        except Exception:
+            return None
+        if (
+            not isinstance(cached, _CachedAnalysis)
+            or cached.version != CACHE_VERSION
+            or cached.root != root
+        ):
+            return None
+        cached.nbytes = len(data)
+        return cached
+
+    def _save_cache(self, cached: _CachedAnalysis) -> None:
+        """Write a cached analysis to disk atomically."""
+        path = self._cache_file(cached.root)
+        data = pickle.dumps(cached, protocol=pickle.HIGHEST_PROTOCOL)
+        cached.nbytes = len(data)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix(path.suffix + ".tmp")
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not save project analysis cache: {e}")
+
     def _detect_project_type(self) -> ProjectType:
         """Detect the main project type based on files and structure."""
-        files = list(self.project_root.glob("*"))
-        filenames = {f.name for f in files}
+        filenames = self.scan.root_names
 
         # Next.js
         if "next.config.js" in filenames or "next.config.mjs" in filenames:
@@ -118,22 +420,15 @@ class ProjectAnalyzer:
             return ProjectType.VITE
 
         # React (check package.json)
-        if "package.json" in filenames:
-            try:
-                with open(self.project_root / "package.json", "r", encoding="utf-8") as f:
-                    package_data = json.load(f)
-                    deps = package_data.get("dependencies", {})
-
-                    if "next" in deps:
-                        return ProjectType.NEXTJS
-                    elif "vite" in deps:
-                        return ProjectType.VITE
-                    elif "react" in deps:
-                        return ProjectType.REACT
-                    elif "express" in deps or "fastify" in deps:
-                        return ProjectType.NODE
-            except:
-                pass
+        deps = self.manifests.npm_dependencies
+        if "next" in deps:
+            return ProjectType.NEXTJS
+        elif "vite" in deps:
+            return ProjectType.VITE
+        elif "react" in deps:
+            return ProjectType.REACT
+        elif "express" in deps or "fastify" in deps:
+            return ProjectType.NODE
 
         # Python frameworks
         if "requirements.txt" in filenames or "pyproject.toml" in filenames or "setup.py" in filenames:
@@ -141,26 +436,14 @@ class ProjectAnalyzer:
                 return ProjectType.DJANGO
             elif "app.py" in filenames or "main.py" in filenames:
                 # Check for Flask imports
-                try:
-                    for py_file in self.project_root.glob("*.py"):
-                        with open(py_file, "r", encoding="utf-8") as f:
-                            content = f.read()
-                            if "from flask import" in content or "import flask" in content:
-                                return ProjectType.FLASK
-                except:
-                    pass
+                if self.manifests.python_sources_contain("from flask import", "import flask"):
+                    return ProjectType.FLASK
                 return ProjectType.PYTHON
 
         # Java/Spring
         if "pom.xml" in filenames or "build.gradle" in filenames:
-            try:
-                for xml_file in self.project_root.glob("pom.xml"):
-                    with open(xml_file, "r", encoding="utf-8") as f:
-                        content = f.read()
-                        if "spring-boot" in content:
-                            return ProjectType.SPRING
-            except:
-                pass
+            if self._uses_spring_boot():
+                return ProjectType.SPRING
             return ProjectType.OTHER  # Generic Java
 
         # Go
@@ -182,31 +465,30 @@ class ProjectAnalyzer:
         languages = set()
 
         # Check file extensions
-        for file_path in self.project_root.rglob("*"):
-            if file_path.is_file():
-                ext = file_path.suffix.lower()
-                if ext in [".js", ".jsx", ".mjs", ".cjs"]:
-                    languages.add("JavaScript")
-                elif ext in [".ts", ".tsx"]:
-                    languages.add("TypeScript")
-                elif ext == ".py":
-                    languages.add("Python")
-                elif ext in [".java", ".kt", ".scala"]:
-                    languages.add("Java")
-                elif ext == ".go":
-                    languages.add("Go")
-                elif ext == ".rs":
-                    languages.add("Rust")
-                elif ext in [".cs", ".vb"]:
-                    languages.add(".NET")
-                elif ext in [".cpp", ".cc", ".cxx", ".c++"]:
-                    languages.add("C++")
-                elif ext == ".c":
-                    languages.add("C")
-                elif ext in [".php"]:
-                    languages.add("PHP")
-                elif ext in [".rb"]:
-                    languages.add("Ruby")
+        extensions = {os.path.splitext(path)[1].lower() for path in self.scan.files}
+        for ext in extensions:
+            if ext in [".js", ".jsx", ".mjs", ".cjs"]:
+                languages.add("JavaScript")
+            elif ext in [".ts", ".tsx"]:
+                languages.add("TypeScript")
+            elif ext == ".py":
+                languages.add("Python")
+            elif ext in [".java", ".kt", ".scala"]:
+                languages.add("Java")
+            elif ext == ".go":
+                languages.add("Go")
+            elif ext == ".rs":
+                languages.add("Rust")
+            elif ext in [".cs", ".vb"]:
+                languages.add(".NET")
+            elif ext in [".cpp", ".cc", ".cxx", ".c++"]:
+                languages.add("C++")
+            elif ext == ".c":
+                languages.add("C")
+            elif ext in [".php"]:
+                languages.add("PHP")
+            elif ext in [".rb"]:
+                languages.add("Ruby")
 
         return languages
 
@@ -215,133 +497,120 @@ class ProjectAnalyzer:
         frameworks = set()
 
         # Check package.json for Node.js frameworks
-        if (self.project_root / "package.json").exists():
-            try:
-                with open(self.project_root / "package.json", "r", encoding="utf-8") as f:
-                    package_data = json.load(f)
-                    deps = {**package_data.get("dependencies", {}), **package_data.get("devDependencies", {})}
-
-                    if "next" in deps:
-                        frameworks.add("Next.js")
-                    if "vite" in deps:
-                        frameworks.add("Vite")
-                    if "react" in deps:
-                        frameworks.add("React")
-                    if "vue" in deps:
-                        frameworks.add("Vue.js")
-                    if "angular" in deps:
-                        frameworks.add("Angular")
-                    if "express" in deps:
-                        frameworks.add("Express.js")
-                    if "fastify" in deps:
-                        frameworks.add("Fastify")
-                    if "nestjs" in deps:
-                        frameworks.add("NestJS")
-            except:
-                pass
+        deps = self.manifests.npm_all_dependencies
+        if "next" in deps:
+            frameworks.add("Next.js")
+        if "vite" in deps:
+            frameworks.add("Vite")
+        if "react" in deps:
+            frameworks.add("React")
+        if "vue" in deps:
+            frameworks.add("Vue.js")
+        if "angular" in deps:
+            frameworks.add("Angular")
+        if "express" in deps:
+            frameworks.add("Express.js")
+        if "fastify" in deps:
+            frameworks.add("Fastify")
+        if "nestjs" in deps:
+            frameworks.add("NestJS")
 
         # Check Python frameworks
-        for py_file in self.project_root.glob("*.py"):
-            try:
-                with open(py_file, "r", encoding="utf-8") as f:
-                    content = f.read()
-                    if "from flask import" in content or "import flask" in content:
-                        frameworks.add("Flask")
-                    if "from django" in content or "import django" in content:
-                        frameworks.add("Django")
-                    if "from fastapi import" in content:
-                        frameworks.add("FastAPI")
-            except:
-                pass
+        if self.manifests.python_sources_contain("from flask import", "import flask"):
+            frameworks.add("Flask")
+        if self.manifests.python_sources_contain("from django", "import django"):
+            frameworks.add("Django")
+        if self.manifests.python_sources_contain("from fastapi import"):
+            frameworks.add("FastAPI")
 
         # Check Java/Spring
-        if (self.project_root / "pom.xml").exists():
-            try:
-                with open(self.project_root / "pom.xml", "r", encoding="utf-8") as f:
-                    content = f.read()
-                    if "spring-boot" in content:
-                        frameworks.add("Spring Boot")
-            except:
-                pass
+        if self._uses_spring_boot():
+            frameworks.add("Spring Boot")
 
         return frameworks
 
+    def _uses_spring_boot(self) -> bool:
+        """Whether pom.xml references Spring Boot (as parent, dependency or plugin)."""
+        pom = self.manifests.pom
+        return pom is not None and any("spring-boot" in artifact for artifact in pom.artifacts)
+
     def _extract_dependencies(self) -> tuple[Dict[str, str], Dict[str, str]]:
         """Extract dependencies from various package files."""
+        manifests = self.manifests
         dependencies = {}
         dev_dependencies = {}
 
         # Node.js
-        if (self.project_root / "package.json").exists():
-            try:
-                with open(self.project_root / "package.json", "r", encoding="utf-8") as f:
-                    package_data = json.load(f)
-                    dependencies = package_data.get("dependencies", {})
-                    dev_dependencies = package_data.get("devDependencies", {})
-            except:
-                pass
+        dependencies.update(manifests.npm_dependencies)
+        dev_dependencies.update(manifests.npm_dev_dependencies)
 
         # Python
-        if (self.project_root / "requirements.txt").exists():
-            try:
-                with open(self.project_root / "requirements.txt", "r", encoding="utf-8") as f:
-                    for line in f:
-                        line = line.strip()
-                        if line and not line.startswith("#"):
-                            if "==" in line:
-                                name, version = line.split("==", 1)
-                                dependencies[name] = version
-                            else:
-                                dependencies[line] = "latest"
-            except:
-                pass
+        if manifests.requirements:
+            dependencies.update(manifests.requirements)
+        project = (manifests.pyproject or {}).get("project") or {}
+        for requirement in project.get("dependencies") or []:
+            dependencies.update(parse_requirements(requirement))
+        for group, requirements in (project.get("optional-dependencies") or {}).items():
+            if group in ("dev", "test", "tests"):
+                for requirement in requirements:
+                    dev_dependencies.update(parse_requirements(requirement))
+        poetry = ((manifests.pyproject or {}).get("tool") or {}).get("poetry") or {}
+        for name, spec in (poetry.get("dependencies") or {}).items():
+            if name != "python":
+                dependencies[name] = self._toml_version(spec)
+        for group in (poetry.get("group") or {}).values():
+            for name, spec in (group.get("dependencies") or {}).items():
+                dev_dependencies[name] = self._toml_version(spec)
 
         # Go
-        if (self.project_root / "go.mod").exists():
-            try:
-                with open(self.project_root / "go.mod", "r", encoding="utf-8") as f:
-                    for line in f:
-                        line = line.strip()
-                        if line.startswith("require "):
-                            # Parse require block
-                            pass
-                        elif line.startswith("\t"):
-                            parts = line.split()
-                            if len(parts) >= 2:
-                                dependencies[parts[0]] = parts[1]
-            except:
-                pass
+        if manifests.go_mod:
+            dependencies.update(manifests.go_mod.require)
+
+        # Rust
+        cargo = manifests.cargo or {}
+        for name, spec in (cargo.get("dependencies") or {}).items():
+            dependencies[name] = self._toml_version(spec)
+        for name, spec in (cargo.get("dev-dependencies") or {}).items():
+            dev_dependencies[name] = self._toml_version(spec)
+
+        # Java
+        if manifests.pom:
+            for dep in manifests.pom.dependencies:
+                target = dev_dependencies if dep["scope"] == "test" else dependencies
+                target[f"{dep['group_id']}:{dep['artifact_id']}"] = dep["version"] or "managed"
 
         return dependencies, dev_dependencies
 
+    @staticmethod
+    def _toml_version(spec: Any) -> str:
+        """Version of a Poetry or Cargo dependency given as a string or a table."""
+        if isinstance(spec, dict):
+            spec = spec.get("version") or spec.get("git") or spec.get("path")
+        return str(spec) if spec else "latest"
+
     def _detect_build_commands(self) -> List[str]:
         """Detect build commands from package.json or other config files."""
         commands = []
 
-        # Node.js
-        if (self.project_root / "package.json").exists():
-            try:
-                with open(self.project_root / "package.json", "r", encoding="utf-8") as f:
-                    package_data = json.load(f)
-                    scripts = package_data.get("scripts", {})
+        present = self.manifests.present
 
-                    if "build" in scripts:
-                        commands.append(f"npm run build")
-                    if "compile" in scripts:
-                        commands.append(f"npm run compile")
-            except:
-                pass
+        # Node.js
+        scripts = self.manifests.npm_scripts
+        if "build" in scripts:
+            commands.append(f"npm run build")
+        if "compile" in scripts:
+            commands.append(f"npm run compile")
 
         # Python
-        if (self.project_root / "setup.py").exists():
+        if "setup.py" in present:
             commands.append("python setup.py build")
 
         # Go
-        if (self.project_root / "go.mod").exists():
+        if "go.mod" in present:
             commands.append("go build")
 
         # Rust
-        if (self.project_root / "Cargo.toml").exists():
+        if "Cargo.toml" in present:
             commands.append("cargo build")
 
         return commands
@@ -351,25 +620,18 @@ class ProjectAnalyzer:
         commands = []
 
         # Node.js
-        if (self.project_root / "package.json").exists():
-            try:
-                with open(self.project_root / "package.json", "r", encoding="utf-8") as f:
-                    package_data = json.load(f)
-                    scripts = package_data.get("scripts", {})
-
-                    if "start" in scripts:
-                        commands.append(f"npm start")
-                    if "dev" in scripts:
-                        commands.append(f"npm run dev")
-            except:
-                pass
+        scripts = self.manifests.npm_scripts
+        if "start" in scripts:
+            commands.append(f"npm start")
+        if "dev" in scripts:
+            commands.append(f"npm run dev")
 
         # Python
-        if any(self.project_root.glob("*.py")):
+        if self.manifests.root_python:
             commands.append("python main.py")  # Generic
 
         # Go
-        if (self.project_root / "go.mod").exists():
+        if "go.mod" in self.manifests.present:
             commands.append("go run .")
 
         return commands
@@ -381,36 +643,31 @@ class ProjectAnalyzer:
         frameworks = set()
 
         # Node.js
-        if (self.project_root / "package.json").exists():
-            try:
-                with open(self.project_root / "package.json", "r", encoding="utf-8") as f:
-                    package_data = json.load(f)
-                    scripts = package_data.get("scripts", {})
-                    deps = {**package_data.get("dependencies", {}), **package_data.get("devDependencies", {})}
-
-                    if "test" in scripts:
-                        commands.append("npm test")
-                        has_tests = True
-
-                    if "jest" in deps:
-                        frameworks.add("Jest")
-                    if "mocha" in deps:
-                        frameworks.add("Mocha")
-                    if "vitest" in deps:
-                        frameworks.add("Vitest")
-            except:
-                pass
+        scripts = self.manifests.npm_scripts
+        deps = self.manifests.npm_all_dependencies
+
+        if "test" in scripts:
+            commands.append("npm test")
+            has_tests = True
+
+        if "jest" in deps:
+            frameworks.add("Jest")
+        if "mocha" in deps:
+            frameworks.add("Mocha")
+        if "vitest" in deps:
+            frameworks.add("Vitest")
 
         # Python
-        if any(self.project_root.glob("test_*.py")) or any(self.project_root.glob("*_test.py")):
+        if self.scan.root_files("test_*.py") or self.scan.root_files("*_test.py"):
             has_tests = True
             commands.append("python -m pytest")
             frameworks.add("pytest")
 
         # Check for test directories
         test_dirs = ["test", "tests", "__tests__", "spec", "specs"]
+        root_names = self.scan.root_names
         for test_dir in test_dirs:
-            if (self.project_root / test_dir).exists():
+            if test_dir in root_names:
                 has_tests = True
                 break
 
@@ -418,45 +675,40 @@ class ProjectAnalyzer:
 
     def _analyze_folder_structure(self) -> Dict[str, Any]:
         """Analyze and summarize folder structure."""
-        structure = {}
+        scan = self.scan
 
-        def analyze_dir(path: Path, max_depth=3, current_depth=0) -> Dict[str, Any]:
+        def analyze_dir(rel_dir: str, max_depth=3, current_depth=0) -> Dict[str, Any]:
             if current_depth >= max_depth:
                 return {"type": "directory", "truncated": True}
 
             result = {"type": "directory", "children": {}}
-
-            try:
-                for item in sorted(path.iterdir()):
-                    if item.name.startswith("."):
-                        continue  # Skip hidden files
-
-                    if item.is_file():
-                        result["children"][item.name] = {"type": "file"}
-                    elif item.is_dir():
-                        result["children"][item.name] = analyze_dir(item, max_depth, current_depth + 1)
-            except PermissionError:
+            if rel_dir in scan.unreadable:
                 result["error"] = "Permission denied"
 
+            for name, is_dir in scan.entries.get(rel_dir, []):
+                if name.startswith("."):
+                    continue  # Skip hidden files
+
+                if is_dir:
+                    rel_path = f"{rel_dir}/{name}" if rel_dir else name
+                    result["children"][name] = analyze_dir(rel_path, max_depth, current_depth + 1)
+                else:
+                    result["children"][name] = {"type": "file"}
+
             return result
 
-        structure = analyze_dir(self.project_root)
-        return structure
+        return analyze_dir('')
 
     def _find_config_files(self) -> List[str]:
         """Find configuration files."""
-        config_files = []
         config_patterns = [
             "*.json", "*.yaml", "*.yml", "*.toml", "*.ini", "*.cfg", "*.conf",
             "*.env*", ".env*", "*.properties", "*.xml", "*.gradle", "*.mk"
         ]
+        # One regex for all patterns, matched against each file's name
+        config_regex = re.compile("|".join(translate(pattern) for pattern in config_patterns))
 
-        for pattern in config_patterns:
-            for file_path in self.project_root.glob(f"**/{pattern}"):
-                if file_path.is_file():
-                    config_files.append(str(file_path.relative_to(self.project_root)))
-
-        return config_files
+        return [path for path in self.scan.files if config_regex.match(path.rpartition("/")[2])]
 
     def _find_entry_points(self) -> List[str]:
         """Find main entry points."""
@@ -473,15 +725,9 @@ class ProjectAnalyzer:
                 entry_points.append(entry)
 
         # Check package.json main field
-        if (self.project_root / "package.json").exists():
-            try:
-                with open(self.project_root / "package.json", "r", encoding="utf-8") as f:
-                    package_data = json.load(f)
-                    main = package_data.get("main")
-                    if main and (self.project_root / main).exists():
-                        entry_points.append(main)
-            except:
-                pass
+        main = (self.manifests.package_json or {}).get("main")
+        if isinstance(main, str) and main and (self.project_root / main).exists():
+            entry_points.append(main)
 
         return entry_points
 
@@ -489,20 +735,23 @@ class ProjectAnalyzer:
         """Detect package managers used."""
         managers = set()
 
-        if (self.project_root / "package.json").exists():
+        present = self.manifests.present
+        root_names = self.scan.root_names
+
+        if "package.json" in present:
             managers.add("npm")
-            if (self.project_root / "yarn.lock").exists():
+            if "yarn.lock" in root_names:
                 managers.add("yarn")
-            if (self.project_root / "pnpm-lock.yaml").exists():
+            if "pnpm-lock.yaml" in root_names:
                 managers.add("pnpm")
 
-        if (self.project_root / "requirements.txt").exists() or (self.project_root / "pyproject.toml").exists():
+        if "requirements.txt" in present or "pyproject.toml" in present:
             managers.add("pip")
 
-        if (self.project_root / "go.mod").exists():
+        if "go.mod" in present:
             managers.add("go modules")
 
-        if (self.project_root / "Cargo.toml").exists():
+        if "Cargo.toml" in present:
             managers.add("cargo")
 
         return managers
@@ -518,58 +767,74 @@ class ProjectAnalyzer:
             "serverless.yml", "app.yaml", "Procfile"
         ]
 
+        # Files and directories at any depth, by name and by trailing path
+        scan = self.scan
+        paths = scan.files + scan.dirs
+        names = {path.rpartition("/")[2] for path in paths}
         for file_pattern in deployment_files:
-            if list(self.project_root.glob(f"**/{file_pattern}")):
+            if "/" not in file_pattern:
+                found = file_pattern in names
+            else:
+                found = any(path == file_pattern or path.endswith("/" + file_pattern) for path in scan.dirs)
+            if found:
                 indicators.append(file_pattern)
 
         return indicators
 
-    def _scan_vulnerabilities(self) -> List[str]:
+    def _find_vulnerable_packages(self) -> List[str]:
         """Basic vulnerability scanning (placeholder for more advanced scanning)."""
         vulnerabilities = []
 
         # Check for common security issues
-        if (self.project_root / "package.json").exists():
-            try:
-                with open(self.project_root / "package.json", "r", encoding="utf-8") as f:
-                    package_data = json.load(f)
-                    deps = {**package_data.get("dependencies", {}), **package_data.get("devDependencies", {})}
-
-                    # Check for known vulnerable packages (simplified)
-                    vulnerable_packages = ["left-pad"]  # Example
-                    for vuln in vulnerable_packages:
-                        if vuln in deps:
-                            vulnerabilities.append(f"Potentially vulnerable package: {vuln}")
-            except:
-                pass
+        deps = self.manifests.npm_all_dependencies
+
+        # Check for known vulnerable packages (simplified)
+        vulnerable_packages = ["left-pad"]  # Example
+        for vuln in vulnerable_packages:
+            if vuln in deps:
+                vulnerabilities.append(f"Potentially vulnerable package: {vuln}")
+
+        return vulnerabilities
+
+    def _find_secret_files(self) -> List[str]:
+        """Find files and directories that look like they hold secrets."""
+        vulnerabilities = []
 
         # Check for exposed secrets
         secret_patterns = [".env", "secrets", "keys"]
+        names = {path.rpartition("/")[2] for path in self.scan.files + self.scan.dirs}
         for pattern in secret_patterns:
-            if list(self.project_root.glob(f"**/{pattern}*")):
+            if any(name.startswith(pattern) for name in names):
                 vulnerabilities.append(f"Potential secrets file: {pattern}")
 
         return vulnerabilities
 
-    def _calculate_health_score(self) -> int:
-        """Calculate a basic health score for the project."""
+    def _calculate_health_score(
+        self,
+        has_tests: bool,
+        config_files: List[str],
+        entry_points: List[str],
+        deployment_indicators: List[str],
+        vulnerabilities: List[str]
+    ) -> int:
+        """Calculate a basic health score from the already detected metadata."""
         score = 50  # Base score
 
         # Add points for good practices
-        if self._detect_test_info()[1]:  # Has tests
+        if has_tests:
             score += 20
 
-        if self._find_config_files():  # Has config files
+        if config_files:
             score += 10
 
-        if self._find_entry_points():  # Has clear entry points
+        if entry_points:  # Has clear entry points
             score += 10
 
-        if self._detect_deployment_indicators():  # Has deployment config
+        if deployment_indicators:  # Has deployment config
             score += 10
 
         # Subtract points for issues
-        if self._scan_vulnerabilities():
+        if vulnerabilities:
             score -= 20
 
         return max(0, min(100, score))
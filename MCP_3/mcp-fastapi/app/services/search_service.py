@@ -0,0 +1,600 @@
+"""Code search service for regex and literal search across the project."""
+import asyncio
+import hashlib
+import logging
+import os
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, AsyncIterator, Callable, Deque, Dict, Iterator, List, Optional, Pattern, Set, Tuple
+
+from app.config import settings
+from app.services.fs_service import fs_service
+from app.services.watcher_service import watcher_service
+from app.utils.ignore import compile_glob
+from app.utils.path_utils import resolve_safe_path
+from app.utils.project_state import project_states
+from app.utils.trigram import Plan, TrigramIndex, file_trigrams, literal_plan, regex_plan
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _IndexState:
+    """Trigram index of one project root and its pending changes."""
+    index: Optional[TrigramIndex] = None  # set once the project has been fully scanned
+    refreshed_at: float = 0.0  # start of the last completed rescan
+    changed_paths: Set[str] = field(default_factory=set)
+    generation: int = 0  # bumped whenever anything may have changed unseen
+    synced_generation: int = -1  # generation at the start of the last completed rescan
+    refresh_lock: threading.Lock = field(default_factory=threading.Lock, repr=False)  # one rescan at a time
+
+    @property
+    def nbytes(self) -> int:
+        return self.index.nbytes if self.index is not None else 0
+
+
+class SearchService:
+    """
+    Service for searching file contents within project boundaries.
+
+    Files are enumerated with the same gitignore-aware walk as list_files
+    and scanned by a thread pool, a bounded window of files at a time.
+    Results are reported in walk order, and scanning stops as soon as the
+    result limit is reached or the consumer goes away.
+
+    When the trigram index for the project is ready, queries with enough
+    literal text are narrowed to the files the index says may match, and
+    only those are scanned. Indexes are built by a background thread,
+    persisted under ~/.senscoder/search_index, and updated per file as
+    tools and the file watcher report changes. An index is only trusted
+    as is while the watcher reports changes to its project live and no
+    unlocalized change (e.g. exec) is pending; otherwise it is rescanned
+    (one stat per file, re-reading changed files) before the search uses
+    it, at most every UNWATCHED_RESCAN_INTERVAL seconds for a project that
+    is not watched live. Each project root has its own index, held in the
+    shared per-project state cache.
+    """
+
+    DEFAULT_MAX_RESULTS = 200
+    MAX_RESULTS = 5000
+    MAX_CONTEXT_LINES = 10
+    MAX_FILE_SIZE = 1024 * 1024  # larger files are skipped
+    MAX_LINE_LENGTH = 500  # longer matching lines are clipped around the match
+    BINARY_SNIFF_BYTES = 8192
+    INDEX_DIR = Path.home() / ".senscoder" / "search_index"
+    INDEX_REFRESH_INTERVAL = 60.0  # seconds between background rescans of the tree
+    UNWATCHED_RESCAN_INTERVAL = 2.0  # seconds an index of a project not watched live is trusted
+
+    def __init__(self, max_workers: Optional[int] = None):
+        self.max_workers = max_workers or min(8, (os.cpu_count() or 1) + 2)
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+        # Trigram indexes live in project_states as _IndexState, one per project root
+        self._index_lock = threading.Lock()
+        self._index_executor: Optional[ThreadPoolExecutor] = None
+        self._index_jobs: Dict[str, Future] = {}  # project root -> running or queued refresh
+        self._closing = False
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='search')
+        return self._executor
+
+    def _compile(self, query: str, regex: bool, case_sensitive: bool) -> Pattern:
+        """Compile the query, raising ValueError for an invalid regex."""
+        if not query:
+            raise ValueError("Query is required")
+        flags = 0 if case_sensitive else re.IGNORECASE
+        try:
+            return re.compile(query if regex else re.escape(query), flags)
+        except re.error as e:
+            raise ValueError(f"Invalid regular expression: {e}")
+
+    def _clip(self, line: str, column: int) -> str:
+        """Clip a long line to a window around the match."""
+        if len(line) <= self.MAX_LINE_LENGTH:
+            return line
+        start = max(0, column - self.MAX_LINE_LENGTH // 4)
+        return line[start:start + self.MAX_LINE_LENGTH]
+
+    def _scan_file(
+        self,
+        path: str,
+        rel_path: str,
+        pattern: Pattern,
+        literal: Optional[bytes],
+        context_lines: int,
+        max_matches: int,
+        stop: threading.Event
+    ) -> Optional[List[Dict[str, Any]]]:
+        """
+        Search one file (runs in the thread pool).
+
+        Returns:
+            List of matches, or None if the file was skipped (binary, too
+            large or unreadable)
+        """
+        if stop.is_set():
+            return []
+        try:
+            if os.path.getsize(path) > self.MAX_FILE_SIZE:
+                return None
+            with open(path, 'rb') as f:
+                data = f.read()
+        except OSError:
+            return None
+
+        if b'\0' in data[:self.BINARY_SNIFF_BYTES]:
+            return None
+        # Cheap byte-level rejection before decoding
+        if literal is not None and literal not in data:
+            return []
+
+        text = data.decode('utf-8', errors='replace')
+        if not pattern.search(text):
+            return []
+
+        lines = text.splitlines()
+        matches = []
+        for index, line in enumerate(lines):
+            found = pattern.search(line)
+            if not found:
+                continue
+            match: Dict[str, Any] = {
+                "path": rel_path,
+                "line": index + 1,
+                "column": found.start() + 1,
+                "text": self._clip(line, found.start())
+            }
+            if context_lines:
+                match["before"] = [self._clip(l, 0) for l in lines[max(0, index - context_lines):index]]
+                match["after"] = [self._clip(l, 0) for l in lines[index + 1:index + 1 + context_lines]]
+            matches.append(match)
+            if len(matches) >= max_matches:
+                break
+        return matches
+
+    def _iter_candidates(
+        self,
+        project_root: Path,
+        dir_path: Path,
+        candidates: List[str],
+        include: List[Pattern],
+        exclude: List[Pattern]
+    ) -> Iterator[Tuple[str, str]]:
+        """Index candidates below dir_path that pass the filters, in index order."""
+        root_rel = dir_path.relative_to(project_root).as_posix()
+        prefix = '' if root_rel == '.' else root_rel + '/'
+
+        for rel_path in candidates:
+            if not rel_path.startswith(prefix):
+                continue
+            rel_in_root = rel_path[len(prefix):]
+            if include and not any(p.match(rel_in_root) for p in include):
+                continue
+            if exclude:
+                # Excluded directories prune everything below them
+                parts = rel_in_root.split('/')
+                if any(p.match('/'.join(parts[:i])) for i in range(1, len(parts) + 1) for p in exclude):
+                    continue
+            yield str(project_root / rel_path), rel_path
+
+    def _iter_walk(
+        self,
+        project_root: Path,
+        dir_path: Path,
+        include: List[Pattern],
+        exclude: List[Pattern],
+        respect_gitignore: bool,
+        stop: threading.Event
+    ) -> Iterator[Tuple[str, str]]:
+        """Files below dir_path that pass the filters, in walk order."""
+        for item, item_parts, rel_path, is_dir in fs_service.iter_tree(
+            project_root, dir_path, exclude=exclude, respect_gitignore=respect_gitignore
+        ):
+            if stop.is_set():
+                return
+            if is_dir:
+                continue
+            if include and not any(p.match('/'.join(item_parts)) for p in include):
+                continue
+            yield item.path, rel_path
+
+    def _search(
+        self,
+        emit: Callable[[Dict[str, Any]], None],
+        stop: threading.Event,
+        files: Iterator[Tuple[str, str]],
+        pattern: Pattern,
+        literal: Optional[bytes],
+        context_lines: int,
+        max_results: int,
+        indexed: bool
+    ) -> None:
+        """Scan files in the pool, emitting matches in the order given (blocking)."""
+        executor = self._get_executor()
+        window: Deque[Future] = deque()
+        window_size = self.max_workers * 4
+        results = files_scanned = files_matched = files_skipped = 0
+        truncated = False
+
+        def drain_one() -> None:
+            nonlocal results, files_scanned, files_matched, files_skipped, truncated
+            matches = window.popleft().result()
+            if matches is None:
+                files_skipped += 1
+                return
+            files_scanned += 1
+            if matches:
+                files_matched += 1
+            for match in matches:
+                results += 1
+                emit(match)
+                if results >= max_results:
+                    truncated = True
+                    stop.set()
+                    return
+
+        try:
+            for path, rel_path in files:
+                if stop.is_set():
+                    break
+                window.append(executor.submit(
+                    self._scan_file, path, rel_path, pattern, literal,
+                    context_lines, max_results, stop
+                ))
+                if len(window) >= window_size:
+                    drain_one()
+
+            while window and not stop.is_set():
+                drain_one()
+        finally:
+            for future in window:
+                future.cancel()
+
+        emit({
+            "count": results,
+            "files_scanned": files_scanned,
+            "files_matched": files_matched,
+            "files_skipped": files_skipped,
+            "truncated": truncated,
+            "indexed": indexed
+        })
+
+    async def stream_search(
+        self,
+        query: str,
+        relative_path: str = ".",
+        user_id: Optional[str] = None,
+        regex: bool = False,
+        case_sensitive: bool = True,
+        include: Optional[List[str]] = None,
+        exclude: Optional[List[str]] = None,
+        respect_gitignore: bool = True,
+        context_lines: int = 0,
+        max_results: int = DEFAULT_MAX_RESULTS
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Search file contents, yielding matches as they are found.
+
+        Binary files (a NUL byte near the start), files over MAX_FILE_SIZE
+        and ignored paths are skipped. Uses the trigram index when it is
+        ready and respect_gitignore is set.
+
+        Args:
+            query: Text or regular expression to search for
+            relative_path: Directory to search (defaults to project root)
+            user_id: User ID for context
+            regex: Treat query as a regular expression
+            case_sensitive: Match case
+            include: Globs a file must match; patterns without "/" match the file name
+            exclude: Globs of files and directories to skip
+            respect_gitignore: Skip .git and paths ignored by .gitignore files
+            context_lines: Lines of context before and after each match
+            max_results: Stop after this many matches
+
+        Yields:
+            {"path", "line", "column", "text"[, "before", "after"]} per match,
+            then a summary with counts, a truncated flag (set when
+            max_results was reached) and whether the index was used
+
+        Raises:
+            ValueError: If the query or path is invalid
+            FileNotFoundError: If directory doesn't exist
+        """
+        pattern = self._compile(query, regex, case_sensitive)
+        literal = query.encode('utf-8') if not regex and case_sensitive else None
+        context_lines = max(0, min(int(context_lines), self.MAX_CONTEXT_LINES))
+        max_results = max(1, min(int(max_results), self.MAX_RESULTS))
+
+        dir_path = resolve_safe_path(relative_path, user_id)
+        if not dir_path.is_dir():
+            raise FileNotFoundError(f"Directory not found: {relative_path}")
+        project_root = resolve_safe_path(".", user_id)
+
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        stop = threading.Event()
+        done = object()
+
+        def emit(event: Dict[str, Any]) -> None:
+            loop.call_soon_threadsafe(queue.put_nowait, event)
+
+        include_globs = [compile_glob(p) for p in include or []]
+        exclude_globs = [compile_glob(p) for p in exclude or []]
+        plan = regex_plan(query, case_sensitive) if regex else literal_plan(query, case_sensitive)
+
+        def run() -> None:
+            try:
+                candidates = self._index_candidates(project_root, plan) if respect_gitignore else None
+                if candidates is not None:
+                    files = self._iter_candidates(project_root, dir_path, candidates, include_globs, exclude_globs)
+                else:
+                    files = self._iter_walk(project_root, dir_path, include_globs, exclude_globs, respect_gitignore, stop)
+                self._search(
+                    emit, stop, files, pattern, literal,
+                    context_lines, max_results, candidates is not None
+                )
+            except Exception as e:
+                loop.call_soon_threadsafe(queue.put_nowait, e)
+            finally:
+                loop.call_soon_threadsafe(queue.put_nowait, done)
+
+        worker = loop.run_in_executor(None, run)
+        try:
+            while True:
+                event = await queue.get()
+                if event is done:
+                    break
+                if isinstance(event, Exception):
+                    raise event
+                yield event
+        finally:
+            # Stops the walk if the consumer went away early
+            stop.set()
+            await asyncio.shield(worker)
+
+    async def search(self, query: str, relative_path: str = ".", user_id: Optional[str] = None, **options: Any) -> Dict[str, Any]:
+        """
+        Search file contents and return all matches at once.
+
+        Takes the same options as stream_search.
+
+        Returns:
+            Dict with matches, count, files_scanned, files_matched,
+            files_skipped and a truncated flag
+        """
+        matches: List[Dict[str, Any]] = []
+        summary: Dict[str, Any] = {}
+
+        async for event in self.stream_search(query, relative_path, user_id, **options):
+            if "line" in event:
+                matches.append(event)
+            else:
+                summary = event
+
+        return {"matches": matches, **summary}
+
+    # Trigram index
+
+    def _index_file(self, root: Path) -> Path:
+        digest = hashlib.sha1(str(root).encode('utf-8')).hexdigest()[:16]
+        return self.INDEX_DIR / f"{digest}.pickle"
+
+    def warm_index(self, user_id: Optional[str] = None) -> None:
+        """Start loading or building the index of the project in the background."""
+        if not settings.search_index_enabled:
+            return
+        try:
+            project_root = resolve_safe_path(".", user_id)
+        except ValueError:
+            # Project not configured yet
+            return
+        self._schedule_refresh(project_root)
+
+    def _index_state(self, project_root: Path) -> _IndexState:
+        return project_states.get(str(project_root), 'search_index', _IndexState)
+
+    def notify_changed(self, project_root: Path, relative_paths: Optional[List[str]] = None) -> None:
+        """
+        Tell a project's index that files changed.
+
+        Args:
+            project_root: Resolved project root
+            relative_paths: Changed paths relative to the project root; they
+                are re-indexed before the next search. None means anything
+                may have changed; the next search rescans the project first.
+        """
+        state = project_states.peek(str(project_root), 'search_index')
+        if state is None:
+            return
+        with self._index_lock:
+            if relative_paths is None:
+                state.generation += 1
+            else:
+                state.changed_paths.update(
+                    os.path.normpath(path).replace(os.sep, '/') for path in relative_paths
+                )
+
+    def _schedule_refresh(self, project_root: Path, state: Optional[_IndexState] = None) -> None:
+        state = state or self._index_state(project_root)
+        root = str(project_root)
+        with self._index_lock:
+            job = self._index_jobs.get(root)
+            if self._closing or (job is not None and not job.done()):
+                return
+            if self._index_executor is None:
+                # One thread: refreshes of different projects queue up
+                self._index_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='search-index')
+            self._index_jobs = {key: job for key, job in self._index_jobs.items() if not job.done()}
+            self._index_jobs[root] = self._index_executor.submit(self._refresh_index, project_root, state)
+
+    def _index_candidates(self, project_root: Path, plan: Plan) -> Optional[List[str]]:
+        """
+        Candidate paths from the index, or None if it cannot be used (blocking).
+
+        Brings the index up to date first: a project that had an
+        unlocalized change, or that is not watched live and was last
+        rescanned more than UNWATCHED_RESCAN_INTERVAL ago, is rescanned
+        right away; otherwise only pending per-file changes are applied,
+        plus a background rescan when the last one is older than
+        INDEX_REFRESH_INTERVAL.
+        """
+        if not settings.search_index_enabled:
+            return None
+
+        state = self._index_state(project_root)
+        if state.index is None:
+            self._schedule_refresh(project_root, state)
+            return None
+        if plan is None:
+            return None
+
+        live = watcher_service.is_live(str(project_root))
+
+        def stale() -> bool:
+            return state.synced_generation != state.generation or (
+                not live and time.monotonic() - state.refreshed_at > self.UNWATCHED_RESCAN_INTERVAL
+            )
+
+        if stale():
+            with state.refresh_lock:
+                # A rescan that finished while we waited may have covered it
+                if stale() and not self._rescan(project_root, state):
+                    return None
+        elif time.monotonic() - state.refreshed_at > self.INDEX_REFRESH_INTERVAL:
+            self._schedule_refresh(project_root, state)
+        index = state.index
+
+        with self._index_lock:
+            changed, state.changed_paths = state.changed_paths, set()
+        for rel_path in changed:
+            self._update_index_file(index, project_root, rel_path)
+
+        return index.candidates(plan)
+
+    def _read_trigrams(self, path: str, size: int) -> Optional[Set[int]]:
+        """Trigrams of a file, or None if it is not searchable (binary, too large, unreadable)."""
+        if size > self.MAX_FILE_SIZE:
+            return None
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except OSError:
+            return None
+        if b'\0' in data[:self.BINARY_SNIFF_BYTES]:
+            return None
+        return file_trigrams(data)
+
+    def _update_index_file(self, index: TrigramIndex, project_root: Path, rel_path: str) -> None:
+        """Bring one file's index entry up to date (blocking)."""
+        path = project_root / rel_path
+        try:
+            stat = path.stat()
+        except OSError:
+            index.remove(rel_path)
+            return
+        if not path.is_file():
+            index.remove(rel_path)
+        elif not index.is_current(rel_path, stat.st_mtime_ns, stat.st_size):
+            index.update(rel_path, stat.st_mtime_ns, stat.st_size, self._read_trigrams(str(path), stat.st_size))
+
+    def _iter_files(self, project_root: Path) -> Iterator[Tuple[str, int, int]]:
+        """
+        (path, mtime_ns, size) of every searchable file (blocking).
+
+        Served from the watcher's project tree when there is one, otherwise
+        by walking and stat-ing the project.
+        """
+        tree = fs_service.project_tree(project_root)
+        if tree is not None:
+            for rel_path, entry in tree.files():
+                yield rel_path, entry.mtime_ns, entry.size
+            return
+
+        for item, _, rel_path, is_dir in fs_service.iter_tree(project_root, project_root):
+            if is_dir:
+                continue
+            try:
+                stat = item.stat()
+            except OSError:
+                continue
+            yield rel_path, stat.st_mtime_ns, stat.st_size
+
+    def _refresh_index(self, project_root: Path, state: _IndexState) -> None:
+        """Load, build or rescan the index (runs on the index thread)."""
+        with state.refresh_lock:
+            self._rescan(project_root, state)
+
+    def _rescan(self, project_root: Path, state: _IndexState) -> bool:
+        """
+        Load, build or rescan the index (blocking; state.refresh_lock held).
+
+        Unchanged files (same mtime and size) are skipped, so a rescan costs
+        one stat per file (none with a watcher running) plus reading the
+        files that changed. A new index only replaces the active one once
+        it is complete; updates to the active one take its own lock, so
+        searches can keep using it meanwhile.
+
+        Returns:
+            Whether the index is now up to date
+        """
+        root = str(project_root)
+        index_file = self._index_file(project_root)
+        try:
+            with self._index_lock:
+                generation = state.generation
+            index = state.index
+            if index is None:
+                index = TrigramIndex.load(index_file, root) or TrigramIndex(root)
+            if index.needs_compaction:
+                index = TrigramIndex(root)
+
+            started = time.monotonic()
+            changed = False
+            seen: Set[str] = set()
+            for rel_path, mtime_ns, size in self._iter_files(project_root):
+                if self._closing:
+                    return False
+                seen.add(rel_path)
+                if not index.is_current(rel_path, mtime_ns, size):
+                    index.update(rel_path, mtime_ns, size, self._read_trigrams(str(project_root / rel_path), size))
+                    changed = True
+
+            if index.retain(seen):
+                changed = True
+
+            state.index = index
+            state.refreshed_at = started
+            state.synced_generation = generation
+            # The index may have grown past the memory budget of the cache
+            project_states.trim(keep=root)
+            if changed:
+                index.save(index_file)
+            logger.log(
+                logging.INFO if changed else logging.DEBUG,
+                f"Search index refreshed: {len(index)} files in {time.monotonic() - started:.1f}s"
+            )
+            return True
+        except Exception:
+            logger.exception("Search index refresh failed")
+            return False
+
+    def close(self) -> None:
+        """Shut down the thread pools."""
+        self._closing = True
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        if self._index_executor is not None:
+            self._index_executor.shutdown(wait=False, cancel_futures=True)
+            self._index_executor = None
+
+
+# Global service instance
+search_service = SearchService()
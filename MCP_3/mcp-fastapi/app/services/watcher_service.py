@@ -0,0 +1,508 @@
+"""File watcher service that keeps project caches incrementally fresh."""
+import asyncio
+import ctypes
+import ctypes.util
+import errno
+import logging
+import os
+import stat
+import struct
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from app.config import settings
+from app.project_manager import project_manager
+from app.services.fs_service import fs_service
+from app.utils.ignore import IgnoreStack
+from app.utils.path_utils import resolve_safe_path
+from app.utils.project_tree import ProjectTree, TreeEntry
+
+logger = logging.getLogger(__name__)
+
+# Receives the watched project root and the changed paths (relative to it),
+# or None when anything may have changed
+Subscriber = Callable[[Path, Optional[List[str]]], None]
+
+# From <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_DONT_FOLLOW = 0x02000000
+IN_EXCL_UNLINK = 0x04000000
+
+WATCH_MASK = (
+    IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE
+    | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR | IN_DONT_FOLLOW | IN_EXCL_UNLINK
+)
+
+_EVENT_HEADER = struct.Struct('iIII')  # wd, mask, cookie, name length
+
+
+class _Inotify:
+    """Minimal ctypes binding to the Linux inotify API."""
+
+    def __init__(self):
+        libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self._add_watch.restype = ctypes.c_int
+        self._rm_watch = libc.inotify_rm_watch
+        self._rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+
+        fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if fd < 0:
+            code = ctypes.get_errno()
+            raise OSError(code, os.strerror(code))
+        self.fd = fd
+
+    def add_watch(self, path: str) -> int:
+        wd = self._add_watch(self.fd, os.fsencode(path), WATCH_MASK)
+        if wd < 0:
+            code = ctypes.get_errno()
+            raise OSError(code, os.strerror(code), path)
+        return wd
+
+    def rm_watch(self, wd: int) -> None:
+        self._rm_watch(self.fd, wd)
+
+    def read_events(self) -> List[Tuple[int, int, str]]:
+        """Read pending events as (wd, mask, name) tuples."""
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+
+        events = []
+        pos = 0
+        while pos + _EVENT_HEADER.size <= len(data):
+            wd, mask, _, length = _EVENT_HEADER.unpack_from(data, pos)
+            pos += _EVENT_HEADER.size
+            name = data[pos:pos + length].rstrip(b'\0')
+            pos += length
+            events.append((wd, mask, os.fsdecode(name)))
+        return events
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+class _ProjectWatch:
+    """
+    Watcher of one project root: its tree, and its inotify instance or poll task.
+
+    The initial scan runs in the background; until it completes the
+    project is not live and there is no tree, so services fall back to
+    reading the file system. Watch descriptors are registered from scan
+    threads and looked up on the event loop, so their maps are guarded by
+    a lock.
+    """
+
+    DEBOUNCE = 0.1
+    POLL_INTERVAL = 2.0  # minimum seconds between polling rescans
+
+    def __init__(self, root: Path, publish: Subscriber, loop: asyncio.AbstractEventLoop):
+        self.root = root
+        self.backend: Optional[str] = None  # 'inotify' or 'polling' once scanned
+        self.tree: Optional[ProjectTree] = None
+        self._publish_to = publish
+        self._loop = loop
+        self._inotify: Optional[_Inotify] = None
+        self._watches: Dict[int, str] = {}  # wd -> directory relative to the root
+        self._watch_dirs: Dict[str, int] = {}
+        self._watch_lock = threading.Lock()  # guards _watches and _watch_dirs
+        self._scan_task: Optional[asyncio.Task] = None  # initial scan, while it runs
+        self._scan_cancel = threading.Event()
+        self._pending: Set[str] = set()
+        self._rescan = False
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._flush_lock = asyncio.Lock()
+        self._poll_task: Optional[asyncio.Task] = None
+
+    def _publish(self, paths: Optional[List[str]]) -> None:
+        if paths is not None and not paths:
+            return
+        self._publish_to(self.root, paths)
+
+    def start(self) -> None:
+        """Scan the project in the background, then start receiving changes."""
+        self._scan_task = asyncio.create_task(self._initial_scan(self._scan_cancel))
+
+    async def _initial_scan(self, cancel: threading.Event) -> None:
+        """Scan the project, then start receiving changes."""
+        root = self.root
+        started = time.monotonic()
+        try:
+            if sys.platform.startswith('linux'):
+                try:
+                    self._inotify = _Inotify()
+                except (OSError, AttributeError):
+                    self._inotify = None
+
+            tree = ProjectTree(str(root))
+            try:
+                await asyncio.to_thread(self._scan, tree, '', cancel)
+            except OSError as e:
+                if e.errno not in (errno.ENOSPC, errno.EMFILE) or cancel.is_set():
+                    raise
+                # Out of inotify watches: rescan a fresh tree and poll instead
+                logger.warning(f"inotify watch limit reached ({e}); falling back to polling {root}")
+                self._close_inotify()
+                tree = ProjectTree(str(root))
+                await asyncio.to_thread(self._scan, tree, '', cancel)
+            if cancel.is_set():
+                return
+        except Exception:
+            if not cancel.is_set():
+                logger.exception(f"Failed to scan {root}; not watching it")
+                self._close_inotify()
+            return
+        finally:
+            self._scan_task = None
+
+        self.tree = tree
+        fs_service.use_tree(root, tree)
+
+        if self._inotify is not None:
+            self.backend = 'inotify'
+            self._loop.add_reader(self._inotify.fd, self._on_readable)
+        else:
+            self.backend = 'polling'
+            self._poll_task = asyncio.create_task(self._poll_loop())
+
+        logger.info(
+            f"Watching {root} with {self.backend}: {len(tree)} paths in {time.monotonic() - started:.1f}s"
+        )
+
+    async def stop(self) -> None:
+        """Stop watching and drop the tree."""
+        if self._scan_task is not None:
+            # The scan thread cannot be interrupted: tell it to stop and wait
+            self._scan_cancel.set()
+            await asyncio.gather(self._scan_task, return_exceptions=True)
+            self._scan_task = None
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if self._poll_task is not None:
+            self._poll_task.cancel()
+            try:
+                await self._poll_task
+            except asyncio.CancelledError:
+                pass
+            self._poll_task = None
+        self._close_inotify()
+
+        if self.tree is not None:
+            fs_service.use_tree(self.root, None)
+        self.tree = None
+        self.backend = None
+        self._pending.clear()
+
+    def _close_inotify(self) -> None:
+        if self._inotify is None:
+            return
+        self._loop.remove_reader(self._inotify.fd)
+        self._inotify.close()
+        self._inotify = None
+        with self._watch_lock:
+            self._watches.clear()
+            self._watch_dirs.clear()
+
+    # Scanning (blocking, runs in a worker thread)
+
+    def _watch(self, rel_dir: str) -> None:
+        if self._inotify is None:
+            return
+        wd = self._inotify.add_watch(str(self.root / rel_dir) if rel_dir else str(self.root))
+        with self._watch_lock:
+            # A moved directory keeps its watch descriptor under the new path
+            previous = self._watches.get(wd)
+            if previous is not None and previous != rel_dir:
+                self._watch_dirs.pop(previous, None)
+            self._watches[wd] = rel_dir
+            self._watch_dirs[rel_dir] = wd
+
+    def _unwatch(self, rel_dir: str) -> None:
+        with self._watch_lock:
+            wd = self._watch_dirs.pop(rel_dir, None)
+            if wd is None or self._watches.get(wd) != rel_dir:
+                return
+            del self._watches[wd]
+        if self._inotify is not None:
+            self._inotify.rm_watch(wd)
+
+    def _scan(self, tree: ProjectTree, rel_dir: str, cancel: Optional[threading.Event] = None) -> List[str]:
+        """
+        Add a directory's subtree to the tree, watching each directory.
+
+        A directory is watched before its entries are listed, so nothing
+        created meanwhile is missed.
+
+        Args:
+            tree: Tree to add to
+            rel_dir: Directory relative to the root ('' for the root)
+            cancel: Stops the scan early when set
+
+        Returns:
+            The paths added
+        """
+        root = self.root
+        dir_path = root / rel_dir if rel_dir else root
+        self._watch(rel_dir)
+
+        added = []
+        for item, _, rel_path, is_dir in fs_service.iter_tree(root, dir_path):
+            if cancel is not None and cancel.is_set():
+                break
+            try:
+                st = item.stat()
+            except OSError:
+                continue
+            tree.set(rel_path, TreeEntry(is_dir, None if is_dir else st.st_size, st.st_mtime_ns))
+            added.append(rel_path)
+            if is_dir and not item.is_symlink():
+                self._watch(rel_path)
+        return added
+
+    def _apply(self, tree: ProjectTree, paths: Set[str]) -> List[str]:
+        """
+        Bring the given paths up to date in the tree.
+
+        Returns:
+            The paths that actually changed
+        """
+        root = self.root
+        changed: List[str] = []
+        ignores: Dict[str, IgnoreStack] = {}
+
+        # Parents first, so new directories exist before their entries
+        for rel_path in sorted(paths, key=lambda path: path.count('/')):
+            parent, _, name = rel_path.rpartition('/')
+            try:
+                st = os.stat(root / rel_path)
+            except OSError:
+                for removed in tree.remove(rel_path):
+                    self._unwatch(removed)
+                    changed.append(removed)
+                continue
+
+            if parent and parent not in tree:
+                # Inside an ignored or not yet scanned directory
+                continue
+            is_dir = stat.S_ISDIR(st.st_mode)
+            if parent not in ignores:
+                ignores[parent] = IgnoreStack.for_directory(root, parent)
+            if (is_dir and name == '.git') or ignores[parent].is_ignored(rel_path, is_dir):
+                for removed in tree.remove(rel_path):
+                    self._unwatch(removed)
+                    changed.append(removed)
+                continue
+
+            entry = TreeEntry(is_dir, None if is_dir else st.st_size, st.st_mtime_ns)
+            previous = tree.get(rel_path)
+            if is_dir and (previous is None or not previous.is_dir):
+                # New or moved-in directory
+                tree.set(rel_path, entry)
+                changed.append(rel_path)
+                if not os.path.islink(root / rel_path):
+                    changed.extend(self._scan(tree, rel_path))
+            elif previous != entry:
+                tree.set(rel_path, entry)
+                changed.append(rel_path)
+
+        return changed
+
+    def _resync(self) -> ProjectTree:
+        """Rebuild the tree and all watches from scratch."""
+        with self._watch_lock:
+            watched = list(self._watch_dirs)
+        for rel_dir in watched:
+            self._unwatch(rel_dir)
+        tree = ProjectTree(str(self.root))
+        self._scan(tree, '')
+        return tree
+
+    def _poll(self, tree: ProjectTree) -> List[str]:
+        """Rescan the project and update the tree in place."""
+        root = self.root
+        changed: List[str] = []
+        seen: Set[str] = set()
+
+        for item, _, rel_path, is_dir in fs_service.iter_tree(root, root):
+            try:
+                st = item.stat()
+            except OSError:
+                continue
+            seen.add(rel_path)
+            entry = TreeEntry(is_dir, None if is_dir else st.st_size, st.st_mtime_ns)
+            if tree.get(rel_path) != entry:
+                tree.set(rel_path, entry)
+                changed.append(rel_path)
+
+        for rel_path in tree.paths():
+            if rel_path not in seen and rel_path in tree:
+                changed.extend(tree.remove(rel_path))
+        return changed
+
+    # Event handling (event loop)
+
+    def _on_readable(self) -> None:
+        if self._inotify is None:
+            return
+        for wd, mask, name in self._inotify.read_events():
+            if mask & IN_Q_OVERFLOW:
+                self._rescan = True
+                continue
+            with self._watch_lock:
+                rel_dir = self._watches.get(wd)
+                if rel_dir is not None and mask & IN_IGNORED:
+                    # The kernel dropped the watch (directory deleted or unmounted)
+                    del self._watches[wd]
+                    if self._watch_dirs.get(rel_dir) == wd:
+                        del self._watch_dirs[rel_dir]
+            if rel_dir is None or mask & IN_IGNORED:
+                continue
+            if name == '.gitignore':
+                # Ignore rules changed: which paths belong in the tree changed too
+                self._rescan = True
+            if mask & (IN_DELETE_SELF | IN_MOVE_SELF) and not rel_dir:
+                # The project root itself went away
+                self._rescan = True
+            self._pending.add(f"{rel_dir}/{name}" if rel_dir and name else name or rel_dir)
+
+        if self._flush_handle is None:
+            self._flush_handle = self._loop.call_later(self.DEBOUNCE, self._start_flush)
+
+    def _start_flush(self) -> None:
+        self._flush_handle = None
+        asyncio.create_task(self._flush())
+
+    async def _flush(self) -> None:
+        async with self._flush_lock:
+            tree = self.tree
+            if tree is None:
+                return
+            pending, self._pending = self._pending, set()
+            rescan, self._rescan = self._rescan, False
+            pending.discard('')
+
+            try:
+                if rescan:
+                    new_tree = await asyncio.to_thread(self._resync)
+                    if self.tree is tree:
+                        self.tree = new_tree
+                        fs_service.use_tree(self.root, new_tree)
+                    self._publish(None)
+                elif pending:
+                    self._publish(await asyncio.to_thread(self._apply, tree, pending))
+            except Exception:
+                logger.exception("Watcher failed to apply changes")
+
+    async def _poll_loop(self) -> None:
+        while True:
+            tree = self.tree
+            if tree is None:
+                return
+            started = time.monotonic()
+            try:
+                changed = await asyncio.to_thread(self._poll, tree)
+                self._publish(changed)
+            except Exception:
+                logger.exception("Watcher poll failed")
+            # Keep polling to a small share of the time on large trees
+            elapsed = time.monotonic() - started
+            await asyncio.sleep(max(self.POLL_INTERVAL, elapsed * 5))
+
+
+class WatcherService:
+    """
+    Watches project roots and publishes changed paths to subscribers.
+
+    The default project and the projects of individual users are watched,
+    up to settings.max_projects roots (the bound of the per-project state
+    cache; the default project comes first). Projects beyond it are not
+    live, and services validate their caches by mtime instead.
+
+    For each root a ProjectTree (every non-ignored path with its type, size
+    and mtime) is maintained that fs_service uses for listings. On Linux
+    the tree is kept current with inotify; elsewhere, or when inotify is
+    unavailable or out of watches, the tree is rescanned periodically and
+    diffed. Either way subscribers only hear about the paths that changed,
+    batched over _ProjectWatch.DEBOUNCE seconds.
+    """
+
+    def __init__(self):
+        self._subscribers: List[Subscriber] = []
+        self._projects: Dict[str, _ProjectWatch] = {}  # root -> its watch
+
+    def subscribe(self, callback: Subscriber) -> None:
+        """Register a callback for change batches; called on the event loop."""
+        self._subscribers.append(callback)
+
+    def _publish(self, root: Path, paths: Optional[List[str]]) -> None:
+        for callback in self._subscribers:
+            try:
+                callback(root, paths)
+            except Exception:
+                logger.exception("Watcher subscriber failed")
+
+    def is_live(self, root: str) -> bool:
+        """Whether changes under a project root are reported as they happen (not polled)."""
+        watch = self._projects.get(root)
+        return watch is not None and watch.backend == 'inotify'
+
+    def _configured_roots(self) -> List[Path]:
+        """The project roots to watch, the default project's first."""
+        roots = []
+        try:
+            roots.append(resolve_safe_path("."))
+        except ValueError:
+            pass
+        for config in project_manager.user_projects().values():
+            root = config.project_path
+            if root not in roots and root.is_dir():
+                roots.append(root)
+        return roots[:settings.max_projects]
+
+    async def start(self) -> None:
+        """
+        Watch the configured project roots; call again after configuration changes.
+
+        Returns at once; roots not watched yet are scanned in the background
+        and become live (see is_live) once the scan completes. Roots that
+        are still configured keep their watch, and watches of roots that no
+        longer are are stopped.
+        """
+        roots = {str(root): root for root in self._configured_roots()}
+        stale = [self._projects.pop(root) for root in list(self._projects) if root not in roots]
+        for watch in stale:
+            await watch.stop()
+
+        loop = asyncio.get_running_loop()
+        for key, root in roots.items():
+            if key not in self._projects:
+                watch = _ProjectWatch(root, self._publish, loop)
+                self._projects[key] = watch
+                watch.start()
+
+    async def stop(self) -> None:
+        """Stop watching every root and drop their trees."""
+        watches, self._projects = list(self._projects.values()), {}
+        for watch in watches:
+            await watch.stop()
+
+
+# Global service instance
+watcher_service = WatcherService()
@@ -0,0 +1,84 @@
+"""In-memory caching utilities."""
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+
+class LRUCache:
+    """
+    Thread-safe least-recently-used cache.
+
+    Bounded by entry count and, optionally, by the total size of its values
+    as measured by `sizeof`. The least recently used entries are evicted
+    first when either bound is exceeded.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        max_bytes: Optional[int] = None,
+        sizeof: Optional[Callable[[Any], int]] = None
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._sizeof = sizeof or (lambda value: 0)
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._sizes: dict = {}
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Get a value and mark it as recently used."""
+        with self._lock:
+            if key not in self._data:
+                return default
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """Insert or replace a value, evicting old entries as needed."""
+        size = self._sizeof(value)
+        with self._lock:
+            if key in self._data:
+                self._total_bytes -= self._sizes.pop(key)
+                del self._data[key]
+
+            # Values larger than the whole budget are not worth caching
+            if self.max_bytes is not None and size > self.max_bytes:
+                return
+
+            self._data[key] = value
+            self._sizes[key] = size
+            self._total_bytes += size
+
+            while len(self._data) > self.max_entries or (
+                self.max_bytes is not None and self._total_bytes > self.max_bytes
+            ):
+                old_key, _ = self._data.popitem(last=False)
+                self._total_bytes -= self._sizes.pop(old_key)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        """Remove a value and return it."""
+        with self._lock:
+            if key not in self._data:
+                return default
+            self._total_bytes -= self._sizes.pop(key)
+            return self._data.pop(key)
+
+    def clear(self) -> None:
+        """Remove all values."""
+        with self._lock:
+            self._data.clear()
+            self._sizes.clear()
+            self._total_bytes = 0
+
+    @property
+    def total_bytes(self) -> int:
+        """Total size of cached values as measured by `sizeof`."""
+        return self._total_bytes
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._data
@@ -0,0 +1,194 @@
+"""Long-lived `git cat-file` coprocesses for fast git object access."""
+import asyncio
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from app.utils.metrics import tool_metrics
+
+
+class GitObjectInfo(NamedTuple):
+    """Header of a git object as reported by `git cat-file --batch-check`."""
+    sha: str
+    type: str
+    size: int
+
+
+class TreeEntry(NamedTuple):
+    """Single entry of a git tree object."""
+    mode: str
+    type: str
+    sha: str
+    name: str
+
+
+class _CatFileProcess:
+    """
+    One `git cat-file --batch` or `--batch-check` coprocess.
+
+    Requests are written to stdin one object name per line and answered in
+    order, so access is serialized with a lock. The process is started on
+    first use and restarted if it dies.
+    """
+
+    def __init__(self, repo_root: str, mode: str):
+        self.repo_root = repo_root
+        self.mode = mode
+        self._process: Optional[asyncio.subprocess.Process] = None
+        self._lock = asyncio.Lock()
+
+    async def _ensure_started(self) -> asyncio.subprocess.Process:
+        if self._process is None or self._process.returncode is not None:
+            if self._process is not None:
+                tool_metrics.child_exited(self._process)
+            self._process = await asyncio.create_subprocess_exec(
+                'git', 'cat-file', self.mode,
+                cwd=self.repo_root,
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.DEVNULL,
+                start_new_session=True,
+            )
+            # Serves many tool calls, so its CPU is not any one call's
+            tool_metrics.child_started(self._process, owned=False)
+        return self._process
+
+    async def request(self, spec: str) -> Tuple[Optional[GitObjectInfo], Optional[bytes]]:
+        """
+        Look up one object.
+
+        Returns:
+            (info, content) where content is None in --batch-check mode, or
+            (None, None) if the object does not exist or is ambiguous
+        """
+        async with self._lock:
+            process = await self._ensure_started()
+            try:
+                process.stdin.write(spec.encode('utf-8') + b'\n')
+                await process.stdin.drain()
+                header = (await process.stdout.readuntil(b'\n')).decode('utf-8', errors='replace').rstrip('\n')
+
+                # "<spec> missing" / "<spec> ambiguous"
+                if header.endswith((' missing', ' ambiguous')):
+                    return None, None
+
+                sha, obj_type, size = header.split()
+                info = GitObjectInfo(sha=sha, type=obj_type, size=int(size))
+                if self.mode != '--batch':
+                    return info, None
+
+                content = await process.stdout.readexactly(info.size + 1)
+                return info, content[:-1]
+
+            except (asyncio.IncompleteReadError, ConnectionResetError, BrokenPipeError):
+                # The coprocess died mid-request; start afresh next time
+                await self._terminate()
+                raise RuntimeError("git cat-file process exited unexpectedly")
+            except asyncio.CancelledError:
+                # A half-read response would desynchronize the protocol
+                await self._terminate()
+                raise
+
+    async def _terminate(self) -> None:
+        process, self._process = self._process, None
+        if process and process.returncode is None:
+            try:
+                process.kill()
+            except ProcessLookupError:
+                pass
+            await process.wait()
+        if process:
+            tool_metrics.child_exited(process)
+
+    async def close(self) -> None:
+        """Shut down the coprocess."""
+        async with self._lock:
+            process, self._process = self._process, None
+            if process and process.returncode is None:
+                process.stdin.close()
+                try:
+                    await asyncio.wait_for(process.wait(), timeout=2)
+                except asyncio.TimeoutError:
+                    process.kill()
+                    await process.wait()
+            if process:
+                tool_metrics.child_exited(process)
+
+
+class GitCatFile:
+    """
+    Object reader for one repository backed by persistent cat-file processes.
+
+    Object names are anything `git rev-parse` understands, including
+    `<rev>:<path>` and `<rev>^{tree}`. A lookup costs a pipe round trip
+    instead of a process spawn.
+    """
+
+    def __init__(self, repo_root: str):
+        self.repo_root = repo_root
+        self._batch = _CatFileProcess(repo_root, '--batch')
+        self._batch_check = _CatFileProcess(repo_root, '--batch-check')
+
+    @staticmethod
+    def _validate_spec(spec: str) -> None:
+        if not spec or '\n' in spec or '\0' in spec:
+            raise ValueError(f"Invalid git object name: {spec!r}")
+
+    async def info(self, spec: str) -> Optional[GitObjectInfo]:
+        """Get an object's SHA, type and size without reading its content."""
+        self._validate_spec(spec)
+        info, _ = await self._batch_check.request(spec)
+        return info
+
+    async def read(self, spec: str) -> Tuple[Optional[GitObjectInfo], Optional[bytes]]:
+        """Read an object's header and raw content."""
+        self._validate_spec(spec)
+        return await self._batch.request(spec)
+
+    async def read_tree(self, spec: str) -> Optional[List[TreeEntry]]:
+        """Read a tree object (or the tree of a commit) and parse its entries."""
+        info, content = await self.read(spec)
+        if info is None:
+            return None
+        if info.type == 'commit':
+            info, content = await self.read(f"{info.sha}^{{tree}}")
+        if info is None or info.type != 'tree':
+            raise ValueError(f"Not a tree: {spec}")
+        return parse_tree(content, hash_size=len(info.sha) // 2)
+
+    async def close(self) -> None:
+        """Shut down both coprocesses."""
+        await self._batch.close()
+        await self._batch_check.close()
+
+
+_TREE_ENTRY_TYPES: Dict[str, str] = {
+    '40000': 'tree',
+    '160000': 'commit',  # submodule
+}
+
+
+def parse_tree(content: bytes, hash_size: int = 20) -> List[TreeEntry]:
+    """
+    Parse raw tree object content.
+
+    Each entry is `<mode> <name>\\0<binary sha>`, where the sha is 20 bytes
+    (SHA-1 repositories) or 32 bytes (SHA-256 repositories).
+    """
+    entries = []
+    pos = 0
+    end = len(content)
+
+    while pos < end:
+        space = content.index(b' ', pos)
+        nul = content.index(b'\0', space)
+        mode = content[pos:space].decode('ascii')
+        name = content[space + 1:nul].decode('utf-8', errors='replace')
+        sha = content[nul + 1:nul + 1 + hash_size].hex()
+        entries.append(TreeEntry(
+            mode=mode,
+            type=_TREE_ENTRY_TYPES.get(mode, 'blob'),
+            sha=sha,
+            name=name
+        ))
+        pos = nul + 1 + hash_size
+
+    return entries
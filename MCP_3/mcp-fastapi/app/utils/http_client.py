@@ -1,5 +1,8 @@
 """HTTP client for communicating with the SensCoder Node.js backend."""
+import asyncio
 import logging
+import random
+import time
 import httpx
 from typing import Dict, Any, Optional
 
@@ -8,26 +11,146 @@ from app.config import settings
 logger = logging.getLogger(__name__)
 
 
+class CircuitBreaker:
+    """
+    Stops calling a failing backend for a while.
+
+    After `failure_threshold` consecutive failures the circuit opens and
+    calls are refused for `reset_timeout` seconds. Then a single trial call
+    is let through: success closes the circuit, failure opens it again. A
+    trial that never reports back (e.g. cancelled) is replaced by a new one
+    after another `reset_timeout`.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_started: Optional[float] = None
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at < self.reset_timeout:
+            return "open"
+        return "half-open"
+
+    def allow(self) -> bool:
+        """Whether a call may be made now."""
+        state = self.state
+        if state == "closed":
+            return True
+        now = time.monotonic()
+        if state == "half-open" and (
+            self._trial_started is None or now - self._trial_started >= self.reset_timeout
+        ):
+            self._trial_started = now
+            return True
+        return False
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+        self._trial_started = None
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self._trial_started = None
+        if self.opened_at is not None or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+
+
 class BackendClient:
-    """Client for communicating with the SensCoder backend."""
+    """
+    Client for communicating with the SensCoder backend.
+
+    One pooled httpx client is shared by all backend calls; it is created by
+    `start` in the app lifespan (or lazily on first use) and closed by
+    `close`. Transient failures (connection errors, timeouts, 5xx) are
+    retried with jittered exponential backoff, and a circuit breaker makes
+    calls fail immediately while the backend is down.
+    """
+
+    RETRY_BASE_DELAY = 0.2  # seconds; doubled on each retry, then jittered
 
     def __init__(self):
-        self.client = httpx.AsyncClient(
-            timeout=httpx.Timeout(10.0, connect=5.0),
-            headers={
-                "User-Agent": "SensCoder-MCP/0.1.0",
-                "Content-Type": "application/json"
-            },
-            verify=True  # Enable SSL verification
-        )
+        self.client: Optional[httpx.AsyncClient] = None
+        self.breaker = CircuitBreaker()
 
     async def __aenter__(self):
+        await self.start()
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        await self.client.aclose()
+        await self.close()
+
+    async def start(self) -> None:
+        """Create the connection pool."""
+        if self.client is None:
+            self.client = httpx.AsyncClient(
+                timeout=httpx.Timeout(settings.backend_timeout, connect=min(5.0, settings.backend_timeout)),
+                limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+                headers={
+                    "User-Agent": "SensCoder-MCP/0.1.0",
+                    "Content-Type": "application/json"
+                },
+                verify=True  # Enable SSL verification
+            )
+
+    async def close(self) -> None:
+        """Close the connection pool."""
+        if self.client is not None:
+            client, self.client = self.client, None
+            await client.aclose()
+
+    async def get_json(self, endpoint: str, user_id: Optional[str] = None) -> Optional[Any]:
+        """
+        GET a backend endpoint and decode its JSON response.
 
-    async def get_provider_config(self, user_id: str) -> Dict[str, Any]:
+        Args:
+            endpoint: Path below the backend URL
+            user_id: Sent as the X-User-ID header
+
+        Returns:
+            The decoded body of a 200 response, or None if the backend is
+            unavailable, the circuit is open or the response is not 200
+        """
+        if not self.breaker.allow():
+            return None
+        if self.client is None:
+            await self.start()
+
+        url = settings.get_backend_url(endpoint)
+        headers = {"X-User-ID": user_id} if user_id else None
+        for attempt in range(settings.backend_max_retries + 1):
+            try:
+                response = await self.client.get(url, headers=headers)
+            except httpx.HTTPError as e:
+                error = str(e) or type(e).__name__
+            else:
+                if response.status_code < 500:
+                    # The backend answered; a 4xx is not a reason to open the circuit
+                    self.breaker.record_success()
+                    if response.status_code != 200:
+                        logger.warning(f"Backend GET {endpoint} returned {response.status_code}")
+                        return None
+                    try:
+                        return response.json()
+                    except ValueError:
+                        logger.warning(f"Backend GET {endpoint} returned invalid JSON")
+                        return None
+                error = f"HTTP {response.status_code}"
+
+            if attempt < settings.backend_max_retries:
+                await asyncio.sleep(random.uniform(0, self.RETRY_BASE_DELAY * 2 ** attempt))
+
+        self.breaker.record_failure()
+        logger.warning(f"Backend GET {endpoint} failed: {error} (circuit {self.breaker.state})")
+        return None
+
+    async def get_provider_config(self, user_id: str) -> Optional[Dict[str, Any]]:
         """
         Get provider configuration for a user.
 
@@ -35,34 +158,11 @@ class BackendClient:
             user_id: User ID to get config for
 
         Returns:
-            Provider configuration dict
+            Provider configuration dict, or None if the backend is unavailable
         """
-        url = settings.get_backend_url(f"/internal/mcp/config?userId={user_id}")
-
-        try:
-            logger.info(f"Fetching provider config for user {user_id}")
-            response = await self.client.get(url)
-            response.raise_for_status()
-            data = response.json()
-            logger.info(f"Successfully retrieved provider config for user {user_id}")
-            return data
-        except httpx.HTTPError as e:
-            logger.warning(f"Failed to get provider config for user {user_id}: {e}")
-            # Return default config if backend is unavailable
-            return {
-                "provider": "none",
-                "useOwnKey": False,
-                "hasApiKey": False
-            }
-        except Exception as e:
-            logger.error(f"Unexpected error getting provider config for user {user_id}: {e}")
-            return {
-                "provider": "none",
-                "useOwnKey": False,
-                "hasApiKey": False
-            }
-
-    async def get_project_config(self, user_id: str) -> Dict[str, Any]:
+        return await self.get_json("/api/internal/mcp/config", user_id)
+
+    async def get_project_config(self, user_id: str) -> Optional[Dict[str, Any]]:
         """
         Get project configuration for a user.
 
@@ -70,29 +170,10 @@ class BackendClient:
             user_id: User ID to get project config for
 
         Returns:
-            Project configuration dict
+            Project configuration dict, or None if the backend is unavailable
         """
-        url = settings.get_backend_url(f"/internal/mcp/project?userId={user_id}")
-
-        try:
-            logger.info(f"Fetching project config for user {user_id}")
-            response = await self.client.get(url)
-            response.raise_for_status()
-            data = response.json()
-            logger.info(f"Successfully retrieved project config for user {user_id}")
-            return data
-        except httpx.HTTPError as e:
-            logger.warning(f"Failed to get project config for user {user_id}: {e}")
-            # Return default project config
-            return {
-                "projectRoot": str(settings.project_root_path)
-            }
-        except Exception as e:
-            logger.error(f"Unexpected error getting project config for user {user_id}: {e}")
-            return {
-                "projectRoot": str(settings.project_root_path)
-            }
+        return await self.get_json("/api/internal/mcp/project-config", user_id)
 
 
 # Global client instance
-backend_client = BackendClient()
\ No newline at end of file
+backend_client = BackendClient()
@@ -0,0 +1,163 @@
+"""Glob and .gitignore pattern matching for directory walks."""
+import re
+from pathlib import Path
+from typing import List, NamedTuple, Optional, Pattern
+
+
+def _translate_glob(pattern: str) -> str:
+    """
+    Translate a gitignore-style glob to a regular expression.
+
+    `*` and `?` do not match `/`, `**` matches across directories, and
+    `[...]` character classes (with `!` negation) are supported.
+    """
+    out = []
+    i = 0
+    n = len(pattern)
+
+    while i < n:
+        c = pattern[i]
+        if c == '*':
+            if pattern[i:i + 3] == '**/':
+                out.append('(?:.*/)?')
+                i += 3
+                continue
+            if pattern[i:i + 2] == '**':
+                out.append('.*')
+                i += 2
+                continue
+            out.append('[^/]*')
+        elif c == '?':
+            out.append('[^/]')
+        elif c == '[':
+            end = pattern.find(']', i + 2)
+            if end == -1:
+                out.append(re.escape(c))
+            else:
+                body = pattern[i + 1:end]
+                if body.startswith('!'):
+                    body = '^' + body[1:]
+                out.append('[' + body.replace('\\', '\\\\') + ']')
+                i = end
+        elif c == '\\' and i + 1 < n:
+            i += 1
+            out.append(re.escape(pattern[i]))
+        else:
+            out.append(re.escape(c))
+        i += 1
+
+    return ''.join(out)
+
+
+def compile_glob(pattern: str) -> Pattern:
+    """
+    Compile a glob matched against `/`-separated relative paths.
+
+    Patterns without a `/` match the last path component at any depth;
+    patterns containing one match the whole path.
+    """
+    pattern = pattern.strip().rstrip('/')
+    if '/' in pattern:
+        return re.compile(_translate_glob(pattern.lstrip('/')) + r'\Z')
+    return re.compile(r'(?:.*/)?' + _translate_glob(pattern) + r'\Z')
+
+
+class IgnoreRule(NamedTuple):
+    """One .gitignore pattern."""
+    regex: Pattern
+    negated: bool
+    dir_only: bool
+
+
+class IgnoreFile:
+    """Rules from one .gitignore file, matched relative to its directory."""
+
+    def __init__(self, base: str, rules: List[IgnoreRule]):
+        self.base = base  # directory of the file, relative to the project root ('' for the root)
+        self.rules = rules
+
+    @classmethod
+    def parse(cls, base: str, text: str) -> "IgnoreFile":
+        rules = []
+        for line in text.splitlines():
+            line = line.rstrip()
+            if not line or line.startswith('#'):
+                continue
+
+            negated = line.startswith('!')
+            if negated:
+                line = line[1:]
+            elif line.startswith('\\'):
+                line = line[1:]
+
+            dir_only = line.endswith('/')
+            line = line.rstrip('/')
+            if not line:
+                continue
+
+            rules.append(IgnoreRule(compile_glob(line), negated, dir_only))
+        return cls(base, rules)
+
+    @classmethod
+    def load(cls, directory: Path, base: str) -> Optional["IgnoreFile"]:
+        """Read `<directory>/.gitignore`, or return None if it is missing or empty."""
+        try:
+            text = (directory / '.gitignore').read_text(encoding='utf-8', errors='replace')
+        except OSError:
+            return None
+        ignore_file = cls.parse(base, text)
+        return ignore_file if ignore_file.rules else None
+
+    def match(self, rel_path: str, is_dir: bool) -> Optional[bool]:
+        """
+        Match a path relative to the project root.
+
+        Returns:
+            True if ignored, False if re-included by a `!` pattern, None if
+            no rule matches
+        """
+        if self.base:
+            if not rel_path.startswith(self.base + '/'):
+                return None
+            rel_path = rel_path[len(self.base) + 1:]
+
+        # The last matching rule wins
+        for rule in reversed(self.rules):
+            if rule.dir_only and not is_dir:
+                continue
+            if rule.regex.match(rel_path):
+                return not rule.negated
+        return None
+
+
+class IgnoreStack:
+    """
+    The .gitignore files in effect for a directory during a walk.
+
+    Deeper files take precedence over shallower ones, as in git. Children
+    of an ignored directory are never visited, so they need no checks.
+    """
+
+    def __init__(self, files: Optional[List[IgnoreFile]] = None):
+        self.files = files or []
+
+    @classmethod
+    def for_directory(cls, project_root: Path, rel_dir: str) -> "IgnoreStack":
+        """Stack for a directory: the .gitignore files from the project root down to it."""
+        stack = cls().push(IgnoreFile.load(project_root, ''))
+        directory, base = project_root, ''
+        for part in rel_dir.split('/') if rel_dir else []:
+            directory, base = directory / part, f"{base}/{part}" if base else part
+            stack = stack.push(IgnoreFile.load(directory, base))
+        return stack
+
+    def push(self, ignore_file: Optional[IgnoreFile]) -> "IgnoreStack":
+        """Stack for a subdirectory: this one plus the subdirectory's own file."""
+        return IgnoreStack(self.files + [ignore_file]) if ignore_file else self
+
+    def is_ignored(self, rel_path: str, is_dir: bool) -> bool:
+        for ignore_file in reversed(self.files):
+            result = ignore_file.match(rel_path, is_dir)
+            if result is not None:
+                return result
+        return False
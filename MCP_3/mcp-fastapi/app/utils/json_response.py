@@ -0,0 +1,83 @@
+"""Fast JSON encoding for large responses."""
+from dataclasses import asdict, is_dataclass
+from enum import Enum
+from pathlib import PurePath
+from typing import Any, Dict
+
+import pydantic_core
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:  # optional: pip install -e ".[speedups]"
+    orjson = None
+
+
+def _model_fields(model: BaseModel) -> Dict[str, Any]:
+    """
+    A model's fields by alias, as FastAPI serializes responses.
+
+    Values are left for the encoder instead of being copied by model_dump,
+    which costs as much as encoding for large dicts; models with custom
+    serializers or computed fields still go through model_dump.
+    """
+    cls = type(model)
+    decorators = cls.__pydantic_decorators__
+    if decorators.field_serializers or decorators.model_serializers or cls.model_computed_fields:
+        return model.model_dump(mode="json", by_alias=True)
+    return {
+        field.serialization_alias or field.alias or name: getattr(model, name)
+        for name, field in cls.model_fields.items()
+    }
+
+
+def _default(value: Any) -> Any:
+    """Encode what orjson does not know natively, like jsonable_encoder would."""
+    if isinstance(value, BaseModel):
+        return _model_fields(value)
+    if isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    if isinstance(value, PurePath):
+        return str(value)
+    if isinstance(value, Enum):
+        return value.value
+    if is_dataclass(value) and not isinstance(value, type):
+        return asdict(value)
+    return str(value)
+
+
+def dumps(content: Any) -> bytes:
+    """
+    Encode a value as compact UTF-8 JSON.
+
+    Uses orjson when it is installed and pydantic-core's encoder otherwise;
+    both work on the objects directly instead of first building a
+    jsonable_encoder copy. Pydantic models, dataclasses, sets, paths and
+    enums are encoded as FastAPI would; other unknown objects as str().
+
+    Args:
+        content: Value to encode
+
+    Returns:
+        JSON bytes
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            # e.g. integers beyond 64 bits; pydantic-core handles them
+            pass
+    return pydantic_core.to_json(content, fallback=_default)
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSONResponse encoded with `dumps`.
+
+    Endpoints with large bodies return it directly, which skips FastAPI's
+    response-model validation and jsonable_encoder pass.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -0,0 +1,86 @@
+"""Sparse line-offset index for seeking by line number in large files."""
+import mmap
+from array import array
+from bisect import bisect_left
+from typing import Optional, Tuple
+
+
+class LineIndex:
+    """
+    Newline counts at fixed byte intervals of a file.
+
+    `newlines_before[b]` is the number of newlines in the file before byte
+    `b * block_size`. Locating a line is a binary search over the blocks
+    followed by a scan of at most one block, so memory stays at a few bytes
+    per block and a seek never touches more than `block_size` bytes of
+    content regardless of the file size.
+    """
+
+    def __init__(self, size: int, block_size: int, newlines_before: array, total_newlines: int, ends_with_newline: bool):
+        self.size = size
+        self.block_size = block_size
+        self.newlines_before = newlines_before
+        self.total_newlines = total_newlines
+        self.ends_with_newline = ends_with_newline
+
+    @classmethod
+    def build(cls, mm: mmap.mmap, block_size: int = 64 * 1024) -> "LineIndex":
+        """Scan a mapped file once and record the newline count per block."""
+        size = len(mm)
+        newlines_before = array('Q')
+        total = 0
+
+        for start in range(0, size, block_size):
+            newlines_before.append(total)
+            total += mm[start:start + block_size].count(b'\n')
+
+        ends_with_newline = size > 0 and mm[size - 1:size] == b'\n'
+        return cls(size, block_size, newlines_before, total, ends_with_newline)
+
+    @property
+    def line_count(self) -> int:
+        """Number of lines, counting a final line without a trailing newline."""
+        if self.size == 0:
+            return 0
+        return self.total_newlines + (0 if self.ends_with_newline else 1)
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory used by the index."""
+        return self.newlines_before.itemsize * len(self.newlines_before) + 64
+
+    def line_offset(self, mm: mmap.mmap, line: int) -> Optional[int]:
+        """
+        Byte offset of the start of a 1-based line.
+
+        Returns:
+            The offset, the file size for the line just past the last one, or
+            None if the line is beyond that
+        """
+        if line <= 1:
+            return 0
+        if line > self.line_count + 1:
+            return None
+
+        # The line starts right after newline number `skip` (1-based)
+        skip = line - 1
+        if skip > self.total_newlines:
+            return self.size
+
+        # Last block that starts before that newline
+        block = bisect_left(self.newlines_before, skip) - 1
+        pos = block * self.block_size
+        remaining = skip - self.newlines_before[block]
+
+        while remaining:
+            pos = mm.find(b'\n', pos) + 1
+            remaining -= 1
+        return pos
+
+    def line_range(self, mm: mmap.mmap, start_line: int, end_line: int) -> Tuple[int, int]:
+        """Byte range [start, end) covering lines start_line..end_line inclusive."""
+        start = self.line_offset(mm, start_line)
+        if start is None:
+            return self.size, self.size
+        end = self.line_offset(mm, end_line + 1)
+        return start, self.size if end is None else end
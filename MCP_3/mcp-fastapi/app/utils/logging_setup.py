@@ -0,0 +1,153 @@
+"""Non-blocking structured logging with per-request context."""
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+from contextvars import ContextVar
+from typing import Any, Dict, Optional
+
+from app.config import settings
+
+# ID of the HTTP request being handled, attached to every record logged while handling it
+request_id_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+# Attributes every LogRecord has; anything else was passed through `extra`
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "request_id"}
+
+
+class RequestIdFilter(logging.Filter):
+    """Attach the current request ID to records."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Format records as one JSON object per line.
+
+    Fields: time, level, logger, message, request_id (when logged during a
+    request), every `extra` field, and exc_info as a formatted traceback.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: Dict[str, Any] = {
+            "time": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        request_id = getattr(record, "request_id", None)
+        if request_id:
+            entry["request_id"] = request_id
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            # Already formatted by DroppingQueueHandler.prepare
+            entry["exc_info"] = record.exc_text
+        return json.dumps(entry, default=str, separators=(",", ":"))
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that never blocks: records are dropped when the queue is full.
+
+    Formatting and I/O happen on the listener thread; the logging call only
+    pays for building the record and a non-blocking put.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Resolve the message and traceback now: arguments may change once
+        # the caller moves on. Extra fields are kept for the formatter.
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class _TextFormatter(logging.Formatter):
+    """The classic one-line format, with the request ID when there is one."""
+
+    def formatMessage(self, record: logging.LogRecord) -> str:
+        line = super().formatMessage(record)
+        request_id = getattr(record, "request_id", None)
+        return f"{line} [{request_id}]" if request_id else line
+
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_queue_handler: Optional[DroppingQueueHandler] = None
+_sample_rates: Dict[str, float] = settings.log_sample_rates
+
+
+def configure_logging() -> None:
+    """
+    Route all logging through a bounded queue to a background writer thread.
+
+    Records are written to stderr as JSON lines (LOG_FORMAT=json) or as
+    text; the writer is flushed and stopped at interpreter exit.
+    """
+    global _listener, _queue_handler
+    if _listener is not None:
+        return
+
+    stream_handler = logging.StreamHandler(sys.stderr)
+    if settings.log_format == "json":
+        stream_handler.setFormatter(JsonFormatter())
+    else:
+        stream_handler.setFormatter(_TextFormatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+
+    _queue_handler = DroppingQueueHandler(queue.Queue(maxsize=settings.log_queue_size))
+    _queue_handler.addFilter(RequestIdFilter())
+
+    root = logging.getLogger()
+    root.handlers = [_queue_handler]
+    root.setLevel(logging.DEBUG if settings.debug else logging.INFO)
+
+    _listener = logging.handlers.QueueListener(_queue_handler.queue, stream_handler)
+    _listener.start()
+    atexit.register(stop_logging)
+
+
+def stop_logging() -> None:
+    """Write out queued records and stop the writer thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def dropped_records() -> int:
+    """Records dropped because the log queue was full."""
+    return _queue_handler.dropped if _queue_handler is not None else 0
+
+
+def should_log_request(path: str, status: int, duration: float) -> bool:
+    """
+    Whether to log a request line, applying LOG_SAMPLE_RATES to high-volume routes.
+
+    Failed (status >= 400) and slow (LOG_SLOW_REQUEST_MS) requests are always logged.
+    """
+    if status >= 400 or duration * 1000 >= settings.log_slow_request_ms:
+        return True
+    rate = _sample_rates.get(path)
+    return rate is None or random.random() < rate
@@ -0,0 +1,220 @@
+"""In-process per-tool call metrics."""
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - Windows
+    resource = None
+
+# Upper bounds of the latency histogram buckets, in milliseconds; the last bucket is unbounded
+LATENCY_BUCKETS_MS = (1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+
+def _children_cpu() -> Tuple[float, float]:
+    """(user, system) CPU seconds of all terminated and waited-for child processes."""
+    if resource is None:
+        return 0.0, 0.0
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime, usage.ru_stime
+
+
+@dataclass
+class ToolStats:
+    """Counters of one tool."""
+    calls: int = 0
+    errors: int = 0
+    in_flight: int = 0
+    latency_sum: float = 0.0  # seconds
+    latency_max: float = 0.0
+    buckets: List[int] = field(default_factory=lambda: [0] * (len(LATENCY_BUCKETS_MS) + 1))
+    bytes_in: int = 0
+    bytes_out: int = 0
+    subprocess_user: float = 0.0  # CPU seconds
+    subprocess_system: float = 0.0
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Latency percentile in milliseconds, as the upper bound of its histogram bucket."""
+        total = sum(self.buckets)
+        if not total:
+            return None
+        rank = q * total
+        seen = 0
+        for i, count in enumerate(self.buckets):
+            seen += count
+            if seen >= rank:
+                return LATENCY_BUCKETS_MS[i] if i < len(LATENCY_BUCKETS_MS) else round(self.latency_max * 1000, 3)
+        return round(self.latency_max * 1000, 3)
+
+    def to_dict(self) -> Dict[str, Any]:
+        finished = sum(self.buckets)
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "in_flight": self.in_flight,
+            "latency_ms": {
+                "mean": round(self.latency_sum * 1000 / finished, 3) if finished else None,
+                "max": round(self.latency_max * 1000, 3),
+                "p50": self.percentile(0.5),
+                "p90": self.percentile(0.9),
+                "p99": self.percentile(0.99),
+                "total": round(self.latency_sum * 1000, 3),
+                "buckets": {
+                    **{str(bound): count for bound, count in zip(LATENCY_BUCKETS_MS, self.buckets)},
+                    "+Inf": self.buckets[-1]
+                }
+            },
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "subprocess_cpu_seconds": {
+                "user": round(self.subprocess_user, 6),
+                "system": round(self.subprocess_system, 6)
+            }
+        }
+
+
+@dataclass(eq=False)
+class ToolCall:
+    """A tool call being measured; returned by ToolMetrics.start."""
+    tool: str
+    started: float
+    cpu: Tuple[float, float]
+    shared: bool = False  # a child process not started by this call exited during it
+
+
+# The call being measured in the current task; child processes started in it belong to it
+_current_call: ContextVar[Optional[ToolCall]] = ContextVar("tool_call", default=None)
+
+
+class ToolMetrics:
+    """
+    Per-tool call counts, errors, latency histograms, payload bytes and
+    subprocess CPU time, for this worker process.
+
+    The kernel only reports the CPU of child processes in total, as
+    RUSAGE_CHILDREN grows when they exit. Child processes are registered
+    (see child_started) with the call that started them, and a call gets
+    the growth of RUSAGE_CHILDREN over it only if no other child exited
+    meanwhile; otherwise, and for children that belong to no call, the
+    CPU is reported as `unattributed`. `process` has the totals.
+    """
+
+    def __init__(self):
+        self._tools: Dict[str, ToolStats] = {}
+        self._lock = threading.Lock()
+        self._calls: Set[ToolCall] = set()  # in flight
+        self._children: Dict[Any, Optional[ToolCall]] = {}  # running child process -> its call
+        self._attributed = [0.0, 0.0]  # subprocess CPU seconds (user, system) given to tools
+        self._children_base = _children_cpu()
+        self.started_at = time.time()
+
+    def _stats(self, tool: str) -> ToolStats:
+        stats = self._tools.get(tool)
+        if stats is None:
+            stats = self._tools.setdefault(tool, ToolStats())
+        return stats
+
+    def start(self, tool: str) -> ToolCall:
+        """Start measuring a call of a tool; child processes the current task starts belong to it."""
+        call = ToolCall(tool, time.perf_counter(), _children_cpu())
+        with self._lock:
+            self._stats(tool).in_flight += 1
+            self._calls.add(call)
+        _current_call.set(call)
+        return call
+
+    def child_started(self, process: Any, owned: bool = True) -> None:
+        """
+        Register a child process (an asyncio.subprocess.Process).
+
+        Args:
+            process: The child process
+            owned: Whether it belongs to the call running in the current
+                task; long-lived processes that serve many calls do not
+        """
+        call = _current_call.get() if owned else None
+        with self._lock:
+            self._children[process] = call if call in self._calls else None
+
+    def child_exited(self, process: Any) -> None:
+        """Unregister a child process once it has been waited for."""
+        with self._lock:
+            if process not in self._children:
+                return
+            owner = self._children.pop(process)
+            for call in self._calls:
+                if call is not owner:
+                    call.shared = True
+
+    def finish(self, call: ToolCall, ok: bool) -> None:
+        """Record the outcome of a call started with `start`."""
+        elapsed = time.perf_counter() - call.started
+        user, system = _children_cpu()
+        if _current_call.get() is call:
+            _current_call.set(None)
+        with self._lock:
+            self._calls.discard(call)
+            # Another call's child that exited but is not unregistered yet
+            shared = call.shared or any(
+                owner is not call and process.returncode is not None
+                for process, owner in self._children.items()
+            )
+            stats = self._stats(call.tool)
+            stats.in_flight -= 1
+            stats.calls += 1
+            if not ok:
+                stats.errors += 1
+            stats.latency_sum += elapsed
+            stats.latency_max = max(stats.latency_max, elapsed)
+            stats.buckets[bisect_left(LATENCY_BUCKETS_MS, elapsed * 1000)] += 1
+            if not shared:
+                stats.subprocess_user += user - call.cpu[0]
+                stats.subprocess_system += system - call.cpu[1]
+                self._attributed[0] += user - call.cpu[0]
+                self._attributed[1] += system - call.cpu[1]
+
+    def record_bytes(self, tool: str, bytes_in: int, bytes_out: int) -> None:
+        """Add the request and response sizes of a call."""
+        with self._lock:
+            stats = self._stats(tool)
+            stats.bytes_in += bytes_in
+            stats.bytes_out += bytes_out
+
+    def snapshot(self) -> Dict[str, Any]:
+        """All metrics, tools sorted by total time spent in them."""
+        user, system = _children_cpu()
+        with self._lock:
+            tools = sorted(self._tools.items(), key=lambda item: item[1].latency_sum, reverse=True)
+            tool_data = {tool: stats.to_dict() for tool, stats in tools}
+            # Since the last reset; calls in flight are not attributed yet
+            unattributed = {
+                "user": round(max(user - self._children_base[0] - self._attributed[0], 0.0), 6),
+                "system": round(max(system - self._children_base[1] - self._attributed[1], 0.0), 6)
+            }
+        process = {"subprocess_cpu_seconds": {"user": round(user, 6), "system": round(system, 6)}}
+        if resource is not None:
+            usage = resource.getrusage(resource.RUSAGE_SELF)
+            process["cpu_seconds"] = {"user": round(usage.ru_utime, 6), "system": round(usage.ru_stime, 6)}
+            process["max_rss_kb"] = usage.ru_maxrss
+        return {
+            "uptime_seconds": round(time.time() - self.started_at, 3),
+            "process": process,
+            "tools": tool_data,
+            "unattributed": {"subprocess_cpu_seconds": unattributed}
+        }
+
+    def reset(self) -> None:
+        """Drop all counters."""
+        with self._lock:
+            self._tools.clear()
+            self._attributed = [0.0, 0.0]
+            self._children_base = _children_cpu()
+            self.started_at = time.time()
+
+
+# Global metrics instance
+tool_metrics = ToolMetrics()
@@ -16,8 +16,9 @@ def resolve_safe_path(
 
     Args:
         relative_path: Relative path from project root
-        user_id: User ID (reserved for future per-user project roots)
-        base_path: Override base path (defaults to project root)
+        user_id: User whose project root to use (the default project if
+            they have none of their own)
+        base_path: Override base path (defaults to the user's project root)
 
     Returns:
         Resolved absolute path within project boundaries
@@ -26,7 +27,7 @@ def resolve_safe_path(
         ValueError: If path attempts to escape project root
     """
     if base_path is None:
-        config = project_manager.get_project_config()
+        config = project_manager.get_project_config(user_id)
         if not config:
             raise ValueError("Project not configured. Please visit /wizard to set up your project.")
         base_path = config.project_path
@@ -0,0 +1,177 @@
+"""Per-project state for servers that serve several project roots."""
+import asyncio
+import inspect
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class ProjectStateCache:
+    """
+    Least-recently-used per-project state, bounded by project count and memory.
+
+    Services keep what they hold for a project (search index, analysis
+    results, git processes, ...) here as named components, keyed by the
+    resolved project root. Using any component of a project marks the whole
+    project as recently used.
+
+    When more than `max_projects` projects are held, or the estimated size of
+    their components exceeds `max_bytes`, whole projects are evicted, least
+    recently used first; the project being used is never evicted. Sizes are
+    read from each component's `nbytes` attribute (0 if it has none) every
+    time the bounds are checked, since components grow in place. Evicted
+    components are closed through their `close()` method if they have one;
+    coroutine results are run on the event loop the cache was last used from.
+    """
+
+    def __init__(self, max_projects: int, max_bytes: int):
+        self.max_projects = max_projects
+        self.max_bytes = max_bytes
+        self._projects: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.RLock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def get(self, root: str, name: str, factory: Optional[Callable[[], Any]] = None) -> Any:
+        """
+        Get a component of a project and mark the project as recently used.
+
+        Args:
+            root: Resolved project root
+            name: Component name, e.g. "search_index"
+            factory: Creates the component if the project does not have it yet
+
+        Returns:
+            The component, or None if it does not exist and no factory was given
+        """
+        self._remember_loop()
+        with self._lock:
+            components = self._projects.get(root)
+            if components is not None:
+                self._projects.move_to_end(root)
+                component = components.get(name)
+                if component is not None or factory is None:
+                    return component
+            elif factory is None:
+                return None
+
+            component = factory()
+            self._projects.setdefault(root, {})[name] = component
+            self._projects.move_to_end(root)
+            evicted = self._evict(keep=root)
+        self._close(evicted)
+        return component
+
+    def peek(self, root: str, name: str) -> Any:
+        """Get a component of a project without marking the project as used."""
+        with self._lock:
+            return self._projects.get(root, {}).get(name)
+
+    def set(self, root: str, name: str, component: Any) -> None:
+        """Store or replace a component of a project."""
+        self._remember_loop()
+        with self._lock:
+            self._projects.setdefault(root, {})[name] = component
+            self._projects.move_to_end(root)
+            evicted = self._evict(keep=root)
+        self._close(evicted)
+
+    def items(self, name: str) -> List[Tuple[str, Any]]:
+        """(root, component) of every project holding a component, without marking them used."""
+        with self._lock:
+            return [
+                (root, components[name]) for root, components in self._projects.items() if name in components
+            ]
+
+    def discard(self, root: str) -> None:
+        """Evict one project."""
+        with self._lock:
+            components = self._projects.pop(root, None)
+        if components:
+            self._close([(root, components)])
+
+    def trim(self, keep: Optional[str] = None) -> None:
+        """Evict projects until the bounds hold again (call after a component grew)."""
+        with self._lock:
+            evicted = self._evict(keep)
+        self._close(evicted)
+
+    def clear(self) -> None:
+        """Evict every project."""
+        with self._lock:
+            evicted, self._projects = list(self._projects.items()), OrderedDict()
+        self._close(evicted)
+
+    @property
+    def nbytes(self) -> int:
+        """Estimated size of all components."""
+        with self._lock:
+            return sum(self._project_bytes(components) for components in self._projects.values())
+
+    def stats(self) -> Dict[str, Any]:
+        """Held projects (most recently used last) with their estimated sizes."""
+        with self._lock:
+            return {
+                "max_projects": self.max_projects,
+                "max_bytes": self.max_bytes,
+                "projects": [
+                    {"root": root, "components": sorted(components), "bytes": self._project_bytes(components)}
+                    for root, components in self._projects.items()
+                ]
+            }
+
+    def __len__(self) -> int:
+        return len(self._projects)
+
+    @staticmethod
+    def _project_bytes(components: Dict[str, Any]) -> int:
+        return sum(getattr(component, "nbytes", 0) or 0 for component in components.values())
+
+    def _evict(self, keep: Optional[str]) -> List[Tuple[str, Dict[str, Any]]]:
+        """Pop projects, oldest first, until within bounds (lock held)."""
+        evicted = []
+        total = sum(self._project_bytes(components) for components in self._projects.values())
+        for root in list(self._projects):
+            if len(self._projects) <= self.max_projects and total <= self.max_bytes:
+                break
+            if root == keep:
+                continue
+            components = self._projects.pop(root)
+            total -= self._project_bytes(components)
+            evicted.append((root, components))
+        return evicted
+
+    def _remember_loop(self) -> None:
+        try:
+            self._loop = asyncio.get_running_loop()
+        except RuntimeError:
+            pass
+
+    def _close(self, evicted: List[Tuple[str, Dict[str, Any]]]) -> None:
+        for root, components in evicted:
+            logger.info(f"Evicting cached state of project {root}")
+            for name, component in components.items():
+                close = getattr(component, "close", None)
+                if close is None:
+                    continue
+                try:
+                    result = close()
+                    if inspect.isawaitable(result):
+                        loop = self._loop
+                        if loop is None or loop.is_closed():
+                            result.close()
+                        else:
+                            asyncio.run_coroutine_threadsafe(result, loop)
+                except Exception:
+                    logger.exception(f"Failed to close {name} of project {root}")
+
+
+# Global per-project state, shared by all services
+project_states = ProjectStateCache(
+    max_projects=settings.max_projects,
+    max_bytes=settings.project_state_memory_mb * 1024 * 1024
+)
@@ -0,0 +1,130 @@
+"""In-memory snapshot of a project's directory tree."""
+import threading
+from typing import Dict, Iterator, List, NamedTuple, Optional, Pattern, Sequence, Set, Tuple
+
+
+class TreeEntry(NamedTuple):
+    """Metadata of one file or directory."""
+    is_dir: bool
+    size: Optional[int]
+    mtime_ns: int
+
+
+class ProjectTree:
+    """
+    Paths below a project root with their type, size and mtime.
+
+    Kept up to date by the watcher service, so listings and rescans can be
+    served from memory instead of walking the filesystem. Paths are
+    relative to the root and `/`-separated; the root itself is ''. All
+    methods are thread-safe.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        self._entries: Dict[str, TreeEntry] = {}
+        self._children: Dict[str, Set[str]] = {'': set()}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, rel_path: str) -> bool:
+        return rel_path in self._entries
+
+    def get(self, rel_path: str) -> Optional[TreeEntry]:
+        return self._entries.get(rel_path)
+
+    def set(self, rel_path: str, entry: TreeEntry) -> None:
+        """Add or update a path; its parent directory must already be present."""
+        parent, _, name = rel_path.rpartition('/')
+        with self._lock:
+            previous = self._entries.get(rel_path)
+            if previous is not None and previous.is_dir and not entry.is_dir:
+                self._remove(rel_path)
+            self._entries[rel_path] = entry
+            self._children.setdefault(parent, set()).add(name)
+            if entry.is_dir:
+                self._children.setdefault(rel_path, set())
+
+    def remove(self, rel_path: str) -> List[str]:
+        """
+        Remove a path and, for a directory, everything below it.
+
+        Returns:
+            The removed paths
+        """
+        with self._lock:
+            return self._remove(rel_path)
+
+    def _remove(self, rel_path: str) -> List[str]:
+        removed = []
+        stack = [rel_path]
+        while stack:
+            path = stack.pop()
+            if self._entries.pop(path, None) is None:
+                continue
+            removed.append(path)
+            for name in self._children.pop(path, ()):
+                stack.append(f"{path}/{name}")
+
+        parent, _, name = rel_path.rpartition('/')
+        self._children.get(parent, set()).discard(name)
+        return removed
+
+    def paths(self) -> List[str]:
+        """All paths."""
+        with self._lock:
+            return list(self._entries)
+
+    def files(self) -> List[Tuple[str, TreeEntry]]:
+        """All files with their metadata."""
+        with self._lock:
+            return [(path, entry) for path, entry in self._entries.items() if not entry.is_dir]
+
+    def iter_tree(
+        self,
+        dir_rel: str = '',
+        max_depth: Optional[int] = None,
+        exclude: Sequence[Pattern] = (),
+        cursor: Optional[Tuple[str, ...]] = None
+    ) -> Iterator[Tuple[str, Tuple[str, ...], str, TreeEntry]]:
+        """
+        Walk below a directory depth-first in sorted order.
+
+        Same order, pruning and cursor semantics as
+        FileSystemService.iter_tree.
+
+        Yields:
+            (name, path components below dir_rel, path relative to the
+            root, entry) tuples
+        """
+        def children(path: str) -> List[str]:
+            with self._lock:
+                return sorted(self._children.get(path, ()), reverse=True)
+
+        stack = [((), dir_rel, children(dir_rel))]
+        while stack:
+            parts, path, pending = stack[-1]
+            if not pending:
+                stack.pop()
+                continue
+
+            name = pending.pop()
+            item_parts = parts + (name,)
+            before_cursor = cursor is not None and item_parts <= cursor
+            if before_cursor and cursor[:len(item_parts)] != item_parts:
+                continue
+
+            rel_path = f"{path}/{name}" if path else name
+            entry = self._entries.get(rel_path)
+            if entry is None:
+                continue
+            if exclude and any(pattern.match('/'.join(item_parts)) for pattern in exclude):
+                continue
+
+            if not before_cursor:
+                yield name, item_parts, rel_path, entry
+
+            if entry.is_dir and (max_depth is None or len(item_parts) < max_depth):
+                stack.append((item_parts, rel_path, children(rel_path)))
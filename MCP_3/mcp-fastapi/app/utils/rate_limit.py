@@ -0,0 +1,128 @@
+"""Token-bucket rate limiting shared by all worker processes on a host."""
+import logging
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Optional, Tuple
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+_PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+_RATE = re.compile(r"\s*(\d+(?:\.\d+)?)\s*(?:/|per)\s*(\d+)?\s*(second|minute|hour|day)s?\s*\Z", re.IGNORECASE)
+
+
+def parse_rate(rate: str) -> Tuple[float, float]:
+    """
+    Parse a rate such as "10/minute", "100 per hour" or "5/10 seconds".
+
+    Returns:
+        (tokens, period in seconds)
+
+    Raises:
+        ValueError: If the rate is malformed
+    """
+    match = _RATE.match(rate)
+    if not match:
+        raise ValueError(f"Invalid rate limit: {rate!r}")
+    amount, multiplier, unit = match.groups()
+    return float(amount), _PERIODS[unit.lower()] * int(multiplier or 1)
+
+
+class TokenBucketLimiter:
+    """
+    Token buckets stored in SQLite, so that every uvicorn worker on the host
+    draws from the same buckets.
+
+    Each bucket holds up to `capacity` tokens and refills at `capacity` per
+    `period` seconds. Checks run in a BEGIN IMMEDIATE transaction, which
+    serializes them across processes. If the database cannot be used, the
+    limiter fails open and logs a warning.
+    """
+
+    CLEANUP_EVERY = 1000  # acquisitions between deletions of idle buckets
+
+    def __init__(self, db_path: Path):
+        self.db_path = db_path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._calls = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.db_path), timeout=5.0, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS buckets ("
+                "key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL, idle_after REAL NOT NULL)"
+            )
+            self._conn = conn
+        return self._conn
+
+    def acquire(self, key: str, cost: float, capacity: float, period: float) -> Tuple[bool, float]:
+        """
+        Take `cost` tokens from a bucket (blocking).
+
+        Args:
+            key: Bucket key, e.g. "tool:<user>"
+            cost: Tokens to take; capped at the bucket capacity
+            capacity: Maximum tokens in the bucket
+            period: Seconds to refill a whole bucket
+
+        Returns:
+            (allowed, seconds until the request would be allowed)
+        """
+        if cost <= 0:
+            return True, 0.0
+        cost = min(cost, capacity)
+        refill = capacity / period
+
+        with self._lock:
+            try:
+                conn = self._connect()
+                now = time.time()
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    row = conn.execute("SELECT tokens, updated FROM buckets WHERE key = ?", (key,)).fetchone()
+                    tokens = capacity if row is None else min(capacity, row[0] + max(0.0, now - row[1]) * refill)
+                    allowed = tokens >= cost
+                    if allowed:
+                        tokens -= cost
+                    conn.execute(
+                        "INSERT OR REPLACE INTO buckets (key, tokens, updated, idle_after) VALUES (?, ?, ?, ?)",
+                        (key, tokens, now, now + (capacity - tokens) / refill)
+                    )
+                    conn.execute("COMMIT")
+                except BaseException:
+                    conn.execute("ROLLBACK")
+                    raise
+
+                self._calls += 1
+                if self._calls % self.CLEANUP_EVERY == 0:
+                    # Buckets that have refilled completely behave like missing ones
+                    conn.execute("DELETE FROM buckets WHERE idle_after < ?", (now,))
+            except (sqlite3.Error, OSError) as e:
+                logger.warning(f"Rate limiter unavailable, allowing request: {e}")
+                return True, 0.0
+
+        return allowed, 0.0 if allowed else (cost - tokens) / refill
+
+    def reset(self) -> None:
+        """Remove all buckets."""
+        with self._lock:
+            self._connect().execute("DELETE FROM buckets")
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+# Global limiter instance
+rate_limiter = TokenBucketLimiter(settings.rate_limit_db)
@@ -1,9 +1,13 @@
 """Safe subprocess utilities for command execution."""
 import asyncio
+import os
 import shlex
-from typing import List, Optional, Tuple
+import signal
+from contextlib import aclosing, asynccontextmanager
+from typing import AsyncIterator, List, NamedTuple, Optional, Tuple, Union
 
 from app.config import settings
+from app.utils.metrics import tool_metrics
 
 
 class DangerousCommandError(Exception):
@@ -11,6 +15,14 @@ class DangerousCommandError(Exception):
     pass
 
 
+class CommandResult(NamedTuple):
+    """Captured output of a finished command."""
+    stdout: str
+    stderr: str
+    exit_code: int
+    truncated: bool = False  # True if stdout or stderr hit the output cap
+
+
 def validate_command_safety(command: str, args: List[str]) -> None:
     """
     Validate that a command is safe to execute.
@@ -50,12 +62,241 @@ def validate_command_safety(command: str, args: List[str]) -> None:
             raise DangerousCommandError(f"Dangerous command pattern detected: {pattern}")
 
 
+class SubprocessManager:
+    """
+    Runs commands as subprocesses on the running event loop.
+
+    All commands share a global concurrency limit, so a burst of tool calls
+    queues instead of forking without bound. Each command runs in its own
+    process group: on timeout, cancellation (e.g. the client disconnected) or
+    any other error the whole group is killed, including children such as
+    test runner workers. Output beyond the per-stream cap is drained and
+    discarded so the child never blocks on a full pipe. Each command is
+    registered with tool_metrics, which attributes its CPU time to the
+    tool call that ran it.
+    """
+
+    READ_CHUNK_SIZE = 64 * 1024
+    STREAM_LINE_LIMIT = 1024 * 1024  # longest single line readline() accepts
+
+    def __init__(self, max_concurrency: int, max_output_bytes: int):
+        self.max_concurrency = max_concurrency
+        self.max_output_bytes = max_output_bytes
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    @asynccontextmanager
+    async def _spawn(self, command: str, args: List[str], cwd: Optional[str]):
+        """Start a command in a new process group, holding a concurrency slot."""
+        validate_command_safety(command, args)
+
+        async with self._semaphore:
+            process = await asyncio.create_subprocess_exec(
+                command,
+                *args,
+                cwd=cwd or str(settings.project_root_path),
+                stdin=asyncio.subprocess.DEVNULL,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+                start_new_session=True,
+                limit=self.STREAM_LINE_LIMIT,
+            )
+            tool_metrics.child_started(process)
+            try:
+                yield process
+            finally:
+                try:
+                    if process.returncode is None:
+                        await self._kill(process)
+                finally:
+                    tool_metrics.child_exited(process)
+
+    async def _kill(self, process: asyncio.subprocess.Process) -> None:
+        """Kill a process together with its process group and reap it."""
+        try:
+            if hasattr(os, 'killpg'):
+                os.killpg(process.pid, signal.SIGKILL)
+            else:
+                process.kill()
+        except (ProcessLookupError, PermissionError):
+            pass
+        await process.wait()
+
+    async def _read_capped(self, stream: asyncio.StreamReader, limit: int) -> Tuple[bytes, bool]:
+        """Read a stream to EOF, keeping at most `limit` bytes."""
+        chunks = []
+        size = 0
+        truncated = False
+
+        while True:
+            chunk = await stream.read(self.READ_CHUNK_SIZE)
+            if not chunk:
+                break
+            if size < limit:
+                kept = chunk[:limit - size]
+                chunks.append(kept)
+                size += len(kept)
+                truncated = truncated or len(kept) < len(chunk)
+            else:
+                truncated = True
+
+        return b''.join(chunks), truncated
+
+    async def run(
+        self,
+        command: str,
+        args: List[str],
+        cwd: Optional[str] = None,
+        timeout: int = 30,
+        max_output_bytes: Optional[int] = None
+    ) -> CommandResult:
+        """
+        Run a command to completion and capture its output.
+
+        Args:
+            command: Command to run
+            args: Command arguments
+            cwd: Working directory
+            timeout: Command timeout in seconds (not counting time queued
+                for a concurrency slot)
+            max_output_bytes: Per-stream output cap (defaults to the manager's)
+
+        Returns:
+            CommandResult with decoded stdout, stderr, exit code and truncation flag
+
+        Raises:
+            DangerousCommandError: If command is unsafe
+            asyncio.TimeoutError: If command times out
+        """
+        limit = max_output_bytes or self.max_output_bytes
+
+        async with self._spawn(command, args, cwd) as process:
+            tasks = [
+                asyncio.create_task(self._read_capped(process.stdout, limit)),
+                asyncio.create_task(self._read_capped(process.stderr, limit)),
+                asyncio.create_task(process.wait()),
+            ]
+            try:
+                _, pending = await asyncio.wait(tasks, timeout=timeout)
+                if pending:
+                    raise asyncio.TimeoutError(f"Command timed out after {timeout} seconds")
+            finally:
+                for task in tasks:
+                    task.cancel()
+
+            (stdout, out_truncated), (stderr, err_truncated), exit_code = (
+                task.result() for task in tasks
+            )
+
+        return CommandResult(
+            stdout=stdout.decode('utf-8', errors='replace'),
+            stderr=stderr.decode('utf-8', errors='replace'),
+            exit_code=exit_code or 0,
+            truncated=out_truncated or err_truncated
+        )
+
+    async def stream(
+        self,
+        command: str,
+        args: List[str],
+        cwd: Optional[str] = None,
+        timeout: int = 30,
+        max_output_bytes: Optional[int] = None
+    ) -> AsyncIterator[Tuple[str, Union[str, int]]]:
+        """
+        Run a command and yield its output line by line as it is produced.
+
+        Args:
+            command: Command to run
+            args: Command arguments
+            cwd: Working directory
+            timeout: Command timeout in seconds
+            max_output_bytes: Per-stream output cap (defaults to the manager's)
+
+        Yields:
+            ("stdout", line) and ("stderr", line) tuples in arrival order,
+            ("truncated", stream_name) once if a stream hits the output cap,
+            followed by a final ("exit", exit_code) tuple
+
+        Raises:
+            DangerousCommandError: If command is unsafe
+            asyncio.TimeoutError: If command times out
+
+        The process group is killed if the consumer stops iterating early
+        (for example when the HTTP client disconnects).
+        """
+        limit = max_output_bytes or self.max_output_bytes
+
+        async with self._spawn(command, args, cwd) as process:
+            queue: asyncio.Queue = asyncio.Queue()
+
+            async def pump(stream: asyncio.StreamReader, name: str) -> None:
+                sent = 0
+                truncated = False
+                while True:
+                    try:
+                        line = await stream.readline()
+                    except ValueError:
+                        # Line longer than STREAM_LINE_LIMIT; pass on what fits
+                        line = await stream.read(self.STREAM_LINE_LIMIT)
+                    if not line:
+                        break
+                    if truncated or sent + len(line) > limit:
+                        if not truncated:
+                            truncated = True
+                            await queue.put(('truncated', name))
+                        continue
+                    sent += len(line)
+                    await queue.put((name, line.decode('utf-8', errors='replace')))
+                await queue.put((name, None))
+
+            readers = [
+                asyncio.create_task(pump(process.stdout, 'stdout')),
+                asyncio.create_task(pump(process.stderr, 'stderr')),
+            ]
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + timeout
+            open_streams = len(readers)
+
+            try:
+                while open_streams:
+                    remaining = deadline - loop.time()
+                    try:
+                        name, data = await asyncio.wait_for(queue.get(), timeout=max(remaining, 0))
+                    except asyncio.TimeoutError:
+                        raise asyncio.TimeoutError(f"Command timed out after {timeout} seconds")
+
+                    if name == 'truncated':
+                        yield name, data
+                    elif data is None:
+                        open_streams -= 1
+                    else:
+                        yield name, data
+
+                remaining = deadline - loop.time()
+                try:
+                    exit_code = await asyncio.wait_for(process.wait(), timeout=max(remaining, 0))
+                except asyncio.TimeoutError:
+                    raise asyncio.TimeoutError(f"Command timed out after {timeout} seconds")
+                yield 'exit', exit_code or 0
+
+            finally:
+                for reader in readers:
+                    reader.cancel()
+
+
+# Global subprocess manager shared by all services
+subprocess_manager = SubprocessManager(
+    max_concurrency=settings.subprocess_max_concurrency,
+    max_output_bytes=settings.subprocess_max_output_bytes
+)
+
+
 async def run_command_async(
     command: str,
     args: List[str],
     cwd: Optional[str] = None,
     timeout: int = 30
-) -> Tuple[str, str, int]:
+) -> CommandResult:
     """
     Run a command asynchronously with safety checks.
 
@@ -66,73 +307,26 @@ async def run_command_async(
         timeout: Command timeout in seconds
 
     Returns:
-        Tuple of (stdout, stderr, exit_code)
+        CommandResult with stdout, stderr, exit code and truncation flag
 
     Raises:
         DangerousCommandError: If command is unsafe
         asyncio.TimeoutError: If command times out
     """
-    # Validate command safety
-    validate_command_safety(command, args)
-
-    # Prepare the process
-    process = await asyncio.create_subprocess_exec(
-        command,
-        *args,
-        cwd=cwd or str(settings.project_root_path),
-        stdout=asyncio.subprocess.PIPE,
-        stderr=asyncio.subprocess.PIPE,
-    )
-
-    try:
-        # Wait for completion with timeout
-        stdout, stderr = await asyncio.wait_for(
-            process.communicate(),
-            timeout=timeout
-        )
+    return await subprocess_manager.run(command, args, cwd, timeout)
 
-        # Decode output
-        stdout_str = stdout.decode('utf-8', errors='replace')
-        stderr_str = stderr.decode('utf-8', errors='replace')
 
-        return stdout_str, stderr_str, process.returncode or 0
-
-    except asyncio.TimeoutError:
-        # Kill the process if it times out
-        try:
-            process.kill()
-            await process.wait()
-        except:
-            pass
-        raise asyncio.TimeoutError(f"Command timed out after {timeout} seconds")
-
-
-def run_command_sync(
+async def stream_command_async(
     command: str,
     args: List[str],
     cwd: Optional[str] = None,
     timeout: int = 30
-) -> Tuple[str, str, int]:
+) -> AsyncIterator[Tuple[str, Union[str, int]]]:
     """
-    Run a command synchronously with safety checks.
+    Run a command and yield its output line by line as it is produced.
 
-    Args:
-        command: Command to run
-        args: Command arguments
-        cwd: Working directory
-        timeout: Command timeout in seconds
-
-    Returns:
-        Tuple of (stdout, stderr, exit_code)
+    See SubprocessManager.stream for the yielded tuples.
     """
-    try:
-        # Run in a new event loop
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        result = loop.run_until_complete(
-            run_command_async(command, args, cwd, timeout)
-        )
-        loop.close()
-        return result
-    except asyncio.TimeoutError:
-        raise TimeoutError(f"Command timed out after {timeout} seconds")
\ No newline at end of file
+    async with aclosing(subprocess_manager.stream(command, args, cwd, timeout)) as output:
+        async for item in output:
+            yield item
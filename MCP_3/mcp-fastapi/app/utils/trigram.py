@@ -0,0 +1,328 @@
+"""Trigram index for narrowing code search down to candidate files."""
+import os
+import pickle
+import re
+import sys
+import threading
+from array import array
+from bisect import bisect_left
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple, Union
+
+try:  # Python 3.11+
+    from re import _constants as sre_constants, _parser as sre_parse
+except ImportError:  # pragma: no cover
+    import sre_constants
+    import sre_parse
+
+INDEX_VERSION = 1
+
+# A query plan is None (any file may match), a literal that must occur in
+# the file, or an AND / OR of sub-plans.
+Plan = Union[None, bytes, Tuple[str, list]]
+
+
+def file_trigrams(data: bytes) -> Set[int]:
+    """
+    Distinct trigrams of a file's content, ASCII-lowercased.
+
+    Reads the content as native 4-byte words at each of the four offsets
+    so that deduplication happens in C; each distinct word then yields its
+    two trigrams.
+    """
+    data = data.lower()
+    n = len(data)
+    if n < 4:
+        return {int.from_bytes(data[i:i + 3], sys.byteorder) for i in range(n - 2)}
+
+    words: Set[int] = set()
+    for offset in range(4):
+        end = offset + (n - offset) // 4 * 4
+        words.update(memoryview(data[offset:end]).cast('I'))
+
+    # The low and high three bytes of each word, in native byte order
+    return {w & 0xFFFFFF for w in words} | {w >> 8 for w in words}
+
+
+def _literal_trigrams(literal: bytes) -> Set[int]:
+    literal = literal.lower()
+    return {int.from_bytes(literal[i:i + 3], sys.byteorder) for i in range(len(literal) - 2)}
+
+
+def _and(parts: List[Plan]) -> Plan:
+    parts = [part for part in parts if part is not None]
+    if not parts:
+        return None
+    return parts[0] if len(parts) == 1 else ('and', parts)
+
+
+def _or(parts: List[Plan]) -> Plan:
+    if not parts or any(part is None for part in parts):
+        return None
+    return parts[0] if len(parts) == 1 else ('or', parts)
+
+
+def literal_plan(query: str, case_sensitive: bool = True) -> Plan:
+    """Plan for a plain substring query."""
+    if not case_sensitive:
+        return regex_plan(re.escape(query), case_sensitive=False)
+    literal = query.encode('utf-8')
+    return literal if len(literal) >= 3 else None
+
+
+def regex_plan(pattern: str, case_sensitive: bool = True) -> Plan:
+    """
+    Plan for a regular expression: the literals any match must contain.
+
+    Runs of literal characters become required literals, alternations
+    become ORs, and anything else (classes, optional parts, backreferences)
+    is treated as matching anything. The plan is conservative: files it
+    rules out cannot match, files it keeps are verified by the caller.
+    """
+    try:
+        parsed = sre_parse.parse(pattern, 0 if case_sensitive else sre_constants.SRE_FLAG_IGNORECASE)
+    except Exception:
+        return None
+    state = getattr(parsed, 'state', None) or getattr(parsed, 'pattern', None)
+    flags = getattr(state, 'flags', 0)
+    return _plan_sequence(list(parsed), bool(flags & sre_constants.SRE_FLAG_IGNORECASE))
+
+
+# The index folds ASCII case only, but re.IGNORECASE also matches these
+# letters against non-ASCII characters (e.g. "k" against KELVIN SIGN)
+_NON_ASCII_FOLDS = frozenset('kKsS')
+
+
+def _plan_sequence(items: Iterable, ignorecase: bool) -> Plan:
+    parts: List[Plan] = []
+    run: List[str] = []
+
+    def flush() -> None:
+        if run:
+            literal = ''.join(run).encode('utf-8')
+            parts.append(literal if len(literal) >= 3 else None)
+            run.clear()
+
+    for op, av in items:
+        if op is sre_constants.LITERAL:
+            char = chr(av)
+            if ignorecase and (not char.isascii() or char in _NON_ASCII_FOLDS):
+                flush()
+            else:
+                run.append(char)
+        elif op is sre_constants.AT:
+            # Zero-width anchors keep neighbouring literals contiguous
+            continue
+        elif op is sre_constants.SUBPATTERN:
+            flush()
+            _, add_flags, del_flags, sub = av
+            sub_ignorecase = (ignorecase or bool(add_flags & sre_constants.SRE_FLAG_IGNORECASE)) and not (
+                del_flags & sre_constants.SRE_FLAG_IGNORECASE
+            )
+            parts.append(_plan_sequence(sub, sub_ignorecase))
+        elif op in (sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT) or op is getattr(
+            sre_constants, 'POSSESSIVE_REPEAT', None
+        ):
+            flush()
+            low, _, sub = av
+            if low >= 1:
+                parts.append(_plan_sequence(sub, ignorecase))
+        elif op is sre_constants.BRANCH:
+            flush()
+            parts.append(_or([_plan_sequence(branch, ignorecase) for branch in av[1]]))
+        elif op is getattr(sre_constants, 'ATOMIC_GROUP', None):
+            flush()
+            parts.append(_plan_sequence(av, ignorecase))
+        else:
+            flush()
+
+    flush()
+    return _and(parts)
+
+
+class TrigramIndex:
+    """
+    Inverted index from content trigrams to the files containing them.
+
+    Posting lists are sorted arrays of file ids. Files are updated by
+    giving them a new id and leaving the old one behind as a tombstone,
+    so updates never rewrite posting lists; `needs_compaction` reports
+    when enough tombstones have built up that a rebuild is worthwhile.
+    All methods are thread-safe.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        self.paths: List[Optional[str]] = []  # file id -> path, None once replaced or removed
+        self.files: Dict[str, Tuple[int, int, int]] = {}  # path -> (file id or -1 if not indexed, mtime_ns, size)
+        self.postings: Dict[int, array] = {}
+        self.dead = 0
+        self.posting_entries = 0  # total length of all posting lists
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.files)
+
+    @property
+    def nbytes(self) -> int:
+        """Rough memory footprint: posting arrays, plus per-trigram and per-file overhead."""
+        return 4 * self.posting_entries + 100 * len(self.postings) + 200 * len(self.paths)
+
+    @property
+    def needs_compaction(self) -> bool:
+        return self.dead > 1000 and self.dead > len(self.paths) // 2
+
+    def is_current(self, path: str, mtime_ns: int, size: int) -> bool:
+        """Whether a file is indexed as of the given stat."""
+        entry = self.files.get(path)
+        return entry is not None and entry[1] == mtime_ns and entry[2] == size
+
+    def update(self, path: str, mtime_ns: int, size: int, trigrams: Optional[Set[int]]) -> None:
+        """
+        Add or replace a file.
+
+        Args:
+            path: Path relative to the project root
+            mtime_ns: Modification time the trigrams were read at
+            size: Size the trigrams were read at
+            trigrams: The file's trigrams, or None to record the file as not
+                indexable (binary or too large)
+        """
+        with self._lock:
+            self._remove(path)
+            if trigrams is None:
+                self.files[path] = (-1, mtime_ns, size)
+                return
+
+            file_id = len(self.paths)
+            self.paths.append(path)
+            self.files[path] = (file_id, mtime_ns, size)
+            postings = self.postings
+            self.posting_entries += len(trigrams)
+            for trigram in trigrams:
+                posting = postings.get(trigram)
+                if posting is None:
+                    postings[trigram] = array('I', (file_id,))
+                else:
+                    posting.append(file_id)
+
+    def remove(self, path: str) -> None:
+        """Remove a file."""
+        with self._lock:
+            self._remove(path)
+
+    def retain(self, paths: Set[str]) -> int:
+        """Remove every file not in paths; returns how many were removed."""
+        with self._lock:
+            removed = [path for path in self.files if path not in paths]
+            for path in removed:
+                self._remove(path)
+        return len(removed)
+
+    def _remove(self, path: str) -> None:
+        entry = self.files.pop(path, None)
+        if entry and entry[0] >= 0:
+            self.paths[entry[0]] = None
+            self.dead += 1
+
+    def candidates(self, plan: Plan) -> Optional[List[str]]:
+        """
+        Paths of the files that may match a plan.
+
+        Returns:
+            Candidate paths in the order they were indexed (walk order for
+            a fresh index), or None if the plan cannot narrow the search
+        """
+        if plan is None:
+            return None
+        with self._lock:
+            ids = self._evaluate(plan)
+            if ids is None:
+                return None
+            paths = self.paths
+            return [paths[file_id] for file_id in sorted(ids) if paths[file_id] is not None]
+
+    def _evaluate(self, plan: Plan) -> Optional[Set[int]]:
+        if plan is None:
+            return None
+        if isinstance(plan, bytes):
+            return self._lookup(plan)
+
+        op, parts = plan
+        results = [self._evaluate(part) for part in parts]
+        if op == 'or':
+            if any(result is None for result in results):
+                return None
+            return set().union(*results)
+
+        known = sorted((result for result in results if result is not None), key=len)
+        if not known:
+            return None
+        ids = known[0]
+        for other in known[1:]:
+            ids = ids & other
+        return ids
+
+    def _lookup(self, literal: bytes) -> Set[int]:
+        """Files containing every trigram of a literal."""
+        postings = []
+        for trigram in _literal_trigrams(literal):
+            posting = self.postings.get(trigram)
+            if posting is None:
+                return set()
+            postings.append(posting)
+        postings.sort(key=len)
+
+        ids = set(postings[0])
+        for posting in postings[1:]:
+            if not ids:
+                break
+            if len(ids) * 16 < len(posting):
+                # Few candidates left: binary search the sorted posting list
+                size = len(posting)
+                ids = {i for i in ids if (pos := bisect_left(posting, i)) < size and posting[pos] == i}
+            else:
+                ids.intersection_update(posting)
+        return ids
+
+    def save(self, path: Path) -> None:
+        """Write the index to disk atomically."""
+        with self._lock:
+            state = {
+                'version': INDEX_VERSION,
+                'byteorder': sys.byteorder,
+                'root': self.root,
+                'paths': self.paths,
+                'files': self.files,
+                'postings': self.postings,
+                'dead': self.dead,
+            }
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix(path.suffix + '.tmp')
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: Path, root: str) -> Optional["TrigramIndex"]:
+        """Read an index written by save, or return None if missing or unusable."""
+        try:
+            with open(path, 'rb') as f:
+                state = pickle.load(f)
+        except Exception:
+            return None
+        if (
+            not isinstance(state, dict)
+            or state.get('version') != INDEX_VERSION
+            or state.get('byteorder') != sys.byteorder
+            or state.get('root') != root
+        ):
+            return None
+
+        index = cls(root)
+        index.paths = state['paths']
+        index.files = state['files']
+        index.postings = state['postings']
+        index.dead = state['dead']
+        index.posting_entries = sum(len(posting) for posting in index.postings.values())
+        return index
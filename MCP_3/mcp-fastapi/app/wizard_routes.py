@@ -2,12 +2,15 @@
 import json
 import os
 from pathlib import Path
-from fastapi import APIRouter, Request, HTTPException, Form
+from typing import Optional
+from fastapi import APIRouter, Depends, Request, HTTPException, Form
 from fastapi.responses import HTMLResponse, JSONResponse, RedirectResponse
 from fastapi.templating import Jinja2Templates
 from pydantic import ValidationError
 
+from app.auth import get_optional_user
 from app.project_manager import project_manager, ProjectConfig
+from app.services import watcher_service
 
 router = APIRouter()
 
@@ -777,6 +780,23 @@ with open(templates_dir / "wizard.html", "w", encoding="utf-8") as f:
     f.write(wizard_html)
 
 
+def _check_user_access(user_id: str, current_user: Optional[dict]) -> None:
+    """
+    Only let a user see or change their own project.
+
+    Raises:
+        HTTPException: 401 without a valid token, 403 for another user's project
+    """
+    if current_user is None:
+        raise HTTPException(
+            status_code=401,
+            detail="Authentication required for a user project",
+            headers={"WWW-Authenticate": "Bearer"}
+        )
+    if current_user.get("sub") != user_id:
+        raise HTTPException(status_code=403, detail="Not allowed to access another user's project")
+
+
 @router.get("/wizard", response_class=HTMLResponse)
 async def wizard_page(request: Request):
     """Serve the project setup wizard page."""
@@ -784,19 +804,35 @@ async def wizard_page(request: Request):
 
 
 @router.post("/wizard/setup")
-async def setup_project(request: Request):
+async def setup_project(request: Request, current_user: Optional[dict] = Depends(get_optional_user)):
     """Setup project configuration."""
     try:
         data = await request.json()
+        # Optional compare-and-set against the version read from /wizard/status
+        expected_version = data.pop("expected_version", None)
+        # Optional: give the authenticated user their own project instead of setting the default one
+        user_id = data.pop("user_id", None) or None
+        if user_id is not None:
+            _check_user_access(user_id, current_user)
 
         # Validate project config
         config = ProjectConfig(**data)
-        project_manager.set_project_config(config)
+        project_manager.set_project_config(config, expected_version, user_id)
+        # Watch the new project root (no-op if it did not change)
+        await watcher_service.start()
 
-        return {"message": "Project configured successfully", "config": config.dict()}
+        return {
+            "message": "Project configured successfully",
+            "config": config.dict(),
+            "version": project_manager.version
+        }
 
+    except HTTPException:
+        raise
     except ValidationError as e:
         raise HTTPException(status_code=400, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Setup failed: {str(e)}")
 
@@ -844,12 +880,30 @@ async def detect_project_type(request: Request):
         return {"projectType": None, "error": str(e)}
 
 
+@router.delete("/wizard/users/{user_id}")
+async def remove_user_project(user_id: str, current_user: Optional[dict] = Depends(get_optional_user)):
+    """Return the authenticated user to the default project."""
+    _check_user_access(user_id, current_user)
+    if not project_manager.has_user_project(user_id):
+        raise HTTPException(status_code=404, detail=f"User has no project of their own: {user_id}")
+    project_manager.remove_user_project(user_id)
+    await watcher_service.start()
+    return {"message": "User project removed", "version": project_manager.version}
+
+
 @router.get("/wizard/status")
-async def get_wizard_status():
-    """Get current wizard/project status."""
-    config = project_manager.get_project_config()
+async def get_wizard_status(user_id: Optional[str] = None, current_user: Optional[dict] = Depends(get_optional_user)):
+    """Get current wizard/project status (of the authenticated user's project if user_id is given)."""
+    if user_id is not None:
+        _check_user_access(user_id, current_user)
+    try:
+        config = project_manager.get_project_config(user_id)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
     return {
-        "configured": project_manager.is_configured(),
+        "configured": config is not None,
         "project_root": config.project_root if config else None,
         "project_type": config.project_type if config else None,
+        "user_project": user_id is not None and project_manager.has_user_project(user_id),
+        "version": project_manager.version,
     }
\ No newline at end of file
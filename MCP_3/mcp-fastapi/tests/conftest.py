@@ -0,0 +1,55 @@
+"""Test setup: an isolated home directory and a default project root."""
+import os
+import tempfile
+from pathlib import Path
+
+import pytest
+
+# Settings are read at import time, so the environment is set before any app import
+_base = Path(tempfile.mkdtemp(prefix="senscoder-tests-"))
+DEFAULT_ROOT = _base / "default"
+DEFAULT_ROOT.mkdir()
+(_base / "home").mkdir()
+os.environ["HOME"] = str(_base / "home")
+os.environ["SENSCODER_PROJECT_ROOT"] = str(DEFAULT_ROOT)
+os.environ["TOOL_INVOKE_RATE_LIMIT"] = "100000/minute"
+os.environ["RATE_LIMIT_REQUESTS"] = "100000"
+os.environ["MCP_JWT_SECRET"] = "test-secret-" + os.urandom(8).hex()
+
+
+@pytest.fixture
+def default_root() -> Path:
+    return DEFAULT_ROOT
+
+
+@pytest.fixture
+def configured() -> Path:
+    """Configure the default project; returns its root."""
+    from app.project_manager import ProjectConfig, project_manager
+
+    project_manager.set_project_config(ProjectConfig(project_root=str(DEFAULT_ROOT), project_type="other"))
+    return DEFAULT_ROOT.resolve()
+
+
+@pytest.fixture
+def client(configured, monkeypatch):
+    """Test client without the app lifespan (no file watcher)."""
+    from fastapi.testclient import TestClient
+    from app.main import app
+    from app.services.watcher_service import watcher_service
+
+    # Each request of a client outside `with` runs on its own event loop
+    async def start():
+        pass
+    monkeypatch.setattr(watcher_service, "start", start)
+    return TestClient(app)
+
+
+@pytest.fixture
+def auth_headers():
+    """Build bearer headers for a user ID."""
+    from app.auth import AuthService
+
+    def headers(user_id: str) -> dict:
+        return {"Authorization": f"Bearer {AuthService.create_access_token({'sub': user_id})}"}
+    return headers
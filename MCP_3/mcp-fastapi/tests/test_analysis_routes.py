@@ -0,0 +1,29 @@
+"""Project analysis must not block the event loop."""
+import asyncio
+
+import pytest
+
+from app.services.project_analyzer import project_analyzer
+
+
+def _running_loop():
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+
+@pytest.mark.parametrize("route", ["/mcp/analyze-project", "/mcp/generate-prd"])
+def test_analysis_runs_off_the_event_loop(client, configured, monkeypatch, route):
+    loops = []
+    original = project_analyzer.analyze_project
+
+    def analyze_project(path):
+        loops.append(_running_loop())
+        return original(path)
+
+    monkeypatch.setattr(project_analyzer, "analyze_project", analyze_project)
+
+    client.post(route, json={"projectPath": str(configured)})
+
+    assert loops == [None]
@@ -0,0 +1,151 @@
+"""Auto-setup jobs run in the background, are shared per project and replay their events."""
+import asyncio
+
+import pytest
+
+from app.models import ProviderConfig
+from app.services.auto_setup_service import AutoSetupService
+from app.services.config_service import config_service
+from app.services.documentation_generator import documentation_generator
+
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    async def get_provider_config(user_id):
+        return ProviderConfig(provider="test", use_own_key=False, has_api_key=False)
+
+    monkeypatch.setattr(config_service, "get_provider_config", get_provider_config)
+    (tmp_path / "main.py").write_text("print(1)\n")
+    return tmp_path
+
+
+@pytest.fixture
+def service():
+    return AutoSetupService()
+
+
+def _hold_prd(monkeypatch):
+    """Make the PRD generator wait until the returned event is set."""
+    release = asyncio.Event()
+    original = documentation_generator.generate_prd
+
+    async def generate_prd(*args):
+        await release.wait()
+        return await original(*args)
+
+    monkeypatch.setattr(documentation_generator, "generate_prd", generate_prd)
+    return release
+
+
+def test_job_runs_to_completion_and_replays_its_events(project, service):
+    async def scenario():
+        job, deduplicated = service.submit(str(project), "u1")
+        await job.task
+        return job, deduplicated, [event async for event in service.events(job)]
+
+    job, deduplicated, events = asyncio.run(scenario())
+
+    assert deduplicated is False
+    assert job.status == "completed"
+    assert set(job.stages.values()) == {"completed"}
+    assert job.result["success"] is True
+    assert set(job.result["documentation"]) == set(documentation_generator.document_generators())
+    assert [event["event"] for event in events[:2]] == ["start", "stage"]
+    assert (events[1]["stage"], events[1]["status"]) == ("analysis", "running")
+    assert (events[-1]["event"], events[-1]["status"]) == ("end", "completed")
+
+
+def test_submitting_a_running_project_joins_its_job(project, service, monkeypatch):
+    async def scenario():
+        release = _hold_prd(monkeypatch)
+        first, _ = service.submit(str(project), "u1")
+        second, joined = service.submit(str(project / "."), "u1")
+        other_user, other_joined = service.submit(str(project), "u2")
+
+        # A subscriber sees events as they happen, not only after the end
+        seen = []
+
+        async def follow():
+            async for event in service.events(first):
+                seen.append(event["event"])
+
+        follower = asyncio.create_task(follow())
+        await asyncio.sleep(0.05)
+        running = (first.status, list(seen))
+        release.set()
+        await asyncio.gather(first.task, other_user.task, follower)
+        again, rejoined = service.submit(str(project), "u1")
+        await again.task
+        return first, second, joined, other_user, other_joined, running, seen, again, rejoined
+
+    first, second, joined, other_user, other_joined, running, seen, again, rejoined = asyncio.run(scenario())
+
+    assert second is first and joined is True
+    assert other_user is not first and other_joined is False
+    assert running[0] == "running" and running[1][0] == "start" and "end" not in running[1]
+    assert seen[-1] == "end"
+    # A finished job is not joined
+    assert again is not first and rejoined is False
+
+
+def test_jobs_are_private_to_their_user(project, service):
+    async def scenario():
+        job, _ = service.submit(str(project), "u1")
+        await job.task
+        return job
+
+    job = asyncio.run(scenario())
+
+    assert service.get(job.id, "u1") is job
+    assert service.get(job.id, "u2") is None
+    assert service.get("missing", "u1") is None
+
+
+def test_failed_analysis_fails_the_job(project, service, monkeypatch):
+    from app.services.project_analyzer import project_analyzer
+
+    def analyze_project(path):
+        raise RuntimeError("disk on fire")
+
+    monkeypatch.setattr(project_analyzer, "analyze_project", analyze_project)
+
+    async def scenario():
+        job, _ = service.submit(str(project), "u1")
+        await job.task
+        return job
+
+    job = asyncio.run(scenario())
+
+    assert job.status == "failed"
+    assert job.error == "disk on fire"
+    assert job.stages["analysis"] == "failed"
+    assert job.events[-1]["error"] == "disk on fire"
+
+
+def test_finished_jobs_are_pruned(project, service, monkeypatch):
+    monkeypatch.setattr(service, "MAX_FINISHED_JOBS", 1)
+
+    async def scenario():
+        jobs = []
+        for _ in range(3):
+            job, _ = service.submit(str(project), "u1")
+            await job.task
+            jobs.append(job)
+        return jobs
+
+    jobs = asyncio.run(scenario())
+
+    # Pruning happens on submit, before the new job is added
+    assert [service.get(job.id, "u1") is not None for job in jobs] == [False, True, True]
+
+
+def test_invalid_project_path(service, tmp_path):
+    with pytest.raises(ValueError):
+        service.submit(str(tmp_path / "missing"), "u1")
+
+
+def test_job_routes_validate_their_input(client, tmp_path):
+    assert client.post("/mcp/auto-setup/jobs", json={}).status_code == 400
+    assert client.post("/mcp/auto-setup/jobs", json={"projectPath": str(tmp_path / "missing")}).status_code == 400
+    for path in ["", "/events", "/result"]:
+        assert client.get(f"/mcp/auto-setup/jobs/unknown{path}").status_code == 404
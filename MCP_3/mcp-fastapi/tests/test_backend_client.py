@@ -0,0 +1,129 @@
+"""Backend calls retry transient failures and stop while the circuit is open."""
+import asyncio
+
+import httpx
+import pytest
+
+from app.utils import http_client
+from app.utils.http_client import BackendClient, CircuitBreaker
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(http_client, "time", clock)
+    return clock
+
+
+def test_breaker_opens_after_the_threshold(clock):
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=10)
+    for _ in range(2):
+        breaker.record_failure()
+    assert breaker.state == "closed" and breaker.allow()
+
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow()
+
+
+def test_success_resets_the_failure_count(clock):
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+
+    assert breaker.state == "closed"
+
+
+def test_half_open_lets_one_trial_through(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10)
+    breaker.record_failure()
+    clock.now += 10
+
+    assert breaker.state == "half-open"
+    assert breaker.allow()
+    assert not breaker.allow()  # the trial is in flight
+
+    breaker.record_failure()  # the trial failed: open again for a full timeout
+    assert breaker.state == "open"
+    clock.now += 10
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed" and breaker.allow()
+
+
+def test_lost_trial_is_replaced_after_the_timeout(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10)
+    breaker.record_failure()
+    clock.now += 10
+    assert breaker.allow()
+
+    clock.now += 9
+    assert not breaker.allow()
+    clock.now += 1
+    assert breaker.allow()
+
+
+@pytest.fixture
+def backend(monkeypatch):
+    """A BackendClient whose requests are answered by the `responses` list."""
+    monkeypatch.setattr(BackendClient, "RETRY_BASE_DELAY", 0)
+    responses = []
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        response = responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    client = BackendClient()
+    client.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return client, responses, requests
+
+
+def _get(client):
+    return asyncio.run(client.get_json("/api/x", "u1"))
+
+
+def test_transient_failures_are_retried(backend):
+    client, responses, requests = backend
+    responses.extend([httpx.ConnectError("refused"), httpx.Response(503), httpx.Response(200, json={"ok": True})])
+
+    assert _get(client) == {"ok": True}
+    assert len(requests) == 3
+    assert requests[0].headers["X-User-ID"] == "u1"
+    assert client.breaker.failures == 0
+
+
+@pytest.mark.parametrize("response", [httpx.Response(404), httpx.Response(200, content=b"not json")])
+def test_client_errors_are_not_retried(backend, response):
+    client, responses, requests = backend
+    responses.append(response)
+
+    assert _get(client) is None
+    assert len(requests) == 1
+    assert client.breaker.failures == 0
+
+
+def test_open_circuit_skips_the_backend(backend, monkeypatch):
+    from app.config import settings
+
+    monkeypatch.setattr(settings, "backend_max_retries", 0)
+    client, responses, requests = backend
+    client.breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+    responses.extend([httpx.Response(500), httpx.Response(500)])
+
+    assert _get(client) is None and _get(client) is None
+    assert client.breaker.state == "open"
+    assert _get(client) is None
+    assert len(requests) == 2
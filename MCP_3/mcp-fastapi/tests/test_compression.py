@@ -0,0 +1,34 @@
+"""Large responses are gzipped; streams are left alone so events arrive as produced."""
+import pytest
+
+
+@pytest.fixture
+def many_files(configured):
+    paths = [configured / f"file_{i:04d}.txt" for i in range(300)]
+    for path in paths:
+        path.write_text("x")
+    yield configured
+    for path in paths:
+        path.unlink()
+
+
+def test_large_response_is_gzipped(client, many_files, auth_headers):
+    response = client.post(
+        "/mcp/tool-invoke",
+        json={"tool": "list_files", "params": {"path": "."}},
+        headers={**auth_headers("gzip-user"), "Accept-Encoding": "gzip"}
+    )
+    assert response.headers.get("content-encoding") == "gzip"
+    assert response.json()["result"]["count"] >= 300
+
+
+@pytest.mark.parametrize("accept", ["application/x-ndjson", "text/event-stream"])
+def test_stream_is_not_compressed(client, many_files, accept):
+    response = client.post(
+        "/mcp/tool-invoke/stream",
+        json={"tool": "list_files", "params": {"path": "."}},
+        headers={"Accept-Encoding": "gzip", "Accept": accept}
+    )
+    assert response.status_code == 200
+    assert len(response.content) > 4096
+    assert "content-encoding" not in response.headers
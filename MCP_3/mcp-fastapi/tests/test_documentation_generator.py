@@ -0,0 +1,81 @@
+"""generate_all runs the document generators concurrently and isolates their failures."""
+import asyncio
+
+import pytest
+
+from app.models import ProviderConfig
+from app.services.config_service import config_service
+from app.services.documentation_generator import documentation_generator
+from app.services.project_analyzer import project_analyzer
+
+
+@pytest.fixture
+def metadata(tmp_path):
+    (tmp_path / "main.py").write_text("print(1)\n")
+    return project_analyzer.analyze_project(str(tmp_path))
+
+
+@pytest.fixture
+def provider_fetches(monkeypatch):
+    fetches = []
+
+    async def get_provider_config(user_id):
+        fetches.append(user_id)
+        return ProviderConfig(provider="test", use_own_key=False, has_api_key=False)
+
+    monkeypatch.setattr(config_service, "get_provider_config", get_provider_config)
+    return fetches
+
+
+def test_provider_config_is_fetched_once(metadata, provider_fetches):
+    result = asyncio.run(documentation_generator.generate_all(metadata, "doc-user"))
+
+    assert provider_fetches == ["doc-user"]
+    assert list(result["documentation"]) == list(documentation_generator.document_generators())
+    assert result["errors"] == {}
+    assert "generated_at" in result
+
+
+def test_generators_run_concurrently(metadata, provider_fetches, monkeypatch):
+    names = list(documentation_generator.document_generators())
+    started = []
+
+    async def scenario():
+        all_started = asyncio.Event()
+
+        def generator(name):
+            async def generate(metadata, user_id, provider_config):
+                started.append(name)
+                if len(started) == len(names):
+                    all_started.set()
+                # Only completes if every generator is running at the same time
+                await asyncio.wait_for(all_started.wait(), timeout=5)
+                return {"name": name}
+            return generate
+
+        for name, generate in documentation_generator.document_generators().items():
+            monkeypatch.setattr(documentation_generator, generate.__name__, generator(name))
+        return await documentation_generator.generate_all(metadata, "doc-user")
+
+    result = asyncio.run(scenario())
+
+    assert result["errors"] == {}
+    assert result["documentation"] == {name: {"name": name} for name in names}
+
+
+def test_failed_generator_does_not_affect_the_others(metadata, provider_fetches, monkeypatch):
+    async def failing(metadata, user_id, provider_config):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(documentation_generator, "generate_health_report", failing)
+    progress = []
+
+    result = asyncio.run(documentation_generator.generate_all(
+        metadata, "doc-user", on_progress=lambda *event: progress.append(event)
+    ))
+
+    assert result["errors"] == {"health_report": "boom"}
+    assert "health_report" not in result["documentation"]
+    assert len(result["documentation"]) == len(documentation_generator.document_generators()) - 1
+    assert ("health_report", "failed", "boom") in progress
+    assert ("prd", "running", None) in progress and ("prd", "completed", None) in progress
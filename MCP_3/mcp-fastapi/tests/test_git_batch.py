@@ -0,0 +1,83 @@
+"""Persistent git cat-file coprocesses answer object lookups over a pipe."""
+import asyncio
+import subprocess
+
+import pytest
+
+from app.utils.git_batch import GitCatFile, TreeEntry, parse_tree
+
+
+@pytest.fixture
+def repo(tmp_path):
+    root = tmp_path / "repo"
+    (root / "src").mkdir(parents=True)
+
+    def git(*args):
+        return subprocess.run(["git", *args], cwd=root, check=True, capture_output=True, text=True).stdout
+
+    git("init", "-q")
+    (root / "README.md").write_text("hello\n")
+    (root / "src" / "main.py").write_text("print(1)\n")
+    git("add", ".")
+    git("-c", "user.name=t", "-c", "user.email=t@t", "commit", "-q", "-m", "init")
+    return root, git
+
+
+def test_lookups(repo):
+    root, git = repo
+    blob_sha = git("rev-parse", "HEAD:README.md").strip()
+
+    async def scenario():
+        reader = GitCatFile(str(root))
+        try:
+            return (
+                await reader.info("HEAD:README.md"),
+                await reader.read("HEAD:src/main.py"),
+                await reader.read("HEAD:missing.txt"),
+                await reader.read_tree("HEAD"),
+            )
+        finally:
+            await reader.close()
+
+    info, (main_info, main_content), missing, tree = asyncio.run(scenario())
+    assert (info.sha, info.type, info.size) == (blob_sha, "blob", 6)
+    assert main_info.type == "blob"
+    assert main_content == b"print(1)\n"
+    assert missing == (None, None)
+    assert [(entry.name, entry.type) for entry in tree] == [("README.md", "blob"), ("src", "tree")]
+
+
+def test_restarts_a_dead_coprocess(repo):
+    root, _ = repo
+
+    async def scenario():
+        reader = GitCatFile(str(root))
+        try:
+            await reader.read("HEAD:README.md")
+            reader._batch._process.kill()
+            await reader._batch._process.wait()
+            return await reader.read("HEAD:README.md")
+        finally:
+            await reader.close()
+
+    _, content = asyncio.run(scenario())
+    assert content == b"hello\n"
+
+
+@pytest.mark.parametrize("spec", ["", "HEAD\n:README.md", "HEAD\0"])
+def test_invalid_object_names(repo, spec):
+    root, _ = repo
+    with pytest.raises(ValueError):
+        asyncio.run(GitCatFile(str(root)).info(spec))
+
+
+def test_parse_tree():
+    sha1, sha2 = bytes(range(20)), bytes(range(20, 40))
+    content = b"100644 a.txt\0" + sha1 + b"40000 dir\0" + sha2 + b"160000 sub\0" + sha1
+
+    assert parse_tree(content) == [
+        TreeEntry("100644", "blob", sha1.hex(), "a.txt"),
+        TreeEntry("40000", "tree", sha2.hex(), "dir"),
+        TreeEntry("160000", "commit", sha1.hex(), "sub"),
+    ]
+    assert parse_tree(b"100644 x\0" + bytes(32), hash_size=32)[0].sha == "00" * 32
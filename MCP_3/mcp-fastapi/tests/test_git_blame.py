@@ -0,0 +1,74 @@
+"""blame checks and normalizes its line range and parses porcelain output."""
+import asyncio
+import subprocess
+
+import pytest
+
+from app.project_manager import ProjectConfig, project_manager
+from app.services.git_service import git_service
+
+
+@pytest.fixture
+def repo(tmp_path, configured):
+    root = tmp_path / "repo"
+    root.mkdir()
+
+    def git(*args):
+        subprocess.run(["git", *args], cwd=root, check=True, capture_output=True)
+
+    git("init", "-q")
+    (root / "lines.txt").write_text("".join(f"line {i}\n" for i in range(1, 6)))
+    git("add", ".")
+    git("-c", "user.name=t", "-c", "user.email=t@t", "commit", "-q", "-m", "init")
+
+    project_manager.set_project_config(ProjectConfig(project_root=str(root), project_type="other"), user_id="blame-user")
+    yield root
+    project_manager.remove_user_project("blame-user")
+
+
+async def _blame(**kwargs):
+    return await git_service.blame("lines.txt", include_lines=True, user_id="blame-user", **kwargs)
+
+
+@pytest.mark.parametrize("start_line, end_line", [(0, 2), (-1, None), (3, 2), (None, 0), ("x", 2), (1, [2])])
+def test_invalid_ranges_are_rejected(repo, start_line, end_line):
+    with pytest.raises(ValueError):
+        asyncio.run(_blame(start_line=start_line, end_line=end_line))
+
+
+def test_range_is_coerced_and_normalized(repo):
+    async def blames():
+        return [
+            (await _blame(start_line="2", end_line="3"))["lines"],
+            (await _blame(end_line=2))["lines"],
+            (await _blame(start_line=4))["lines"],
+        ]
+
+    assert asyncio.run(blames()) == [["line 2", "line 3"], ["line 1", "line 2"], ["line 4", "line 5"]]
+
+    keys = {key[3:] for key in git_service._blame_cache._data if key[0] == str(repo.resolve())}
+    assert keys == {(2, 3), (1, 2), (4, None)}
+
+
+def test_parse_blame_porcelain():
+    a, b = "a" * 40, "b" * 40
+    output = "\n".join([
+        f"{a} 1 1 2", "author Ann", "author-mail <ann@x>", "author-time 100", "summary first",
+        "boundary", "filename f.txt", "\tone",
+        f"{a} 2 2", "\ttwo",
+        f"{b} 2 3 1", "author Bob", "author-mail <bob@x>", "author-time 200", "summary second",
+        f"previous {a} f.txt", "filename f.txt", "\tthree",
+    ]) + "\n"
+
+    result = git_service._parse_blame_porcelain(output)
+
+    assert result["lines"] == ["one", "two", "three"]
+    assert result["hunks"] == [
+        {"commit": a, "start_line": 1, "orig_start_line": 1, "line_count": 2},
+        {"commit": b, "start_line": 3, "orig_start_line": 2, "line_count": 1},
+    ]
+    assert result["commits"][a] == {
+        "author": "Ann", "author_email": "ann@x", "author_time": 100, "summary": "first",
+        "boundary": True, "filename": "f.txt"
+    }
+    assert result["commits"][b]["previous"] == a
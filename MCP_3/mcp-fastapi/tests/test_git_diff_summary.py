@@ -0,0 +1,64 @@
+"""diff_summary must survive git output cut at the size cap."""
+import asyncio
+import subprocess
+
+import pytest
+
+from app.project_manager import ProjectConfig, project_manager
+from app.services.git_service import git_service
+from app.utils.subprocess_utils import subprocess_manager
+
+
+@pytest.fixture
+def repo(tmp_path, configured):
+    root = tmp_path / "repo"
+    root.mkdir()
+
+    def git(*args):
+        subprocess.run(["git", *args], cwd=root, check=True, capture_output=True)
+
+    git("init", "-q")
+    for i in range(200):
+        (root / f"file_{i:03d}.txt").write_text("one\n")
+    git("add", ".")
+    git("-c", "user.name=t", "-c", "user.email=t@t", "commit", "-q", "-m", "init")
+    for i in range(200):
+        (root / f"file_{i:03d}.txt").write_text("one\ntwo\n")
+    git("mv", "file_000.txt", "renamed.txt")
+
+    project_manager.set_project_config(ProjectConfig(project_root=str(root), project_type="other"), user_id="git-user")
+    yield root
+    project_manager.remove_user_project("git-user")
+
+
+def test_complete_output(repo):
+    result = asyncio.run(git_service.diff_summary(user_id="git-user"))
+    assert result["count"] == 200
+    assert "truncated" not in result
+
+    staged = asyncio.run(git_service.diff_summary(staged=True, user_id="git-user"))
+    assert staged["files"] == [{
+        "status": "R", "similarity": 100, "old_path": "file_000.txt", "path": "renamed.txt",
+        "binary": False, "additions": 0, "deletions": 0
+    }]
+
+
+@pytest.mark.parametrize("cap", [100, 1000, 5000, 9000, 12000])
+def test_truncated_output_drops_the_partial_record(repo, monkeypatch, cap):
+    monkeypatch.setattr(subprocess_manager, "max_output_bytes", cap)
+
+    result = asyncio.run(git_service.diff_summary(user_id="git-user"))
+
+    assert result["truncated"] is True
+    assert result["count"] <= 200
+    assert all(entry["path"] for entry in result["files"])
+
+
+@pytest.mark.parametrize("cap", [20, 60, 80])
+def test_truncated_rename_record(repo, monkeypatch, cap):
+    monkeypatch.setattr(subprocess_manager, "max_output_bytes", cap)
+
+    result = asyncio.run(git_service.diff_summary(staged=True, user_id="git-user"))
+
+    assert result["truncated"] is True
+    assert all(entry["path"] for entry in result["files"])
@@ -0,0 +1,96 @@
+"""git log pages are structured, stable under new commits and parsed exactly."""
+import asyncio
+import subprocess
+
+import pytest
+
+from app.project_manager import ProjectConfig, project_manager
+from app.services.git_service import git_service
+
+
+@pytest.fixture
+def repo(tmp_path, configured):
+    root = tmp_path / "repo"
+    root.mkdir()
+
+    def git(*args):
+        subprocess.run(["git", *args], cwd=root, check=True, capture_output=True)
+
+    def commit(message):
+        git("add", "-A")
+        git("-c", "user.name=t", "-c", "user.email=t@t", "commit", "-q", "-m", message)
+
+    git("init", "-q")
+    for i in range(4):
+        (root / "a.txt").write_text("line\n" * (i + 1))
+        commit(f"commit {i}")
+    git("mv", "a.txt", "b.txt")
+    commit("rename\n\nwith a body")
+
+    project_manager.set_project_config(ProjectConfig(project_root=str(root), project_type="other"), user_id="log-user")
+    yield root, commit
+    project_manager.remove_user_project("log-user")
+
+
+async def _pages(limit, **kwargs):
+    pages = [await git_service.log(limit=limit, user_id="log-user", **kwargs)]
+    while pages[-1]["next_cursor"]:
+        pages.append(await git_service.log(limit=limit, cursor=pages[-1]["next_cursor"], user_id="log-user"))
+    return pages
+
+
+def test_pages_follow_the_cursor(repo):
+    pages = asyncio.run(_pages(2))
+
+    assert [page["count"] for page in pages] == [2, 2, 1]
+    subjects = [commit["subject"] for page in pages for commit in page["commits"]]
+    assert subjects == ["rename", "commit 3", "commit 2", "commit 1", "commit 0"]
+    assert pages[0]["commits"][0]["body"] == "with a body"
+    assert pages[-1]["commits"][-1]["parents"] == []
+
+
+def test_cursor_pins_the_starting_commit(repo):
+    root, commit = repo
+
+    async def scenario():
+        first = await git_service.log(limit=2, user_id="log-user")
+        (root / "c.txt").write_text("new\n")
+        commit("newer")
+        second = await git_service.log(limit=2, cursor=first["next_cursor"], user_id="log-user")
+        latest = await git_service.log(limit=1, user_id="log-user")
+        return second, latest
+
+    second, latest = asyncio.run(scenario())
+    assert [commit["subject"] for commit in second["commits"]] == ["commit 2", "commit 1"]
+    assert latest["commits"][0]["subject"] == "newer"
+
+
+def test_numstat_reports_renames(repo):
+    page = asyncio.run(git_service.log(limit=2, numstat=True, user_id="log-user"))
+
+    assert page["commits"][0]["files"] == [{"added": 0, "deleted": 0, "old_path": "a.txt", "path": "b.txt"}]
+    assert page["commits"][1]["files"] == [{"added": 1, "deleted": 0, "path": "a.txt"}]
+
+
+@pytest.mark.parametrize("cursor", ["HEAD:2", "abc:1", "0" * 40])
+def test_invalid_cursor(repo, cursor):
+    with pytest.raises(ValueError):
+        asyncio.run(git_service.log(cursor=cursor, user_id="log-user"))
+
+
+def test_parse_log_records():
+    fields = ["a" * 40, "b" * 40 + " " + "c" * 40, "Ann", "ann@x", "100", "Bob", "bob@x", "200", "Merge", "line 1\nline 2\n"]
+    numstat = "\n3\t1\tsrc/x.py\0-\t-\tlogo.png\0" + "0\t0\t\0old.txt\0new.txt\0"
+    output = "\x1e" + "\0".join(fields) + "\0" + numstat
+
+    [commit] = git_service._parse_log_records(output)
+
+    assert commit["hash"] == "a" * 40
+    assert commit["parents"] == ["b" * 40, "c" * 40]
+    assert (commit["author_time"], commit["committer_time"]) == (100, 200)
+    assert commit["body"] == "line 1\nline 2"
+    assert commit["files"] == [
+        {"added": 3, "deleted": 1, "path": "src/x.py"},
+        {"added": None, "deleted": None, "path": "logo.png"},
+        {"added": 0, "deleted": 0, "old_path": "old.txt", "path": "new.txt"},
+    ]
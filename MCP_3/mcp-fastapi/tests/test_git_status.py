@@ -0,0 +1,95 @@
+"""git status is parsed from porcelain v2 and cached until the repository changes."""
+import asyncio
+import subprocess
+
+import pytest
+
+from app.project_manager import ProjectConfig, project_manager
+from app.services.git_service import git_service
+
+
+@pytest.fixture
+def repo(tmp_path, configured):
+    root = tmp_path / "repo"
+    root.mkdir()
+
+    def git(*args):
+        subprocess.run(["git", *args], cwd=root, check=True, capture_output=True)
+
+    git("init", "-q", "-b", "main")
+    (root / "a.txt").write_text("one\n")
+    git("add", ".")
+    git("-c", "user.name=t", "-c", "user.email=t@t", "commit", "-q", "-m", "init")
+
+    project_manager.set_project_config(ProjectConfig(project_root=str(root), project_type="other"), user_id="status-user")
+    yield root, git
+    project_manager.remove_user_project("status-user")
+
+
+def test_status_is_cached_until_the_index_or_a_signal_changes(repo):
+    root, git = repo
+
+    def status():
+        return git_service.status(user_id="status-user")
+
+    async def scenario():
+        results = [await status(), await status()]
+        (root / "b.txt").write_text("new\n")
+        results.append(await status())  # an edit nothing reported: still cached
+        git_service.invalidate_status(str(root))
+        results.append(await status())
+        git("add", "b.txt")
+        results.append(await status())
+        return results
+
+    clean, again, unreported, signalled, staged = asyncio.run(scenario())
+    assert clean["cached"] is False and clean["has_changes"] is False
+    assert clean["branch"]["head"] == "main"
+    assert again["cached"] is True
+    assert unreported["cached"] is True and unreported["entries"] == []
+    assert signalled["cached"] is False
+    assert signalled["entries"] == [{"path": "b.txt", "kind": "untracked"}]
+    assert staged["cached"] is False
+    assert staged["counts"]["staged"] == 1
+
+
+def test_invalid_untracked_mode(repo):
+    with pytest.raises(ValueError):
+        asyncio.run(git_service.status(untracked="some", user_id="status-user"))
+
+
+def test_parse_status_v2():
+    sha = "a" * 40
+    output = "\0".join([
+        f"# branch.oid {sha}",
+        "# branch.head feature",
+        "# branch.upstream origin/feature",
+        "# branch.ab +2 -1",
+        f"1 .M N... 100644 100644 100644 {sha} {sha} src/a file.py",
+        f"2 R. N... 100644 100644 100644 {sha} {sha} R100 new.txt",
+        "old.txt",
+        f"u UU N... 100644 100644 100644 100644 {sha} {sha} {sha} conflict.txt",
+        "? untracked.txt",
+        "! build/",
+    ]) + "\0"
+
+    result = git_service._parse_status_v2(output)
+
+    assert result["branch"] == {"oid": sha, "head": "feature", "upstream": "origin/feature", "ahead": 2, "behind": 1}
+    assert result["entries"] == [
+        {"path": "src/a file.py", "kind": "changed", "index_status": ".", "worktree_status": "M"},
+        {"path": "new.txt", "kind": "renamed", "index_status": "R", "worktree_status": ".",
+         "score": "R100", "orig_path": "old.txt"},
+        {"path": "conflict.txt", "kind": "unmerged", "index_status": "U", "worktree_status": "U"},
+        {"path": "untracked.txt", "kind": "untracked"},
+        {"path": "build/", "kind": "ignored"},
+    ]
+    assert result["counts"] == {"staged": 1, "unstaged": 1, "untracked": 1, "conflicted": 1, "ignored": 1}
+    assert result["has_changes"] is True
+
+
+def test_parse_status_v2_initial_detached():
+    result = git_service._parse_status_v2("# branch.oid (initial)\0# branch.head (detached)\0! ignored.log\0")
+
+    assert result["branch"] == {"oid": None, "head": None}
+    assert result["has_changes"] is False
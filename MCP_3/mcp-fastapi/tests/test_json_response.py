@@ -0,0 +1,87 @@
+"""dumps encodes responses as FastAPI would, with or without orjson."""
+import json
+from dataclasses import dataclass
+from enum import Enum
+from pathlib import Path
+from typing import Optional
+
+import pytest
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel, Field, field_serializer
+
+from app.utils import json_response
+from app.utils.json_response import FastJSONResponse, dumps
+
+
+class Color(Enum):
+    RED = "red"
+
+
+@dataclass
+class Point:
+    x: int
+    y: int
+
+
+class Item(BaseModel):
+    name: str
+    alias_field: int = Field(serialization_alias="aliasField")
+    nested: Optional["Item"] = None
+
+
+class Custom(BaseModel):
+    value: int
+
+    @field_serializer("value")
+    def double(self, value: int) -> int:
+        return value * 2
+
+
+@pytest.fixture(params=["orjson", "pydantic-core"])
+def backend(request, monkeypatch):
+    if request.param == "pydantic-core":
+        monkeypatch.setattr(json_response, "orjson", None)
+    elif json_response.orjson is None:
+        pytest.skip("orjson is not installed")
+    return request.param
+
+
+CONTENT = {
+    "text": "héllo 😀",
+    "numbers": [1, 2.5, None, True],
+    "set": {3},
+    "tuple": (1, 2),
+    "path": Path("/tmp/x"),
+    "enum": Color.RED,
+    "dataclass": Point(1, 2),
+    "model": Item(name="a", alias_field=1, nested=Item(name="b", alias_field=2)),
+    "custom": Custom(value=21),
+}
+
+
+def test_matches_jsonable_encoder(backend):
+    assert json.loads(dumps(CONTENT)) == jsonable_encoder(CONTENT)
+
+
+def test_output_is_compact_utf8(backend):
+    assert dumps({"a": [1, "é"]}) == '{"a":[1,"é"]}'.encode("utf-8")
+
+
+def test_big_integers_and_non_string_keys(backend):
+    assert json.loads(dumps({"big": 2 ** 70})) == {"big": 2 ** 70}
+    assert json.loads(dumps({1: "one"})) == {"1": "one"}
+
+
+def test_unknown_objects_become_strings(backend):
+    class Thing:
+        def __str__(self):
+            return "thing"
+
+    assert json.loads(dumps({"x": Thing()})) == {"x": "thing"}
+
+
+def test_fast_json_response_renders_with_dumps(backend):
+    response = FastJSONResponse({"model": Item(name="a", alias_field=1)})
+
+    assert response.body == dumps({"model": {"name": "a", "aliasField": 1, "nested": None}})
+    assert response.headers["content-type"] == "application/json"
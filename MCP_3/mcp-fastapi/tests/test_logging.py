@@ -0,0 +1,91 @@
+"""Log records are structured, never block the caller and carry the request ID."""
+import json
+import logging
+import queue
+import sys
+
+import pytest
+
+from app.utils import logging_setup
+from app.utils.logging_setup import (
+    DroppingQueueHandler, JsonFormatter, RequestIdFilter, request_id_var, should_log_request
+)
+
+
+def _record(msg="hello %s", args=("world",), exc_info=None, **extra):
+    record = logging.getLogger("test.logger").makeRecord(
+        "test.logger", logging.WARNING, __file__, 1, msg, args, exc_info, extra=extra
+    )
+    RequestIdFilter().filter(record)
+    return record
+
+
+def test_json_formatter_fields():
+    token = request_id_var.set("req-1")
+    try:
+        record = _record(path="/mcp/x", status=200, payload={"a": object()})
+    finally:
+        request_id_var.reset(token)
+
+    entry = json.loads(JsonFormatter().format(record))
+
+    assert entry["level"] == "WARNING"
+    assert entry["logger"] == "test.logger"
+    assert entry["message"] == "hello world"
+    assert entry["request_id"] == "req-1"
+    assert (entry["path"], entry["status"]) == ("/mcp/x", 200)
+    assert entry["payload"]["a"].startswith("<object")  # unserializable values become strings
+    assert "args" not in entry and "msg" not in entry
+
+
+def test_outside_a_request_there_is_no_request_id():
+    assert "request_id" not in json.loads(JsonFormatter().format(_record()))
+
+
+def test_records_are_resolved_before_they_are_queued():
+    handler = DroppingQueueHandler(queue.Queue())
+    args = ["before"]
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        record = _record(msg="value %s", args=(args,), exc_info=sys.exc_info(), path="/p")
+    handler.emit(record)
+    args[0] = "after"
+
+    queued = handler.queue.get_nowait()
+    entry = json.loads(JsonFormatter().format(queued))
+    assert entry["message"] == "value ['before']"
+    assert "ValueError: boom" in entry["exc_info"]
+    assert entry["path"] == "/p"
+
+
+def test_full_queue_drops_records():
+    handler = DroppingQueueHandler(queue.Queue(maxsize=1))
+    for _ in range(3):
+        handler.emit(_record())
+
+    assert handler.queue.qsize() == 1
+    assert handler.dropped == 2
+
+
+@pytest.fixture
+def sampled(monkeypatch):
+    monkeypatch.setattr(logging_setup, "_sample_rates", {"/mcp/health": 0.25})
+    monkeypatch.setattr(logging_setup.settings, "log_slow_request_ms", 1000.0)
+    monkeypatch.setattr(logging_setup.random, "random", lambda: 0.5)
+
+
+@pytest.mark.parametrize("path, status, duration, logged", [
+    ("/mcp/health", 200, 0.01, False),  # sampled out
+    ("/mcp/health", 500, 0.01, True),  # failures are always logged
+    ("/mcp/health", 200, 1.5, True),  # so are slow requests
+    ("/mcp/tools", 200, 0.01, True),  # paths without a rate are always logged
+])
+def test_should_log_request(sampled, path, status, duration, logged):
+    assert should_log_request(path, status, duration) is logged
+
+
+def test_request_id_is_echoed_or_generated(client):
+    assert client.get("/mcp/health", headers={"X-Request-ID": "abc"}).headers["X-Request-ID"] == "abc"
+    generated = client.get("/mcp/health").headers["X-Request-ID"]
+    assert len(generated) == 16
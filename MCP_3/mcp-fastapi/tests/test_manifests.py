@@ -0,0 +1,124 @@
+"""Manifests are parsed once per analysis into what the detectors read."""
+import json
+
+import pytest
+
+from app.services.manifests import GoModule, ProjectManifests, parse_go_mod, parse_pom, parse_requirements
+
+
+@pytest.mark.parametrize("line, expected", [
+    ("requests==2.31.0", {"requests": "2.31.0"}),
+    ("requests == 2.31.0  # pinned", {"requests": "2.31.0"}),
+    ("uvicorn[standard]>=0.20", {"uvicorn": ">=0.20"}),
+    ("django>=4,<5", {"django": ">=4,<5"}),
+    ("numpy==1.26; python_version >= '3.9'", {"numpy": "1.26"}),
+    ("flask", {"flask": "latest"}),
+    ("zope.interface~=6.0", {"zope.interface": "~=6.0"}),
+    ("# comment", {}),
+    ("-r base.txt", {}),
+    ("--index-url https://example.com/simple", {}),
+    ("-e .", {}),
+    ("https://example.com/pkg.tar.gz", {}),
+])
+def test_parse_requirements(line, expected):
+    assert parse_requirements(line) == expected
+
+
+def test_parse_go_mod():
+    go_mod = parse_go_mod(
+        "// a comment\n"
+        "module example.com/app\n"
+        "\n"
+        "go 1.21\n"
+        "\n"
+        "require github.com/single/dep v1.0.0\n"
+        "require (\n"
+        "\tgithub.com/gin-gonic/gin v1.9.1\n"
+        "\tgolang.org/x/text v0.14.0 // indirect\n"
+        "\t\"quoted.example/mod\" v2.0.0\n"
+        ")\n"
+        "replace github.com/single/dep => ../dep\n"
+    )
+
+    assert go_mod == GoModule(
+        module="example.com/app",
+        go_version="1.21",
+        require={
+            "github.com/single/dep": "v1.0.0",
+            "github.com/gin-gonic/gin": "v1.9.1",
+            "golang.org/x/text": "v0.14.0",
+            "quoted.example/mod": "v2.0.0",
+        },
+        indirect={"golang.org/x/text"},
+    )
+
+
+POM = """<?xml version="1.0"?>
+<project xmlns="http://maven.apache.org/POM/4.0.0">
+  <parent>
+    <groupId>org.springframework.boot</groupId>
+    <artifactId>spring-boot-starter-parent</artifactId>
+  </parent>
+  <groupId>com.example</groupId>
+  <artifactId>demo</artifactId>
+  <dependencies>
+    <dependency>
+      <groupId> org.postgresql </groupId>
+      <artifactId>postgresql</artifactId>
+      <version>42.7.0</version>
+    </dependency>
+    <dependency>
+      <groupId>junit</groupId>
+      <artifactId>junit</artifactId>
+      <scope>test</scope>
+    </dependency>
+  </dependencies>
+  <dependencyManagement>
+    <dependencies>
+      <dependency><groupId>managed</groupId><artifactId>only</artifactId></dependency>
+    </dependencies>
+  </dependencyManagement>
+  <build>
+    <plugins>
+      <plugin>
+        <groupId>org.apache.maven.plugins</groupId>
+        <artifactId>maven-compiler-plugin</artifactId>
+      </plugin>
+    </plugins>
+  </build>
+</project>
+"""
+
+
+def test_parse_pom():
+    pom = parse_pom(POM)
+
+    assert (pom.group_id, pom.artifact_id) == ("com.example", "demo")
+    assert pom.parent == "org.springframework.boot:spring-boot-starter-parent"
+    # Only direct dependencies, not dependencyManagement
+    assert pom.dependencies == [
+        {"group_id": "org.postgresql", "artifact_id": "postgresql", "version": "42.7.0", "scope": None},
+        {"group_id": "junit", "artifact_id": "junit", "version": None, "scope": "test"},
+    ]
+    assert pom.artifacts == [
+        "org.springframework.boot:spring-boot-starter-parent", "org.postgresql:postgresql", "junit:junit",
+        "org.apache.maven.plugins:maven-compiler-plugin",
+    ]
+    assert parse_pom("<project><unclosed></project>") is None
+
+
+def test_load_parses_the_manifests_present(tmp_path):
+    (tmp_path / "package.json").write_text(json.dumps({"dependencies": {"react": "18"}, "scripts": {"build": "x"}}))
+    (tmp_path / "requirements.txt").write_text("flask==3.0\n")
+    (tmp_path / "pyproject.toml").write_text("not = [valid\n")
+    (tmp_path / "app.py").write_text("from flask import Flask\n")
+
+    manifests = ProjectManifests.load(tmp_path)
+
+    assert manifests.present == {"package.json", "requirements.txt", "pyproject.toml", "app.py"}
+    assert manifests.hashes["go.mod"] is None and manifests.hashes["app.py"] is not None
+    assert manifests.npm_all_dependencies == {"react": "18"}
+    assert manifests.npm_scripts == {"build": "x"}
+    assert manifests.requirements == {"flask": "3.0"}
+    assert manifests.pyproject is None  # present but unparseable
+    assert manifests.python_sources_contain("import flask", "from flask import")
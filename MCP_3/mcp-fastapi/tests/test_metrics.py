@@ -0,0 +1,116 @@
+"""Tool metrics count calls and latency, and attribute subprocess CPU only when it cannot be another call's."""
+import asyncio
+import sys
+
+import pytest
+
+from app.utils.metrics import LATENCY_BUCKETS_MS, ToolStats, tool_metrics
+from app.utils.subprocess_utils import subprocess_manager
+
+pytestmark = pytest.mark.skipif(sys.platform == "win32", reason="needs the resource module")
+
+BUSY = "import time\nend = time.process_time() + 0.2\nwhile time.process_time() < end: pass"
+
+
+async def _call(tool, ready=None, go=None):
+    call = tool_metrics.start(tool)
+    if ready is not None:
+        ready.set()
+        await go.wait()
+    try:
+        await subprocess_manager.run(sys.executable, ["-c", BUSY])
+    finally:
+        tool_metrics.finish(call, True)
+
+
+def _cpu(data):
+    seconds = data["subprocess_cpu_seconds"]
+    return seconds["user"] + seconds["system"]
+
+
+@pytest.fixture(autouse=True)
+def fresh_metrics():
+    tool_metrics.reset()
+    yield
+    tool_metrics.reset()
+
+
+def test_single_call_gets_its_children_cpu():
+    asyncio.run(_call("exec"))
+
+    snapshot = tool_metrics.snapshot()
+    assert _cpu(snapshot["tools"]["exec"]) >= 0.15
+    assert _cpu(snapshot["unattributed"]) < 0.1
+
+
+def test_overlapping_calls_count_no_cpu_twice():
+    async def scenario():
+        ready, go = asyncio.Event(), asyncio.Event()
+        first = asyncio.create_task(_call("exec", ready, go))
+        await ready.wait()
+        second = asyncio.create_task(_call("git"))
+        go.set()
+        await asyncio.gather(first, second)
+
+    asyncio.run(scenario())
+
+    # The first call to finish saw only its own child exit; the other one
+    # saw both, so its share is unattributed
+    snapshot = tool_metrics.snapshot()
+    exec_cpu, git_cpu = _cpu(snapshot["tools"]["exec"]), _cpu(snapshot["tools"]["git"])
+    assert exec_cpu == 0 or git_cpu == 0
+    assert max(exec_cpu, git_cpu) < 0.35
+    assert exec_cpu + git_cpu + _cpu(snapshot["unattributed"]) >= 0.35
+
+
+def test_percentiles_are_bucket_upper_bounds():
+    stats = ToolStats()
+    assert stats.percentile(0.5) is None
+
+    stats.buckets[LATENCY_BUCKETS_MS.index(5)] = 90
+    stats.buckets[LATENCY_BUCKETS_MS.index(100)] = 9
+    stats.buckets[-1] = 1
+    stats.latency_max = 42.0
+
+    assert stats.percentile(0.5) == 5
+    assert stats.percentile(0.9) == 5
+    assert stats.percentile(0.99) == 100
+    assert stats.percentile(1.0) == 42000.0  # the unbounded bucket reports the maximum
+
+
+def test_calls_errors_latency_and_bytes():
+    for ok, delay in [(True, 0.003), (False, 0.2)]:
+        call = tool_metrics.start("read_file")
+        assert tool_metrics.snapshot()["tools"]["read_file"]["in_flight"] == 1
+        call.started -= delay
+        tool_metrics.finish(call, ok)
+    tool_metrics.record_bytes("read_file", 10, 200)
+    tool_metrics.record_bytes("read_file", 5, 50)
+    fast = tool_metrics.start("list_files")
+    tool_metrics.finish(fast, True)
+
+    snapshot = tool_metrics.snapshot()
+    stats = snapshot["tools"]["read_file"]
+    assert list(snapshot["tools"]) == ["read_file", "list_files"]  # most time spent first
+    assert (stats["calls"], stats["errors"], stats["in_flight"]) == (2, 1, 0)
+    assert (stats["bytes_in"], stats["bytes_out"]) == (15, 250)
+    assert stats["latency_ms"]["buckets"]["5"] == 1 and stats["latency_ms"]["buckets"]["250"] == 1
+    assert stats["latency_ms"]["max"] >= 200
+    assert stats["latency_ms"]["p50"] == 5 and stats["latency_ms"]["p99"] == 250
+
+
+def test_reset_drops_counters():
+    tool_metrics.finish(tool_metrics.start("exec"), True)
+    tool_metrics.reset()
+
+    assert tool_metrics.snapshot()["tools"] == {}
+
+
+def test_tool_invocations_are_recorded(client, auth_headers):
+    client.post(
+        "/mcp/tool-invoke", json={"tool": "read_file", "params": {"path": "missing.txt"}}, headers=auth_headers("u1")
+    )
+
+    stats = client.get("/mcp/metrics").json()["tools"]["read_file"]
+    assert (stats["calls"], stats["errors"]) == (1, 1)
+    assert stats["bytes_in"] > 0 and stats["bytes_out"] > 0
@@ -0,0 +1,139 @@
+"""Project analysis skips pruned paths and reruns only the detectors whose inputs changed."""
+import json
+
+import pytest
+
+from app.services import project_analyzer as project_analyzer_module
+from app.services.project_analyzer import CACHE_VERSION, ProjectScan, ProjectType, project_analyzer
+from app.utils.project_state import project_states
+
+
+@pytest.fixture
+def project(tmp_path):
+    root = tmp_path / "project"
+    (root / "config").mkdir(parents=True)
+    (root / "config" / "secrets.yml").write_text("token: x\n")
+    (root / "package.json").write_text(json.dumps({"name": "app", "dependencies": {}}))
+    return root
+
+
+def test_manifest_change_keeps_tree_findings(project):
+    first = project_analyzer.analyze_project(str(project))
+    assert "Potential secrets file: secrets" in first.vulnerabilities
+
+    # Rewriting a file in place changes no directory listing
+    (project / "package.json").write_text(json.dumps({"name": "app", "dependencies": {"left-pad": "1.0.0"}}))
+    second = project_analyzer.analyze_project(str(project))
+
+    assert "Potential secrets file: secrets" in second.vulnerabilities
+    assert "Potentially vulnerable package: left-pad" in second.vulnerabilities
+    assert second.config_files == first.config_files
+
+
+@pytest.fixture
+def vendored(tmp_path):
+    root = tmp_path / "vendored"
+    for path in ["main.py", "node_modules/lib/index.js", "build/gen.go", "conf/a.yml", "conf/b.yml", "conf/c.yml", "conf/d.yml"]:
+        (root / path).parent.mkdir(parents=True, exist_ok=True)
+        (root / path).write_text("x")
+    (root / ".gitignore").write_text("keys.pem\n")
+    (root / "keys.pem").write_text("secret")
+    return root
+
+
+def test_pruned_and_ignored_paths_are_not_analyzed(vendored):
+    metadata = project_analyzer.analyze_project(str(vendored))
+
+    assert metadata.languages == {"Python"}
+    assert "node_modules" not in metadata.folder_structure["children"]
+    assert metadata.vulnerabilities == []
+
+
+def test_analysis_settings_are_applied(vendored, monkeypatch):
+    from app.config import settings
+
+    project_analyzer.analyze_project(str(vendored))
+    # Changing the settings must not reuse the analysis made with the old ones
+    monkeypatch.setattr(settings, "analysis_prune_dirs_str", "node_modules")
+    monkeypatch.setattr(settings, "analysis_respect_gitignore", False)
+    monkeypatch.setattr(settings, "analysis_max_files_per_dir", 3)
+    metadata = project_analyzer.analyze_project(str(vendored))
+
+    assert metadata.languages == {"Python", "Go"}
+    assert "Potential secrets file: keys" in metadata.vulnerabilities
+    assert metadata.config_files == ["conf/a.yml", "conf/b.yml", "conf/c.yml"]
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    """Record which detectors and walks each analysis runs."""
+    record = {"detectors": [], "walks": []}
+    for name in ["_detect_languages", "_detect_project_type", "_find_secret_files", "_find_vulnerable_packages"]:
+        original = getattr(project_analyzer, name)
+
+        def detector(name=name, original=original):
+            record["detectors"].append(name)
+            return original()
+        monkeypatch.setattr(project_analyzer, name, detector)
+
+    original_walk = ProjectScan.walk.__func__
+
+    def walk(cls, *args, **kwargs):
+        record["walks"].append(kwargs.get("max_depth"))
+        return original_walk(cls, *args, **kwargs)
+    monkeypatch.setattr(ProjectScan, "walk", classmethod(walk))
+
+    def take():
+        taken = {key: list(value) for key, value in record.items()}
+        for value in record.values():
+            value.clear()
+        return taken
+    return take
+
+
+def test_unchanged_project_reuses_the_cached_analysis(project, calls):
+    first = project_analyzer.analyze_project(str(project))
+    calls()
+
+    second = project_analyzer.analyze_project(str(project))
+
+    assert calls() == {"detectors": [], "walks": []}
+    assert second == first
+
+
+def test_only_detectors_whose_inputs_changed_run_again(project, calls):
+    project_analyzer.analyze_project(str(project))
+    calls()
+
+    (project / "package.json").write_text(json.dumps({"name": "app", "dependencies": {"react": "18"}}))
+    metadata = project_analyzer.analyze_project(str(project))
+
+    # Only the manifests changed: the root is listed, the tree is not walked
+    assert calls() == {"detectors": ["_detect_project_type", "_find_vulnerable_packages"], "walks": [0]}
+    assert metadata.project_type == ProjectType.REACT
+
+    (project / "src").mkdir()
+    (project / "src" / "main.go").write_text("package main\n")
+    metadata = project_analyzer.analyze_project(str(project))
+
+    assert set(calls()["detectors"]) == {"_detect_project_type", "_detect_languages", "_find_secret_files"}
+    assert metadata.languages == {"Go"}
+
+
+def test_cache_survives_a_restart(project, calls):
+    first = project_analyzer.analyze_project(str(project))
+    project_states.discard(str(project.resolve()))
+    calls()
+
+    assert project_analyzer.analyze_project(str(project)) == first
+    assert calls()["walks"] == []
+
+
+def test_cache_of_another_version_is_ignored(project, calls, monkeypatch):
+    project_analyzer.analyze_project(str(project))
+    project_states.discard(str(project.resolve()))
+    monkeypatch.setattr(project_analyzer_module, "CACHE_VERSION", CACHE_VERSION + 1)
+    calls()
+
+    project_analyzer.analyze_project(str(project))
+    assert calls()["walks"] == [None]
@@ -0,0 +1,95 @@
+"""The project config file is shared by worker processes through atomic, versioned writes."""
+import json
+
+import pytest
+
+from app.project_manager import ProjectConfig, ProjectManager, project_manager
+
+
+@pytest.fixture
+def workers(tmp_path, monkeypatch):
+    """Two managers on one config file stand in for two worker processes."""
+    monkeypatch.setenv("HOME", str(tmp_path))
+    return ProjectManager(), ProjectManager()
+
+
+def _config(path, project_type="other"):
+    path.mkdir(exist_ok=True)
+    return ProjectConfig(project_root=str(path), project_type=project_type)
+
+
+def test_write_of_another_worker_is_seen_on_the_next_read(workers, tmp_path):
+    first, second = workers
+    assert second.get_project_config() is None
+
+    first.set_project_config(_config(tmp_path / "a"))
+
+    assert second.get_project_root() == str(tmp_path / "a")
+    assert second.version == first.version == 1
+
+
+def test_unchanged_file_is_not_reloaded(workers, tmp_path, monkeypatch):
+    first, second = workers
+    first.set_project_config(_config(tmp_path / "a"))
+    second.get_project_config()
+    loads = []
+    monkeypatch.setattr(second, "_load_config", lambda: loads.append(1))
+
+    for _ in range(3):
+        second.get_project_config()
+
+    assert loads == []
+
+
+def test_expected_version_is_compared_before_writing(workers, tmp_path):
+    first, second = workers
+    first.set_project_config(_config(tmp_path / "a"))
+    second.get_project_config()
+    version = second.version
+
+    first.set_project_config(_config(tmp_path / "b"))
+    with pytest.raises(ValueError, match="changed"):
+        second.set_project_config(_config(tmp_path / "c"), expected_version=version)
+    assert second.get_project_root() == str(tmp_path / "b")
+
+    second.set_project_config(_config(tmp_path / "c"), expected_version=second.version)
+    assert first.get_project_root() == str(tmp_path / "c")
+    assert first.version == 3
+
+
+def test_writes_build_on_the_latest_file(workers, tmp_path):
+    first, second = workers
+    first.set_project_config(_config(tmp_path / "a"))
+    second.set_project_config(_config(tmp_path / "u"), user_id="u1")  # second never read the file
+    first.set_project_config(_config(tmp_path / "v"), user_id="u2")
+
+    data = json.loads(second.config_file.read_text())
+    assert data["version"] == 3
+    assert data["config"]["project_root"] == str(tmp_path / "a")
+    assert set(data["users"]) == {"u1", "u2"}
+    assert not list(second.config_file.parent.glob("*.tmp"))
+
+
+def test_unversioned_file_is_still_read(tmp_path, monkeypatch):
+    monkeypatch.setenv("HOME", str(tmp_path))
+    (tmp_path / "a").mkdir()
+    (tmp_path / ".senscoder").mkdir()
+    (tmp_path / ".senscoder" / "project_config.json").write_text(
+        json.dumps({"project_root": str(tmp_path / "a"), "project_type": "python"})
+    )
+
+    manager = ProjectManager()
+
+    assert manager.get_project_config().project_type == "python"
+    assert manager.version == 0
+
+
+def test_setup_route_reports_conflicts(client, default_root):
+    version = client.get("/wizard/status").json()["version"]
+    body = {"project_root": str(default_root), "project_type": "other"}
+
+    response = client.post("/wizard/setup", json={**body, "expected_version": version})
+    assert response.status_code == 200
+    assert response.json()["version"] == version + 1 == project_manager.version
+
+    assert client.post("/wizard/setup", json={**body, "expected_version": version}).status_code == 409
@@ -0,0 +1,102 @@
+"""One ProjectScan walk records every listing the detectors read, and notices changes."""
+import os
+
+import pytest
+
+from app.services.project_analyzer import ProjectScan, project_analyzer
+
+
+@pytest.fixture
+def root(tmp_path):
+    root = tmp_path / "project"
+    for path in ["main.py", "test_main.py", "src/app.py", "src/lib/util.py", "node_modules/x/index.js",
+                 "dist/bundle.js", "docs/a.md", "docs/b.md", "docs/c.md"]:
+        (root / path).parent.mkdir(parents=True, exist_ok=True)
+        (root / path).write_text("x")
+    (root / ".gitignore").write_text("dist/\n")
+    os.symlink(root / "src", root / "link")
+    return root
+
+
+def test_walk_lists_every_directory_in_sorted_depth_first_order(root):
+    scan = ProjectScan.walk(root, respect_gitignore=False)
+
+    # A directory's files are recorded when it is listed, before its subdirectories are walked
+    assert scan.files == [
+        ".gitignore", "main.py", "test_main.py", "dist/bundle.js", "docs/a.md", "docs/b.md", "docs/c.md",
+        "node_modules/x/index.js", "src/app.py", "src/lib/util.py"
+    ]
+    assert scan.dirs[:3] == ["dist", "docs", "link"]
+    assert scan.entries["src"] == [("app.py", False), ("lib", True)]
+    # Symlinked directories are listed but not followed
+    assert "link" in scan.dirs and "link" not in scan.entries
+    assert scan.root_names == {".gitignore", "dist", "docs", "link", "main.py", "node_modules", "src", "test_main.py"}
+    assert scan.root_files("test_*.py") == ["test_main.py"]
+
+
+def test_prune_gitignore_file_cap_and_depth(root):
+    scan = ProjectScan.walk(root, prune={"node_modules"}, max_files_per_dir=2)
+
+    assert not any(path.startswith(("node_modules", "dist")) for path in scan.files + scan.dirs)
+    assert scan.entries["docs"] == [("a.md", False), ("b.md", False)]
+    assert scan.capped == {"", "docs"}
+    assert ".gitignore" in scan.ignore_mtimes
+
+    shallow = ProjectScan.walk(root, max_depth=0)
+    assert set(shallow.entries) == {""}
+    assert "src" in shallow.root_names
+
+
+def test_unreadable_directories_are_recorded(root):
+    if os.geteuid() == 0:
+        pytest.skip("root can list any directory")
+    (root / "docs").chmod(0)
+    try:
+        scan = ProjectScan.walk(root)
+    finally:
+        (root / "docs").chmod(0o755)
+
+    assert scan.unreadable == {"docs"}
+    assert scan.entries["docs"] == []
+
+
+def _bump(path):
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+
+def test_changed_reports_which_listings_moved(root):
+    scan = ProjectScan.walk(root)
+    assert scan.changed() == set()
+
+    (root / "main.py").write_text("edited in place")
+    assert scan.changed() == set()
+
+    (root / "src" / "lib" / "new.py").write_text("x")
+    _bump(root / "src" / "lib")
+    assert scan.changed() == {"tree"}
+
+    scan = ProjectScan.walk(root)
+    _bump(root / ".gitignore")
+    assert scan.changed() == {"root", "tree"}
+
+    scan = ProjectScan.walk(root)
+    (root / "new_root_file").write_text("x")
+    _bump(root)
+    assert scan.changed() == {"root", "tree"}
+
+
+def test_analysis_walks_the_tree_once(root, monkeypatch):
+    walks = []
+    original = ProjectScan.walk.__func__
+
+    def walk(cls, *args, **kwargs):
+        walks.append(kwargs.get("max_depth"))
+        return original(cls, *args, **kwargs)
+
+    monkeypatch.setattr(ProjectScan, "walk", classmethod(walk))
+    metadata = project_analyzer.analyze_project(str(root))
+
+    assert walks == [None]
+    # node_modules and dist are pruned
+    assert metadata.languages == {"Python"}
@@ -0,0 +1,97 @@
+"""Per-project state is evicted least recently used first, by count and by size."""
+import asyncio
+
+from app.utils.project_state import ProjectStateCache
+
+
+class Component:
+    def __init__(self, nbytes=0):
+        self.nbytes = nbytes
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class AsyncComponent:
+    def __init__(self):
+        self.closed = False
+
+    async def close(self):
+        self.closed = True
+
+
+def test_get_creates_once_and_peek_does_not_create():
+    cache = ProjectStateCache(max_projects=2, max_bytes=1000)
+    created = cache.get("/a", "index", Component)
+
+    assert cache.get("/a", "index", Component) is created
+    assert cache.get("/a", "other") is None
+    assert cache.peek("/b", "index") is None
+    assert len(cache) == 1
+
+
+def test_least_recently_used_project_is_evicted_and_closed():
+    cache = ProjectStateCache(max_projects=2, max_bytes=1000)
+    a, b = cache.get("/a", "index", Component), cache.get("/b", "index", Component)
+    cache.get("/a", "index")  # /a is now the most recently used
+    cache.peek("/b", "index")  # peeking does not count as a use
+
+    c = cache.get("/c", "index", Component)
+
+    assert [project["root"] for project in cache.stats()["projects"]] == ["/a", "/c"]
+    assert b.closed and not a.closed and not c.closed
+
+
+def test_size_bound_and_trim():
+    cache = ProjectStateCache(max_projects=10, max_bytes=100)
+    a = Component(60)
+    cache.set("/a", "index", a)
+    b = Component(30)
+    cache.set("/b", "index", b)
+    assert cache.nbytes == 90
+
+    # Components grow in place; trim re-checks the bound
+    b.nbytes = 50
+    cache.trim(keep="/b")
+    assert a.closed
+    assert cache.nbytes == 50
+
+
+def test_project_in_use_is_never_evicted():
+    cache = ProjectStateCache(max_projects=1, max_bytes=10)
+    huge = cache.get("/a", "index", lambda: Component(100))
+
+    assert cache.peek("/a", "index") is huge and not huge.closed
+    cache.get("/b", "index", Component)
+    assert huge.closed
+    assert len(cache) == 1
+
+
+def test_discard_clear_and_items():
+    cache = ProjectStateCache(max_projects=10, max_bytes=1000)
+    a, b = cache.get("/a", "index", Component), cache.get("/b", "index", Component)
+    cache.set("/b", "status", Component())
+
+    assert cache.items("index") == [("/a", a), ("/b", b)]
+    cache.discard("/a")
+    assert a.closed and cache.items("index") == [("/b", b)]
+    cache.clear()
+    assert b.closed and len(cache) == 0
+
+
+def test_async_close_runs_on_the_last_loop():
+    cache = ProjectStateCache(max_projects=1, max_bytes=1000)
+
+    async def scenario():
+        component = cache.get("/a", "git", AsyncComponent)
+        cache.get("/b", "git", AsyncComponent)
+        await asyncio.sleep(0)
+        return component
+
+    assert asyncio.run(scenario()).closed
+
+    # Without a running loop the coroutine is discarded instead of leaking
+    stale = cache.get("/c", "git", AsyncComponent)
+    cache.clear()
+    assert not stale.closed
@@ -0,0 +1,86 @@
+"""Ranged reads page through files by bytes or lines without splitting characters."""
+import asyncio
+import mmap
+
+import pytest
+
+from app.services.fs_service import fs_service
+from app.utils.line_index import LineIndex
+
+TEXT = "".join(f"{i}: héllo wörld € 😀\n" for i in range(1, 201))
+
+
+@pytest.fixture
+def text_file(configured):
+    path = configured / "ranged.txt"
+    path.write_text(TEXT, encoding="utf-8")
+    yield path
+    path.unlink()
+
+
+def _read(**kwargs):
+    return asyncio.run(fs_service.read_file("ranged.txt", **kwargs))
+
+
+@pytest.mark.parametrize("content", [b"", b"a", b"a\n", b"a\nb", b"\n\n\n", b"one\ntwo\nthree\n" * 40])
+def test_line_index_matches_a_naive_split(tmp_path, content):
+    path = tmp_path / "f"
+    path.write_bytes(content)
+    if not content:
+        return
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        index = LineIndex.build(mm, block_size=5)
+        starts = [0] + [i + 1 for i, byte in enumerate(content) if byte == ord("\n") and i + 1 < len(content)]
+
+        assert index.line_count == len(content.splitlines())
+        assert [index.line_offset(mm, line) for line in range(1, len(starts) + 1)] == starts
+        assert index.line_offset(mm, index.line_count + 1) == len(content)
+        assert index.line_offset(mm, index.line_count + 2) is None
+        assert index.line_range(mm, index.line_count + 5, index.line_count + 6) == (len(content), len(content))
+
+
+def test_byte_ranges_never_split_characters(text_file):
+    data = TEXT.encode("utf-8")
+    for offset in range(0, 40):
+        for length in (1, 2, 3, 7, 50):
+            result = _read(offset=offset, length=length)
+            assert "�" not in result["content"]
+            assert result["content"].encode("utf-8") == data[result["offset"]:result["offset"] + result["length"]]
+
+
+def test_paging_by_bytes_returns_the_whole_file(text_file):
+    parts, offset = [], 0
+    while offset is not None:
+        result = _read(offset=offset, length=37)
+        parts.append(result["content"])
+        offset = result["next_offset"]
+
+    assert "".join(parts) == TEXT
+
+
+def test_line_ranges(text_file):
+    result = _read(start_line=2, end_line=3)
+
+    assert result["content"] == "2: héllo wörld € 😀\n3: héllo wörld € 😀\n"
+    assert (result["start_line"], result["end_line"], result["next_line"]) == (2, 3, 4)
+    assert result["total_lines"] == 200
+    assert _read(start_line=200)["next_line"] is None
+    assert _read(start_line=500)["content"] == ""
+
+
+def test_line_ranges_stop_at_the_last_whole_line_that_fits(text_file, monkeypatch):
+    monkeypatch.setattr(fs_service, "MAX_FILE_SIZE_MB", 100 / (1024 * 1024))
+
+    result = _read(start_line=1)
+
+    assert result["content"].endswith("\n")
+    assert result["end_line"] == 3
+    assert result["next_line"] == 4
+
+
+@pytest.mark.parametrize("kwargs", [
+    {"offset": 0, "start_line": 1}, {"offset": -1}, {"length": 0}, {"start_line": 0}, {"start_line": 3, "end_line": 2}
+])
+def test_invalid_ranges(text_file, kwargs):
+    with pytest.raises(ValueError):
+        _read(**kwargs)
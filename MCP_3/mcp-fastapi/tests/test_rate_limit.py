@@ -0,0 +1,113 @@
+"""Token buckets are shared through SQLite, and only API routes pay for a check."""
+import pytest
+
+from app.utils import rate_limit
+from app.utils.rate_limit import TokenBucketLimiter, parse_rate, rate_limiter
+
+
+@pytest.fixture
+def acquired(monkeypatch):
+    keys = []
+
+    def acquire(key, cost, capacity, period):
+        keys.append(key)
+        return True, 0.0
+
+    monkeypatch.setattr(rate_limiter, "acquire", acquire)
+    return keys
+
+
+@pytest.mark.parametrize("path", ["/mcp/health", "/mcp/metrics", "/", "/docs", "/openapi.json"])
+def test_probes_and_pages_skip_the_limiter(client, acquired, path):
+    assert client.get(path).status_code == 200
+    assert acquired == []
+
+
+@pytest.mark.parametrize("path", ["/mcp/resources", "/wizard/status"])
+def test_api_routes_are_limited(client, acquired, path):
+    assert client.get(path).status_code == 200
+    assert acquired == ["ip:testclient"]
+
+
+@pytest.mark.parametrize("rate, parsed", [
+    ("10/minute", (10, 60)),
+    ("100 per hour", (100, 3600)),
+    ("5/10 seconds", (5, 10)),
+    ("2.5/Second", (2.5, 1)),
+    (" 1 / day ", (1, 86400)),
+])
+def test_parse_rate(rate, parsed):
+    assert parse_rate(rate) == parsed
+
+
+@pytest.mark.parametrize("rate", ["", "10", "ten/minute", "10/fortnight", "10/minute extra", "-1/minute"])
+def test_parse_rate_rejects_malformed_rates(rate):
+    with pytest.raises(ValueError):
+        parse_rate(rate)
+
+
+class FakeTime:
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeTime()
+    monkeypatch.setattr(rate_limit, "time", clock)
+    return clock
+
+
+@pytest.fixture
+def limiters(tmp_path):
+    # Two limiters on one database stand in for two worker processes
+    first, second = TokenBucketLimiter(tmp_path / "limits.db"), TokenBucketLimiter(tmp_path / "limits.db")
+    yield first, second
+    first.close()
+    second.close()
+
+
+def test_bucket_refills_over_its_period(clock, limiters):
+    limiter, _ = limiters
+    assert [limiter.acquire("k", 1, 3, 60)[0] for _ in range(4)] == [True, True, True, False]
+    assert limiter.acquire("k", 1, 3, 60) == (False, 20.0)
+
+    clock.now += 20
+    assert limiter.acquire("k", 1, 3, 60) == (True, 0.0)
+    assert limiter.acquire("other", 1, 3, 60)[0] is True
+
+
+def test_workers_share_buckets(clock, limiters):
+    first, second = limiters
+    assert first.acquire("k", 2, 3, 60)[0] is True
+    assert second.acquire("k", 2, 3, 60) == (False, 20.0)
+    assert second.acquire("k", 1, 3, 60)[0] is True
+
+
+def test_cost_is_capped_at_the_capacity(clock, limiters):
+    limiter, _ = limiters
+    assert limiter.acquire("k", 10, 3, 60) == (True, 0.0)
+    assert limiter.acquire("k", 0, 3, 60) == (True, 0.0)
+    assert limiter.acquire("k", 1, 3, 60)[0] is False
+
+
+def test_idle_buckets_are_cleaned_up(clock, limiters, monkeypatch):
+    limiter, _ = limiters
+    monkeypatch.setattr(limiter, "CLEANUP_EVERY", 2)
+    limiter.acquire("idle", 1, 3, 60)
+    clock.now += 60
+    limiter.acquire("busy", 1, 3, 60)
+
+    keys = [row[0] for row in limiter._connect().execute("SELECT key FROM buckets")]
+    assert keys == ["busy"]
+
+
+def test_unusable_database_fails_open(tmp_path):
+    (tmp_path / "file").write_text("x")
+    limiter = TokenBucketLimiter(tmp_path / "file" / "limits.db")
+
+    assert limiter.acquire("k", 1, 1, 60) == (True, 0.0)
+    assert limiter.acquire("k", 1, 1, 60) == (True, 0.0)
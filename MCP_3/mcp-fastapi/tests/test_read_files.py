@@ -0,0 +1,81 @@
+"""read_files reports per-file results and shares the validated content cache."""
+import asyncio
+import builtins
+import os
+
+import pytest
+
+from app.services.fs_service import fs_service
+
+
+@pytest.fixture
+def files(configured):
+    paths = {
+        "a.txt": "alpha\n",
+        "b.txt": "beta\n",
+        "blob.bin": None,
+    }
+    for name, content in paths.items():
+        if content is None:
+            (configured / name).write_bytes(b"\0\1\2" * 100)
+        else:
+            (configured / name).write_text(content)
+    yield configured
+    for name in paths:
+        (configured / name).unlink()
+
+
+def _read_files(paths):
+    return asyncio.run(fs_service.read_files(paths))
+
+
+def test_results_and_errors_per_file(files):
+    result = _read_files(["a.txt", "missing.txt", "blob.bin", "../outside.txt", "b.txt", "a.txt"])
+
+    assert result["count"] == 5
+    assert result["errors"] == 3
+    by_path = {entry["path"]: entry for entry in result["files"]}
+    assert by_path["a.txt"]["content"] == "alpha\n"
+    assert by_path["b.txt"]["size"] == 5
+    assert all("error" in by_path[path] for path in ("missing.txt", "blob.bin", "../outside.txt"))
+
+
+def test_too_many_paths(files, monkeypatch):
+    monkeypatch.setattr(fs_service, "MAX_READ_FILES", 2)
+    with pytest.raises(ValueError):
+        _read_files(["a.txt", "b.txt", "c.txt"])
+
+
+def test_batch_size_limit(files, monkeypatch):
+    monkeypatch.setattr(fs_service, "MAX_READ_FILES_CHARS", 3)
+
+    result = _read_files(["a.txt", "b.txt"])
+
+    assert result["files"][0]["content"] == "alpha\n"
+    assert "Batch size limit" in result["files"][1]["error"]
+
+
+def test_unchanged_files_come_from_the_cache(files, monkeypatch):
+    _read_files(["a.txt"])
+    opened = []
+    original_open = builtins.open
+
+    def tracking_open(file, *args, **kwargs):
+        opened.append(str(file))
+        return original_open(file, *args, **kwargs)
+
+    monkeypatch.setattr(builtins, "open", tracking_open)
+    assert _read_files(["a.txt"])["files"][0]["content"] == "alpha\n"
+    assert str(files / "a.txt") not in opened
+
+    (files / "a.txt").write_text("changed\n")
+    stat = os.stat(files / "a.txt")
+    os.utime(files / "a.txt", ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    assert _read_files(["a.txt"])["files"][0]["content"] == "changed\n"
+    assert str(files / "a.txt") in opened
+
+
+def test_read_file_and_read_files_share_the_cache(files):
+    asyncio.run(fs_service.read_file("b.txt"))
+
+    assert fs_service._contents.get(str(files / "b.txt"))[2] == "beta\n"
@@ -0,0 +1,98 @@
+"""Search scans gitignore-aware, filtered files and reports matches in walk order."""
+import asyncio
+import shutil
+
+import pytest
+
+from app.services.search_service import search_service
+
+
+@pytest.fixture
+def tree(configured, monkeypatch):
+    # A leftover index of the default project is rescanned before it is used
+    monkeypatch.setattr(search_service, "UNWATCHED_RESCAN_INTERVAL", 0)
+    root = configured / "find"
+    files = {
+        "a.py": "import os\nneedle = 1\nprint(needle)\n",
+        "b.txt": "one\ntwo\nNeedle three\nfour\nfive\n",
+        "sub/c.py": "def needle():\n    pass\n",
+        "build/out.py": "needle\n",
+        "tests/test_x.py": "needle\n",
+    }
+    for path, content in files.items():
+        (root / path).parent.mkdir(parents=True, exist_ok=True)
+        (root / path).write_text(content)
+    (root / "blob.bin").write_bytes(b"needle\0" * 10)
+    (root / ".gitignore").write_text("build/\n")
+    yield "find"
+    shutil.rmtree(root)
+
+
+def _search(query, path="find", **options):
+    return asyncio.run(search_service.search(query, path, **options))
+
+
+def _hits(result):
+    return [(match["path"], match["line"]) for match in result["matches"]]
+
+
+def test_literal_search_in_walk_order(tree):
+    result = _search("needle")
+
+    assert _hits(result) == [
+        ("find/a.py", 2), ("find/a.py", 3), ("find/sub/c.py", 1), ("find/tests/test_x.py", 1)
+    ]
+    assert result["matches"][0]["column"] == 1
+    assert result["count"] == 4
+    assert result["files_matched"] == 3
+    assert result["files_skipped"] == 1  # blob.bin
+    assert result["truncated"] is False
+
+
+def test_case_and_regex(tree):
+    assert ("find/b.txt", 3) in _hits(_search("needle", case_sensitive=False))
+    assert _hits(_search(r"^def \w+\(", regex=True)) == [("find/sub/c.py", 1)]
+    assert _search("a.py", regex=False)["matches"] == []  # the dot is literal
+    with pytest.raises(ValueError):
+        _search("(", regex=True)
+
+
+def test_include_exclude_and_gitignore(tree):
+    assert _hits(_search("needle", include=["*.py"], exclude=["tests"])) == [
+        ("find/a.py", 2), ("find/a.py", 3), ("find/sub/c.py", 1)
+    ]
+    assert _hits(_search("needle", include=["sub/*.py"])) == [("find/sub/c.py", 1)]
+    assert ("find/build/out.py", 1) in _hits(_search("needle", respect_gitignore=False))
+
+
+def test_context_lines(tree):
+    [match] = _search("three", context_lines=2)["matches"]
+
+    assert match["before"] == ["one", "two"]
+    assert match["after"] == ["four", "five"]
+
+
+def test_result_limit_truncates(tree):
+    result = _search("needle", max_results=2)
+
+    assert _hits(result) == [("find/a.py", 2), ("find/a.py", 3)]
+    assert result["truncated"] is True
+
+
+def test_stream_stops_when_the_consumer_leaves(tree):
+    async def first():
+        stream = search_service.stream_search("needle", "find")
+        event = await stream.__anext__()
+        await stream.aclose()
+        return event
+
+    assert asyncio.run(first())["path"] == "find/a.py"
+
+
+def test_invalid_arguments(tree):
+    with pytest.raises(ValueError):
+        _search("")
+    with pytest.raises(FileNotFoundError):
+        _search("needle", "find/missing")
+    with pytest.raises(ValueError):
+        _search("needle", "../outside")
@@ -0,0 +1,58 @@
+"""Searches must see changes the trigram index has not been told about."""
+import asyncio
+
+import pytest
+
+from app.services.search_service import search_service
+
+
+@pytest.fixture
+def indexed_project(configured, monkeypatch):
+    # The project is not watched: rescan it before every search
+    monkeypatch.setattr(search_service, "UNWATCHED_RESCAN_INTERVAL", 0)
+    src = configured / "src"
+    src.mkdir(exist_ok=True)
+    (src / "old.py").write_text("print(1)\n")
+    # The first search schedules the index build; wait for it
+    asyncio.run(search_service.search("print", "."))
+    search_service._index_jobs[str(configured)].result()
+    yield configured
+    for path in src.iterdir():
+        path.unlink()
+    src.rmdir()
+
+
+def test_file_created_outside_the_server_is_found_at_once(indexed_project):
+    (indexed_project / "src" / "new.py").write_text("print(2)\n")
+
+    result = asyncio.run(search_service.search("print(2)", "."))
+
+    assert result["indexed"] is True
+    assert [match["path"] for match in result["matches"]] == ["src/new.py"]
+
+
+def test_edited_file_is_searched_by_its_new_content(indexed_project):
+    (indexed_project / "src" / "old.py").write_text("print(3)\n")
+
+    assert asyncio.run(search_service.search("print(1)", "."))["matches"] == []
+    assert [m["path"] for m in asyncio.run(search_service.search("print(3)", "."))["matches"]] == ["src/old.py"]
+
+
+def test_unwatched_project_is_rescanned_at_most_every_interval(indexed_project, monkeypatch):
+    monkeypatch.setattr(search_service, "UNWATCHED_RESCAN_INTERVAL", 60)
+    rescans = []
+    original = search_service._rescan
+
+    def rescan(project_root, state):
+        rescans.append(project_root)
+        return original(project_root, state)
+
+    monkeypatch.setattr(search_service, "_rescan", rescan)
+    # The fixture just built the index
+    asyncio.run(search_service.search("print(1)", "."))
+    asyncio.run(search_service.search("print(1)", "."))
+    assert rescans == []
+
+    search_service._index_state(indexed_project).refreshed_at -= 61
+    asyncio.run(search_service.search("print(1)", "."))
+    assert rescans == [indexed_project]
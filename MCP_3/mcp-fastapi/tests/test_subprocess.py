@@ -0,0 +1,86 @@
+"""Subprocesses run on the event loop without blocking it, capped and killable."""
+import asyncio
+import sys
+import time
+
+import pytest
+
+from app.config import settings
+from app.services.exec_service import exec_service
+from app.utils.subprocess_utils import SubprocessManager
+
+
+def _python(code):
+    return sys.executable, ["-c", code]
+
+
+def test_run_does_not_block_the_event_loop():
+    async def scenario():
+        manager = SubprocessManager(max_concurrency=4, max_output_bytes=1024)
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        task = asyncio.create_task(ticker())
+        result = await manager.run(*_python("import time; time.sleep(0.3); print('done')"))
+        task.cancel()
+        return result, ticks
+
+    result, ticks = asyncio.run(scenario())
+    assert result.stdout == "done\n"
+    assert result.exit_code == 0
+    assert ticks >= 10
+
+
+def test_concurrency_limit_queues_commands():
+    async def scenario():
+        manager = SubprocessManager(max_concurrency=1, max_output_bytes=1024)
+        started = time.monotonic()
+        await asyncio.gather(*(manager.run(*_python("import time; time.sleep(0.2)")) for _ in range(2)))
+        return time.monotonic() - started
+
+    assert asyncio.run(scenario()) >= 0.4
+
+
+def test_output_beyond_the_cap_is_drained_and_flagged():
+    manager = SubprocessManager(max_concurrency=1, max_output_bytes=1000)
+
+    result = asyncio.run(manager.run(*_python("import sys; sys.stdout.write('x' * 1000000)")))
+
+    assert result.exit_code == 0
+    assert result.stdout == "x" * 1000
+    assert result.truncated is True
+
+
+def test_timeout_kills_the_command():
+    manager = SubprocessManager(max_concurrency=1, max_output_bytes=1024)
+    started = time.monotonic()
+
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(manager.run(*_python("import time; time.sleep(30)"), timeout=0.2))
+    assert time.monotonic() - started < 5
+
+
+def test_stream_yields_lines_then_the_exit_code():
+    async def scenario():
+        manager = SubprocessManager(max_concurrency=1, max_output_bytes=1024)
+        code = "import sys\nprint('one', flush=True)\nprint('two', file=sys.stderr, flush=True)\nsys.exit(3)"
+        return [item async for item in manager.stream(*_python(code))]
+
+    items = asyncio.run(scenario())
+    assert sorted(items[:-1]) == [("stderr", "two\n"), ("stdout", "one\n")]
+    assert items[-1] == ("exit", 3)
+
+
+def test_exec_service_requires_exec_to_be_allowed(configured, monkeypatch):
+    monkeypatch.setattr(settings, "senscoder_allow_exec", False)
+    with pytest.raises(ValueError):
+        asyncio.run(exec_service.execute_command(*_python("print(1)")))
+
+    monkeypatch.setattr(settings, "senscoder_allow_exec", True)
+    result = asyncio.run(exec_service.execute_command(*_python("import os; print(os.getcwd())")))
+    assert result.stdout.strip() == str(configured)
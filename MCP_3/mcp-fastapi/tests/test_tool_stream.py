@@ -0,0 +1,62 @@
+"""/mcp/tool-invoke/stream delivers results as events while the tool runs."""
+import json
+
+import pytest
+
+from app.services.fs_service import fs_service
+
+
+@pytest.fixture
+def text_file(configured):
+    path = configured / "stream.txt"
+    # Multi-byte characters straddle the chunk boundaries
+    path.write_text("héllo wörld " * 50, encoding="utf-8")
+    yield path
+    path.unlink()
+
+
+def _events(response):
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+def test_read_file_streams_chunks(client, text_file, monkeypatch):
+    monkeypatch.setattr(fs_service, "STREAM_CHUNK_SIZE", 7)
+
+    response = client.post("/mcp/tool-invoke/stream", json={"tool": "read_file", "params": {"path": "stream.txt"}})
+
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    events = _events(response)
+    assert events[0]["event"] == "start"
+    assert events[-1] == {"event": "end", "tool": "read_file", "ok": True}
+    data = [event["data"] for event in events if event["event"] == "data"]
+    chunks = [item for item in data if "content" in item]
+    assert len(chunks) > 10
+    assert "".join(chunk["content"] for chunk in chunks) == text_file.read_text(encoding="utf-8")
+    assert data[-1]["size"] == text_file.stat().st_size
+
+
+def test_other_tools_send_one_data_event(client):
+    response = client.post("/mcp/tool-invoke/stream", json={"tool": "echo", "params": {"message": "hi"}})
+
+    assert [event["event"] for event in _events(response)] == ["start", "data", "end"]
+
+
+def test_errors_end_the_stream(client):
+    response = client.post("/mcp/tool-invoke/stream", json={"tool": "no_such_tool", "params": {}})
+
+    events = _events(response)
+    assert [event["event"] for event in events] == ["start", "error"]
+    assert "Unknown tool" in events[-1]["error"]
+
+
+def test_server_sent_events(client):
+    response = client.post(
+        "/mcp/tool-invoke/stream",
+        json={"tool": "echo", "params": {"message": "hi"}},
+        headers={"Accept": "text/event-stream"}
+    )
+
+    assert response.headers["content-type"].startswith("text/event-stream")
+    blocks = [block for block in response.text.split("\n\n") if block]
+    assert [block.splitlines()[0] for block in blocks] == ["event: start", "event: data", "event: end"]
+    assert json.loads(blocks[1].splitlines()[1][len("data: "):])["event"] == "data"
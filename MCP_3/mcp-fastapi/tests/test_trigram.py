@@ -0,0 +1,101 @@
+"""Trigram query plans are conservative: the index never rules out a matching file."""
+import re
+import sys
+
+import pytest
+
+from app.utils.trigram import TrigramIndex, file_trigrams, literal_plan, regex_plan
+
+
+@pytest.mark.parametrize("pattern, plan", [
+    ("hello", b"hello"),
+    ("ab", None),
+    ("^import os$", b"import os"),
+    ("foo.*bar", ("and", [b"foo", b"bar"])),
+    ("foo|barbaz", ("or", [b"foo", b"barbaz"])),
+    ("foo|x", None),
+    ("(?:abc)?def", b"def"),
+    ("(abc)+def", ("and", [b"abc", b"def"])),
+    (r"\w+needle\d", b"needle"),
+    ("[ab]cdef", b"cdef"),
+    ("(", None),
+])
+def test_regex_plan(pattern, plan):
+    assert regex_plan(pattern) == plan
+
+
+def test_case_insensitive_plans_drop_letters_with_non_ascii_folds():
+    # "k" also matches KELVIN SIGN, which the ASCII-folded index cannot see
+    assert regex_plan("(?i)Kelvin") == b"elvin"
+    assert regex_plan("kelvin", case_sensitive=False) == b"elvin"
+    assert regex_plan("(?i:mask)ing") == b"ing"
+
+
+def test_literal_plan():
+    assert literal_plan("needle") == b"needle"
+    assert literal_plan("ab") is None
+    assert literal_plan("a.b*c") == b"a.b*c"
+    assert literal_plan("a.b*c", case_sensitive=False) == b"a.b*c"
+
+
+def test_file_trigrams_match_a_naive_scan():
+    for data in [b"", b"ab", b"abc", b"abcd", b"Hello, World!\n" * 3, bytes(range(256))]:
+        lowered = data.lower()
+        naive = {int.from_bytes(lowered[i:i + 3], sys.byteorder) for i in range(len(lowered) - 2)}
+        assert file_trigrams(data) == naive
+
+
+CORPUS = {
+    "a.py": "import os\ndef needle():\n    return 1\n",
+    "b.py": "class Haystack:\n    pass\n",
+    "c.txt": "The NEEDLE and the thread\n",
+    "d.txt": "temperature in Kelvin\n",
+    "e.md": "foo then bar\n",
+}
+
+
+def _index(files=CORPUS):
+    index = TrigramIndex("/root")
+    for i, (path, content) in enumerate(files.items()):
+        index.update(path, i, len(content), file_trigrams(content.encode("utf-8")))
+    return index
+
+
+@pytest.mark.parametrize("pattern, flags", [
+    ("needle", 0), ("needle", re.IGNORECASE), ("kelvin", re.IGNORECASE), ("foo.*bar", 0),
+    ("needle|Haystack", 0), (r"def \w+\(", 0), ("(?:import|class) [A-Z]", 0), ("thread$", re.MULTILINE),
+])
+def test_candidates_include_every_matching_file(pattern, flags):
+    plan = regex_plan(pattern, case_sensitive=not flags & re.IGNORECASE)
+    candidates = _index().candidates(plan)
+    matching = [path for path, content in CORPUS.items() if re.search(pattern, content, flags)]
+
+    assert matching
+    assert candidates is None or set(matching) <= set(candidates)
+
+
+def test_updates_and_removals():
+    index = _index()
+    assert index.candidates(b"needle") == ["a.py", "c.txt"]  # the index folds ASCII case
+
+    index.update("a.py", 99, 1, file_trigrams(b"nothing here"))
+    index.update("f.py", 100, 1, file_trigrams(b"needle"))
+    index.update("blob.bin", 101, 1, None)
+    assert index.candidates(b"needle") == ["c.txt", "f.py"]
+    assert index.is_current("a.py", 99, 1) and not index.is_current("a.py", 0, 1)
+    assert index.dead == 1
+
+    assert index.retain({"f.py"}) == 6
+    assert len(index) == 1
+    assert index.candidates(None) is None
+
+
+def test_save_and_load(tmp_path):
+    index = _index()
+    index.save(tmp_path / "index.pickle")
+
+    loaded = TrigramIndex.load(tmp_path / "index.pickle", "/root")
+    assert loaded.candidates(b"Haystack") == ["b.py"]
+    assert loaded.posting_entries == index.posting_entries
+    assert TrigramIndex.load(tmp_path / "index.pickle", "/other") is None
+    assert TrigramIndex.load(tmp_path / "missing.pickle", "/root") is None
@@ -0,0 +1,117 @@
+"""Per-user project roots must only be reachable by their own user."""
+import json
+
+import pytest
+
+from app.project_manager import ProjectConfig, project_manager
+
+
+@pytest.fixture
+def alice_root(tmp_path, client):
+    root = tmp_path / "alice"
+    root.mkdir()
+    (root / "secret.txt").write_text("alice's secret")
+    project_manager.set_project_config(ProjectConfig(project_root=str(root), project_type="other"), user_id="alice")
+    yield root
+    project_manager.remove_user_project("alice")
+
+
+def _read_secret(client, headers=None):
+    return client.post(
+        "/mcp/tool-invoke/stream",
+        json={"tool": "read_file", "params": {"path": "secret.txt"}, "user_id": "alice"},
+        headers=headers or {}
+    )
+
+
+def test_anonymous_stream_cannot_pick_user_project(client, alice_root):
+    response = _read_secret(client)
+    assert response.status_code == 200
+    assert "alice's secret" not in response.text
+    events = [json.loads(line) for line in response.text.splitlines()]
+    assert events[-1]["event"] == "error"
+
+
+def test_other_user_cannot_pick_user_project(client, alice_root, auth_headers):
+    assert "alice's secret" not in _read_secret(client, auth_headers("bob")).text
+    response = client.post(
+        "/mcp/tool-invoke",
+        json={"tool": "read_file", "params": {"path": "secret.txt"}, "user_id": "alice"},
+        headers=auth_headers("bob")
+    )
+    assert response.status_code == 200
+    assert response.json()["ok"] is False
+
+
+def test_owner_reaches_own_project(client, alice_root, auth_headers):
+    assert "alice's secret" in _read_secret(client, auth_headers("alice")).text
+
+
+def test_setup_of_user_project_requires_that_user(client, alice_root, auth_headers, default_root):
+    body = {"project_root": str(default_root), "project_type": "other", "user_id": "alice"}
+    assert client.post("/wizard/setup", json=body).status_code == 401
+    assert client.post("/wizard/setup", json=body, headers=auth_headers("bob")).status_code == 403
+    assert project_manager.get_project_root("alice") == str(alice_root.resolve())
+
+    assert client.post("/wizard/setup", json=body, headers=auth_headers("alice")).status_code == 200
+    assert project_manager.get_project_root("alice") == str(default_root.resolve())
+
+
+def test_delete_of_user_project_requires_that_user(client, alice_root, auth_headers):
+    assert client.delete("/wizard/users/alice").status_code == 401
+    assert client.delete("/wizard/users/alice", headers=auth_headers("bob")).status_code == 403
+    assert "alice" in project_manager.user_projects()
+    assert client.delete("/wizard/users/alice", headers=auth_headers("alice")).status_code == 200
+    assert "alice" not in project_manager.user_projects()
+    project_manager.set_project_config(ProjectConfig(project_root=str(alice_root), project_type="other"), user_id="alice")
+
+
+def test_status_of_user_project_requires_that_user(client, alice_root, auth_headers):
+    assert client.get("/wizard/status", params={"user_id": "alice"}).status_code == 401
+    response = client.get("/wizard/status", params={"user_id": "alice"}, headers=auth_headers("alice"))
+    assert response.json()["project_root"] == str(alice_root.resolve())
+
+
+def test_unavailable_user_root_is_kept_and_not_replaced_by_default(tmp_path, alice_root):
+    bob_root = tmp_path / "bob"
+    bob_root.mkdir()
+    project_manager.set_project_config(ProjectConfig(project_root=str(bob_root), project_type="other"), user_id="bob")
+    away = tmp_path / "bob-away"
+    try:
+        bob_root.rename(away)
+        # Another worker starts while Bob's root is missing, and Alice saves
+        project_manager._load_config()
+        project_manager.set_project_config(ProjectConfig(project_root=str(alice_root), project_type="node"), user_id="alice")
+
+        stored = json.loads(project_manager.config_file.read_text())["users"]
+        assert stored["bob"]["project_root"] == str(bob_root.resolve())
+        assert project_manager.has_user_project("bob")
+        with pytest.raises(ValueError):
+            project_manager.get_project_root("bob")
+
+        away.rename(bob_root)
+        assert project_manager.get_project_root("bob") == str(bob_root.resolve())
+    finally:
+        if away.exists():
+            away.rename(bob_root)
+        project_manager.remove_user_project("bob")
+
+
+def test_unavailable_user_root_is_an_error_for_tools_and_status(tmp_path, client, auth_headers):
+    bob_root = tmp_path / "bob"
+    bob_root.mkdir()
+    (bob_root / "secret.txt").write_text("bob's secret")
+    project_manager.set_project_config(ProjectConfig(project_root=str(bob_root), project_type="other"), user_id="bob")
+    bob_root.rename(tmp_path / "bob-away")
+    try:
+        response = client.post(
+            "/mcp/tool-invoke",
+            json={"tool": "list_files", "params": {"path": "."}, "user_id": "bob"},
+            headers=auth_headers("bob")
+        )
+        assert response.json()["ok"] is False
+        response = client.get("/wizard/status", params={"user_id": "bob"}, headers=auth_headers("bob"))
+        assert response.status_code == 409
+        assert client.delete("/wizard/users/bob", headers=auth_headers("bob")).status_code == 200
+    finally:
+        project_manager.remove_user_project("bob")
@@ -0,0 +1,105 @@
+"""Recursive listings honour globs and .gitignore files and page by cursor."""
+import asyncio
+import shutil
+
+import pytest
+
+from app.services.fs_service import fs_service
+from app.utils.ignore import IgnoreFile, IgnoreStack, compile_glob
+
+
+@pytest.mark.parametrize("pattern, path, matches", [
+    ("*.py", "a.py", True),
+    ("*.py", "src/deep/a.py", True),
+    ("*.py", "a.pyc", False),
+    ("src/*.py", "src/a.py", True),
+    ("src/*.py", "src/deep/a.py", False),
+    ("/src/*.py", "src/a.py", True),
+    ("src/**/*.py", "src/a.py", True),
+    ("src/**/*.py", "src/x/y/a.py", True),
+    ("**/test_*", "a/b/test_x.py", True),
+    ("file?.txt", "file1.txt", True),
+    ("file?.txt", "file10.txt", False),
+    ("[!a]*.md", "b.md", True),
+    ("[!a]*.md", "a.md", False),
+    ("build/", "x/build", True),
+])
+def test_compile_glob(pattern, path, matches):
+    assert bool(compile_glob(pattern).match(path)) is matches
+
+
+def test_ignore_rules():
+    root = IgnoreFile.parse("", "# comment\n*.log\nbuild/\n!keep.log\n\\!literal\n")
+    nested = IgnoreFile.parse("pkg", "*.tmp\n!important.log\n/dist\n")
+    stack = IgnoreStack().push(root).push(nested)
+
+    assert stack.is_ignored("debug.log", False)
+    assert not stack.is_ignored("keep.log", False)
+    assert stack.is_ignored("build", True)
+    assert not stack.is_ignored("build", False)  # a file named build
+    assert stack.is_ignored("!literal", False)
+    assert stack.is_ignored("pkg/x.tmp", False)
+    assert not stack.is_ignored("x.tmp", False)
+    assert not stack.is_ignored("pkg/important.log", False)  # deeper files take precedence
+    assert stack.is_ignored("pkg/dist", True)
+    assert not stack.is_ignored("pkg/sub/dist", True)
+
+
+@pytest.fixture
+def tree(configured):
+    root = configured / "walk"
+    for path in ["src/a.py", "src/b.txt", "src/deep/c.py", "build/out.js", "logs/x.log", "logs/keep.log",
+                 "vendor/lib.py", ".git/HEAD", "z.py"]:
+        (root / path).parent.mkdir(parents=True, exist_ok=True)
+        (root / path).write_text("x")
+    (root / ".gitignore").write_text("build/\n*.log\n")
+    (root / "logs" / ".gitignore").write_text("!keep.log\n")
+    yield "walk"
+    shutil.rmtree(root)
+
+
+def _walk(path, **kwargs):
+    return asyncio.run(fs_service.walk_files(path, **kwargs))
+
+
+def test_walk_respects_gitignore(tree):
+    paths = [entry["path"] for entry in _walk(tree)["entries"]]
+
+    assert paths == [
+        "walk/.gitignore", "walk/logs", "walk/logs/.gitignore", "walk/logs/keep.log", "walk/src", "walk/src/a.py",
+        "walk/src/b.txt", "walk/src/deep", "walk/src/deep/c.py", "walk/vendor", "walk/vendor/lib.py", "walk/z.py"
+    ]
+    everything = [entry["path"] for entry in _walk(tree, respect_gitignore=False)["entries"]]
+    assert "walk/build/out.js" in everything and "walk/.git/HEAD" in everything
+
+
+def test_paging_matches_one_listing(tree):
+    full = _walk(tree)["entries"]
+    pages = [_walk(tree, limit=3)]
+    while pages[-1]["next_cursor"]:
+        pages.append(_walk(tree, limit=3, cursor=pages[-1]["next_cursor"]))
+
+    assert [entry for page in pages for entry in page["entries"]] == full
+    assert all(page["count"] <= 3 for page in pages)
+
+
+def test_depth_include_exclude_and_compact(tree):
+    assert [entry["path"] for entry in _walk(tree, max_depth=1, include=["*.py"])["entries"]] == ["walk/z.py"]
+    assert [entry["path"] for entry in _walk(tree, include=["src/**/*.py"])["entries"]] == [
+        "walk/src/a.py", "walk/src/deep/c.py"
+    ]
+    excluded = [entry["path"] for entry in _walk(tree, exclude=["src", "vendor"])["entries"]]
+    assert not any(path.startswith(("walk/src", "walk/vendor")) for path in excluded)
+
+    compact = _walk(tree, max_depth=1, compact=True)
+    assert compact["columns"] == ["path", "is_dir", "size"]
+    assert ["walk/z.py", False, 1] in compact["entries"]
+
+
+def test_invalid_arguments(tree):
+    with pytest.raises(ValueError):
+        _walk(tree, max_depth=0)
+    with pytest.raises(ValueError):
+        _walk("walk/src/a.py")
+    with pytest.raises(FileNotFoundError):
+        _walk("walk/missing")
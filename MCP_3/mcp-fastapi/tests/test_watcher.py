@@ -0,0 +1,122 @@
+"""The watcher scans in the background and is only live once the scan is done."""
+import asyncio
+import sys
+import threading
+import time
+
+import pytest
+
+from app.config import settings
+from app.project_manager import ProjectConfig, project_manager
+from app.services.watcher_service import _ProjectWatch, watcher_service
+
+
+@pytest.fixture
+def blocked_scan(monkeypatch):
+    """Hold every scan until the returned event is set (or the scan is cancelled)."""
+    release = threading.Event()
+    original = _ProjectWatch._scan
+
+    def scan(self, tree, rel_dir, cancel=None):
+        while not release.is_set() and not (cancel is not None and cancel.is_set()):
+            time.sleep(0.01)
+        return original(self, tree, rel_dir, cancel)
+
+    monkeypatch.setattr(_ProjectWatch, "_scan", scan)
+    return release
+
+
+@pytest.fixture
+def user_root(tmp_path):
+    root = tmp_path / "carol"
+    root.mkdir()
+    project_manager.set_project_config(ProjectConfig(project_root=str(root), project_type="other"), user_id="carol")
+    yield root.resolve()
+    project_manager.remove_user_project("carol")
+
+
+async def _wait_for_tree(root):
+    for _ in range(500):
+        watch = watcher_service._projects.get(str(root))
+        if watch is not None and watch.tree is not None:
+            return watch
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"{root} was not scanned")
+
+
+def test_start_returns_before_the_scan_completes(configured, blocked_scan):
+    async def scenario():
+        await asyncio.wait_for(watcher_service.start(), timeout=1)
+        try:
+            assert watcher_service._projects[str(configured)].tree is None
+            assert not watcher_service.is_live(str(configured))
+
+            blocked_scan.set()
+            await _wait_for_tree(configured)
+            return watcher_service.is_live(str(configured))
+        finally:
+            await watcher_service.stop()
+
+    assert asyncio.run(scenario()) == sys.platform.startswith("linux")
+
+
+def test_stop_during_the_scan(configured, blocked_scan):
+    async def scenario():
+        await watcher_service.start()
+        watch = watcher_service._projects[str(configured)]
+        await asyncio.wait_for(watcher_service.stop(), timeout=2)
+        return watch
+
+    watch = asyncio.run(scenario())
+    assert watch.tree is None
+    assert watch.backend is None
+    assert watch._inotify is None
+    assert watcher_service._projects == {}
+
+
+def test_user_projects_are_watched_until_removed(configured, user_root):
+    async def scenario():
+        await watcher_service.start()
+        try:
+            watch = await _wait_for_tree(user_root)
+            live = watcher_service.is_live(str(user_root))
+
+            project_manager.remove_user_project("carol")
+            await watcher_service.start()
+            return watch, live, str(user_root) in watcher_service._projects
+        finally:
+            await watcher_service.stop()
+
+    watch, live, still_watched = asyncio.run(scenario())
+    assert live == sys.platform.startswith("linux")
+    assert not still_watched
+    assert watch.tree is None
+
+
+def test_watched_projects_are_bounded(configured, user_root, monkeypatch):
+    monkeypatch.setattr(settings, "max_projects", 1)
+
+    async def scenario():
+        await watcher_service.start()
+        try:
+            return set(watcher_service._projects)
+        finally:
+            await watcher_service.stop()
+
+    assert asyncio.run(scenario()) == {str(configured)}
+
+
+def test_wizard_updates_the_watched_projects(client, tmp_path, auth_headers, monkeypatch):
+    calls = []
+
+    async def start():
+        calls.append(sorted(project_manager.user_projects()))
+    monkeypatch.setattr(watcher_service, "start", start)
+    root = tmp_path / "dave"
+    root.mkdir()
+
+    body = {"project_root": str(root), "project_type": "other", "user_id": "dave"}
+    assert client.post("/wizard/setup", json=body, headers=auth_headers("dave")).status_code == 200
+    assert client.delete("/wizard/users/dave", headers=auth_headers("dave")).status_code == 200
+
+    assert calls == [["dave"], []]